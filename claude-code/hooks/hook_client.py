@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Hook Client
+
+Tiny stdlib-only client that forwards a hook event to the long-lived hook
+server over a Unix domain socket, so each event costs one python3 start
+instead of a full `uv run` resolve plus dotenv import.
+
+Usage (from settings.json):
+- python3 ~/.claude/hooks/hook_client.py pre_tool_use
+- python3 ~/.claude/hooks/hook_client.py stop --chat --announce
+
+The server is spawned on first use and exits on its own after an idle
+timeout. If it cannot be reached, the hook is run directly with `uv run`.
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent
+
+HOOK_NAMES = (
+    'notification', 'post_tool_use', 'pre_compact', 'pre_tool_use',
+    'session_start', 'stop', 'subagent_stop', 'user_prompt_submit',
+)
+
+# How long to wait for a freshly spawned server to accept connections
+SPAWN_WAIT_SECONDS = 5.0
+# Upper bound for one hook round trip (Claude Code's own hook timeout is 60s)
+REQUEST_TIMEOUT_SECONDS = 60.0
+
+# Result reported when a hook cannot produce one (hooks fail open)
+EMPTY_RESPONSE = {'exit_code': 0, 'stdout': '', 'stderr': ''}
+
+
+def get_run_dir():
+    """Return the directory holding the server socket and lock files."""
+    return Path(os.getenv('CCAOS_HOOK_RUN_DIR', HOOKS_DIR / 'run'))
+
+
+def get_socket_path():
+    """Return the Unix socket path the hook server listens on."""
+    return get_run_dir() / 'hook-server.sock'
+
+
+def send_message(sock, message):
+    """Send one newline-terminated JSON message."""
+    sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def recv_message(sock):
+    """Receive one newline-terminated JSON message, or None if the peer closed."""
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b'\n'):
+            break
+    data = b''.join(chunks).strip()
+    return json.loads(data) if data else None
+
+
+def request_once(request):
+    """Send a request to a running server, returning None if none is listening."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(get_socket_path()))
+    except OSError:
+        sock.close()
+        return None
+
+    try:
+        sock.settimeout(REQUEST_TIMEOUT_SECONDS)
+        send_message(sock, request)
+        response = recv_message(sock)
+    except (OSError, ValueError):
+        # The hook may already have run; never run it a second time
+        response = None
+    finally:
+        sock.close()
+    return response if response is not None else dict(EMPTY_RESPONSE)
+
+
+def spawn_server():
+    """Start the hook server detached from this process."""
+    try:
+        subprocess.Popen(
+            ['uv', 'run', '--script', str(HOOKS_DIR / 'hook_server.py')],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        return True
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+
+def request_server(request):
+    """Forward a request to the server, spawning it on first use."""
+    response = request_once(request)
+    if response is not None:
+        return response
+
+    if not spawn_server():
+        return None
+
+    deadline = time.monotonic() + SPAWN_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        response = request_once(request)
+        if response is not None:
+            return response
+    return None
+
+
+def run_direct(hook, hook_args, stdin_text):
+    """Run the hook script directly, as settings.json did before the server."""
+    try:
+        result = subprocess.run(
+            ['uv', 'run', str(HOOKS_DIR / f'{hook}.py')] + hook_args,
+            input=stdin_text,
+            capture_output=True,
+            text=True,
+            timeout=REQUEST_TIMEOUT_SECONDS,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return dict(EMPTY_RESPONSE)
+    return {'exit_code': result.returncode, 'stdout': result.stdout, 'stderr': result.stderr}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in HOOK_NAMES:
+        print(f"Usage: hook_client.py <{'|'.join(HOOK_NAMES)}> [hook args...]", file=sys.stderr)
+        sys.exit(0)  # Never block Claude Code on a misconfigured hook
+
+    hook = sys.argv[1]
+    hook_args = sys.argv[2:]
+    stdin_text = sys.stdin.read()
+
+    request = {
+        'hook': hook,
+        'args': hook_args,
+        'stdin': stdin_text,
+        'cwd': os.getcwd(),
+        'env': dict(os.environ),
+    }
+
+    response = None
+    if hasattr(socket, 'AF_UNIX') and os.getenv('CCAOS_HOOK_SERVER', '1') != '0':
+        response = request_server(request)
+
+    if response is None:
+        response = run_direct(hook, hook_args, stdin_text)
+
+    sys.stdout.write(response.get('stdout', ''))
+    sys.stderr.write(response.get('stderr', ''))
+    sys.stdout.flush()
+    sys.stderr.flush()
+    sys.exit(response.get('exit_code', 0))
+
+
+if __name__ == '__main__':
+    main()
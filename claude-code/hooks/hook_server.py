@@ -0,0 +1,238 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "anthropic",
+#     "openai",
+#     "google-genai",
+# ]
+# ///
+
+"""
+Hook Server
+
+Long-lived process that keeps every hook module imported and the env file
+parsed, serving hook events forwarded by hook_client.py over a Unix domain
+socket. Each request is handled in a forked child so a slow hook (e.g. Stop
+announcing via TTS) never delays PreToolUse, and hook state such as the cwd,
+stdin and sys.exit() stays isolated per event.
+
+Usage:
+- ./hook_server.py                   # Serve until idle (spawned by hook_client.py)
+- ./hook_server.py --idle-timeout 60 # Override the idle shutdown in seconds
+"""
+
+import argparse
+import importlib
+import io
+import os
+import signal
+import socket
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+HOOKS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from hook_client import HOOK_NAMES, get_run_dir, get_socket_path, recv_message, send_message
+from utils.env import env_file_values
+from utils.hook_io import run
+
+DEFAULT_IDLE_TIMEOUT = 900  # seconds
+
+
+def exit_code_from(exc):
+    """Translate a SystemExit into a process exit code."""
+    if exc.code is None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    print(exc.code, file=sys.stderr)
+    return 1
+
+
+class HookServer:
+    """Serve hook events from pre-imported hook modules."""
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self.modules = {}
+        self.mtimes = {}
+
+    def load_hooks(self):
+        """Import every hook module once and parse the env file ahead of the first event."""
+        for name in HOOK_NAMES:
+            try:
+                self.load_module(name)
+            except Exception:
+                traceback.print_exc()
+        # Forked children inherit the parsed values; hooks export them on first use
+        env_file_values()
+
+    def refresh_modules(self):
+        """Reload any hook module whose file changed since it was imported."""
+        for name in list(self.modules):
+            try:
+                self.load_module(name)
+            except Exception:
+                traceback.print_exc()
+
+    def load_module(self, name):
+        """Import a hook module, reloading it when the file changed on disk."""
+        path = HOOKS_DIR / f'{name}.py'
+        mtime = path.stat().st_mtime_ns
+        module = self.modules.get(name)
+        if module is None:
+            module = importlib.import_module(name)
+        elif self.mtimes.get(name) != mtime:
+            module = importlib.reload(module)
+        self.modules[name] = module
+        self.mtimes[name] = mtime
+        return module
+
+    def run_hook(self, request):
+        """Run one hook in the current (forked) process and return its result."""
+        name = request.get('hook')
+        if name not in HOOK_NAMES:
+            return {'exit_code': 0, 'stdout': '', 'stderr': f"Unknown hook: {name}\n"}
+
+        os.environ.clear()
+        os.environ.update(request.get('env') or {})
+        os.chdir(request.get('cwd') or os.getcwd())
+
+        module = self.modules.get(name) or self.load_module(name)
+        sys.argv = [str(HOOKS_DIR / f'{name}.py')] + list(request.get('args') or [])
+        stdin = io.StringIO(request.get('stdin') or '')
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        exit_code = 0
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                # Hooks return their result from handle(); argparse errors still exit
+                exit_code = run(name, module.handle, module.build_parser(), sys.argv[1:], stdin, stdout, stderr)
+            except SystemExit as exc:
+                exit_code = exit_code_from(exc)
+            except Exception:
+                traceback.print_exc()
+                exit_code = 0  # Hooks fail open, matching their own error handling
+        return {'exit_code': exit_code, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+
+    def handle_connection(self, conn):
+        """Read one request, run it, and send the result back."""
+        try:
+            request = recv_message(conn)
+            if request is not None:
+                send_message(conn, self.run_hook(request))
+        except Exception:
+            traceback.print_exc()
+        finally:
+            conn.close()
+
+    def serve(self, listener, socket_path):
+        """Accept requests until no client has connected for idle_timeout seconds."""
+        listener.settimeout(self.idle_timeout)
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except socket.timeout:
+                break
+            self.dispatch(listener, conn)
+
+        # Stop new clients from connecting, then serve any already queued
+        try:
+            socket_path.unlink()
+        except OSError:
+            pass
+        listener.setblocking(False)
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except (BlockingIOError, socket.timeout):
+                return
+            self.dispatch(listener, conn)
+
+    def dispatch(self, listener, conn):
+        """Handle one connection in a forked child."""
+        conn.setblocking(True)
+        self.refresh_modules()
+
+        pid = os.fork()
+        if pid == 0:
+            # Hooks wait on their own subprocesses, so restore normal child reaping
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            listener.close()
+            self.handle_connection(conn)
+            os._exit(0)
+        conn.close()
+
+
+def acquire_server_lock(run_dir):
+    """Take the single-instance lock, returning the held file or None."""
+    lock_file = open(run_dir / 'hook-server.lock', 'w')
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def bind_socket(socket_path):
+    """Bind the listening socket with owner-only permissions."""
+    if socket_path.exists():
+        socket_path.unlink()  # Stale socket from a server that did not shut down cleanly
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o077)
+    try:
+        listener.bind(str(socket_path))
+    finally:
+        os.umask(old_umask)
+    listener.listen(64)
+    return listener
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve Claude Code hooks over a Unix socket')
+    parser.add_argument('--idle-timeout', type=float,
+                        default=float(os.getenv('CCAOS_HOOK_SERVER_IDLE', DEFAULT_IDLE_TIMEOUT)),
+                        help='Exit after this many seconds without requests')
+    args = parser.parse_args()
+
+    if not hasattr(os, 'fork') or not hasattr(socket, 'AF_UNIX'):
+        print("❌ Error: hook server requires a POSIX platform", file=sys.stderr)
+        return 1
+
+    run_dir = get_run_dir()
+    run_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    lock_file = acquire_server_lock(run_dir)
+    if lock_file is None:
+        return 0  # Another server is already running
+
+    # Forked children exit on their own; let the kernel reap them
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    server = HookServer(idle_timeout=args.idle_timeout)
+    server.load_hooks()
+
+    socket_path = get_socket_path()
+    listener = bind_socket(socket_path)
+    try:
+        server.serve(listener, socket_path)
+    finally:
+        listener.close()
+        lock_file.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,29 +1,16 @@
 #!/usr/bin/env -S uv run --script
 # /// script
 # requires-python = ">=3.11"
-# dependencies = [
-#     "python-dotenv",
-# ]
 # ///
 
 import argparse
-import json
-import os
-import sys
-import subprocess
 import random
 from pathlib import Path
 
-try:
-    from dotenv import load_dotenv
-    # Load dotenv from custom path if specified
-    env_file = os.getenv("CCAOS_ENV_FILE")
-    if env_file:
-        load_dotenv(dotenv_path=env_file)
-    else:
-        load_dotenv()
-except ImportError:
-    pass  # dotenv is optional
+from utils.env import getenv
+from utils.hook_io import default_args, make_result, run_hook
+from utils.log_store import append_event
+from utils.tts.speaker import announce
 
 
 def get_tts_script_path():
@@ -36,13 +23,13 @@ def get_tts_script_path():
     tts_dir = script_dir / "utils" / "tts"
     
     # Check for Gemini API key (highest priority)
-    if os.getenv('GOOGLE_API_KEY'):
+    if getenv('GOOGLE_API_KEY'):
         gemini_script = tts_dir / "gemini_tts.py"
         if gemini_script.exists():
             return str(gemini_script)
     
     # Check for OpenAI API key (second priority)
-    if os.getenv('OPENAI_API_KEY'):
+    if getenv('OPENAI_API_KEY'):
         openai_script = tts_dir / "openai_tts.py"
         if openai_script.exists():
             return str(openai_script)
@@ -63,7 +50,7 @@ def announce_notification():
             return  # No TTS scripts available
         
         # Get engineer name if available
-        engineer_name = os.getenv('ENGINEER_NAME', '').strip()
+        engineer_name = getenv('ENGINEER_NAME', '').strip()
         
         # Create notification message with 30% chance to include name
         if engineer_name and random.random() < 0.3:
@@ -71,68 +58,39 @@ def announce_notification():
         else:
             notification_message = "Your agent needs your input"
         
-        # Call the TTS script with the notification message
-        subprocess.run([
-            "uv", "run", tts_script, notification_message
-        ], 
-        capture_output=True,  # Suppress output
-        timeout=10  # 10-second timeout
-        )
+        # Hand the notification message to the background speaker
+        announce(tts_script, text=notification_message, key='notification')
         
-    except (subprocess.TimeoutExpired, subprocess.SubprocessError, FileNotFoundError):
-        # Fail silently if TTS encounters issues
-        pass
     except Exception:
         # Fail silently for any other errors
         pass
 
 
+def build_parser():
+    """Return the hook's argument parser."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--notify', action='store_true', help='Enable TTS notifications')
+    return parser
+
+
+def handle(event, args=None):
+    """Log a Notification event and announce it when --notify is set."""
+    args = args or default_args(build_parser())
+
+    # Append event to logs/notification.jsonl
+    append_event('notification', event)
+    
+    # Announce notification via TTS only if --notify flag is set
+    # Skip TTS for the generic "Claude is waiting for your input" message
+    if args.notify and event.get('message') != 'Claude is waiting for your input':
+        announce_notification()
+    
+    return make_result()
+
+
 def main():
-    try:
-        # Parse command line arguments
-        parser = argparse.ArgumentParser()
-        parser.add_argument('--notify', action='store_true', help='Enable TTS notifications')
-        args = parser.parse_args()
-        
-        # Read JSON input from stdin
-        input_data = json.loads(sys.stdin.read())
-        
-        # Ensure log directory exists
-        import os
-        log_dir = os.path.join(os.getcwd(), 'logs')
-        os.makedirs(log_dir, exist_ok=True)
-        log_file = os.path.join(log_dir, 'notification.json')
-        
-        # Read existing log data or initialize empty list
-        if os.path.exists(log_file):
-            with open(log_file, 'r') as f:
-                try:
-                    log_data = json.load(f)
-                except (json.JSONDecodeError, ValueError):
-                    log_data = []
-        else:
-            log_data = []
-        
-        # Append new data
-        log_data.append(input_data)
-        
-        # Write back to file with formatting
-        with open(log_file, 'w') as f:
-            json.dump(log_data, f, indent=2)
-        
-        # Announce notification via TTS only if --notify flag is set
-        # Skip TTS for the generic "Claude is waiting for your input" message
-        if args.notify and input_data.get('message') != 'Claude is waiting for your input':
-            announce_notification()
-        
-        sys.exit(0)
-        
-    except json.JSONDecodeError:
-        # Handle JSON decode errors gracefully
-        sys.exit(0)
-    except Exception:
-        # Handle any other errors gracefully
-        sys.exit(0)
+    run_hook('notification', handle, build_parser())
+
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
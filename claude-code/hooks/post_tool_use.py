@@ -3,46 +3,27 @@
 # requires-python = ">=3.8"
 # ///
 
-import json
-import os
-import sys
-from pathlib import Path
+import argparse
+
+from utils.hook_io import make_result, run_hook
+from utils.log_store import append_event
+
+
+def build_parser():
+    """Return the hook's argument parser."""
+    return argparse.ArgumentParser()
+
+
+def handle(event, args=None):
+    """Log a PostToolUse event."""
+    # Append event to logs/post_tool_use.jsonl
+    append_event('post_tool_use', event)
+    return make_result()
+
 
 def main():
-    try:
-        # Read JSON input from stdin
-        input_data = json.load(sys.stdin)
-        
-        # Ensure log directory exists
-        log_dir = Path.cwd() / 'logs'
-        log_dir.mkdir(parents=True, exist_ok=True)
-        log_path = log_dir / 'post_tool_use.json'
-        
-        # Read existing log data or initialize empty list
-        if log_path.exists():
-            with open(log_path, 'r') as f:
-                try:
-                    log_data = json.load(f)
-                except (json.JSONDecodeError, ValueError):
-                    log_data = []
-        else:
-            log_data = []
-        
-        # Append new data
-        log_data.append(input_data)
-        
-        # Write back to file with formatting
-        with open(log_path, 'w') as f:
-            json.dump(log_data, f, indent=2)
-        
-        sys.exit(0)
-        
-    except json.JSONDecodeError:
-        # Handle JSON decode errors gracefully
-        sys.exit(0)
-    except Exception:
-        # Exit cleanly on any other error
-        sys.exit(0)
+    run_hook('post_tool_use', handle, build_parser())
+
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -3,146 +3,169 @@
 # requires-python = ">=3.8"
 # ///
 
-import json
-import sys
-import re
+import argparse
+import os
 from pathlib import Path
 
+from utils.hook_io import make_result, run_hook
+from utils.log_store import append_event
+from utils.profiler import phase
+from utils.rules import Rule, get_rule_file, load_rules
+from utils.shell_parse import parse_command
+
+RM_MESSAGE = "BLOCKED: Dangerous rm command detected and prevented"
+ENV_MESSAGE = (
+    "BLOCKED: Access to .env files containing sensitive data is prohibited\n"
+    "Use .env.sample for template files instead"
+)
+
+
+# Rule scopes:
+#   rm        - argv of each command from every `rm` word on, lowercased and
+#               joined with single spaces
+#   bash      - words of each simple command in a Bash command, joined with
+#               single spaces
+#   file_path - file_path argument of file-based tools
+# Commands that cannot be parsed (e.g. unbalanced quotes) are checked as raw text.
+DEFAULT_RULES = (
+    # Allow rm -rf for project's tmp directory (tmp/, ./tmp/...) but not system /tmp
+    Rule('rm-rf-project-tmp', 'rm', 'allow',
+         r'^(?=.*\brm\s+.*-[a-z]*(?:r[a-z]*f|f[a-z]*r))(?=.*\b(?:\./)?tmp/\S*)(?!.*(?:^/tmp|/tmp/|\s/tmp/|\s/tmp\s))'),
+    # Standard rm -rf variations
+    Rule('rm-recursive-force', 'rm', 'block', r'\brm\s+.*-[a-z]*r[a-z]*f', RM_MESSAGE),
+    Rule('rm-force-recursive', 'rm', 'block', r'\brm\s+.*-[a-z]*f[a-z]*r', RM_MESSAGE),
+    Rule('rm-long-recursive-force', 'rm', 'block', r'\brm\s+--recursive\s+--force', RM_MESSAGE),
+    Rule('rm-long-force-recursive', 'rm', 'block', r'\brm\s+--force\s+--recursive', RM_MESSAGE),
+    Rule('rm-r-then-f', 'rm', 'block', r'\brm\s+-r\s+.*-f', RM_MESSAGE),
+    Rule('rm-f-then-r', 'rm', 'block', r'\brm\s+-f\s+.*-r', RM_MESSAGE),
+    # rm with recursive flag alongside root, home, parent, current dir or wildcards
+    Rule('rm-recursive-dangerous-path', 'rm', 'block',
+         r'^(?=.*\brm\s+.*-[a-z]*r)(?=.*(?:/|~|\$home|\.|\*))', RM_MESSAGE),
+    # .env access from Bash (but allow .env.sample)
+    Rule('env-reference', 'bash', 'block', r'\b\.env\b(?!\.sample)', ENV_MESSAGE),
+    Rule('env-cat', 'bash', 'block', r'cat\s+.*\.env\b(?!\.sample)', ENV_MESSAGE),
+    Rule('env-echo-redirect', 'bash', 'block', r'echo\s+.*>\s*\.env\b(?!\.sample)', ENV_MESSAGE),
+    Rule('env-touch', 'bash', 'block', r'touch\s+.*\.env\b(?!\.sample)', ENV_MESSAGE),
+    Rule('env-cp', 'bash', 'block', r'cp\s+.*\.env\b(?!\.sample)', ENV_MESSAGE),
+    Rule('env-mv', 'bash', 'block', r'mv\s+.*\.env\b(?!\.sample)', ENV_MESSAGE),
+    # .env access from file-based tools (template files are allowed)
+    Rule('env-sample-path', 'file_path', 'allow', r'\.env\.sample$'),
+    Rule('env-file-path', 'file_path', 'block', r'\.env', ENV_MESSAGE),
+)
+
+FILE_TOOLS = ('Read', 'Edit', 'MultiEdit', 'Write')
+
+
+def get_rules():
+    """Return the compiled rules, including any from the configured rule file."""
+    return load_rules(DEFAULT_RULES, get_rule_file('CCAOS_PRE_TOOL_USE_RULES', 'pre_tool_use.json'))
+
+
+def match_rm_text(text):
+    """Return the rm rule firing for text, or None."""
+    # Normalize command by removing extra spaces and converting to lowercase
+    normalized = ' '.join(text.lower().split())
+    return get_rules().match('rm', normalized)
+
+
+def find_dangerous_rm_rule(command):
+    """
+    Return the rule blocking a dangerous rm command, or None.
+
+    The rules are checked from every unquoted `rm` word of each command,
+    not only where rm is the program, so wrappers the parser does not know
+    (setsid, flock, ...) cannot hide an rm.
+    """
+    commands = parse_command(command)
+    if commands is None:
+        return match_rm_text(command)
+    for cmd in commands:
+        for i, word in enumerate(cmd.argv):
+            if os.path.basename(word).lower() != 'rm':
+                continue
+            rule = match_rm_text(' '.join(cmd.argv[i:]))
+            if rule:
+                return rule
+    return None
+
+
+def find_bash_rule(command):
+    """Return the bash rule firing for any command in a Bash command, or None."""
+    rules = get_rules()
+    commands = parse_command(command)
+    if commands is None:
+        return rules.match('bash', command)
+    for cmd in commands:
+        rule = rules.match('bash', ' '.join(cmd.words))
+        if rule:
+            return rule
+    return None
+
+
+def find_env_file_rule(tool_name, tool_input):
+    """Return the rule blocking access to .env files, or None."""
+    if tool_name in FILE_TOOLS:
+        return get_rules().match('file_path', tool_input.get('file_path', ''))
+    if tool_name == 'Bash':
+        return find_bash_rule(tool_input.get('command', ''))
+    return None
+
+
 def is_dangerous_rm_command(command):
     """
     Comprehensive detection of dangerous rm commands.
     Matches various forms of rm -rf and similar destructive patterns.
     Allows rm -rf for project's tmp directory only.
     """
-    # Normalize command by removing extra spaces and converting to lowercase
-    normalized = ' '.join(command.lower().split())
-    
-    # Allow rm -rf for project's tmp directory
-    if re.search(r'\brm\s+.*-[a-z]*r[a-z]*f', normalized) or re.search(r'\brm\s+.*-[a-z]*f[a-z]*r', normalized):
-        # Check if targeting project's tmp directory (but not system /tmp)
-        # Matches: tmp/, ./tmp/, tmp/something, ./tmp/something
-        # Does NOT match: /tmp, /tmp/, /var/tmp, etc.
-        if re.search(r'\b(\.\/)?tmp\/\S*', normalized) and not re.search(r'^\/tmp|\/tmp\/|\s\/tmp\/|\s\/tmp\s', normalized):
-            return False  # Allow project tmp cleanup
-    
-    # Pattern 1: Standard rm -rf variations
-    patterns = [
-        r'\brm\s+.*-[a-z]*r[a-z]*f',  # rm -rf, rm -fr, rm -Rf, etc.
-        r'\brm\s+.*-[a-z]*f[a-z]*r',  # rm -fr variations
-        r'\brm\s+--recursive\s+--force',  # rm --recursive --force
-        r'\brm\s+--force\s+--recursive',  # rm --force --recursive
-        r'\brm\s+-r\s+.*-f',  # rm -r ... -f
-        r'\brm\s+-f\s+.*-r',  # rm -f ... -r
-    ]
-    
-    # Check for dangerous patterns
-    for pattern in patterns:
-        if re.search(pattern, normalized):
-            return True
-    
-    # Pattern 2: Check for rm with recursive flag targeting dangerous paths
-    dangerous_paths = [
-        r'/',           # Root directory
-        r'/\*',         # Root with wildcard
-        r'~',           # Home directory
-        r'~/',          # Home directory path
-        r'\$HOME',      # Home environment variable
-        r'\.\.',        # Parent directory references
-        r'\*',          # Wildcards in general rm -rf context
-        r'\.',          # Current directory
-        r'\.\s*$',      # Current directory at end of command
-    ]
-    
-    if re.search(r'\brm\s+.*-[a-z]*r', normalized):  # If rm has recursive flag
-        for path in dangerous_paths:
-            if re.search(path, normalized):
-                return True
-    
-    return False
+    return find_dangerous_rm_rule(command) is not None
+
 
 def is_env_file_access(tool_name, tool_input):
     """
     Check if any tool is trying to access .env files containing sensitive data.
     """
-    if tool_name in ['Read', 'Edit', 'MultiEdit', 'Write', 'Bash']:
-        # Check file paths for file-based tools
-        if tool_name in ['Read', 'Edit', 'MultiEdit', 'Write']:
-            file_path = tool_input.get('file_path', '')
-            if '.env' in file_path and not file_path.endswith('.env.sample'):
-                return True
-        
-        # Check bash commands for .env file access
-        elif tool_name == 'Bash':
-            command = tool_input.get('command', '')
-            # Pattern to detect .env file access (but allow .env.sample)
-            env_patterns = [
-                r'\b\.env\b(?!\.sample)',  # .env but not .env.sample
-                r'cat\s+.*\.env\b(?!\.sample)',  # cat .env
-                r'echo\s+.*>\s*\.env\b(?!\.sample)',  # echo > .env
-                r'touch\s+.*\.env\b(?!\.sample)',  # touch .env
-                r'cp\s+.*\.env\b(?!\.sample)',  # cp .env
-                r'mv\s+.*\.env\b(?!\.sample)',  # mv .env
-            ]
-            
-            for pattern in env_patterns:
-                if re.search(pattern, command):
-                    return True
-    
-    return False
+    return find_env_file_rule(tool_name, tool_input) is not None
+
+
+def block(input_data, rule):
+    """Log the blocked tool call and return a result reporting the rule that fired."""
+    append_event('pre_tool_use', dict(input_data, policy={'decision': 'block', 'rule': rule.name}))
+    message = rule.message or "BLOCKED: Tool call prevented by policy"
+    # Exit code 2 blocks tool call and shows error to Claude
+    return make_result(2, stderr=f"{message}\nRule: {rule.name}\n")
+
+
+def find_tool_rule(tool_name, tool_input):
+    """Return the block rule firing for a tool call, or None."""
+    # Check for .env file access (blocks access to sensitive environment files)
+    rule = find_env_file_rule(tool_name, tool_input)
+
+    # Check for dangerous rm -rf commands
+    if rule is None and tool_name == 'Bash':
+        rule = find_dangerous_rm_rule(tool_input.get('command', ''))
+    return rule
+
+
+def build_parser():
+    """Return the hook's argument parser."""
+    return argparse.ArgumentParser()
+
+
+def handle(event, args=None):
+    """Check a PreToolUse event against the rules and log it."""
+    with phase('policy'):
+        rule = find_tool_rule(event.get('tool_name', ''), event.get('tool_input', {}))
+    if rule:
+        return block(event, rule)
+
+    # Append event to logs/pre_tool_use.jsonl
+    append_event('pre_tool_use', event)
+    return make_result()
+
 
 def main():
-    try:
-        # Read JSON input from stdin
-        input_data = json.load(sys.stdin)
-        
-        tool_name = input_data.get('tool_name', '')
-        tool_input = input_data.get('tool_input', {})
-        
-        # Check for .env file access (blocks access to sensitive environment files)
-        if is_env_file_access(tool_name, tool_input):
-            print("BLOCKED: Access to .env files containing sensitive data is prohibited", file=sys.stderr)
-            print("Use .env.sample for template files instead", file=sys.stderr)
-            sys.exit(2)  # Exit code 2 blocks tool call and shows error to Claude
-        
-        # Check for dangerous rm -rf commands
-        if tool_name == 'Bash':
-            command = tool_input.get('command', '')
-            
-            # Block rm -rf commands with comprehensive pattern matching
-            if is_dangerous_rm_command(command):
-                print("BLOCKED: Dangerous rm command detected and prevented", file=sys.stderr)
-                sys.exit(2)  # Exit code 2 blocks tool call and shows error to Claude
-        
-        # Ensure log directory exists
-        log_dir = Path.cwd() / 'logs'
-        log_dir.mkdir(parents=True, exist_ok=True)
-        log_path = log_dir / 'pre_tool_use.json'
-        
-        # Read existing log data or initialize empty list
-        if log_path.exists():
-            with open(log_path, 'r') as f:
-                try:
-                    log_data = json.load(f)
-                except (json.JSONDecodeError, ValueError):
-                    log_data = []
-        else:
-            log_data = []
-        
-        # Append new data
-        log_data.append(input_data)
-        
-        # Write back to file with formatting
-        with open(log_path, 'w') as f:
-            json.dump(log_data, f, indent=2)
-        
-        sys.exit(0)
-        
-    except json.JSONDecodeError:
-        # Gracefully handle JSON decode errors
-        sys.exit(0)
-    except Exception:
-        # Handle any other errors gracefully
-        sys.exit(0)
+    run_hook('pre_tool_use', handle, build_parser())
+
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
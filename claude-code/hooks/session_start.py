@@ -1,58 +1,44 @@
 #!/usr/bin/env -S uv run --script
 # /// script
 # requires-python = ">=3.11"
-# dependencies = [
-#     "python-dotenv",
-# ]
 # ///
 
 import argparse
 import json
-import os
-import sys
+import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
-try:
-    from dotenv import load_dotenv
-    # Load dotenv from custom path if specified
-    env_file = os.getenv("CCAOS_ENV_FILE")
-    if env_file:
-        load_dotenv(dotenv_path=env_file)
-    else:
-        load_dotenv()
-except ImportError:
-    pass  # dotenv is optional
+from utils.context_cache import cached, git_state_key
+from utils.git_changes import count_changes, format_changes
+from utils.hook_io import default_args, make_result, run_hook
+from utils.log_store import append_event
+from utils.profiler import phase
+from utils.tts.speaker import announce
+
+# Reuse git status while the index and HEAD are unchanged, for at most this long
+GIT_STATUS_MAX_AGE = 300
+# GitHub issues change independently of the checkout, so they only get a TTL
+ISSUES_MAX_AGE = 600
 
 
 def log_session_start(input_data):
     """Log session start event to logs directory."""
-    # Ensure logs directory exists
-    log_dir = Path("logs")
-    log_dir.mkdir(parents=True, exist_ok=True)
-    log_file = log_dir / 'session_start.json'
-    
-    # Read existing log data or initialize empty list
-    if log_file.exists():
-        with open(log_file, 'r') as f:
-            try:
-                log_data = json.load(f)
-            except (json.JSONDecodeError, ValueError):
-                log_data = []
-    else:
-        log_data = []
-    
-    # Append the entire input data
-    log_data.append(input_data)
-    
-    # Write back to file with formatting
-    with open(log_file, 'w') as f:
-        json.dump(log_data, f, indent=2)
+    # Append event to logs/session_start.jsonl
+    append_event('session_start', input_data)
 
 
+@phase('subprocess')
 def get_git_status():
-    """Get current git status information."""
+    """
+    Get current git status information.
+
+    Returns:
+        tuple: (branch, uncommitted count, whether the count is complete);
+        the count is a lower bound when git ran out of its time budget
+    """
     try:
         # Get current branch
         branch_result = subprocess.run(
@@ -63,30 +49,21 @@ def get_git_status():
         )
         current_branch = branch_result.stdout.strip() if branch_result.returncode == 0 else "unknown"
         
-        # Get uncommitted changes count
-        status_result = subprocess.run(
-            ['git', 'status', '--porcelain'],
-            capture_output=True,
-            text=True,
-            timeout=5
-        )
-        if status_result.returncode == 0:
-            changes = status_result.stdout.strip().split('\n') if status_result.stdout.strip() else []
-            uncommitted_count = len(changes)
-        else:
-            uncommitted_count = 0
+        # Count uncommitted changes without blocking on a huge working tree
+        changes = count_changes()
+        uncommitted_count, complete = changes if changes else (0, True)
         
-        return current_branch, uncommitted_count
+        return current_branch, uncommitted_count, complete
     except Exception:
-        return None, None
+        return None, None, True
 
 
+@phase('subprocess')
 def get_recent_issues():
     """Get recent GitHub issues if gh CLI is available."""
     try:
         # Check if gh is available
-        gh_check = subprocess.run(['which', 'gh'], capture_output=True)
-        if gh_check.returncode != 0:
+        if shutil.which('gh') is None:
             return None
         
         # Get recent open issues
@@ -103,22 +80,27 @@ def get_recent_issues():
     return None
 
 
-def load_development_context(source):
-    """Load relevant development context based on session source."""
-    context_parts = []
-    
-    # Add timestamp
-    context_parts.append(f"Session started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    context_parts.append(f"Session source: {source}")
-    
-    # Add git information
-    branch, changes = get_git_status()
-    if branch:
-        context_parts.append(f"Git branch: {branch}")
-        if changes > 0:
-            context_parts.append(f"Uncommitted changes: {changes} files")
-    
-    # Load project-specific context files if they exist
+def get_cached_git_status():
+    """Get git status, reusing the cached result while the index and HEAD are unchanged."""
+    key = git_state_key()
+    if key is None:
+        return get_git_status()  # Not a repository; nothing to key the cache on
+
+    def probe():
+        status = get_git_status()
+        return list(status) if status[0] else None  # Failures are not cached
+
+    status = cached('git_changes', key, GIT_STATUS_MAX_AGE, probe)
+    return tuple(status) if status else (None, None, True)
+
+
+def get_cached_issues():
+    """Get recent GitHub issues, reusing the cached list for ISSUES_MAX_AGE seconds."""
+    return cached('issues', None, ISSUES_MAX_AGE, get_recent_issues)
+
+
+def read_context_files():
+    """Return (path, content) for each project-specific context file that exists."""
     context_files = [
         ".claude/CONTEXT.md",
         ".claude/TODO.md",
@@ -126,19 +108,48 @@ def load_development_context(source):
         ".github/ISSUE_TEMPLATE.md"
     ]
     
+    contents = []
     for file_path in context_files:
         if Path(file_path).exists():
             try:
                 with open(file_path, 'r') as f:
                     content = f.read().strip()
                     if content:
-                        context_parts.append(f"\n--- Content from {file_path} ---")
-                        context_parts.append(content[:1000])  # Limit to first 1000 chars
+                        contents.append((file_path, content[:1000]))  # Limit to first 1000 chars
             except Exception:
                 pass
+    return contents
+
+
+def load_development_context(source):
+    """Load relevant development context based on session source."""
+    context_parts = []
+    
+    # Add timestamp
+    context_parts.append(f"Session started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    context_parts.append(f"Session source: {source}")
+    
+    # Run the git and GitHub probes concurrently while the context files are read
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        git_future = pool.submit(get_cached_git_status)
+        issues_future = pool.submit(get_cached_issues)
+        context_files = read_context_files()
+        branch, changes, complete = git_future.result()
+        issues = issues_future.result()
+    
+    # Add git information
+    if branch:
+        context_parts.append(f"Git branch: {branch}")
+        # An incomplete count is shown even at zero ("0+"): the tree may not be clean
+        if changes > 0 or not complete:
+            context_parts.append(f"Uncommitted changes: {format_changes(changes, complete)} files")
+    
+    # Add project-specific context files
+    for file_path, content in context_files:
+        context_parts.append(f"\n--- Content from {file_path} ---")
+        context_parts.append(content)
     
     # Add recent issues if available
-    issues = get_recent_issues()
     if issues:
         context_parts.append("\n--- Recent GitHub Issues ---")
         context_parts.append(issues)
@@ -146,73 +157,66 @@ def load_development_context(source):
     return "\n".join(context_parts)
 
 
-def main():
-    try:
-        # Parse command line arguments
-        parser = argparse.ArgumentParser()
-        parser.add_argument('--load-context', action='store_true',
-                          help='Load development context at session start')
-        parser.add_argument('--announce', action='store_true',
-                          help='Announce session start via TTS')
-        args = parser.parse_args()
-        
-        # Read JSON input from stdin
-        input_data = json.loads(sys.stdin.read())
-        
-        # Extract fields
-        session_id = input_data.get('session_id', 'unknown')
-        source = input_data.get('source', 'unknown')  # "startup", "resume", or "clear"
-        
-        # Log the session start event
-        log_session_start(input_data)
-        
-        # Load development context if requested
-        if args.load_context:
-            context = load_development_context(source)
-            if context:
-                # Using JSON output to add context
-                output = {
-                    "hookSpecificOutput": {
-                        "hookEventName": "SessionStart",
-                        "additionalContext": context
-                    }
+def build_parser():
+    """Return the hook's argument parser."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--load-context', action='store_true',
+                      help='Load development context at session start')
+    parser.add_argument('--announce', action='store_true',
+                      help='Announce session start via TTS')
+    return parser
+
+
+def handle(event, args=None):
+    """Log a SessionStart event, adding development context when --load-context is set."""
+    args = args or default_args(build_parser())
+
+    # Extract fields
+    session_id = event.get('session_id', 'unknown')
+    source = event.get('source', 'unknown')  # "startup", "resume", or "clear"
+    
+    # Log the session start event
+    log_session_start(event)
+    
+    # Load development context if requested
+    if args.load_context:
+        context = load_development_context(source)
+        if context:
+            # Using JSON output to add context
+            output = {
+                "hookSpecificOutput": {
+                    "hookEventName": "SessionStart",
+                    "additionalContext": context
                 }
-                print(json.dumps(output))
-                sys.exit(0)
-        
-        # Announce session start if requested
-        if args.announce:
-            try:
-                # Try to use TTS to announce session start
-                script_dir = Path(__file__).parent
-                tts_script = script_dir / "utils" / "tts" / "pyttsx3_tts.py"
+            }
+            return make_result(stdout=json.dumps(output) + "\n")
+    
+    # Announce session start if requested
+    if args.announce:
+        try:
+            # Try to use TTS to announce session start
+            script_dir = Path(__file__).parent
+            tts_script = script_dir / "utils" / "tts" / "pyttsx3_tts.py"
+            
+            if tts_script.exists():
+                messages = {
+                    "startup": "Claude Code session started",
+                    "resume": "Resuming previous session",
+                    "clear": "Starting fresh session"
+                }
+                message = messages.get(source, "Session started")
                 
-                if tts_script.exists():
-                    messages = {
-                        "startup": "Claude Code session started",
-                        "resume": "Resuming previous session",
-                        "clear": "Starting fresh session"
-                    }
-                    message = messages.get(source, "Session started")
-                    
-                    subprocess.run(
-                        ["uv", "run", str(tts_script), message],
-                        capture_output=True,
-                        timeout=5
-                    )
-            except Exception:
-                pass
-        
-        # Success
-        sys.exit(0)
-        
-    except json.JSONDecodeError:
-        # Handle JSON decode errors gracefully
-        sys.exit(0)
-    except Exception:
-        # Handle any other errors gracefully
-        sys.exit(0)
+                announce(tts_script, text=message, key='session_start')
+        except Exception:
+            pass
+    
+    # Success
+    return make_result()
+
+
+def main():
+    run_hook('session_start', handle, build_parser())
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
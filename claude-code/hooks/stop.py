@@ -3,29 +3,24 @@
 # requires-python = ">=3.11"
 # dependencies = [
 #     "pyttsx3==2.90",
-#     "python-dotenv",
+#     "anthropic",
+#     "openai",
+#     "google-genai",
 # ]
 # ///
 
 import argparse
-import json
 import os
-import sys
 import random
-import subprocess
 from pathlib import Path
 from datetime import datetime
 
-try:
-    from dotenv import load_dotenv
-    # Load dotenv from custom path if specified
-    env_file = os.getenv("CCAOS_ENV_FILE")
-    if env_file:
-        load_dotenv(dotenv_path=env_file)
-    else:
-        load_dotenv()
-except ImportError:
-    pass  # dotenv is optional
+from utils.env import getenv
+from utils.hook_io import default_args, make_result, run_hook
+from utils.llm.message_pool import pop_message
+from utils.log_store import append_event, is_dry_run
+from utils.transcript_export import export_transcript
+from utils.tts.speaker import announce
 
 
 def get_completion_messages():
@@ -49,13 +44,13 @@ def get_tts_script_path():
     tts_dir = script_dir / "utils" / "tts"
     
     # Check for Gemini API key (highest priority)
-    if os.getenv('GOOGLE_API_KEY'):
+    if getenv('GOOGLE_API_KEY'):
         gemini_script = tts_dir / "gemini_tts.py"
         if gemini_script.exists():
             return str(gemini_script)
     
     # Check for OpenAI API key (second priority)
-    if os.getenv('OPENAI_API_KEY'):
+    if getenv('OPENAI_API_KEY'):
         openai_script = tts_dir / "openai_tts.py"
         if openai_script.exists():
             return str(openai_script)
@@ -78,19 +73,19 @@ def get_llm_script_path():
     llm_dir = script_dir / "utils" / "llm"
     
     # Check for Gemini API keys (highest priority)
-    if os.getenv('GOOGLE_API_KEY') or os.getenv('GEMINI_API_KEY'):
+    if getenv('GOOGLE_API_KEY') or getenv('GEMINI_API_KEY'):
         gemini_script = llm_dir / "gemini.py"
         if gemini_script.exists():
             return str(gemini_script)
     
     # Check for OpenAI API key (second priority)
-    if os.getenv('OPENAI_API_KEY'):
+    if getenv('OPENAI_API_KEY'):
         openai_script = llm_dir / "oai.py"
         if openai_script.exists():
             return str(openai_script)
     
     # Check for Anthropic API key (third priority)
-    if os.getenv('ANTHROPIC_API_KEY'):
+    if getenv('ANTHROPIC_API_KEY'):
         anth_script = llm_dir / "anth.py"
         if anth_script.exists():
             return str(anth_script)
@@ -98,129 +93,64 @@ def get_llm_script_path():
     return None
 
 
-def get_llm_completion_message():
-    """
-    Generate completion message using available LLM services.
-    Priority order: Gemini > OpenAI > Anthropic > fallback to random message
-    
-    Returns:
-        str: Generated or fallback completion message
-    """
-    llm_script = get_llm_script_path()
-    
-    if llm_script:
-        try:
-            result = subprocess.run([
-                "uv", "run", llm_script, "--completion"
-            ], 
-            capture_output=True,
-            text=True,
-            timeout=10
-            )
-            if result.returncode == 0 and result.stdout.strip():
-                return result.stdout.strip()
-        except (subprocess.TimeoutExpired, subprocess.SubprocessError):
-            pass
-    
-    # Fallback to random predefined message
-    messages = get_completion_messages()
-    return random.choice(messages)
-
 def announce_completion():
-    """Announce completion using the best available TTS service."""
+    """Queue a completion announcement with the background speaker."""
     try:
         tts_script = get_tts_script_path()
         if not tts_script:
             return  # No TTS scripts available
         
-        # Get completion message (LLM-generated or fallback)
-        completion_message = get_llm_completion_message()
+        # Take a pre-generated LLM message; the pool refills itself in the background
+        completion_message = pop_message(get_llm_script_path())
+        if not completion_message:
+            completion_message = random.choice(get_completion_messages())
         
-        # Call the TTS script with the completion message
-        subprocess.run([
-            "uv", "run", tts_script, completion_message
-        ])
+        announce(tts_script, text=completion_message, key='stop')
     except Exception:
         pass  # Silently fail if TTS doesn't work
 
 
-def main():
+def build_parser():
+    """Return the hook's argument parser."""
     parser = argparse.ArgumentParser()
     parser.add_argument('--announce', action='store_true',
                       help='Announce completion via TTS')
     parser.add_argument('--chat', action='store_true',
-                      help='Copy transcript to chat.json')
-    args = parser.parse_args()
+                      help='Export transcript to logs/chat/<session_id>.jsonl')
+    return parser
+
+
+def handle(event, args=None):
+    """Log a Stop event, export the transcript and announce completion."""
+    args = args or default_args(build_parser())
+
+    # Extract session_id  
+    session_id = event.get('session_id', 'unknown')
+    stop_hook_active = event.get("stop_hook_active", False)
     
-    try:
-        # Read JSON input from stdin
-        input_data = json.loads(sys.stdin.read())
-        
-        # Extract session_id  
-        session_id = input_data.get('session_id', 'unknown')
-        stop_hook_active = input_data.get("stop_hook_active", False)
-        
-        # Ensure log directory exists
-        log_dir = os.path.join(os.getcwd(), "logs")
-        os.makedirs(log_dir, exist_ok=True)
-        log_path = os.path.join(log_dir, "stop.json")
-        
-        # Read existing log data or initialize empty list
-        if os.path.exists(log_path):
-            with open(log_path, 'r') as f:
-                try:
-                    log_data = json.load(f)
-                except (json.JSONDecodeError, ValueError):
-                    log_data = []
-        else:
-            log_data = []
-        
-        # Append new data (FULL input_data, not just session_id)
-        log_data.append(input_data)
-        
-        # Write back to file with formatting
-        with open(log_path, 'w') as f:
-            json.dump(log_data, f, indent=2)
-        
-        # Handle --chat switch
-        if args.chat and 'transcript_path' in input_data:
-            transcript_path = input_data['transcript_path']
-            if os.path.exists(transcript_path):
-                # Read .jsonl file and convert to JSON array
-                chat_data = []
-                try:
-                    with open(transcript_path, 'r') as f:
-                        for line in f:
-                            line = line.strip()
-                            if line:
-                                try:
-                                    chat_data.append(json.loads(line))
-                                except json.JSONDecodeError:
-                                    pass  # Skip invalid lines
-                    
-                    # Write to logs/chat.json
-                    log_dir = Path("logs")
-                    log_dir.mkdir(parents=True, exist_ok=True)
-                    chat_file = log_dir / 'chat.json'
-                    with open(chat_file, 'w') as f:
-                        json.dump(chat_data, f, indent=2)
-                except Exception:
-                    pass  # Fail silently
-        
-        # Announce completion if requested
-        if args.announce:
-            announce_completion()
-        
-        # Exit successfully
-        sys.exit(0)
-        
-    except json.JSONDecodeError:
-        # Handle JSON decode errors gracefully
-        sys.exit(0)
-    except Exception:
-        # Handle any other errors gracefully
-        sys.exit(0)
+    # Append event to logs/stop.jsonl
+    append_event('stop', event)
+    
+    # Handle --chat switch
+    if args.chat and 'transcript_path' in event and not is_dry_run():
+        transcript_path = event['transcript_path']
+        if os.path.exists(transcript_path):
+            try:
+                # Append new transcript lines to logs/chat/<session_id>.jsonl
+                export_transcript(transcript_path, session_id)
+            except Exception:
+                pass  # Fail silently
+    
+    # Announce completion if requested
+    if args.announce:
+        announce_completion()
+    
+    return make_result()
+
+
+def main():
+    run_hook('stop', handle, build_parser())
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,29 +1,18 @@
 #!/usr/bin/env -S uv run --script
 # /// script
 # requires-python = ">=3.11"
-# dependencies = [
-#     "python-dotenv",
-# ]
 # ///
 
 import argparse
-import json
 import os
-import sys
-import subprocess
 from pathlib import Path
 from datetime import datetime
 
-try:
-    from dotenv import load_dotenv
-    # Load dotenv from custom path if specified
-    env_file = os.getenv("CCAOS_ENV_FILE")
-    if env_file:
-        load_dotenv(dotenv_path=env_file)
-    else:
-        load_dotenv()
-except ImportError:
-    pass  # dotenv is optional
+from utils.env import getenv
+from utils.hook_io import default_args, make_result, run_hook
+from utils.log_store import append_event, is_dry_run
+from utils.transcript_export import export_transcript
+from utils.tts.speaker import announce
 
 
 def get_tts_script_path():
@@ -36,13 +25,13 @@ def get_tts_script_path():
     tts_dir = script_dir / "utils" / "tts"
     
     # Check for Gemini API key (highest priority)
-    if os.getenv('GOOGLE_API_KEY'):
+    if getenv('GOOGLE_API_KEY'):
         gemini_script = tts_dir / "gemini_tts.py"
         if gemini_script.exists():
             return str(gemini_script)
     
     # Check for OpenAI API key (second priority)
-    if os.getenv('OPENAI_API_KEY'):
+    if getenv('OPENAI_API_KEY'):
         openai_script = tts_dir / "openai_tts.py"
         if openai_script.exists():
             return str(openai_script)
@@ -56,102 +45,57 @@ def get_tts_script_path():
 
 
 def announce_subagent_completion():
-    """Announce subagent completion using the best available TTS service."""
+    """Queue a subagent completion announcement with the background speaker."""
     try:
         tts_script = get_tts_script_path()
         if not tts_script:
             return  # No TTS scripts available
         
-        # Use fixed message for subagent completion
-        completion_message = "Subagent Complete"
+        # Use fixed message for subagent completion; bursts are spoken once
+        announce(tts_script, text="Subagent Complete", key='subagent_stop')
         
-        # Call the TTS script with the completion message
-        subprocess.run([
-            "uv", "run", tts_script, completion_message
-        ], 
-        capture_output=True,  # Suppress output
-        timeout=10  # 10-second timeout
-        )
-        
-    except (subprocess.TimeoutExpired, subprocess.SubprocessError, FileNotFoundError):
-        # Fail silently if TTS encounters issues
-        pass
     except Exception:
         # Fail silently for any other errors
         pass
 
 
+def build_parser():
+    """Return the hook's argument parser."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--chat', action='store_true', help='Export transcript to logs/chat/<session_id>.jsonl')
+    return parser
+
+
+def handle(event, args=None):
+    """Log a SubagentStop event, export the transcript and announce completion."""
+    args = args or default_args(build_parser())
+
+    # Extract required fields
+    session_id = event.get("session_id", "")
+    stop_hook_active = event.get("stop_hook_active", False)
+
+    # Append event to logs/subagent_stop.jsonl
+    append_event('subagent_stop', event)
+    
+    # Handle --chat switch (same as stop.py)
+    if args.chat and 'transcript_path' in event and not is_dry_run():
+        transcript_path = event['transcript_path']
+        if os.path.exists(transcript_path):
+            try:
+                # Append new transcript lines to logs/chat/<session_id>.jsonl
+                export_transcript(transcript_path, session_id)
+            except Exception:
+                pass  # Fail silently
+
+    # Announce subagent completion via TTS
+    announce_subagent_completion()
+
+    return make_result()
+
+
 def main():
-    try:
-        # Parse command line arguments
-        parser = argparse.ArgumentParser()
-        parser.add_argument('--chat', action='store_true', help='Copy transcript to chat.json')
-        args = parser.parse_args()
-        
-        # Read JSON input from stdin
-        input_data = json.load(sys.stdin)
-
-        # Extract required fields
-        session_id = input_data.get("session_id", "")
-        stop_hook_active = input_data.get("stop_hook_active", False)
-
-        # Ensure log directory exists
-        log_dir = os.path.join(os.getcwd(), "logs")
-        os.makedirs(log_dir, exist_ok=True)
-        log_path = os.path.join(log_dir, "subagent_stop.json")
-
-        # Read existing log data or initialize empty list
-        if os.path.exists(log_path):
-            with open(log_path, 'r') as f:
-                try:
-                    log_data = json.load(f)
-                except (json.JSONDecodeError, ValueError):
-                    log_data = []
-        else:
-            log_data = []
-        
-        # Append new data
-        log_data.append(input_data)
-        
-        # Write back to file with formatting
-        with open(log_path, 'w') as f:
-            json.dump(log_data, f, indent=2)
-        
-        # Handle --chat switch (same as stop.py)
-        if args.chat and 'transcript_path' in input_data:
-            transcript_path = input_data['transcript_path']
-            if os.path.exists(transcript_path):
-                # Read .jsonl file and convert to JSON array
-                chat_data = []
-                try:
-                    with open(transcript_path, 'r') as f:
-                        for line in f:
-                            line = line.strip()
-                            if line:
-                                try:
-                                    chat_data.append(json.loads(line))
-                                except json.JSONDecodeError:
-                                    pass  # Skip invalid lines
-                    
-                    # Write to logs/chat.json
-                    chat_file = os.path.join(log_dir, 'chat.json')
-                    with open(chat_file, 'w') as f:
-                        json.dump(chat_data, f, indent=2)
-                except Exception:
-                    pass  # Fail silently
-
-        # Announce subagent completion via TTS
-        announce_subagent_completion()
-
-        sys.exit(0)
-
-    except json.JSONDecodeError:
-        # Handle JSON decode errors gracefully
-        sys.exit(0)
-    except Exception:
-        # Handle any other errors gracefully
-        sys.exit(0)
+    run_hook('subagent_stop', handle, build_parser())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,469 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Hook benchmark: replay event streams through every configured hook.
+
+Each hook command in settings_hooks.json is run once per event of a
+synthetic session stream (or events replayed from a recorded logs/
+directory) inside a scratch project whose logs are seeded with a given
+number of prior records, so log growth shows up in the numbers. Every
+event is timed end to end, and the peak RSS of the process that ran it
+is recorded.
+
+Execution modes:
+
+    uv      - cold `uv run --script <hook>.py`, one process per event
+    python  - cold `python <hook>.py`, one process per event
+    server  - warm: hook_client.py forwarding to a running hook_server.py
+
+Log rollover is disabled so the prior records stay in place for the whole
+run. Unless --with-tts is given, the TTS flags (--announce, --notify) are
+dropped and CCAOS_TTS=0 is set for every hook. SubagentStop announces
+whatever its flags say, so the flags alone are not enough. A run that
+still queues an announcement or starts a speaker fails.
+
+Usage:
+- ./bench_hooks.py                                        # All modes, 10k/100k/1M prior records
+- ./bench_hooks.py --modes python,server --prior 10000 --events 200
+- ./bench_hooks.py --replay ~/project/logs --events 500   # Replay recorded events
+- ./bench_hooks.py --rate 20 --json results.json          # 20 events/s, save results
+- ./bench_hooks.py --profile                              # Also report per-phase timings
+"""
+
+import argparse
+import json
+import os
+import random
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from hook_client import HOOK_NAMES
+from utils import profiler
+from utils.log_store import encode_record, get_log_path, iter_events
+from utils.tts.speaker import LOCK_FILE, QUEUE_FILE
+
+DEFAULT_SETTINGS = HOOKS_DIR.parent.parent / 'extensions' / 'hooks' / 'settings_hooks.json'
+DEFAULT_PRIOR = (10_000, 100_000, 1_000_000)
+DEFAULT_EVENTS = 100
+MODES = ('uv', 'python', 'server')
+TTS_FLAGS = {'--announce', '--notify'}
+SERVER_START_SECONDS = 10.0
+
+TOOLS = (
+    ('Read', lambda i, rng: {'file_path': f'/project/src/module_{i % 40}.py'}),
+    ('Edit', lambda i, rng: {'file_path': f'/project/src/module_{i % 40}.py',
+                             'old_string': 'return None', 'new_string': 'return result'}),
+    ('Bash', lambda i, rng: {'command': rng.choice(('git status', 'ls -la src', 'python -m pytest -q',
+                                                  'rm -rf build/', 'cat .env.sample'))}),
+    ('Grep', lambda i, rng: {'pattern': f'def handler_{i % 12}', 'path': '/project'}),
+    ('Write', lambda i, rng: {'file_path': f'/project/notes/draft_{i % 5}.md', 'content': 'x' * 400}),
+)
+
+
+def parse_settings(path):
+    """
+    Return the hooks configured in a settings file.
+
+    Commands forwarded through hook_client.py and direct `uv run <hook>.py`
+    commands are both recognised; anything else (e.g. `cat reminder.md`)
+    is not a Python hook and is skipped.
+
+    Returns:
+        dict: {hook name: [hook args]}
+    """
+    with open(path, 'r') as f:
+        settings = json.load(f)
+    hooks = {}
+    for groups in settings.get('hooks', {}).values():
+        for group in groups:
+            for hook in group.get('hooks', []):
+                words = shlex.split(hook.get('command', ''))
+                for i, word in enumerate(words):
+                    if Path(word).name == 'hook_client.py' and i + 1 < len(words):
+                        name, args = words[i + 1], words[i + 2:]
+                    elif word.endswith('.py'):
+                        name, args = Path(word).stem, words[i + 1:]
+                    else:
+                        continue
+                    if name in HOOK_NAMES:
+                        hooks[name] = args
+                    break
+    return hooks
+
+
+def hook_args(args, with_tts=False):
+    """Return hook arguments with the TTS flags dropped unless requested."""
+    return list(args) if with_tts else [a for a in args if a not in TTS_FLAGS]
+
+
+def write_transcript(path, turns=50):
+    """Write a small synthetic transcript for Stop/SubagentStop/PreCompact to read."""
+    with open(path, 'w') as f:
+        for i in range(turns):
+            role = 'user' if i % 2 == 0 else 'assistant'
+            f.write(json.dumps({'type': role, 'message': {'role': role, 'content': f'turn {i} ' + 'text ' * 30}}) + '\n')
+
+
+def synthetic_stream(count, transcript_path, seed=0):
+    """
+    Return a list of (hook, event) pairs resembling real sessions.
+
+    Each session starts with SessionStart, then repeats prompt, a run of
+    PreToolUse/PostToolUse pairs and Stop, with the occasional
+    Notification, SubagentStop and PreCompact.
+    """
+    rng = random.Random(seed)
+    stream = []
+    i = 0
+    while len(stream) < count:
+        session_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        base = {'session_id': session_id, 'transcript_path': str(transcript_path)}
+        stream.append(('session_start', dict(base, hook_event_name='SessionStart', source='startup')))
+        for _turn in range(rng.randint(2, 6)):
+            stream.append(('user_prompt_submit', dict(base, hook_event_name='UserPromptSubmit',
+                                                      prompt=f'Please refactor handler {i} and run the tests')))
+            for _call in range(rng.randint(1, 8)):
+                tool_name, make_input = TOOLS[rng.randrange(len(TOOLS))]
+                tool_input = make_input(i, rng)
+                stream.append(('pre_tool_use', dict(base, hook_event_name='PreToolUse',
+                                                    tool_name=tool_name, tool_input=tool_input)))
+                stream.append(('post_tool_use', dict(base, hook_event_name='PostToolUse', tool_name=tool_name,
+                                                     tool_input=tool_input, tool_response={'success': True})))
+                i += 1
+            if rng.random() < 0.2:
+                stream.append(('notification', dict(base, hook_event_name='Notification',
+                                                    message='Claude needs your permission to use Bash')))
+            if rng.random() < 0.15:
+                stream.append(('subagent_stop', dict(base, hook_event_name='SubagentStop', stop_hook_active=False)))
+            stream.append(('stop', dict(base, hook_event_name='Stop', stop_hook_active=False)))
+        if rng.random() < 0.3:
+            stream.append(('pre_compact', dict(base, hook_event_name='PreCompact', trigger='auto',
+                                               custom_instructions='')))
+    return stream[:count]
+
+
+def recorded_stream(log_dir, count):
+    """
+    Return the most recent count events recorded in a logs/ directory.
+
+    Events from every hook log are merged in logged_at order; fields the
+    hooks add when logging (logged_at, policy) are removed.
+    """
+    stream = []
+    for name in HOOK_NAMES:
+        for record in iter_events(name, log_dir):
+            if not isinstance(record, dict):
+                continue
+            event = {k: v for k, v in record.items() if k not in ('logged_at', 'policy')}
+            stream.append((record.get('logged_at') or '', name, event))
+    stream.sort(key=lambda item: item[0])
+    return [(name, event) for _, name, event in stream[-count:]] if count else []
+
+
+def seed_logs(log_dir, stream, prior):
+    """
+    Fill the hook logs with prior records before the run.
+
+    The records are spread over the logs in the same proportion as the
+    stream's events, so the busiest logs are also the largest.
+
+    Returns:
+        int: Total size of the seeded logs in bytes
+    """
+    log_dir.mkdir(parents=True, exist_ok=True)
+    by_hook = {}
+    for name, event in stream:
+        by_hook.setdefault(name, []).append(event)
+    total = 0
+    remaining = prior
+    names = sorted(by_hook, key=lambda n: len(by_hook[n]))
+    for index, name in enumerate(names):
+        events = by_hook[name]
+        share = remaining if index == len(names) - 1 else prior * len(events) // len(stream)
+        remaining -= share
+        lines = [encode_record(dict(e, logged_at='2025-01-01T00:00:00.000000+00:00')) for e in events]
+        log_path = get_log_path(name, log_dir)
+        with open(log_path, 'wb') as f:
+            block = b''.join(lines)
+            full, rest = divmod(share, len(lines))
+            for _ in range(full):
+                f.write(block)
+            f.write(b''.join(lines[:rest]))
+        total += log_path.stat().st_size
+    return total
+
+
+def run_process(cmd, stdin_text, cwd, env):
+    """
+    Run one hook process and measure it.
+
+    The child is reaped with os.wait4() so its own peak RSS is reported,
+    not the largest of all children so far.
+
+    Returns:
+        tuple: (exit code, elapsed ms, peak RSS in KB or None)
+    """
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL, cwd=cwd, env=env)
+    try:
+        proc.stdin.write(stdin_text.encode('utf-8'))
+        proc.stdin.close()
+    except BrokenPipeError:
+        pass
+    if hasattr(os, 'wait4'):
+        _, status, usage = os.wait4(proc.pid, 0)
+        elapsed = (time.perf_counter() - started) * 1000
+        proc.returncode = os.waitstatus_to_exitcode(status) if hasattr(os, 'waitstatus_to_exitcode') else status >> 8
+        # ru_maxrss is KB on Linux and bytes on macOS
+        rss = usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+        return proc.returncode, elapsed, rss
+    proc.wait()
+    return proc.returncode, (time.perf_counter() - started) * 1000, None
+
+
+def hook_command(mode, name, args):
+    """Return the command line that runs a hook in the given mode."""
+    if mode == 'uv':
+        return ['uv', 'run', '--script', str(HOOKS_DIR / f'{name}.py')] + args
+    if mode == 'python':
+        return [sys.executable, str(HOOKS_DIR / f'{name}.py')] + args
+    return [sys.executable, str(HOOKS_DIR / 'hook_client.py'), name] + args
+
+
+def start_server(env):
+    """Start a hook server for the benchmark and wait until it is listening."""
+    proc = subprocess.Popen([sys.executable, str(HOOKS_DIR / 'hook_server.py'), '--idle-timeout', '3600'],
+                            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            env=env)
+    socket_path = Path(env['CCAOS_HOOK_RUN_DIR']) / 'hook-server.sock'
+    deadline = time.monotonic() + SERVER_START_SECONDS
+    while not socket_path.exists():
+        if proc.poll() is not None or time.monotonic() > deadline:
+            stop_server(proc)
+            raise RuntimeError('hook server did not start')
+        time.sleep(0.02)
+    return proc
+
+
+def stop_server(proc):
+    """Stop the benchmark's hook server."""
+    if proc.poll() is None:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+def check_silent(run_dir):
+    """Raise RuntimeError if a hook queued an announcement or started a speaker."""
+    spoke = [name for name in (QUEUE_FILE, LOCK_FILE) if (run_dir / name).exists()]
+    if spoke:
+        raise RuntimeError(f"TTS was used during the benchmark: {', '.join(spoke)} in {run_dir}")
+
+
+def peak_rss_kb(pid):
+    """Return a live process's peak RSS in KB from /proc, or None where unavailable."""
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def run_mode(mode, stream, hooks, prior, work_dir, rate=0.0, with_tts=False, profile=False):
+    """
+    Replay a stream through the hooks in one mode against freshly seeded logs.
+
+    Returns:
+        dict: mode, prior, seeded bytes, per-event samples
+              [{'hook', 'ms', 'rss_kb', 'exit'}], server peak RSS and timing records
+    """
+    project = work_dir / f'{mode}-{prior}'
+    if project.exists():
+        shutil.rmtree(project)
+    project.mkdir(parents=True)
+    seeded = seed_logs(project / 'logs', stream, prior)
+
+    env = dict(os.environ,
+               CCAOS_LOG_ROTATE='0',
+               CCAOS_HOOK_RUN_DIR=str(project / 'run'),
+               CCAOS_HOOK_SERVER='1' if mode == 'server' else '0',
+               CCAOS_PROFILE='1' if profile else '0',
+               CCAOS_TTS='1' if with_tts else '0',
+               CCAOS_PROFILE_DIR=str(project / 'profile'))
+    env.pop('PYTHONPATH', None)
+
+    server = start_server(env) if mode == 'server' else None
+    samples = []
+    try:
+        started = time.monotonic()
+        for index, (name, event) in enumerate(stream):
+            if name not in hooks:
+                continue
+            if rate > 0:
+                delay = started + index / rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            code, ms, rss = run_process(hook_command(mode, name, hook_args(hooks[name], with_tts)),
+                                        json.dumps(event), project, env)
+            samples.append({'hook': name, 'ms': round(ms, 3), 'rss_kb': rss, 'exit': code})
+        server_rss = peak_rss_kb(server.pid) if server else None
+    finally:
+        if server:
+            stop_server(server)
+
+    if not with_tts:
+        check_silent(project / 'run')
+    timings = profiler.read_timings(project / 'profile') if profile else []
+    return {'mode': mode, 'prior': prior, 'seeded_bytes': seeded, 'samples': samples,
+            'server_rss_kb': server_rss, 'timings': timings}
+
+
+def summarize_run(run):
+    """
+    Reduce a run's samples to latency percentiles per hook.
+
+    Returns:
+        dict: {hook: {'count', 'p50', 'p95', 'p99', 'max_rss_kb'}}, with an
+              'all' entry covering every event
+    """
+    groups = {'all': run['samples']}
+    for sample in run['samples']:
+        groups.setdefault(sample['hook'], []).append(sample)
+    summary = {}
+    for name, samples in groups.items():
+        if not samples:
+            continue
+        values = [s['ms'] for s in samples]
+        rss = [s['rss_kb'] for s in samples if s['rss_kb'] is not None]
+        summary[name] = {
+            'count': len(values),
+            'p50': profiler.percentile(values, 50),
+            'p95': profiler.percentile(values, 95),
+            'p99': profiler.percentile(values, 99),
+            'max_rss_kb': max(rss) if rss else None,
+        }
+    return summary
+
+
+def print_report(runs):
+    """Print latency and memory per mode, prior log size and hook."""
+    print(f"{'mode':<8} {'prior':>9} {'hook':<20} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rss MB':>7}")
+    for run in runs:
+        for name, s in sorted(summarize_run(run).items(), key=lambda item: (item[0] != 'all', item[0])):
+            rss = f"{s['max_rss_kb'] / 1024:.1f}" if s['max_rss_kb'] else '-'
+            print(f"{run['mode']:<8} {run['prior']:>9} {name:<20} {s['count']:>6} "
+                  f"{s['p50']:>9.2f} {s['p95']:>9.2f} {s['p99']:>9.2f} {rss:>7}")
+        if run['server_rss_kb']:
+            print(f"{run['mode']:<8} {run['prior']:>9} {'(server peak)':<20} {'':>6} {'':>9} {'':>9} {'':>9} "
+                  f"{run['server_rss_kb'] / 1024:>7.1f}")
+
+    by_prior = {}
+    for run in runs:
+        overall = summarize_run(run).get('all')
+        if overall:
+            by_prior.setdefault(run['prior'], {})[run['mode']] = overall['p50']
+    for prior, modes in sorted(by_prior.items()):
+        cold = [m for m in ('uv', 'python') if m in modes]
+        if cold and 'server' in modes and modes['server'] > 0:
+            ratios = ', '.join(f"{m} {modes[m] / modes['server']:.1f}x" for m in cold)
+            print(f"prior {prior}: warm server p50 {modes['server']:.2f} ms; cold/warm {ratios}")
+
+    profiled_runs = [run for run in runs if run['timings']]
+    for run in profiled_runs:
+        print(f"\nphases ({run['mode']}, prior {run['prior']}):")
+        for name, data in profiler.summarize(run['timings']).items():
+            phases = ', '.join(f"{phase} {s['p50']:.2f}" for phase, s in data['phases'].items())
+            print(f"  {name:<20} total p50 {data['total']['p50']:.2f} ms  [{phases}]")
+
+
+def parse_sizes(text):
+    """Parse a comma-separated list of record counts, allowing k/M suffixes."""
+    sizes = []
+    for part in text.split(','):
+        part = part.strip().lower()
+        if not part:
+            continue
+        scale = {'k': 1_000, 'm': 1_000_000}.get(part[-1], 1)
+        sizes.append(int(float(part.rstrip('km')) * scale))
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the hooks by replaying event streams')
+    parser.add_argument('--settings', default=str(DEFAULT_SETTINGS), help='Settings file listing the hooks')
+    parser.add_argument('--modes', default=','.join(MODES), help=f"Comma-separated modes ({', '.join(MODES)})")
+    parser.add_argument('--prior', default=','.join(str(n) for n in DEFAULT_PRIOR),
+                        help='Comma-separated prior log sizes in records, e.g. 10k,100k,1M')
+    parser.add_argument('--events', type=int, default=DEFAULT_EVENTS, help='Events to replay per run')
+    parser.add_argument('--rate', type=float, default=0.0, help='Events per second (default: back to back)')
+    parser.add_argument('--replay', help='Replay events recorded in this logs/ directory')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic stream')
+    parser.add_argument('--with-tts', action='store_true', help='Keep --announce/--notify hook flags')
+    parser.add_argument('--profile', action='store_true', help='Record and report per-phase timings')
+    parser.add_argument('--work-dir', help='Scratch directory (default: a temporary directory)')
+    parser.add_argument('--json', help='Also write the results to this file')
+    args = parser.parse_args()
+
+    hooks = parse_settings(args.settings)
+    modes = [m.strip() for m in args.modes.split(',') if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        parser.error(f"unknown mode: {', '.join(unknown)}")
+    if 'uv' in modes and shutil.which('uv') is None:
+        print("uv not found on PATH; skipping the uv mode", file=sys.stderr)
+        modes.remove('uv')
+
+    work_dir = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix='hook-bench-'))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    transcript = work_dir / 'transcript.jsonl'
+    write_transcript(transcript)
+
+    if args.replay:
+        stream = recorded_stream(args.replay, args.events)
+    else:
+        stream = synthetic_stream(args.events, transcript, args.seed)
+    stream = [(name, event) for name, event in stream if name in hooks]
+    if not stream:
+        print("No events to replay for the configured hooks", file=sys.stderr)
+        return 1
+
+    runs = []
+    try:
+        for prior in parse_sizes(args.prior):
+            for mode in modes:
+                print(f"… {mode}: {len(stream)} events, {prior} prior records", file=sys.stderr)
+                runs.append(run_mode(mode, stream, hooks, prior, work_dir, args.rate, args.with_tts, args.profile))
+                shutil.rmtree(work_dir / f'{mode}-{prior}', ignore_errors=True)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_report(runs)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump([dict(run, summary=summarize_run(run)) for run in runs], f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import os
+import sys
+import pytest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add the hooks directory to path to import utils (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.tts import audio_cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    """Point the audio cache at a temporary directory."""
+    with patch.dict(os.environ, {'CCAOS_TTS_CACHE_DIR': str(tmp_path / 'tts')}):
+        yield tmp_path / 'tts'
+
+
+class TestAudioCache:
+    """Test suite for the synthesized speech cache."""
+
+    def test_key_covers_provider_voice_model_and_text(self):
+        """Test any change to the rendering inputs changes the key."""
+        base = audio_cache.cache_key('gemini', 'Kore', 'tts-1', 'All done!')
+        assert base == audio_cache.cache_key('gemini', 'Kore', 'tts-1', 'All done!')
+        assert base != audio_cache.cache_key('openai', 'Kore', 'tts-1', 'All done!')
+        assert base != audio_cache.cache_key('gemini', 'Puck', 'tts-1', 'All done!')
+        assert base != audio_cache.cache_key('gemini', 'Kore', 'tts-2', 'All done!')
+        assert base != audio_cache.cache_key('gemini', 'Kore', 'tts-1', 'Job complete!')
+
+    def test_round_trip(self, cache_dir):
+        """Test stored audio is returned on the next lookup."""
+        key = audio_cache.cache_key('gemini', 'Kore', 'tts-1', 'Subagent Complete')
+        assert audio_cache.get_cached(key, 'wav') is None
+
+        audio_cache.put_cached(key, 'wav', b'RIFF-audio')
+        assert audio_cache.get_cached(key, 'wav').read_bytes() == b'RIFF-audio'
+
+    def test_evicts_least_recently_used(self, cache_dir):
+        """Test eviction removes the entry played longest ago."""
+        for name, mtime in (('old', 100), ('recent', 300), ('middle', 200)):
+            audio_cache.put_cached(name, 'wav', b'x' * 10)
+            os.utime(cache_dir / f'{name}.wav', (mtime, mtime))
+
+        audio_cache.evict(20)
+        assert sorted(p.stem for p in cache_dir.iterdir()) == ['middle', 'recent']
+
+    def test_hit_refreshes_recency(self, cache_dir):
+        """Test playing an entry protects it from eviction."""
+        for name, mtime in (('a', 100), ('b', 200)):
+            audio_cache.put_cached(name, 'wav', b'x' * 10)
+            os.utime(cache_dir / f'{name}.wav', (mtime, mtime))
+
+        audio_cache.get_cached('a', 'wav')
+        audio_cache.evict(10)
+        assert [p.stem for p in cache_dir.iterdir()] == ['a']
+
+    def test_disabled(self, cache_dir):
+        """Test CCAOS_TTS_CACHE=0 neither stores nor returns audio."""
+        with patch.dict(os.environ, {'CCAOS_TTS_CACHE': '0'}):
+            assert audio_cache.put_cached('k', 'wav', b'data') is None
+            assert audio_cache.get_cached('k', 'wav') is None
+
+    def test_parse_tts_args(self):
+        """Test --cache-only is separated from the text to speak."""
+        assert audio_cache.parse_tts_args(['--cache-only', 'All', 'done!']) == ('All done!', True)
+        assert audio_cache.parse_tts_args(['Hello']) == ('Hello', False)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,114 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import json
+import os
+import sys
+import pytest
+from pathlib import Path
+
+# Add the hooks directory to path to import utils (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+import bench_hooks
+from hook_client import HOOK_NAMES
+from utils import log_store
+
+
+class TestStreams:
+    """Test suite for the benchmark's event streams and log seeding."""
+
+    def test_parses_configured_hooks(self):
+        """Test every Python hook in settings_hooks.json is found with its arguments."""
+        hooks = bench_hooks.parse_settings(bench_hooks.DEFAULT_SETTINGS)
+        assert set(hooks) == set(HOOK_NAMES)
+        assert hooks['stop'] == ['--chat', '--announce']
+        assert bench_hooks.hook_args(hooks['stop']) == ['--chat']
+        assert bench_hooks.hook_args(hooks['stop'], with_tts=True) == ['--chat', '--announce']
+
+    def test_parses_direct_uv_commands(self, tmp_path):
+        """Test older settings that run hooks with `uv run` are understood."""
+        settings = tmp_path / 'settings.json'
+        settings.write_text(json.dumps({'hooks': {'Stop': [{'hooks': [
+            {'type': 'command', 'command': 'cat ~/.claude/hooks/instructions/reminder.md'},
+            {'type': 'command', 'command': 'uv run ~/.claude/hooks/stop.py --chat'},
+        ]}]}}))
+        assert bench_hooks.parse_settings(settings) == {'stop': ['--chat']}
+
+    def test_synthetic_stream_is_repeatable(self, tmp_path):
+        """Test the same seed gives the same stream, covering the session hooks."""
+        first = bench_hooks.synthetic_stream(300, tmp_path / 't.jsonl', seed=3)
+        second = bench_hooks.synthetic_stream(300, tmp_path / 't.jsonl', seed=3)
+        assert first == second
+        assert len(first) == 300
+        assert {'session_start', 'user_prompt_submit', 'pre_tool_use', 'post_tool_use', 'stop'} <= {n for n, _ in first}
+
+    def test_seeds_requested_record_count(self, tmp_path):
+        """Test seeded logs hold exactly the requested number of prior records."""
+        stream = bench_hooks.synthetic_stream(50, tmp_path / 't.jsonl')
+        bench_hooks.seed_logs(tmp_path / 'logs', stream, 1234)
+        total = sum(len(log_store.read_events(name, tmp_path / 'logs')) for name in HOOK_NAMES)
+        assert total == 1234
+        assert len(log_store.read_events('pre_tool_use', tmp_path / 'logs')) > len(
+            log_store.read_events('stop', tmp_path / 'logs'))
+
+    def test_replays_recorded_events_in_order(self, tmp_path):
+        """Test recorded events are merged across logs by logged_at."""
+        log_store.append_event('pre_tool_use', {'tool_name': 'Bash', 'n': 1}, tmp_path)
+        log_store.append_event('post_tool_use', {'tool_name': 'Bash', 'n': 2}, tmp_path)
+        log_store.append_event('stop', {'n': 3}, tmp_path)
+
+        stream = bench_hooks.recorded_stream(tmp_path, 2)
+        assert stream == [('post_tool_use', {'tool_name': 'Bash', 'n': 2}), ('stop', {'n': 3})]
+
+    def test_parses_sizes(self):
+        """Test prior sizes accept k and M suffixes."""
+        assert bench_hooks.parse_sizes('10k,100k,1M') == [10_000, 100_000, 1_000_000]
+
+
+class TestRun:
+    """Test suite for replaying a stream through the hooks."""
+
+    def test_cold_run_records_latency_and_memory(self, tmp_path):
+        """Test a short cold run times every event and appends to the seeded logs."""
+        hooks = bench_hooks.parse_settings(bench_hooks.DEFAULT_SETTINGS)
+        stream = bench_hooks.synthetic_stream(6, tmp_path / 't.jsonl')
+        run = bench_hooks.run_mode('python', stream, hooks, 100, tmp_path)
+
+        assert len(run['samples']) == 6
+        assert all(s['exit'] in (0, 2) and s['ms'] > 0 for s in run['samples'])
+        if hasattr(os, 'wait4'):
+            assert all(s['rss_kb'] > 0 for s in run['samples'])
+        total = sum(len(log_store.read_events(name, tmp_path / 'python-100' / 'logs')) for name in HOOK_NAMES)
+        assert total == 106
+
+        summary = bench_hooks.summarize_run(run)
+        assert summary['all']['count'] == 6
+        assert summary['all']['p50'] <= summary['all']['p99']
+
+    @pytest.mark.parametrize('mode', ['python', 'server'])
+    def test_never_speaks(self, tmp_path, mode):
+        """Test SubagentStop, which announces regardless of flags, starts no speaker."""
+        hooks = bench_hooks.parse_settings(bench_hooks.DEFAULT_SETTINGS)
+        stream = [('subagent_stop', {'session_id': 's', 'stop_hook_active': False})] * 2
+        run = bench_hooks.run_mode(mode, stream, hooks, 10, tmp_path)
+        assert [s['exit'] for s in run['samples']] == [0, 0]
+        run_dir = tmp_path / f'{mode}-10' / 'run'
+        assert not (run_dir / bench_hooks.QUEUE_FILE).exists()
+        assert not (run_dir / bench_hooks.LOCK_FILE).exists()
+
+    def test_speech_fails_the_run(self, tmp_path):
+        """Test a queued announcement is reported instead of passing silently."""
+        (tmp_path / bench_hooks.QUEUE_FILE).write_text('{}\n')
+        with pytest.raises(RuntimeError):
+            bench_hooks.check_silent(tmp_path)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,143 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import os
+import sys
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from pathlib import Path
+
+# Add the hooks directory to path to import utils (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import session_start
+from utils import context_cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    """Point the context cache at a temporary directory."""
+    with patch.dict(os.environ, {'CCAOS_CONTEXT_CACHE_DIR': str(tmp_path / 'cache')}):
+        yield tmp_path / 'cache'
+
+
+class TestCached:
+    """Test suite for keyed, time-limited probe caching."""
+
+    def test_hit_reuses_value(self, cache_dir, tmp_path):
+        """Test a second lookup with the same key skips the probe."""
+        probe = MagicMock(return_value=['main', 2])
+        assert context_cache.cached('git_status', [1], 60, probe, tmp_path) == ['main', 2]
+        assert context_cache.cached('git_status', [1], 60, probe, tmp_path) == ['main', 2]
+        probe.assert_called_once()
+
+    def test_key_change_recomputes(self, cache_dir, tmp_path):
+        """Test a changed invalidation key runs the probe again."""
+        context_cache.cached('git_status', [1], 60, lambda: ['main', 2], tmp_path)
+        assert context_cache.cached('git_status', [2], 60, lambda: ['main', 3], tmp_path) == ['main', 3]
+
+    def test_expired_entry_recomputes(self, cache_dir, tmp_path):
+        """Test entries older than max_age are refreshed."""
+        context_cache.cached('issues', None, 60, lambda: 'old', tmp_path)
+        with patch('time.time', return_value=time.time() + 61):
+            assert context_cache.cached('issues', None, 60, lambda: 'new', tmp_path) == 'new'
+
+    def test_none_is_not_cached(self, cache_dir, tmp_path):
+        """Test failed probes are retried next time."""
+        context_cache.cached('issues', None, 60, lambda: None, tmp_path)
+        assert context_cache.cached('issues', None, 60, lambda: 'issues', tmp_path) == 'issues'
+
+    def test_projects_are_separate(self, cache_dir, tmp_path):
+        """Test each project directory has its own cache."""
+        context_cache.cached('issues', None, 60, lambda: 'a', tmp_path / 'a')
+        assert context_cache.cached('issues', None, 60, lambda: 'b', tmp_path / 'b') == 'b'
+
+    def test_concurrent_writes_keep_both_entries(self, cache_dir, tmp_path):
+        """Test probes finishing together do not drop each other's entries."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        names = [f'probe{i}' for i in range(8)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda name: context_cache.cached(name, None, 60, lambda: name, tmp_path), names))
+        data = context_cache.read_cache(context_cache.get_cache_path(tmp_path))
+        assert sorted(data) == names
+
+    def test_disabled(self, cache_dir, tmp_path):
+        """Test CCAOS_CONTEXT_CACHE=0 always runs the probe."""
+        probe = MagicMock(return_value='issues')
+        with patch.dict(os.environ, {'CCAOS_CONTEXT_CACHE': '0'}):
+            context_cache.cached('issues', None, 60, probe, tmp_path)
+            context_cache.cached('issues', None, 60, probe, tmp_path)
+        assert probe.call_count == 2
+        assert not cache_dir.exists()
+
+
+class TestGitStateKey:
+    """Test the git index/HEAD invalidation key."""
+
+    def make_repo(self, root):
+        git_dir = root / '.git'
+        git_dir.mkdir(parents=True)
+        (git_dir / 'HEAD').write_text('ref: refs/heads/main\n')
+        (git_dir / 'index').write_bytes(b'DIRC')
+        return git_dir
+
+    def test_outside_repo(self, tmp_path):
+        """Test no key is produced outside a repository."""
+        assert context_cache.git_state_key(tmp_path) is None
+
+    def test_found_from_subdirectory(self, tmp_path):
+        """Test the git dir is found by walking up from a subdirectory."""
+        git_dir = self.make_repo(tmp_path)
+        (tmp_path / 'src' / 'pkg').mkdir(parents=True)
+        assert context_cache.find_git_dir(tmp_path / 'src' / 'pkg') == git_dir
+
+    def test_worktree_gitdir_file(self, tmp_path):
+        """Test a .git file pointing elsewhere is followed."""
+        git_dir = self.make_repo(tmp_path / 'main')
+        (tmp_path / 'wt').mkdir()
+        (tmp_path / 'wt' / '.git').write_text(f'gitdir: {git_dir}\n')
+        assert context_cache.find_git_dir(tmp_path / 'wt') == git_dir
+
+    def test_key_changes_with_index_and_head(self, tmp_path):
+        """Test rewriting the index or moving HEAD changes the key."""
+        git_dir = self.make_repo(tmp_path)
+        first = context_cache.git_state_key(tmp_path)
+        os.utime(git_dir / 'index', ns=(0, first[2] + 1_000_000))
+        second = context_cache.git_state_key(tmp_path)
+        assert second != first
+        (git_dir / 'HEAD').write_text('ref: refs/heads/feature\n')
+        assert context_cache.git_state_key(tmp_path) != second
+
+
+class TestSessionStartContext:
+    """Test SessionStart context assembly uses the cache."""
+
+    def test_resume_reuses_probes(self, cache_dir, tmp_path, monkeypatch):
+        """Test a second session start in the same repo runs no git or gh probes."""
+        TestGitStateKey().make_repo(tmp_path)
+        (tmp_path / 'TODO.md').write_text('Ship it')
+        monkeypatch.chdir(tmp_path)
+
+        with patch.object(session_start, 'get_git_status', return_value=('main', 3, True)) as mock_git:
+            with patch.object(session_start, 'get_recent_issues', return_value='#1 Bug') as mock_issues:
+                first = session_start.load_development_context('startup')
+                second = session_start.load_development_context('resume')
+
+        mock_git.assert_called_once()
+        mock_issues.assert_called_once()
+        for context in (first, second):
+            assert 'Git branch: main' in context
+            assert 'Uncommitted changes: 3 files' in context
+            assert 'Ship it' in context
+            assert context.index('Ship it') < context.index('#1 Bug')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
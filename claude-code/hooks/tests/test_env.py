@@ -0,0 +1,102 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import os
+import stat
+import sys
+import pytest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add the hooks directory to path to import utils (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import env
+
+
+@pytest.fixture
+def env_file(tmp_path):
+    """Point the loader at a temporary env file and run directory."""
+    path = tmp_path / '.env'
+    path.write_text('TEST_ENV_KEY=from-file\nexport TEST_ENV_NAME="Ada"\n')
+    overrides = {'CCAOS_ENV_FILE': str(path), 'CCAOS_HOOK_RUN_DIR': str(tmp_path / 'run')}
+    with patch.dict(os.environ, overrides), patch.dict(env._values, clear=True):
+        os.environ.pop('TEST_ENV_KEY', None)
+        os.environ.pop('TEST_ENV_NAME', None)
+        yield path
+
+
+class TestParseEnv:
+    """Test suite for the built-in env file parser."""
+
+    def test_values(self):
+        """Test comments, export, quoting and escapes."""
+        text = (
+            '# comment\n'
+            'export A=1\n'
+            'B = "two\\nlines"  # trailing comment\n'
+            "C='${A} stays literal'\n"
+            'D=bare value # comment\n'
+            'E=no#comment\n'
+            'F=\n'
+            'G="spans\nlines"\n'
+        )
+        assert env.parse_env(text) == {
+            'A': '1', 'B': 'two\nlines', 'C': '${A} stays literal', 'D': 'bare value',
+            'E': 'no#comment', 'F': '', 'G': 'spans\nlines',
+        }
+
+    def test_expansion(self):
+        """Test ${VAR} expands from earlier values, with defaults."""
+        with patch.dict(os.environ, {}, clear=True):
+            assert env.parse_env('A=x\nB=${A}/y\nC="${MISSING:-z}"\n') == {'A': 'x', 'B': 'x/y', 'C': 'z'}
+
+
+class TestGetenv:
+    """Test suite for lazy env loading."""
+
+    def test_set_variables_skip_the_file(self, env_file):
+        """Test a variable already in the environment never reads the env file."""
+        with patch.dict(os.environ, {'TEST_ENV_KEY': 'from-env'}), \
+                patch.object(env, 'parse_env_file', side_effect=AssertionError('parsed')):
+            assert env.getenv('TEST_ENV_KEY') == 'from-env'
+
+    def test_missing_variable_loads_file(self, env_file):
+        """Test a missing variable is read from the env file and exported."""
+        assert env.getenv('TEST_ENV_KEY') == 'from-file'
+        assert os.environ['TEST_ENV_NAME'] == 'Ada'
+        assert env.getenv('TEST_ENV_ABSENT', 'default') == 'default'
+
+    def test_snapshot_reused_by_later_process(self, env_file):
+        """Test a fresh process loads the snapshot instead of parsing."""
+        env.env_file_values()
+        env._values.clear()
+        with patch.object(env, 'parse_env_file', side_effect=AssertionError('parsed')):
+            assert env.getenv('TEST_ENV_KEY') == 'from-file'
+
+    def test_snapshot_is_private(self, env_file):
+        """Test the snapshot, which holds secrets, is readable only by its owner."""
+        env.env_file_values()
+        mode = env.get_snapshot_path(env_file).stat().st_mode
+        assert stat.S_IMODE(mode) == 0o600
+
+    def test_changed_file_is_reparsed(self, env_file):
+        """Test editing the env file invalidates the snapshot."""
+        env.env_file_values()
+        env._values.clear()
+        env_file.write_text('TEST_ENV_KEY=changed-value\n')
+        assert env.getenv('TEST_ENV_KEY') == 'changed-value'
+
+    def test_no_env_file(self, env_file):
+        """Test a missing env file gives the default."""
+        env_file.unlink()
+        assert env.getenv('TEST_ENV_KEY', 'fallback') == 'fallback'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
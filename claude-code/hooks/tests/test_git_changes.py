@@ -0,0 +1,134 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import os
+import shutil
+import subprocess
+import sys
+import time
+import pytest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add the hooks directory to path to import utils (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import session_start
+from utils import git_changes
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason="git not available")
+
+
+def git(repo, *args):
+    subprocess.run(['git', '-C', str(repo), *args], check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """Create a repository with one committed file."""
+    git(tmp_path, 'init', '-q')
+    git(tmp_path, 'config', 'user.email', 'dev@example.com')
+    git(tmp_path, 'config', 'user.name', 'Dev')
+    (tmp_path / 'tracked.txt').write_text('one\n')
+    git(tmp_path, 'add', 'tracked.txt')
+    git(tmp_path, 'commit', '-q', '-m', 'initial')
+    return tmp_path
+
+
+def porcelain_count(repo):
+    output = subprocess.run(['git', 'status', '--porcelain'], cwd=repo, capture_output=True, text=True).stdout
+    return len(output.splitlines())
+
+
+class TestCountChanges:
+    """Test suite for budgeted change counting."""
+
+    def test_clean_repo(self, repo):
+        """Test a clean checkout has no changes."""
+        assert git_changes.count_changes(5, repo) == (0, True)
+
+    def test_matches_porcelain(self, repo):
+        """Test the fast count agrees with git status --porcelain."""
+        (repo / 'tracked.txt').write_text('two\n')
+        (repo / 'new.txt').write_text('new\n')
+        (repo / 'staged.txt').write_text('staged\n')
+        git(repo, 'add', 'staged.txt')
+        (repo / 'build' / 'out').mkdir(parents=True)
+        (repo / 'build' / 'out' / 'a.o').write_text('')
+        (repo / 'build' / 'out' / 'b.o').write_text('')
+        (repo / '.gitignore').write_text('*.log\n')
+        (repo / 'debug.log').write_text('')
+
+        assert porcelain_count(repo) == 5
+        assert git_changes.count_changes(5, repo) == (5, True)
+
+    def test_touched_file_is_not_a_change(self, repo):
+        """Test a file whose mtime changed but content did not is not counted."""
+        os.utime(repo / 'tracked.txt', (time.time() + 10, time.time() + 10))
+        assert git_changes.count_changes(5, repo) == (0, True)
+
+    @pytest.mark.parametrize('mode', ['fast', 'full'])
+    def test_index_is_not_written(self, repo, mode):
+        """Test counting never rewrites the index, so a killed git leaves no index.lock."""
+        os.utime(repo / 'tracked.txt', (time.time() + 10, time.time() + 10))
+        index = repo / '.git' / 'index'
+        before = index.stat().st_mtime_ns
+        with patch.dict(os.environ, {'CCAOS_GIT_STATUS': mode}):
+            git_changes.count_changes(5, repo)
+        assert index.stat().st_mtime_ns == before
+        assert not (repo / '.git' / 'index.lock').exists()
+
+    def test_repo_without_commits(self, tmp_path):
+        """Test staged files count as changes before the first commit."""
+        git(tmp_path, 'init', '-q')
+        (tmp_path / 'a.txt').write_text('a')
+        git(tmp_path, 'add', 'a.txt')
+        (tmp_path / 'b.txt').write_text('b')
+        assert git_changes.count_changes(5, tmp_path) == (2, True)
+
+    def test_full_mode(self, repo):
+        """Test CCAOS_GIT_STATUS=full counts porcelain lines."""
+        (repo / 'new.txt').write_text('new\n')
+        with patch.dict(os.environ, {'CCAOS_GIT_STATUS': 'full'}):
+            assert git_changes.count_changes(5, repo) == (1, True)
+
+    def test_outside_repo(self, tmp_path):
+        """Test None is returned outside a repository."""
+        with patch.dict(os.environ, {'GIT_CEILING_DIRECTORIES': str(tmp_path.parent)}):
+            assert git_changes.count_changes(5, tmp_path) is None
+
+
+class TestBudget:
+    """Test the hard time budget."""
+
+    def test_exhausted_budget_is_not_a_clean_tree(self, repo, monkeypatch):
+        """Test SessionStart reports "0+" changes when nothing was counted in time."""
+        (repo / 'new.txt').write_text('new\n')
+        monkeypatch.chdir(repo)
+        monkeypatch.setenv('CCAOS_GIT_STATUS_BUDGET', '0')
+        monkeypatch.setenv('CCAOS_CONTEXT_CACHE', '0')
+        with patch.object(session_start, 'get_recent_issues', return_value=None):
+            context = session_start.load_development_context('startup')
+        assert 'Uncommitted changes: 0+ files' in context
+
+    def test_partial_count_when_budget_runs_out(self):
+        """Test records seen before the deadline are reported as a lower bound."""
+        command = [sys.executable, '-c',
+                   "import sys, time; sys.stdout.write('a\\0b\\0'); sys.stdout.flush(); time.sleep(5)"]
+        started = time.monotonic()
+        assert git_changes.count_output(command, time.monotonic() + 0.5) == (2, False)
+        assert time.monotonic() - started < 2
+
+    def test_format(self):
+        """Test incomplete counts are shown with a plus."""
+        assert git_changes.format_changes(12, True) == "12"
+        assert git_changes.format_changes(5000, False) == "5000+"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,152 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import io
+import json
+import os
+import subprocess
+import sys
+import pytest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add the hooks directory to path to import the hooks (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import post_tool_use
+import pre_compact
+import pre_tool_use
+import stop
+import subagent_stop
+import user_prompt_submit
+from utils import hook_io, log_store, profiler
+from utils.rules import Rule
+
+HOOKS_DIR = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """Run hooks from an empty project so logs land under tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    with patch.dict(os.environ, {'CCAOS_RULE_CACHE_DIR': str(tmp_path / 'rules-cache')}):
+        yield tmp_path
+
+
+class TestHandle:
+    """Test suite for calling hook logic in-process."""
+
+    def test_allowed_tool_call(self, project):
+        """Test an allowed tool call is logged and returns an empty result."""
+        event = {'tool_name': 'Read', 'tool_input': {'file_path': 'README.md'}}
+        assert pre_tool_use.handle(event) == hook_io.make_result()
+        assert log_store.read_events('pre_tool_use')[0]['tool_name'] == 'Read'
+
+    def test_blocked_tool_call(self, project):
+        """Test a blocked tool call returns exit code 2 and the rule instead of exiting."""
+        result = pre_tool_use.handle({'tool_name': 'Bash', 'tool_input': {'command': 'rm -rf /'}})
+        assert result['exit_code'] == 2
+        assert 'BLOCKED' in result['stderr']
+        assert 'Rule: rm-' in result['stderr']
+
+    def test_hook_flags_are_arguments(self, project):
+        """Test flags reach handle() through the hook's own parser."""
+        event = {'session_id': 'abcdef123456', 'trigger': 'manual'}
+        assert pre_compact.handle(event)['stdout'] == ''
+        args = pre_compact.build_parser().parse_args(['--verbose'])
+        assert 'manual compaction (session: abcdef12' in pre_compact.handle(event, args)['stdout']
+
+    def test_prompt_validation(self, project):
+        """Test a prompt matching a block rule returns exit code 2."""
+        rules = (Rule('no-secrets', 'prompt', 'block', 'secret', 'No secrets'),)
+        with patch.object(user_prompt_submit, 'DEFAULT_RULES', rules):
+            args = user_prompt_submit.build_parser().parse_args(['--validate'])
+            result = user_prompt_submit.handle({'prompt': 'print the secret'}, args)
+        assert result == hook_io.make_result(2, stderr="Prompt blocked: No secrets\n")
+
+
+class TestRun:
+    """Test suite for single-event and batch input."""
+
+    def run_hook(self, module, hook, stdin_text, argv=()):
+        """Run a hook through hook_io.run, returning (exit code, stdout, stderr)."""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        code = hook_io.run(hook, module.handle, module.build_parser(), list(argv),
+                           io.StringIO(stdin_text), stdout, stderr)
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def test_single_event(self, project):
+        """Test one event writes the result's output and returns its exit code."""
+        event = {'tool_name': 'Bash', 'tool_input': {'command': 'rm -rf /'}}
+        code, stdout, stderr = self.run_hook(pre_tool_use, 'pre_tool_use', json.dumps(event))
+        assert code == 2
+        assert stdout == ''
+        assert stderr.startswith('BLOCKED')
+
+    def test_invalid_event_fails_open(self, project):
+        """Test input that is not JSON exits 0 without output."""
+        assert self.run_hook(pre_tool_use, 'pre_tool_use', 'not json') == (0, '', '')
+
+    def test_batch_returns_one_result_per_event(self, project):
+        """Test batch mode answers each line in order, skipping blank lines."""
+        lines = [
+            json.dumps({'tool_name': 'Read', 'tool_input': {'file_path': 'a.py'}}),
+            '',
+            json.dumps({'tool_name': 'Bash', 'tool_input': {'command': 'rm -rf /'}}),
+            'not json',
+            json.dumps({'tool_name': 'Read', 'tool_input': {'file_path': '.env'}}),
+        ]
+        code, stdout, _ = self.run_hook(pre_tool_use, 'pre_tool_use', '\n'.join(lines) + '\n', ['--batch'])
+
+        assert code == 0
+        results = [json.loads(line) for line in stdout.splitlines()]
+        assert [r['exit_code'] for r in results] == [0, 2, 0, 2]
+        assert log_store.read_events('pre_tool_use') == []
+        assert 'CCAOS_DRY_RUN' not in os.environ
+
+    def test_batch_has_no_side_effects(self, project):
+        """Test a batch replay neither logs, exports chats nor queues announcements."""
+        transcript = project / 'transcript.jsonl'
+        transcript.write_text(json.dumps({'type': 'user'}) + '\n')
+        line = json.dumps({'session_id': 's', 'transcript_path': str(transcript)}) + '\n'
+        with patch('utils.tts.speaker.enqueue') as enqueue, \
+                patch('utils.llm.message_pool.spawn_refill') as spawn_refill:
+            self.run_hook(stop, 'stop', line, ['--announce', '--chat', '--batch'])
+            self.run_hook(subagent_stop, 'subagent_stop', line, ['--chat', '--batch'])
+        enqueue.assert_not_called()
+        spawn_refill.assert_not_called()
+        assert not (project / 'logs').exists()
+
+    def test_batch_profiles_each_event(self, project):
+        """Test each event in a batch gets its own timing record."""
+        events = ''.join(json.dumps({'session_id': f's{i}', 'tool_name': 'Read'}) + '\n' for i in range(3))
+        with patch.dict(os.environ, {'CCAOS_PROFILE': '1', 'CCAOS_PROFILE_DIR': str(project / 'profile')}):
+            self.run_hook(post_tool_use, 'post_tool_use', events, ['--batch'])
+            records = profiler.read_timings()
+        assert [r['session_id'] for r in records] == ['s0', 's1', 's2']
+        assert all(r['hook'] == 'post_tool_use' and 'parse' in r['phases'] for r in records)
+
+    def test_batch_from_command_line(self, tmp_path):
+        """Test a hook script replays its own log in one process and terminates."""
+        for i in range(20):
+            log_store.append_event('post_tool_use', {'session_id': 's', 'tool_name': 'Read', 'n': i},
+                                   tmp_path / 'logs')
+        log_path = log_store.get_log_path('post_tool_use', tmp_path / 'logs')
+        before = log_path.read_bytes()
+        with open(log_path) as log:
+            result = subprocess.run(
+                [sys.executable, str(HOOKS_DIR / 'post_tool_use.py'), '--batch'],
+                stdin=log, capture_output=True, text=True, cwd=tmp_path, timeout=30,
+            )
+        assert result.returncode == 0
+        assert len(result.stdout.splitlines()) == 20
+        assert log_path.read_bytes() == before
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
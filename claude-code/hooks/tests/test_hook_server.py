@@ -0,0 +1,117 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.11"
+# dependencies = [
+#     "pytest",
+#     "python-dotenv",
+# ]
+# ///
+
+import json
+import os
+import subprocess
+import sys
+import time
+import pytest
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).parent.parent
+
+# Add the hooks directory to path to import the server (need to go up 1 level)
+sys.path.insert(0, str(HOOKS_DIR))
+
+import hook_client
+import hook_server
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'), reason="hook server requires fork()")
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Run a hook server against a temporary run directory."""
+    env = dict(os.environ, CCAOS_HOOK_RUN_DIR=str(tmp_path / 'run'))
+    proc = subprocess.Popen(
+        [sys.executable, str(HOOKS_DIR / 'hook_server.py'), '--idle-timeout', '2'],
+        env=env,
+    )
+    socket_path = tmp_path / 'run' / 'hook-server.sock'
+    deadline = time.monotonic() + 10
+    while not socket_path.exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    yield env
+    proc.terminate()
+    proc.wait(timeout=5)
+
+
+def run_client(env, cwd, hook, event, *args):
+    """Invoke hook_client.py the way settings.json does."""
+    return subprocess.run(
+        [sys.executable, str(HOOKS_DIR / 'hook_client.py'), hook, *args],
+        input=json.dumps(event),
+        capture_output=True,
+        text=True,
+        cwd=cwd,
+        env=dict(env, CCAOS_HOOK_SERVER='1'),
+        timeout=30,
+    )
+
+
+class TestHookServer:
+    """Test suite for the persistent hook server."""
+
+    def test_forwards_exit_code_and_stderr(self, server, tmp_path):
+        """Test a blocked PreToolUse event returns exit code 2 and the block message."""
+        event = {'tool_name': 'Bash', 'tool_input': {'command': 'rm -rf /'}}
+        result = run_client(server, tmp_path, 'pre_tool_use', event)
+
+        assert result.returncode == 2
+        assert 'BLOCKED' in result.stderr
+
+    def test_runs_in_client_cwd(self, server, tmp_path):
+        """Test hooks write their logs relative to the client's working directory."""
+        project = tmp_path / 'project'
+        project.mkdir()
+        event = {'tool_name': 'Read', 'tool_input': {'file_path': 'README.md'}}
+
+        result = run_client(server, project, 'post_tool_use', event)
+
+        assert result.returncode == 0
+        log_lines = (project / 'logs' / 'post_tool_use.jsonl').read_text().splitlines()
+        record = json.loads(log_lines[0])
+        assert record.pop('logged_at')
+        assert record == event
+
+    def test_idle_timeout_removes_socket(self, server, tmp_path):
+        """Test the server shuts down and removes its socket when idle."""
+        socket_path = tmp_path / 'run' / 'hook-server.sock'
+        deadline = time.monotonic() + 10
+        while socket_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert not socket_path.exists()
+
+
+class TestHookClient:
+    """Test suite for client-side behaviour."""
+
+    def test_unknown_hook_exits_cleanly(self):
+        """Test an unknown hook name never blocks Claude Code."""
+        result = subprocess.run(
+            [sys.executable, str(HOOKS_DIR / 'hook_client.py'), 'not_a_hook'],
+            input='{}', capture_output=True, text=True, timeout=10,
+        )
+        assert result.returncode == 0
+        assert 'Usage' in result.stderr
+
+    def test_exit_code_from_system_exit(self):
+        """Test SystemExit codes map to process exit codes."""
+        assert hook_server.exit_code_from(SystemExit(None)) == 0
+        assert hook_server.exit_code_from(SystemExit(2)) == 2
+
+    def test_hook_names_match_hook_files(self):
+        """Test every forwarded hook name has a hook script."""
+        for name in hook_client.HOOK_NAMES:
+            assert (HOOKS_DIR / f'{name}.py').exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
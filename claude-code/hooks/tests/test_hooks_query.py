@@ -0,0 +1,151 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import csv
+import io
+import json
+import sys
+import pytest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add the hooks directory to path to import utils (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import hooks_query, log_rotate, log_store
+
+
+@pytest.fixture(autouse=True)
+def no_spawn():
+    """Keep rollover from starting a maintenance process."""
+    with patch.object(log_store, 'spawn_maintenance'):
+        yield
+
+
+def tool_event(session, tool, n, **extra):
+    return dict({'session_id': session, 'tool_name': tool, 'n': n}, **extra)
+
+
+def numbers(results):
+    return [record['n'] for _, _, record in results]
+
+
+class TestQuery:
+    """Test suite for indexed event queries."""
+
+    def test_filters(self, tmp_path):
+        """Test session, tool and status filters select the matching events."""
+        log_store.append_event('pre_tool_use', tool_event('s1', 'Bash', 1), tmp_path)
+        log_store.append_event('pre_tool_use', tool_event('s1', 'Read', 2), tmp_path)
+        log_store.append_event('pre_tool_use', tool_event('s2', 'Bash', 3, policy={'decision': 'block', 'rule': 'rm'}),
+                               tmp_path)
+        log_store.append_event('post_tool_use', tool_event('s1', 'Bash', 4, tool_response={'stdout': ''}), tmp_path)
+
+        assert numbers(hooks_query.query_events(tmp_path, session='s1')) == [1, 2, 4]
+        assert numbers(hooks_query.query_events(tmp_path, tool='Bash', log='pre_tool_use')) == [1, 3]
+        assert numbers(hooks_query.query_events(tmp_path, status='block')) == [3]
+        assert numbers(hooks_query.query_events(tmp_path, status='ok')) == [4]
+        assert numbers(hooks_query.query_events(tmp_path, limit=2)) == [3, 4]
+
+    def test_time_filter(self, tmp_path):
+        """Test --since style bounds use the logged_at stamp."""
+        log_store.append_event('stop', {'n': 1, 'logged_at': '2020-01-01T00:00:00+00:00'}, tmp_path)
+        log_store.append_event('stop', {'n': 2}, tmp_path)
+
+        since = hooks_query.parse_when('1h')
+        assert numbers(hooks_query.query_events(tmp_path, since=since)) == [2]
+        until = hooks_query.parse_when('2021-01-01T00:00:00+00:00')
+        assert numbers(hooks_query.query_events(tmp_path, until=until)) == [1]
+
+    def test_invalid_time(self):
+        """Test an unparseable time is rejected."""
+        with pytest.raises(ValueError):
+            hooks_query.parse_when('yesterday')
+
+
+class TestIncrementalIndex:
+    """Test suite for keeping the index current."""
+
+    def test_only_new_records_are_read(self, tmp_path):
+        """Test a second update indexes only appended records."""
+        for n in range(3):
+            log_store.append_event('stop', {'n': n}, tmp_path)
+        assert hooks_query.update_index(tmp_path) == 3
+        assert hooks_query.update_index(tmp_path) == 0
+
+        log_store.append_event('stop', {'n': 3}, tmp_path)
+        assert hooks_query.update_index(tmp_path) == 1
+
+    def test_partial_line_waits(self, tmp_path):
+        """Test a record still being written is indexed once complete."""
+        log_store.append_event('stop', {'n': 0}, tmp_path)
+        log_path = log_store.get_log_path('stop', tmp_path)
+        with open(log_path, 'a') as f:
+            f.write('{"n": 1')
+        assert hooks_query.update_index(tmp_path) == 1
+        with open(log_path, 'a') as f:
+            f.write('}\n')
+        assert hooks_query.update_index(tmp_path) == 1
+
+    def test_rolled_and_compressed_logs_are_not_reindexed(self, tmp_path):
+        """Test a log moved into the archive and gzipped keeps its rows once."""
+        log_store.append_event('stop', {'n': 0}, tmp_path)
+        hooks_query.update_index(tmp_path)
+        log_store.append_event('stop', {'n': 1}, tmp_path)
+        log_rotate.force_roll('stop', tmp_path)
+        log_store.append_event('stop', {'n': 2}, tmp_path)
+
+        assert hooks_query.update_index(tmp_path) == 2
+        log_rotate.compress_segments(tmp_path)
+        assert hooks_query.update_index(tmp_path) == 0
+        assert numbers(hooks_query.query_events(tmp_path)) == [0, 1, 2]
+
+    def test_deleted_segments_are_dropped(self, tmp_path):
+        """Test rows of files removed by retention leave the index."""
+        log_store.append_event('stop', {'n': 0}, tmp_path)
+        segment = log_rotate.force_roll('stop', tmp_path)
+        log_store.append_event('stop', {'n': 1}, tmp_path)
+        hooks_query.update_index(tmp_path)
+
+        segment.unlink()
+        assert numbers(hooks_query.query_events(tmp_path)) == [1]
+
+    def test_migrated_legacy_log(self, tmp_path):
+        """Test a legacy array is indexed and not duplicated after migration."""
+        (tmp_path / 'notification.json').write_text(json.dumps([{'n': 0}]))
+        log_store.append_event('notification', {'n': 1}, tmp_path)
+        assert numbers(hooks_query.query_events(tmp_path)) == [0, 1]
+
+        log_store.migrate_log('notification', tmp_path)
+        assert numbers(hooks_query.query_events(tmp_path)) == [0, 1]
+
+
+class TestExport:
+    """Test output formats."""
+
+    def test_csv(self, tmp_path):
+        """Test CSV output has one row per event with the indexed columns."""
+        log_store.append_event('pre_tool_use', tool_event('s1', 'Bash', 1), tmp_path)
+        out = io.StringIO()
+        hooks_query.write_results(hooks_query.query_events(tmp_path), 'csv', out)
+        rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+        assert [(r['log'], r['session_id'], r['tool_name'], r['status']) for r in rows] == \
+            [('pre_tool_use', 's1', 'Bash', 'allow')]
+
+    def test_jsonl(self, tmp_path):
+        """Test JSONL output carries the full record and its log name."""
+        log_store.append_event('pre_tool_use', tool_event('s1', 'Bash', 1, tool_input={'command': 'ls'}), tmp_path)
+        out = io.StringIO()
+        hooks_query.write_results(hooks_query.query_events(tmp_path), 'jsonl', out)
+        record = json.loads(out.getvalue())
+        assert record['tool_input'] == {'command': 'ls'}
+        assert record['log'] == 'pre_tool_use'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
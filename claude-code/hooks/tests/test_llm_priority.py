@@ -19,6 +19,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import stop
+from utils.tts import speaker
 
 
 class TestLLMPrioritySelection:
@@ -143,121 +144,84 @@ class TestLLMPrioritySelection:
                 assert result is not None
                 assert 'oai.py' in result
 
-    def test_get_llm_completion_message_uses_priority_selection(self):
-        """Test get_llm_completion_message uses get_llm_script_path."""
+    def test_announce_completion_uses_priority_selection(self):
+        """Test announce_completion pops pooled messages for the selected LLM script."""
         mock_script_path = '/fake/path/to/gemini.py'
         
-        with patch('stop.get_llm_script_path') as mock_get_path:
-            mock_get_path.return_value = mock_script_path
+        with patch('stop.get_tts_script_path', return_value='/fake/tts.py'), \
+             patch('stop.get_llm_script_path', return_value=mock_script_path) as mock_get_path, \
+             patch('stop.pop_message', return_value="Task complete!") as mock_pop, \
+             patch('stop.announce') as mock_announce:
+            stop.announce_completion()
             
-            with patch('subprocess.run') as mock_run:
-                # Mock successful subprocess run
-                mock_result = MagicMock()
-                mock_result.returncode = 0
-                mock_result.stdout = "Task complete!\n"
-                mock_run.return_value = mock_result
-                
-                result = stop.get_llm_completion_message()
-                
-                # Verify get_llm_script_path was called
-                mock_get_path.assert_called_once()
+            # Verify the pool refills from the priority-selected script
+            mock_get_path.assert_called_once()
+            mock_pop.assert_called_once_with(mock_script_path)
+            mock_announce.assert_called_once_with('/fake/tts.py', text="Task complete!", key='stop')
+
+    def test_announce_completion_fallback_on_empty_pool(self):
+        """Test announce_completion falls back to a random message when the pool is empty."""
+        with patch('stop.get_tts_script_path', return_value='/fake/tts.py'), \
+             patch('stop.get_llm_script_path', return_value=None), \
+             patch('stop.pop_message', return_value=None), \
+             patch('stop.get_completion_messages', return_value=["Fallback message"]), \
+             patch('stop.announce') as mock_announce:
+            with patch('random.choice') as mock_choice:
+                mock_choice.return_value = "Fallback message"
                 
-                # Verify subprocess.run was called with correct script
-                mock_run.assert_called_once_with([
-                    "uv", "run", mock_script_path, "--completion"
-                ], capture_output=True, text=True, timeout=10)
+                stop.announce_completion()
                 
-                # Verify result is cleaned
-                assert result == "Task complete!"
+                mock_choice.assert_called_once_with(["Fallback message"])
+                mock_announce.assert_called_once_with('/fake/tts.py', text="Fallback message", key='stop')
+
+
+class TestSpeakerTextGeneration:
+    """Test suite for the speaker's LLM text generation (uv subprocess path)."""
 
-    def test_get_llm_completion_message_fallback_on_no_script(self):
-        """Test get_llm_completion_message falls back to random message when no LLM script available."""
-        with patch('stop.get_llm_script_path') as mock_get_path:
-            mock_get_path.return_value = None  # No LLM script available
+    ENTRY = {'llm_script': '/fake/path/to/gemini.py', 'fallback': "Fallback message"}
+
+    def test_generate_text_runs_llm_script(self):
+        """Test generate_text runs the LLM script with --completion and strips its output."""
+        with patch('subprocess.run') as mock_run:
+            mock_result = MagicMock()
+            mock_result.returncode = 0
+            mock_result.stdout = "Task complete!\n"
+            mock_run.return_value = mock_result
             
-            with patch('stop.get_completion_messages') as mock_messages:
-                mock_messages.return_value = ["Fallback message"]
-                
-                with patch('random.choice') as mock_choice:
-                    mock_choice.return_value = "Fallback message"
-                    
-                    result = stop.get_llm_completion_message()
-                    
-                    # Should return fallback message
-                    assert result == "Fallback message"
-                    mock_choice.assert_called_once_with(["Fallback message"])
-
-    def test_get_llm_completion_message_fallback_on_subprocess_error(self):
-        """Test get_llm_completion_message falls back on subprocess failure."""
-        mock_script_path = '/fake/path/to/gemini.py'
-        
-        with patch('stop.get_llm_script_path') as mock_get_path:
-            mock_get_path.return_value = mock_script_path
+            result = speaker.generate_text(self.ENTRY)
             
-            with patch('subprocess.run') as mock_run:
-                # Mock subprocess failure
-                mock_run.side_effect = subprocess.SubprocessError("Failed")
-                
-                with patch('stop.get_completion_messages') as mock_messages:
-                    mock_messages.return_value = ["Fallback message"]
-                    
-                    with patch('random.choice') as mock_choice:
-                        mock_choice.return_value = "Fallback message"
-                        
-                        result = stop.get_llm_completion_message()
-                        
-                        # Should fall back to random message
-                        assert result == "Fallback message"
-
-    def test_get_llm_completion_message_fallback_on_empty_output(self):
-        """Test get_llm_completion_message falls back when subprocess returns empty output."""
-        mock_script_path = '/fake/path/to/gemini.py'
-        
-        with patch('stop.get_llm_script_path') as mock_get_path:
-            mock_get_path.return_value = mock_script_path
+            mock_run.assert_called_once_with(
+                ['uv', 'run', '/fake/path/to/gemini.py', '--completion'],
+                capture_output=True, text=True, timeout=speaker.LLM_TIMEOUT_SECONDS,
+            )
+            assert result == "Task complete!"
+
+    def test_generate_text_fallback_on_subprocess_error(self):
+        """Test generate_text falls back on subprocess failure."""
+        with patch('subprocess.run') as mock_run:
+            mock_run.side_effect = subprocess.SubprocessError("Failed")
             
-            with patch('subprocess.run') as mock_run:
-                # Mock subprocess with empty output
-                mock_result = MagicMock()
-                mock_result.returncode = 0
-                mock_result.stdout = ""  # Empty output
-                mock_run.return_value = mock_result
-                
-                with patch('stop.get_completion_messages') as mock_messages:
-                    mock_messages.return_value = ["Fallback message"]
-                    
-                    with patch('random.choice') as mock_choice:
-                        mock_choice.return_value = "Fallback message"
-                        
-                        result = stop.get_llm_completion_message()
-                        
-                        # Should fall back to random message
-                        assert result == "Fallback message"
-
-    def test_get_llm_completion_message_fallback_on_nonzero_exit(self):
-        """Test get_llm_completion_message falls back when subprocess returns non-zero exit code."""
-        mock_script_path = '/fake/path/to/gemini.py'
-        
-        with patch('stop.get_llm_script_path') as mock_get_path:
-            mock_get_path.return_value = mock_script_path
+            assert speaker.generate_text(self.ENTRY) == "Fallback message"
+
+    def test_generate_text_fallback_on_empty_output(self):
+        """Test generate_text falls back when subprocess returns empty output."""
+        with patch('subprocess.run') as mock_run:
+            mock_result = MagicMock()
+            mock_result.returncode = 0
+            mock_result.stdout = ""  # Empty output
+            mock_run.return_value = mock_result
             
-            with patch('subprocess.run') as mock_run:
-                # Mock subprocess with error exit code
-                mock_result = MagicMock()
-                mock_result.returncode = 1  # Error exit code
-                mock_result.stdout = "Error output"
-                mock_run.return_value = mock_result
-                
-                with patch('stop.get_completion_messages') as mock_messages:
-                    mock_messages.return_value = ["Fallback message"]
-                    
-                    with patch('random.choice') as mock_choice:
-                        mock_choice.return_value = "Fallback message"
-                        
-                        result = stop.get_llm_completion_message()
-                        
-                        # Should fall back to random message
-                        assert result == "Fallback message"
+            assert speaker.generate_text(self.ENTRY) == "Fallback message"
+
+    def test_generate_text_fallback_on_nonzero_exit(self):
+        """Test generate_text falls back when subprocess returns non-zero exit code."""
+        with patch('subprocess.run') as mock_run:
+            mock_result = MagicMock()
+            mock_result.returncode = 1  # Error exit code
+            mock_result.stdout = "Error output"
+            mock_run.return_value = mock_result
+            
+            assert speaker.generate_text(self.ENTRY) == "Fallback message"
 
 
 class TestAPIKeyPriorityCombinations:
@@ -0,0 +1,142 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import os
+import sys
+import time
+import pytest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add the hooks directory to path to import utils (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import log_rotate, log_store, transcript_backup
+
+
+@pytest.fixture
+def no_spawn():
+    """Record maintenance requests instead of starting a process."""
+    with patch.object(log_store, 'spawn_maintenance') as spawn:
+        yield spawn
+
+
+def age(path, seconds):
+    """Set a file's mtime to seconds ago."""
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+class TestRollover:
+    """Test suite for in-process rollover."""
+
+    def test_rolls_past_size_limit(self, tmp_path, no_spawn):
+        """Test a log past the size limit moves into the archive and starts fresh."""
+        with patch.dict(os.environ, {'CCAOS_LOG_MAX_MB': '0.0001'}):
+            for n in range(5):
+                log_store.append_event('stop', {'n': n, 'pad': 'x' * 40}, tmp_path)
+
+        assert log_store.list_segments('stop', tmp_path)
+        assert no_spawn.called
+        assert [r['n'] for r in log_store.read_events('stop', tmp_path)] == list(range(5))
+
+    def test_rolls_after_max_age(self, tmp_path, no_spawn):
+        """Test a log rolls once the last rollover is older than the age limit."""
+        log_store.append_event('stop', {'n': 0}, tmp_path)
+        assert not log_store.list_segments('stop', tmp_path)
+
+        age(log_store.get_stamp_path('stop', tmp_path), 25 * 3600)
+        log_store.append_event('stop', {'n': 1}, tmp_path)
+
+        assert len(log_store.list_segments('stop', tmp_path)) == 1
+        assert not log_store.get_log_path('stop', tmp_path).exists()
+        assert [r['n'] for r in log_store.read_events('stop', tmp_path)] == [0, 1]
+
+    def test_rotation_disabled(self, tmp_path, no_spawn):
+        """Test CCAOS_LOG_ROTATE=0 never rolls."""
+        with patch.dict(os.environ, {'CCAOS_LOG_ROTATE': '0', 'CCAOS_LOG_MAX_MB': '0'}):
+            log_store.append_event('stop', {'n': 0}, tmp_path)
+            log_store.append_event('stop', {'n': 1}, tmp_path)
+        assert not log_store.list_segments('stop', tmp_path)
+        assert not no_spawn.called
+
+
+class TestMaintenance:
+    """Test suite for compression and retention."""
+
+    def test_compressed_segments_are_read(self, tmp_path, no_spawn):
+        """Test gzipped segments are read back in order with the current log."""
+        for n in range(3):
+            log_store.append_event('stop', {'n': n}, tmp_path)
+            log_rotate.force_roll('stop', tmp_path)
+        log_store.append_event('stop', {'n': 3}, tmp_path)
+
+        assert log_rotate.compress_segments(tmp_path) == 3
+        segments = log_store.list_segments('stop', tmp_path)
+        assert all(p.name.endswith('.jsonl.gz') for p in segments)
+        assert [r['n'] for r in log_store.read_events('stop', tmp_path)] == [0, 1, 2, 3]
+
+    def test_segments_of_similar_names_are_separate(self, tmp_path, no_spawn):
+        """Test a log's segments do not include those of a log sharing its prefix."""
+        log_store.append_event('stop', {'n': 0}, tmp_path)
+        log_store.append_event('stop.extra', {'n': 1}, tmp_path)
+        log_rotate.force_roll('stop', tmp_path)
+        log_rotate.force_roll('stop.extra', tmp_path)
+        assert len(log_store.list_segments('stop', tmp_path)) == 1
+
+    def test_retention_removes_only_expired(self, tmp_path, no_spawn):
+        """Test retention deletes old rolled data and keeps recent data and current logs."""
+        log_store.append_event('stop', {'n': 0}, tmp_path)
+        old_segment = log_rotate.force_roll('stop', tmp_path)
+        log_store.append_event('stop', {'n': 1}, tmp_path)
+        new_segment = log_rotate.force_roll('stop', tmp_path)
+        log_store.append_event('stop', {'n': 2}, tmp_path)
+        log_rotate.compress_segments(tmp_path)
+
+        old_gz = old_segment.with_name(old_segment.name + '.gz')
+        age(old_gz, 40 * 86400)
+        chat = tmp_path / 'chat'
+        chat.mkdir()
+        (chat / 'old.jsonl').write_text('{}\n')
+        (chat / 'old.state').write_text('{}')
+        age(chat / 'old.jsonl', 40 * 86400)
+        age(chat / 'old.state', 40 * 86400)
+        migrated = tmp_path / f'pre_tool_use{log_store.MIGRATED_SUFFIX}'
+        migrated.write_text('[]')
+        age(migrated, 40 * 86400)
+        age(log_store.get_log_path('stop', tmp_path), 40 * 86400)
+
+        assert log_rotate.apply_retention(tmp_path) == 4
+        assert not old_gz.exists()
+        assert new_segment.with_name(new_segment.name + '.gz').exists()
+        assert log_store.get_log_path('stop', tmp_path).exists()
+        assert [r['n'] for r in log_store.read_events('stop', tmp_path)] == [1, 2]
+
+    def test_retention_prunes_backup_chunks(self, tmp_path):
+        """Test expired transcript snapshots are removed along with their chunks."""
+        transcript = tmp_path / 'session.jsonl'
+        transcript.write_text('{"type": "user"}\n')
+        manifest = transcript_backup.backup_transcript(transcript, 'auto', tmp_path)
+        age(manifest, 40 * 86400)
+
+        assert log_rotate.apply_retention(tmp_path) == 2
+        assert transcript_backup.list_snapshots(log_dir=tmp_path) == []
+        assert not list((transcript_backup.get_backup_dir(tmp_path) / 'chunks').glob('*/*.gz'))
+
+    def test_single_maintainer(self, tmp_path):
+        """Test maintenance is skipped while another maintainer holds the lock."""
+        held = log_rotate.acquire_maintain_lock(tmp_path)
+        try:
+            assert log_rotate.maintain(tmp_path) is None
+        finally:
+            held.close()
+        assert log_rotate.maintain(tmp_path) == (0, 0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,108 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import json
+import sys
+import pytest
+from pathlib import Path
+
+# Add the hooks directory to path to import utils (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import log_store
+
+
+class TestAppendEvent:
+    """Test suite for JSONL appends."""
+
+    def test_append_creates_jsonl(self, tmp_path):
+        """Test append_event creates the log directory and writes one line per record."""
+        log_dir = tmp_path / 'logs'
+        log_store.append_event('pre_tool_use', {'tool_name': 'Bash'}, log_dir)
+        log_store.append_event('pre_tool_use', {'tool_name': 'Read'}, log_dir)
+
+        lines = (log_dir / 'pre_tool_use.jsonl').read_text().splitlines()
+        assert [json.loads(line)['tool_name'] for line in lines] == ['Bash', 'Read']
+
+    def test_append_does_not_touch_legacy_array(self, tmp_path):
+        """Test appending leaves an existing legacy JSON array untouched."""
+        legacy = tmp_path / 'stop.json'
+        legacy.write_text(json.dumps([{'n': 1}], indent=2))
+
+        log_store.append_event('stop', {'n': 2}, tmp_path)
+
+        assert json.loads(legacy.read_text()) == [{'n': 1}]
+
+    def test_append_follows_replaced_file(self, tmp_path):
+        """Test records land in the current file after the log is replaced."""
+        log_store.append_event('stop', {'n': 1}, tmp_path)
+        log_path = tmp_path / 'stop.jsonl'
+        replacement = tmp_path / 'replacement.jsonl'
+        replacement.write_text(log_path.read_text())
+        replacement.replace(log_path)
+
+        log_store.append_event('stop', {'n': 2}, tmp_path)
+
+        assert [r['n'] for r in log_store.read_events('stop', tmp_path)] == [1, 2]
+
+
+class TestReadEvents:
+    """Test suite for the array view over legacy and JSONL logs."""
+
+    def test_read_merges_legacy_then_jsonl(self, tmp_path):
+        """Test read_events returns legacy records before JSONL records."""
+        (tmp_path / 'notification.json').write_text(json.dumps([{'n': 1}, {'n': 2}]))
+        log_store.append_event('notification', {'n': 3}, tmp_path)
+
+        assert [r['n'] for r in log_store.read_events('notification', tmp_path)] == [1, 2, 3]
+
+    def test_read_skips_corrupt_lines(self, tmp_path):
+        """Test a partial trailing line does not break the reader."""
+        (tmp_path / 'post_tool_use.jsonl').write_text('{"n": 1}\n{"n": \n')
+
+        assert log_store.read_events('post_tool_use', tmp_path) == [{'n': 1}]
+
+    def test_read_missing_log(self, tmp_path):
+        """Test reading a log that was never written returns an empty list."""
+        assert log_store.read_events('session_start', tmp_path) == []
+
+
+class TestMigrateLog:
+    """Test suite for the one-shot legacy migrator."""
+
+    def test_migrate_preserves_order(self, tmp_path):
+        """Test migration places legacy records ahead of existing JSONL records."""
+        (tmp_path / 'pre_compact.json').write_text(json.dumps([{'n': 1}, {'n': 2}], indent=2))
+        log_store.append_event('pre_compact', {'n': 3}, tmp_path)
+
+        assert log_store.migrate_log('pre_compact', tmp_path) == 2
+
+        assert not (tmp_path / 'pre_compact.json').exists()
+        assert (tmp_path / 'pre_compact.json.migrated').exists()
+        assert [r['n'] for r in log_store.read_events('pre_compact', tmp_path)] == [1, 2, 3]
+
+    def test_migrate_is_idempotent(self, tmp_path):
+        """Test running the migrator twice does not duplicate records."""
+        (tmp_path / 'stop.json').write_text(json.dumps([{'n': 1}]))
+
+        log_store.migrate_log('stop', tmp_path)
+        assert log_store.migrate_log('stop', tmp_path) == 0
+        assert log_store.read_events('stop', tmp_path) == [{'n': 1}]
+
+    def test_find_legacy_logs(self, tmp_path):
+        """Test discovery of legacy logs ignores JSONL and migrated files."""
+        (tmp_path / 'stop.json').write_text('[]')
+        (tmp_path / 'chat.json').write_text('[]')
+        (tmp_path / 'post_tool_use.jsonl').write_text('')
+        (tmp_path / 'old.json.migrated').write_text('[]')
+
+        assert log_store.find_legacy_logs(tmp_path) == ['stop']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
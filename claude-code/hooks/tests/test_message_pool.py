@@ -0,0 +1,78 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import os
+import sys
+import pytest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add the hooks directory to path to import utils (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.llm import message_pool
+
+
+@pytest.fixture
+def pool_dir(tmp_path):
+    """Point the message pool at a temporary directory."""
+    with patch.dict(os.environ, {'CCAOS_MESSAGE_POOL_DIR': str(tmp_path), 'ENGINEER_NAME': 'Ada'}):
+        yield tmp_path
+
+
+class TestMessagePool:
+    """Test suite for the pre-generated completion message pool."""
+
+    def test_pop_in_order(self, pool_dir):
+        """Test pooled messages are handed out oldest first."""
+        message_pool.add_messages(['All set, Ada!', 'Done!'])
+        with patch.object(message_pool, 'spawn_refill'):
+            assert message_pool.pop_message() == 'All set, Ada!'
+            assert message_pool.pop_message() == 'Done!'
+            assert message_pool.pop_message() is None
+
+    def test_low_water_triggers_background_refill(self, pool_dir):
+        """Test a refill is spawned, not awaited, once the pool runs low."""
+        message_pool.add_messages(['one', 'two', 'three'])
+        with patch.object(message_pool, 'spawn_refill') as mock_spawn:
+            message_pool.pop_message('/llm/gemini.py')
+        mock_spawn.assert_called_once_with('/llm/gemini.py', message_pool.BATCH_SIZE)
+
+    def test_no_refill_without_llm_script(self, pool_dir):
+        """Test no refill is attempted when no LLM provider is configured."""
+        with patch.object(message_pool, 'spawn_refill') as mock_spawn:
+            assert message_pool.pop_message(None) is None
+        mock_spawn.assert_not_called()
+
+    def test_refill_adds_one_batch(self, pool_dir):
+        """Test a refill stores one batch request's messages without duplicates."""
+        message_pool.add_messages(['All done!'])
+        with patch.object(message_pool, 'request_batch', return_value=['All done!', 'Ready!']) as mock_batch:
+            assert message_pool.refill('/llm/oai.py', batch=2) == 2
+        mock_batch.assert_called_once_with('/llm/oai.py', 2)
+        assert message_pool.read_pool() == ['All done!', 'Ready!']
+
+    def test_pools_are_per_engineer(self, pool_dir):
+        """Test each engineer name gets its own pool."""
+        message_pool.add_messages(['Nice work, Ada!'])
+        with patch.dict(os.environ, {'ENGINEER_NAME': 'Grace'}):
+            assert message_pool.read_pool() == []
+        assert message_pool.read_pool() == ['Nice work, Ada!']
+
+    def test_refill_skipped_while_running(self, pool_dir):
+        """Test a second refill does nothing while one holds the lock."""
+        lock_file = message_pool.acquire_refill_lock()
+        try:
+            if message_pool.fcntl is not None:
+                assert message_pool.refill('/llm/oai.py') is None
+        finally:
+            lock_file.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
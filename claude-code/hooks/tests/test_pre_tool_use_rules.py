@@ -0,0 +1,181 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import json
+import os
+import sys
+import pytest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add the hooks directory to path to import pre_tool_use (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pre_tool_use
+from utils.rules import Rule, RuleBook, load_rules, make_rule
+
+
+@pytest.fixture(autouse=True)
+def rule_cache_dir(tmp_path):
+    """Keep compiled rule sets out of the real cache directory."""
+    with patch.dict(os.environ, {'CCAOS_RULE_CACHE_DIR': str(tmp_path / 'rule-cache')}):
+        yield
+
+
+class TestRuleEngine:
+    """Test suite for the combined rule matcher."""
+
+    def test_reports_matching_rule(self):
+        """Test the rule that fired is returned by name."""
+        book = RuleBook([
+            Rule('first', 'cmd', 'block', r'\bfoo\b'),
+            Rule('second', 'cmd', 'block', r'\bbar\b'),
+        ])
+        assert book.match('cmd', 'echo bar').name == 'second'
+        assert book.match('cmd', 'echo baz') is None
+
+    def test_allow_takes_precedence(self):
+        """Test an allow rule in the same scope overrides block rules."""
+        book = RuleBook([
+            Rule('safe', 'cmd', 'allow', r'^safe'),
+            Rule('danger', 'cmd', 'block', r'danger'),
+        ])
+        assert book.match('cmd', 'safe danger') is None
+        assert book.match('cmd', 'danger').name == 'danger'
+
+    def test_scopes_are_independent(self):
+        """Test rules only apply to their own scope."""
+        book = RuleBook([Rule('path', 'file_path', 'block', r'secret')])
+        assert book.match('bash', 'cat secret') is None
+        assert book.match('file_path', '/secret').name == 'path'
+
+    def test_invalid_pattern_rejected(self):
+        """Test a rule with a broken regex raises ValueError."""
+        with pytest.raises(ValueError):
+            make_rule({'name': 'bad', 'scope': 'bash', 'pattern': '('})
+
+    @pytest.mark.parametrize('pattern', [r'(?P<r1>zzz)', r'(foo)\1', r'(a)?(?(1)b|c)'])
+    def test_group_references_rejected(self, pattern):
+        """Test named groups and backreferences, which break inside the combined pattern, are rejected."""
+        with pytest.raises(ValueError):
+            make_rule({'name': 'bad', 'scope': 'bash', 'pattern': pattern})
+
+    def test_global_inline_flags_rejected(self):
+        """Test a leading (?i), which compiles alone but not inside the combined pattern, names the rule."""
+        with pytest.raises(ValueError, match='rule secret-read'):
+            make_rule({'name': 'secret-read', 'scope': 'bash', 'pattern': '(?i)secret'})
+        assert make_rule({'name': 'scoped', 'scope': 'bash', 'pattern': '(?i:secret)'}).pattern == '(?i:secret)'
+
+    def test_clashing_rule_file_falls_back(self, tmp_path):
+        """Test a rule file whose patterns do not combine keeps the defaults instead of failing open."""
+        rule_file = tmp_path / 'rules.json'
+        rule_file.write_text(json.dumps({'rules': [
+            {'name': 'named', 'scope': 'rm', 'pattern': '(?P<r1>zzz)'},
+        ]}))
+        book = load_rules((Rule('base', 'rm', 'block', 'base'),), rule_file)
+        assert book.match('rm', 'base').name == 'base'
+
+    def test_rule_file_extends_defaults(self, tmp_path):
+        """Test rules from a file are added to the defaults."""
+        rule_file = tmp_path / 'rules.json'
+        rule_file.write_text(json.dumps({'rules': [
+            {'name': 'no-force-push', 'scope': 'bash', 'pattern': r'git\s+push\s+.*--force'}
+        ]}))
+        book = load_rules((Rule('base', 'bash', 'block', 'base'),), rule_file)
+        assert book.match('bash', 'git push origin --force').name == 'no-force-push'
+        assert book.match('bash', 'base').name == 'base'
+
+    def test_rule_file_replaces_defaults(self, tmp_path):
+        """Test extend_defaults: false drops the built-in rules."""
+        rule_file = tmp_path / 'rules.json'
+        rule_file.write_text(json.dumps({'extend_defaults': False, 'rules': []}))
+        book = load_rules((Rule('base', 'bash', 'block', 'base'),), rule_file)
+        assert book.match('bash', 'base') is None
+
+    def test_invalid_rule_file_falls_back(self, tmp_path):
+        """Test a malformed rule file keeps the default rules."""
+        rule_file = tmp_path / 'rules.json'
+        rule_file.write_text('{not json')
+        book = load_rules((Rule('base', 'bash', 'block', 'base'),), rule_file)
+        assert book.match('bash', 'base').name == 'base'
+
+
+class TestDangerousRmRules:
+    """Test suite for the default rm policy."""
+
+    @pytest.mark.parametrize('command', [
+        'rm -rf /',
+        'rm -fr ~',
+        'rm --recursive --force build',
+        'rm -r ../other',
+        'sudo rm -Rf /var/lib',
+        'rm -rf /tmp/cache',
+        'RM -RF /',
+        'setsid rm -rf /',
+        'ionice -c3 rm -rf /',
+        'flock /tmp/l rm -rf /',
+        'flock /tmp/l -c "rm -rf /"',
+        'chroot / rm -rf /',
+        'watch rm -rf /',
+        'su -c "rm -rf /"',
+        'runuser -u deploy -- sh -c "rm -rf ~"',
+        'ssh host rm -rf /',
+        'ssh -p 2222 host "rm -rf /"',
+        'unknownwrapper --flag rm -rf /',
+    ])
+    def test_blocks(self, command):
+        """Test dangerous rm commands are blocked."""
+        assert pre_tool_use.is_dangerous_rm_command(command)
+
+    @pytest.mark.parametrize('command', [
+        'rm -rf tmp/build',
+        'rm file.txt',
+        'rm -r build',
+        'ls -la',
+        'ssh host ls /',
+        'su -c "rm -rf tmp/build"',
+    ])
+    def test_allows(self, command):
+        """Test safe rm commands and project tmp cleanup are allowed."""
+        assert not pre_tool_use.is_dangerous_rm_command(command)
+
+    def test_reports_rule_name(self):
+        """Test the firing rule is reported for rm -rf."""
+        assert pre_tool_use.find_dangerous_rm_rule('rm -rf /').name == 'rm-recursive-force'
+
+
+class TestEnvFileRules:
+    """Test suite for the default .env policy."""
+
+    def test_file_tools(self):
+        """Test .env paths are blocked and .env.sample is allowed."""
+        assert pre_tool_use.is_env_file_access('Read', {'file_path': '/app/.env'})
+        assert not pre_tool_use.is_env_file_access('Write', {'file_path': '/app/.env.sample'})
+
+    def test_bash_commands(self):
+        """Test Bash access to .env is blocked."""
+        assert pre_tool_use.is_env_file_access('Bash', {'command': 'cat .env'})
+        assert not pre_tool_use.is_env_file_access('Bash', {'command': 'cat .env.sample'})
+
+    def test_other_tools_ignored(self):
+        """Test tools without paths or commands are never blocked."""
+        assert not pre_tool_use.is_env_file_access('Glob', {'pattern': '.env'})
+
+    def test_custom_rule_file(self, tmp_path):
+        """Test CCAOS_PRE_TOOL_USE_RULES adds rules to the policy."""
+        rule_file = tmp_path / 'pre_tool_use.json'
+        rule_file.write_text(json.dumps({'rules': [
+            {'name': 'no-secrets-dir', 'scope': 'file_path', 'pattern': '/secrets/'}
+        ]}))
+        with patch.dict(os.environ, {'CCAOS_PRE_TOOL_USE_RULES': str(rule_file)}):
+            rule = pre_tool_use.find_env_file_rule('Read', {'file_path': '/app/secrets/key'})
+        assert rule.name == 'no-secrets-dir'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,95 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import json
+import os
+import subprocess
+import sys
+import pytest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add the hooks directory to path to import utils (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import log_store, profiler
+
+HOOKS_DIR = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def profiling(tmp_path):
+    """Turn profiling on with timings written under tmp_path."""
+    with patch.dict(os.environ, {'CCAOS_PROFILE': '1', 'CCAOS_PROFILE_DIR': str(tmp_path / 'profile')}):
+        yield tmp_path / 'profile'
+
+
+class TestProfiler:
+    """Test suite for hook timing records."""
+
+    def test_disabled_writes_nothing(self, tmp_path):
+        """Test hooks run untimed when CCAOS_PROFILE is not set."""
+        event = {'session_id': 's0', 'tool_name': 'Read'}
+        env = {k: v for k, v in os.environ.items() if k != 'CCAOS_PROFILE'}
+        env['CCAOS_PROFILE_DIR'] = str(tmp_path / 'profile')
+        subprocess.run([sys.executable, str(HOOKS_DIR / 'post_tool_use.py')],
+                       input=json.dumps(event), capture_output=True, text=True, cwd=tmp_path, env=env)
+        assert not (tmp_path / 'profile').exists()
+
+    def test_records_phases_and_exit_code(self, profiling):
+        """Test phases are summed and the exit code is kept."""
+        profiler.begin('pre_tool_use')
+        profiler.set_session('s1')
+        with profiler.phase('parse'):
+            pass
+        with profiler.phase('policy'):
+            pass
+        with profiler.phase('policy'):
+            pass
+        profiler.finish(2)
+        records = profiler.read_timings()
+        assert len(records) == 1
+        record = records[0]
+        assert (record['hook'], record['session_id'], record['exit']) == ('pre_tool_use', 's1', 2)
+        assert set(record['phases']) == {'parse', 'policy'}
+        assert record['total_ms'] >= record['phases']['policy']
+
+    def test_phase_as_decorator(self, profiling, tmp_path):
+        """Test decorated functions, such as append_event, are timed as phases."""
+        profiler.begin('post_tool_use')
+        log_store.append_event('post_tool_use', {'n': 1}, tmp_path / 'logs')
+        profiler.finish()
+        assert 'log_write' in profiler.read_timings()[0]['phases']
+
+    def test_phase_outside_hook_is_ignored(self, profiling):
+        """Test phases outside a timed hook run do not leak into the next record."""
+        with profiler.phase('parse'):
+            pass
+        assert profiler.finish() is None
+
+    def test_summary_percentiles(self):
+        """Test p50/p95/p99 are nearest-rank over each hook and phase."""
+        records = [{'hook': 'pre_tool_use', 'total_ms': float(n), 'phases': {'parse': n / 10}}
+                   for n in range(1, 101)]
+        summary = profiler.summarize(records)['pre_tool_use']
+        assert summary['total'] == {'count': 100, 'p50': 50.0, 'p95': 95.0, 'p99': 99.0}
+        assert summary['phases']['parse']['p50'] == 5.0
+
+    def test_hook_process_writes_timings(self, profiling, tmp_path):
+        """Test a real PreToolUse run records its parse, policy and log phases."""
+        event = {'session_id': 's2', 'tool_name': 'Bash', 'tool_input': {'command': 'ls'}}
+        result = subprocess.run([sys.executable, str(HOOKS_DIR / 'pre_tool_use.py')],
+                                input=json.dumps(event), capture_output=True, text=True, cwd=tmp_path)
+        assert result.returncode == 0
+        record = profiler.read_timings(session='s2')[0]
+        assert record['hook'] == 'pre_tool_use'
+        assert {'parse', 'policy', 'log_write'} <= set(record['phases'])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,158 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import json
+import os
+import re
+import sys
+import pytest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add the hooks directory to path to import user_prompt_submit (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import user_prompt_submit
+from utils import rules
+from utils.rules import Rule, RuleBook
+
+
+@pytest.fixture(autouse=True)
+def rule_cache_dir(tmp_path):
+    """Use an empty disk cache and in-process cache for each test."""
+    with patch.dict(os.environ, {'CCAOS_RULE_CACHE_DIR': str(tmp_path / 'rule-cache')}), \
+            patch.dict(rules._cache, clear=True):
+        yield tmp_path / 'rule-cache'
+
+
+def write_rules(path, specs):
+    path.write_text(json.dumps({'rules': specs}))
+    return path
+
+
+class TestLiteralRules:
+    """Test suite for literal rules merged into a trie."""
+
+    def test_trie_matches_exactly_the_words(self):
+        """Test the trie pattern matches each word and nothing shorter."""
+        words = ['rm -rf', 'rm -r', 'drop table', 'drop database', 'a.b']
+        pattern = re.compile(rules.trie_pattern(words))
+        for word in words:
+            assert pattern.fullmatch(word)
+        assert not pattern.fullmatch('drop')
+        assert not pattern.fullmatch('axb')
+
+    def test_reports_matching_rule(self):
+        """Test the literal that matched maps back to its rule."""
+        book = RuleBook([
+            Rule(f'phrase-{n}', 'prompt', 'block', f'forbidden phrase {n:04d}', literal=True)
+            for n in range(2000)
+        ])
+        assert book.match('prompt', 'log line\n' * 1000 + 'forbidden phrase 1234 here').name == 'phrase-1234'
+        assert book.match('prompt', 'forbidden phrase') is None
+
+    def test_ignore_case(self):
+        """Test case-insensitive literals match any case and keep their rule."""
+        book = RuleBook([
+            Rule('secret', 'prompt', 'block', 'Private Key', ignore_case=True, literal=True),
+            Rule('exact', 'prompt', 'block', 'TOKEN', literal=True),
+        ])
+        assert book.match('prompt', 'my PRIVATE KEY is').name == 'secret'
+        assert book.match('prompt', 'my token') is None
+        assert book.match('prompt', 'my TOKEN').name == 'exact'
+
+    @pytest.mark.parametrize('prompt', ['İGNORE PREVIOUS instructions', 'STRAßE', 'straße'])
+    def test_ignore_case_beyond_lower(self, prompt):
+        """Test text whose lower() differs from the rule's key still blocks."""
+        book = RuleBook([
+            Rule('ignore', 'prompt', 'block', 'ignore previous', ignore_case=True, literal=True),
+            Rule('street', 'prompt', 'block', 'Straße', ignore_case=True, literal=True),
+        ])
+        assert book.match('prompt', prompt).name == ('ignore' if 'GNORE' in prompt else 'street')
+
+    def test_mixed_with_regex_rules(self):
+        """Test literal and regex rules share one scope."""
+        book = RuleBook([
+            Rule('literal', 'prompt', 'block', '(not a regex)', literal=True),
+            Rule('regex', 'prompt', 'block', r'\bsudo\s+rm\b'),
+        ])
+        assert book.match('prompt', 'please (not a regex)').name == 'literal'
+        assert book.match('prompt', 'sudo  rm x').name == 'regex'
+
+    def test_empty_literal_rejected(self):
+        """Test an empty literal, which would match every prompt, is invalid."""
+        with pytest.raises(ValueError):
+            rules.make_rule({'name': 'empty', 'scope': 'prompt', 'pattern': '', 'literal': True})
+
+
+class TestCompiledCache:
+    """Test suite for the on-disk cache of compiled rule sets."""
+
+    def test_reused_across_processes(self, tmp_path, rule_cache_dir):
+        """Test a fresh process loads the compiled rules instead of rebuilding them."""
+        rule_file = write_rules(tmp_path / 'rules.json', [
+            {'name': 'phrase', 'scope': 'prompt', 'pattern': 'launch codes', 'literal': True},
+        ])
+        rules.load_rules((), rule_file)
+        assert len(list(rule_cache_dir.glob('*.json'))) == 1
+
+        rules._cache.clear()
+        with patch.object(rules, 'build_rules', side_effect=AssertionError('rebuilt')):
+            book = rules.load_rules((), rule_file)
+        assert book.match('prompt', 'the launch codes are').name == 'phrase'
+
+    def test_changed_file_is_recompiled(self, tmp_path, rule_cache_dir):
+        """Test editing the rule file produces a new compiled entry."""
+        rule_file = write_rules(tmp_path / 'rules.json', [
+            {'name': 'old', 'scope': 'prompt', 'pattern': 'old phrase', 'literal': True},
+        ])
+        rules.load_rules((), rule_file)
+        write_rules(rule_file, [{'name': 'new', 'scope': 'prompt', 'pattern': 'new phrase', 'literal': True}])
+        rules._cache.clear()
+
+        book = rules.load_rules((), rule_file)
+        assert book.match('prompt', 'old phrase') is None
+        assert book.match('prompt', 'new phrase').name == 'new'
+        assert len(list(rule_cache_dir.glob('*.json'))) == 2
+
+    def test_corrupt_cache_is_rebuilt(self, tmp_path, rule_cache_dir):
+        """Test an unreadable cache entry falls back to compiling the rules."""
+        rule_file = write_rules(tmp_path / 'rules.json', [
+            {'name': 'phrase', 'scope': 'prompt', 'pattern': 'phrase', 'literal': True},
+        ])
+        rules.load_rules((), rule_file)
+        for cached in rule_cache_dir.glob('*.json'):
+            cached.write_text('{not json')
+        rules._cache.clear()
+
+        assert rules.load_rules((), rule_file).match('prompt', 'a phrase').name == 'phrase'
+
+
+class TestValidatePrompt:
+    """Test suite for user_prompt_submit validation."""
+
+    def test_no_rules_allows(self, tmp_path):
+        """Test prompts pass when no rule file exists."""
+        with patch.dict(os.environ, {'CCAOS_USER_PROMPT_RULES': str(tmp_path / 'missing.json')}):
+            assert user_prompt_submit.validate_prompt('rm -rf /') == (True, None)
+
+    def test_rule_file_blocks(self, tmp_path):
+        """Test a configured rule blocks the prompt with its message."""
+        rule_file = write_rules(tmp_path / 'user_prompt_submit.json', [
+            {'name': 'rm-root', 'scope': 'prompt', 'pattern': 'rm -rf /', 'literal': True,
+             'ignore_case': True, 'message': 'Dangerous command detected'},
+        ])
+        with patch.dict(os.environ, {'CCAOS_USER_PROMPT_RULES': str(rule_file)}):
+            assert user_prompt_submit.validate_prompt('Please RM -RF / now') == \
+                (False, 'Dangerous command detected')
+            assert user_prompt_submit.find_prompt_rule('Please RM -RF / now').name == 'rm-root'
+            assert user_prompt_submit.validate_prompt('rm -rf build') == (True, None)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,221 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import os
+import sys
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from pathlib import Path
+
+# Add the hooks directory to path to import utils (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.llm import message_pool, providers
+
+
+@pytest.fixture(autouse=True)
+def fresh_clients(tmp_path):
+    """Start every test without cached clients, scripts or latency stats."""
+    providers._clients.clear()
+    providers._scripts.clear()
+    with patch.object(providers, 'get_latency_path', return_value=tmp_path / 'latency.json'):
+        yield
+    providers._clients.clear()
+    providers._scripts.clear()
+
+
+class TestProviders:
+    """Test suite for the shared LLM provider layer."""
+
+    def test_available_providers_in_priority_order(self):
+        """Test providers are listed Gemini > OpenAI > Anthropic."""
+        env = {'ANTHROPIC_API_KEY': 'a', 'OPENAI_API_KEY': 'o', 'GEMINI_API_KEY': 'g'}
+        with patch.dict(os.environ, env, clear=True):
+            assert providers.available_providers() == ['gemini', 'openai', 'anthropic']
+
+    def test_gemini_prefers_google_api_key(self):
+        """Test GOOGLE_API_KEY is used before GEMINI_API_KEY."""
+        with patch.dict(os.environ, {'GOOGLE_API_KEY': 'google', 'GEMINI_API_KEY': 'gemini'}, clear=True):
+            assert providers.get_api_key('gemini') == 'google'
+
+    def test_prompt_without_key_returns_none(self):
+        """Test no client is built and None is returned without an API key."""
+        with patch.dict(os.environ, {}, clear=True):
+            with patch.object(providers, 'create_client') as mock_create:
+                assert providers.prompt_llm('anthropic', 'test') is None
+        mock_create.assert_not_called()
+
+    def test_client_is_shared_between_prompts(self):
+        """Test repeat prompts reuse one client instead of reconnecting."""
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'key'}, clear=True):
+            with patch.object(providers, 'create_client', return_value=MagicMock()) as mock_create:
+                with patch.object(providers, 'send_prompt', return_value='  Done!\n'):
+                    assert providers.prompt_llm('openai', 'one') == 'Done!'
+                    assert providers.prompt_llm('openai', 'two') == 'Done!'
+        mock_create.assert_called_once_with('openai', 'key')
+
+    def test_client_rebuilt_when_key_changes(self):
+        """Test a changed API key gets a new client."""
+        with patch.object(providers, 'create_client', side_effect=lambda p, k: k):
+            with patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'first'}, clear=True):
+                assert providers.get_client('anthropic') == 'first'
+            with patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'second'}, clear=True):
+                assert providers.get_client('anthropic') == 'second'
+
+    def test_prompt_errors_return_none(self):
+        """Test SDK errors are swallowed like the scripts always did."""
+        with patch.dict(os.environ, {'GOOGLE_API_KEY': 'key'}, clear=True):
+            with patch.object(providers, 'create_client', return_value=MagicMock()):
+                with patch.object(providers, 'send_prompt', side_effect=RuntimeError('boom')):
+                    assert providers.prompt_llm('gemini', 'test') is None
+
+    def test_provider_for_script(self):
+        """Test LLM scripts map to their providers."""
+        assert providers.provider_for_script('/hooks/utils/llm/oai.py') == 'openai'
+        assert providers.provider_for_script('/hooks/utils/llm/anth.py') == 'anthropic'
+        assert providers.provider_for_script('/hooks/utils/llm/other.py') is None
+
+    def test_load_script_requires_sdk(self):
+        """Test scripts are not imported in-process when their SDK is missing."""
+        script = providers.LLM_DIR / 'gemini.py'
+        with patch.object(providers, 'is_installed', return_value=False):
+            assert providers.load_script(script) is None
+
+    @pytest.mark.parametrize('name', ['anth.py', 'oai.py', 'gemini.py'])
+    def test_load_script_without_dotenv(self, name):
+        """Test the LLM scripts import in-process without python-dotenv installed."""
+        with patch.object(providers, 'is_installed', return_value=True), \
+                patch.dict(sys.modules, {'dotenv': None}), patch.dict(providers._scripts, clear=True):
+            module = providers.load_script(providers.LLM_DIR / name)
+        assert module is not None and hasattr(module, 'generate_completion_message')
+
+    def test_load_script_unknown_path(self, tmp_path):
+        """Test a script that does not exist is left to the subprocess fallback."""
+        assert providers.load_script(tmp_path / 'gemini.py') is None
+
+
+class TestLatencyStats:
+    """Test persisted per-provider latency and the ordering built on it."""
+
+    def test_prompt_records_latency(self):
+        """Test each prompt adds a sample, with failures counted as timeouts."""
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'key'}, clear=True):
+            with patch.object(providers, 'create_client', return_value=MagicMock()):
+                with patch.object(providers, 'send_prompt', return_value='Done!'):
+                    providers.prompt_llm('openai', 'test')
+                with patch.object(providers, 'send_prompt', side_effect=RuntimeError('boom')):
+                    providers.prompt_llm('openai', 'test')
+        samples = providers.read_latency()['openai']
+        assert len(samples) == 2
+        assert samples[1] == providers.REQUEST_TIMEOUT_SECONDS
+
+    def test_samples_are_capped(self):
+        """Test only the newest LATENCY_SAMPLES samples are kept."""
+        for i in range(providers.LATENCY_SAMPLES + 5):
+            providers.record_latency('gemini', i)
+        samples = providers.read_latency()['gemini']
+        assert len(samples) == providers.LATENCY_SAMPLES
+        assert samples[-1] == providers.LATENCY_SAMPLES + 4
+
+    def test_summary_needs_min_samples(self):
+        """Test p50/p95 are only reported once enough samples exist."""
+        samples = {'gemini': [1.0] * (providers.MIN_SAMPLES - 1)}
+        assert providers.latency_summary('gemini', samples) is None
+        samples = {'gemini': [0.1 * i for i in range(1, 21)]}
+        assert providers.latency_summary('gemini', samples) == pytest.approx((1.0, 1.9))
+
+    def test_order_adapts_to_latency(self):
+        """Test the fastest measured provider goes first and unmeasured ones are tried early."""
+        for _ in range(providers.MIN_SAMPLES):
+            providers.record_latency('gemini', 3.0)
+            providers.record_latency('openai', 0.5)
+        assert providers.order_by_latency(['gemini', 'openai', 'anthropic']) == ['anthropic', 'openai', 'gemini']
+
+    def test_hedge_delay_from_p95(self):
+        """Test the hedge delay follows the primary's p95 unless configured."""
+        with patch.dict(os.environ, {}, clear=True):
+            assert providers.get_hedge_delay('openai') == providers.DEFAULT_HEDGE_DELAY
+            for seconds in (0.2, 0.3, 0.4, 0.5, 2.0):
+                providers.record_latency('openai', seconds)
+            assert providers.get_hedge_delay('openai') == 2.0
+        with patch.dict(os.environ, {'CCAOS_LLM_HEDGE_DELAY': '0.25'}):
+            assert providers.get_hedge_delay('openai') == 0.25
+
+
+class TestRace:
+    """Test hedged calls across providers."""
+
+    def test_fast_primary_never_hedges(self):
+        """Test no second provider starts when the primary answers in time."""
+        calls = []
+
+        def call(provider):
+            calls.append(provider)
+            return f'{provider} answer'
+
+        assert providers.race(call, ['gemini', 'openai'], hedge_delay=1.0) == ('gemini', 'gemini answer')
+        assert calls == ['gemini']
+
+    def test_slow_primary_is_hedged(self):
+        """Test the backup answers first when the primary is slower than the hedge delay."""
+        def call(provider):
+            time.sleep(1.0 if provider == 'gemini' else 0.01)
+            return f'{provider} answer'
+
+        started = time.monotonic()
+        assert providers.race(call, ['gemini', 'openai'], hedge_delay=0.05) == ('openai', 'openai answer')
+        assert time.monotonic() - started < 0.5
+
+    def test_failure_starts_next_immediately(self):
+        """Test a failed call starts the next provider without waiting out the delay."""
+        def call(provider):
+            if provider == 'gemini':
+                raise RuntimeError('boom')
+            return 'backup'
+
+        started = time.monotonic()
+        assert providers.race(call, ['gemini', 'openai'], hedge_delay=5.0) == ('openai', 'backup')
+        assert time.monotonic() - started < 1.0
+
+    def test_all_fail(self):
+        """Test (None, None) is returned when no provider answers."""
+        assert providers.race(lambda provider: None, ['gemini', 'openai'], hedge_delay=0.01) == (None, None)
+
+    def test_timeout(self):
+        """Test the race gives up after its timeout."""
+        def call(provider):
+            time.sleep(1.0)
+            return 'late'
+
+        assert providers.race(call, ['gemini'], hedge_delay=0.01, timeout=0.1) == (None, None)
+
+
+class TestInProcessCallers:
+    """Test hooks call LLM scripts in-process when possible."""
+
+    def test_request_batch_in_process(self):
+        """Test a pool refill skips uv when the script can be imported."""
+        with patch.object(message_pool, 'load_script', return_value=MagicMock()):
+            with patch.object(message_pool, 'call_script', return_value=['All done!']) as mock_call:
+                with patch('subprocess.run') as mock_run:
+                    assert message_pool.request_batch('/llm/oai.py', 5) == ['All done!']
+        mock_call.assert_called_once_with('/llm/oai.py', 'generate_completion_messages', 5)
+        mock_run.assert_not_called()
+
+    def test_request_batch_falls_back_to_uv(self):
+        """Test a pool refill runs the script with uv when it cannot be imported."""
+        result = MagicMock(returncode=0, stdout='One\nTwo\n')
+        with patch.object(message_pool, 'load_script', return_value=None):
+            with patch('subprocess.run', return_value=result) as mock_run:
+                assert message_pool.request_batch('/llm/oai.py', 2) == ['One', 'Two']
+        assert mock_run.call_args[0][0][:3] == ['uv', 'run', '/llm/oai.py']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,112 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import sys
+import pytest
+from pathlib import Path
+
+# Add the hooks directory to path to import utils (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pre_tool_use
+from utils.shell_parse import parse_command
+
+
+def programs(command):
+    """Return the program of every simple command parsed from command."""
+    return [cmd.program for cmd in parse_command(command)]
+
+
+class TestParseCommand:
+    """Test suite for splitting Bash commands into simple commands."""
+
+    def test_splits_compound_commands(self):
+        """Test ;, &&, || and pipes separate commands."""
+        assert programs('cd src && make || echo failed; ls | grep x') == [
+            'cd', 'make', 'echo', 'ls', 'grep']
+
+    def test_quoted_text_stays_in_word(self):
+        """Test quoted operators and commands are arguments, not commands."""
+        commands = parse_command('echo "rm -rf /; ls"')
+        assert len(commands) == 1
+        assert commands[0].argv == ('echo', 'rm -rf /; ls')
+
+    def test_redirections_excluded_from_argv(self):
+        """Test redirections stay in words but not in argv."""
+        cmd = parse_command('make 2>&1 > build.log')[0]
+        assert cmd.argv == ('make',)
+        assert cmd.words == ('make', '2', '>&', '1', '>', 'build.log')
+
+    def test_strips_wrappers(self):
+        """Test sudo, env, timeout and VAR=value prefixes are skipped."""
+        cmd = parse_command('FOO=1 sudo -u root env BAR=2 timeout 5 /bin/rm -rf x')[0]
+        assert cmd.program == 'rm'
+        assert cmd.argv == ('/bin/rm', '-rf', 'x')
+
+    @pytest.mark.parametrize('command', [
+        'echo $(rm -rf /)',
+        'echo "$(rm -rf /)"',
+        'echo `rm -rf /`',
+        "bash -c 'rm -rf /'",
+        'eval "rm -rf /"',
+        'find . -exec rm -rf {} \\;',
+        '(cd / && rm -rf .)',
+        'for d in a b; do rm -rf /; done',
+        'bash <<EOF\nrm -rf /\nEOF',
+    ])
+    def test_nested_commands(self, command):
+        """Test commands run by substitutions, shells, eval and find are found."""
+        assert 'rm' in programs(command)
+
+    def test_heredoc_body_is_data(self):
+        """Test a heredoc fed to a non-shell command is not parsed."""
+        assert programs('cat <<EOF > notes.txt\nrm -rf /\nEOF\nls') == ['cat', 'ls']
+
+    def test_unbalanced_quotes(self):
+        """Test unparseable commands return None."""
+        assert parse_command('echo "unterminated') is None
+
+    def test_memoized(self):
+        """Test repeated parses of the same command share one result."""
+        assert parse_command('ls -la') is parse_command('ls -la')
+
+
+class TestPolicyOnParsedCommands:
+    """Test suite for pre_tool_use policies evaluated per command."""
+
+    @pytest.mark.parametrize('command', [
+        'echo "rm -rf /"',
+        'git commit -m "remove rm -rf / usage"',
+        'grep -r "rm -rf" .',
+        'rm -rf tmp/build && ls /',
+    ])
+    def test_quoted_rm_allowed(self, command):
+        """Test rm text that is not an rm command is not blocked."""
+        assert not pre_tool_use.is_dangerous_rm_command(command)
+
+    @pytest.mark.parametrize('command', [
+        'ls && rm -rf /',
+        'echo ok; sudo rm -fr ~',
+        'rm -rf tmp/build && rm -rf /',
+        'sh -c "rm -rf \\$HOME"',
+    ])
+    def test_rm_in_compound_blocked(self, command):
+        """Test a dangerous rm anywhere in the command is blocked."""
+        assert pre_tool_use.is_dangerous_rm_command(command)
+
+    def test_env_in_substitution_blocked(self):
+        """Test .env access inside a command substitution is blocked."""
+        assert pre_tool_use.is_env_file_access('Bash', {'command': 'echo "$(cat .env)"'})
+
+    def test_unparseable_falls_back_to_raw_text(self):
+        """Test commands with unbalanced quotes are still checked."""
+        assert pre_tool_use.is_dangerous_rm_command('rm -rf / "')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
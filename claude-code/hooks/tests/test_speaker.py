@@ -0,0 +1,87 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import os
+import sys
+import time
+import pytest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add the hooks directory to path to import utils (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.tts import speaker
+
+
+@pytest.fixture
+def run_dir(tmp_path):
+    """Point the speaker queue at a temporary run directory."""
+    with patch.dict(os.environ, {'CCAOS_HOOK_RUN_DIR': str(tmp_path / 'run')}):
+        yield tmp_path / 'run'
+
+
+def entry(key=None, text='hello', age=0.0, max_age=30.0):
+    """Build a queued announcement created age seconds ago."""
+    created = time.time() - age
+    return {'tts_script': 'tts.py', 'text': text, 'key': key,
+            'created': created, 'expires': created + max_age}
+
+
+class TestSelectEntries:
+    """Test suite for coalescing and dropping queued announcements."""
+
+    def test_coalesces_burst_by_key(self):
+        """Test five announcements with one key are spoken once."""
+        entries = [entry('subagent_stop') for _ in range(5)]
+        assert len(speaker.select_entries(entries, time.time())) == 1
+
+    def test_keeps_newest_in_first_position(self):
+        """Test the newest text of a key is spoken where the burst began."""
+        entries = [entry('stop', 'first'), entry(None, 'other'), entry('stop', 'last')]
+        texts = [e['text'] for e in speaker.select_entries(entries, time.time())]
+        assert texts == ['last', 'other']
+
+    def test_drops_stale(self):
+        """Test announcements past their max age are dropped."""
+        entries = [entry('notification', age=60), entry('stop')]
+        assert [e['key'] for e in speaker.select_entries(entries, time.time())] == ['stop']
+
+
+class TestQueue:
+    """Test suite for handing announcements to the speaker."""
+
+    def test_announce_enqueues_and_spawns(self, run_dir):
+        """Test announce() queues the entry and starts a speaker."""
+        with patch.object(speaker, 'spawn_speaker') as mock_spawn:
+            speaker.announce('tts.py', text='Subagent Complete', key='subagent_stop')
+
+        mock_spawn.assert_called_once()
+        queued = speaker.take_queue()
+        assert [(e['text'], e['key']) for e in queued] == [('Subagent Complete', 'subagent_stop')]
+        assert speaker.take_queue() == []
+
+    def test_announce_skips_spawn_when_running(self, run_dir):
+        """Test no second speaker is spawned while one holds the lock."""
+        lock_file = speaker.acquire_speaker_lock()
+        try:
+            with patch.object(speaker, 'spawn_speaker') as mock_spawn:
+                speaker.announce('tts.py', text='hello')
+            if speaker.fcntl is not None:
+                mock_spawn.assert_not_called()
+        finally:
+            lock_file.close()
+
+    def test_generate_text_falls_back(self):
+        """Test the fallback text is used when no LLM script is available."""
+        queued = dict(entry(), text=None, llm_script=None, fallback='All done!')
+        assert speaker.generate_text(queued) == 'All done!'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
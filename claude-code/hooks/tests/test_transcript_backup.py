@@ -0,0 +1,137 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import json
+import sys
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from pathlib import Path
+
+# Add the hooks directory to path to import utils (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import transcript_backup
+
+
+@pytest.fixture
+def small_chunks():
+    """Use small chunks so tests span several of them."""
+    with patch.object(transcript_backup, 'CHUNK_SIZE', 64):
+        yield 64
+
+
+def write_lines(path, start, count):
+    with open(path, 'a') as f:
+        for i in range(start, start + count):
+            f.write(json.dumps({'type': 'user', 'n': i}) + '\n')
+
+
+class TestTranscriptBackup:
+    """Test suite for chunked, deduplicated transcript backups."""
+
+    def test_second_backup_writes_only_tail(self, tmp_path, small_chunks):
+        """Test a later compaction stores only chunks past the unchanged prefix."""
+        transcript = tmp_path / 'session.jsonl'
+        write_lines(transcript, 0, 40)
+        first = transcript_backup.read_manifest(transcript_backup.backup_transcript(transcript, 'auto', tmp_path))
+        assert first['bytes_written'] == first['size']
+
+        write_lines(transcript, 40, 5)
+        second = transcript_backup.read_manifest(transcript_backup.backup_transcript(transcript, 'auto', tmp_path))
+        assert second['chunks'][:len(first['chunks']) - 1] == first['chunks'][:-1]
+        assert second['bytes_written'] <= second['size'] - first['size'] + small_chunks
+
+    def test_unchanged_transcript_writes_nothing(self, tmp_path, small_chunks):
+        """Test backing up the same content twice stores no new chunks."""
+        transcript = tmp_path / 'session.jsonl'
+        write_lines(transcript, 0, 10)
+        transcript_backup.backup_transcript(transcript, 'manual', tmp_path)
+        again = transcript_backup.read_manifest(transcript_backup.backup_transcript(transcript, 'manual', tmp_path))
+        assert again['bytes_written'] == 0
+
+    def test_every_snapshot_restores(self, tmp_path, small_chunks):
+        """Test each compaction point restores byte for byte."""
+        transcript = tmp_path / 'session.jsonl'
+        expected = []
+        for step in range(3):
+            write_lines(transcript, step * 7, 7)
+            transcript_backup.backup_transcript(transcript, 'auto', tmp_path)
+            expected.append(transcript.read_bytes())
+
+        snapshots = transcript_backup.list_snapshots('session', tmp_path)
+        assert len(snapshots) == 3
+        for snapshot, content in zip(snapshots, expected):
+            out = transcript_backup.restore_snapshot(snapshot, tmp_path / 'restored.jsonl', tmp_path)
+            assert out.read_bytes() == content
+
+    def test_chunks_are_compressed(self, tmp_path):
+        """Test stored chunks are gzip-compressed and smaller than the transcript."""
+        transcript = tmp_path / 'session.jsonl'
+        write_lines(transcript, 0, 500)
+        transcript_backup.backup_transcript(transcript, 'auto', tmp_path)
+        chunks = list((transcript_backup.get_backup_dir(tmp_path) / 'chunks').glob('*/*.gz'))
+        assert chunks
+        assert sum(c.stat().st_size for c in chunks) < transcript.stat().st_size / 2
+
+    def test_corrupt_chunk_fails_restore(self, tmp_path, small_chunks):
+        """Test a checksum mismatch is reported instead of writing bad output."""
+        transcript = tmp_path / 'session.jsonl'
+        write_lines(transcript, 0, 10)
+        manifest_path = transcript_backup.backup_transcript(transcript, 'auto', tmp_path)
+        manifest = transcript_backup.read_manifest(manifest_path)
+        manifest['sha256'] = '0' * 64
+        manifest_path.write_text(json.dumps(manifest))
+        with pytest.raises(ValueError):
+            transcript_backup.restore_snapshot(manifest_path, tmp_path / 'restored.jsonl', tmp_path)
+        assert not (tmp_path / 'restored.jsonl').exists()
+
+    def test_gc_keeps_referenced_chunks(self, tmp_path, small_chunks):
+        """Test garbage collection only removes chunks no snapshot uses."""
+        transcript = tmp_path / 'session.jsonl'
+        write_lines(transcript, 0, 10)
+        manifest_path = transcript_backup.backup_transcript(transcript, 'auto', tmp_path)
+        stray = transcript_backup.get_chunk_path('ff' * 32, tmp_path)
+        stray.parent.mkdir(parents=True, exist_ok=True)
+        stray.write_bytes(b'')
+
+        assert transcript_backup.collect_garbage(tmp_path) == 1
+        out = transcript_backup.restore_snapshot(manifest_path, tmp_path / 'restored.jsonl', tmp_path)
+        assert out.read_bytes() == transcript.read_bytes()
+
+
+    def test_gc_waits_for_running_backup(self, tmp_path, small_chunks):
+        """Test garbage collection cannot delete chunks a backup reuses before its manifest exists."""
+        transcript = tmp_path / 'session.jsonl'
+        write_lines(transcript, 0, 10)
+        # An expired snapshot leaves its chunks unreferenced until the next backup reuses them
+        transcript_backup.backup_transcript(transcript, 'auto', tmp_path).unlink()
+
+        store_chunk = transcript_backup.store_chunk
+        collected = []
+        gc = threading.Thread(target=lambda: collected.append(transcript_backup.collect_garbage(tmp_path)))
+
+        def store_then_collect(data, log_dir=None):
+            result = store_chunk(data, log_dir)
+            if gc.ident is None:  # Collect once, while this backup is under way
+                gc.start()
+                time.sleep(0.2)
+            return result
+
+        with patch.object(transcript_backup, 'store_chunk', store_then_collect):
+            manifest_path = transcript_backup.backup_transcript(transcript, 'manual', tmp_path)
+        gc.join(timeout=5)
+
+        assert collected == [0]
+        out = transcript_backup.restore_snapshot(manifest_path, tmp_path / 'restored.jsonl', tmp_path)
+        assert out.read_bytes() == transcript.read_bytes()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,95 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import json
+import sys
+import pytest
+from pathlib import Path
+
+# Add the hooks directory to path to import utils (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.log_store import iter_jsonl
+from utils.transcript_export import export_transcript, get_chat_path
+
+
+def append_lines(path, *records, raw=b''):
+    """Append records (and optional raw bytes) to a transcript file."""
+    with open(path, 'ab') as f:
+        for record in records:
+            f.write(json.dumps(record).encode('utf-8') + b'\n')
+        f.write(raw)
+
+
+class TestTranscriptExport:
+    """Test suite for incremental transcript export."""
+
+    def test_exports_only_new_lines(self, tmp_path):
+        """Test a second export appends just the lines written since the first."""
+        transcript = tmp_path / 'session.jsonl'
+        append_lines(transcript, {'n': 1}, {'n': 2})
+        assert export_transcript(transcript, 'abc', tmp_path / 'logs') == 2
+
+        append_lines(transcript, {'n': 3})
+        assert export_transcript(transcript, 'abc', tmp_path / 'logs') == 1
+        assert export_transcript(transcript, 'abc', tmp_path / 'logs') == 0
+
+        chat_path = get_chat_path('abc', tmp_path / 'logs')
+        assert [r['n'] for r in iter_jsonl(chat_path)] == [1, 2, 3]
+
+    def test_partial_line_waits(self, tmp_path):
+        """Test a line still being written is exported once it is complete."""
+        transcript = tmp_path / 'session.jsonl'
+        append_lines(transcript, {'n': 1}, raw=b'{"n": ')
+        assert export_transcript(transcript, 'abc', tmp_path / 'logs') == 1
+
+        append_lines(transcript, raw=b'2}\n')
+        assert export_transcript(transcript, 'abc', tmp_path / 'logs') == 1
+        chat_path = get_chat_path('abc', tmp_path / 'logs')
+        assert [r['n'] for r in iter_jsonl(chat_path)] == [1, 2]
+
+    def test_skips_invalid_lines(self, tmp_path):
+        """Test corrupt transcript lines are skipped, as before."""
+        transcript = tmp_path / 'session.jsonl'
+        append_lines(transcript, {'n': 1}, raw=b'not json\n\n')
+        assert export_transcript(transcript, 'abc', tmp_path / 'logs') == 1
+
+    def test_rebuilds_when_transcript_shrinks(self, tmp_path):
+        """Test a rewritten, shorter transcript is exported from the start."""
+        transcript = tmp_path / 'session.jsonl'
+        append_lines(transcript, {'n': 1}, {'n': 2})
+        export_transcript(transcript, 'abc', tmp_path / 'logs')
+
+        transcript.write_text(json.dumps({'n': 9}) + '\n')
+        export_transcript(transcript, 'abc', tmp_path / 'logs')
+        chat_path = get_chat_path('abc', tmp_path / 'logs')
+        assert [r['n'] for r in iter_jsonl(chat_path)] == [9]
+
+    def test_full_rebuild(self, tmp_path):
+        """Test full=True replaces the previous export."""
+        transcript = tmp_path / 'session.jsonl'
+        append_lines(transcript, {'n': 1}, {'n': 2})
+        export_transcript(transcript, 'abc', tmp_path / 'logs')
+        assert export_transcript(transcript, 'abc', tmp_path / 'logs', full=True) == 2
+
+        chat_path = get_chat_path('abc', tmp_path / 'logs')
+        assert [r['n'] for r in iter_jsonl(chat_path)] == [1, 2]
+
+    def test_sessions_are_separate(self, tmp_path):
+        """Test each session gets its own export file."""
+        first, second = tmp_path / 'a.jsonl', tmp_path / 'b.jsonl'
+        append_lines(first, {'n': 1})
+        append_lines(second, {'n': 2})
+        export_transcript(first, 'a', tmp_path / 'logs')
+        export_transcript(second, 'b', tmp_path / 'logs')
+
+        assert [r['n'] for r in iter_jsonl(get_chat_path('b', tmp_path / 'logs'))] == [2]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -1,53 +1,40 @@
 #!/usr/bin/env -S uv run --script
 # /// script
 # requires-python = ">=3.11"
-# dependencies = [
-#     "python-dotenv",
-# ]
 # ///
 
 import argparse
-import json
-import os
-import sys
 from pathlib import Path
 from datetime import datetime
 
-try:
-    from dotenv import load_dotenv
-    # Load dotenv from custom path if specified
-    env_file = os.getenv("CCAOS_ENV_FILE")
-    if env_file:
-        load_dotenv(dotenv_path=env_file)
-    else:
-        load_dotenv()
-except ImportError:
-    pass  # dotenv is optional
+from utils.hook_io import default_args, make_result, run_hook
+from utils.log_store import append_event
+from utils.profiler import phase
+from utils.rules import get_rule_file, load_rules
 
 
 def log_user_prompt(session_id, input_data):
     """Log user prompt to logs directory."""
-    # Ensure logs directory exists
-    log_dir = Path("logs")
-    log_dir.mkdir(parents=True, exist_ok=True)
-    log_file = log_dir / 'user_prompt_submit.json'
-    
-    # Read existing log data or initialize empty list
-    if log_file.exists():
-        with open(log_file, 'r') as f:
-            try:
-                log_data = json.load(f)
-            except (json.JSONDecodeError, ValueError):
-                log_data = []
-    else:
-        log_data = []
-    
-    # Append the entire input data
-    log_data.append(input_data)
-    
-    # Write back to file with formatting
-    with open(log_file, 'w') as f:
-        json.dump(log_data, f, indent=2)
+    # Append event to logs/user_prompt_submit.jsonl
+    append_event('user_prompt_submit', input_data)
+
+
+# Rules for the 'prompt' scope are checked against the full prompt text.
+# Add rules here or in rules/user_prompt_submit.json (or the file named by
+# CCAOS_USER_PROMPT_RULES), e.g.:
+#   Rule('rm-root', 'prompt', 'block', 'rm -rf /', 'Dangerous command detected',
+#        ignore_case=True, literal=True),
+DEFAULT_RULES = ()
+
+
+def get_rules():
+    """Return the compiled prompt rules, including any from the configured rule file."""
+    return load_rules(DEFAULT_RULES, get_rule_file('CCAOS_USER_PROMPT_RULES', 'user_prompt_submit.json'))
+
+
+def find_prompt_rule(prompt):
+    """Return the block rule matching the prompt, or None."""
+    return get_rules().match('prompt', prompt)
 
 
 def validate_prompt(prompt):
@@ -55,63 +42,52 @@ def validate_prompt(prompt):
     Validate the user prompt for security or policy violations.
     Returns tuple (is_valid, reason).
     """
-    # Example validation rules (customize as needed)
-    blocked_patterns = [
-        # Add any patterns you want to block
-        # Example: ('rm -rf /', 'Dangerous command detected'),
-    ]
+    rule = find_prompt_rule(prompt)
+    if rule is None:
+        return True, None
+    return False, rule.message or f"matched rule {rule.name}"
+
+
+def build_parser():
+    """Return the hook's argument parser."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--validate', action='store_true', 
+                      help='Enable prompt validation')
+    parser.add_argument('--log-only', action='store_true',
+                      help='Only log prompts, no validation or blocking')
+    return parser
+
+
+def handle(event, args=None):
+    """Log a UserPromptSubmit event, blocking the prompt if validation fails."""
+    args = args or default_args(build_parser())
+
+    # Extract session_id and prompt
+    session_id = event.get('session_id', 'unknown')
+    prompt = event.get('prompt', '')
+    
+    # Log the user prompt
+    log_user_prompt(session_id, event)
     
-    prompt_lower = prompt.lower()
+    # Validate prompt if requested and not in log-only mode
+    if args.validate and not args.log_only:
+        with phase('policy'):
+            is_valid, reason = validate_prompt(prompt)
+        if not is_valid:
+            # Exit code 2 blocks the prompt with error message
+            return make_result(2, stderr=f"Prompt blocked: {reason}\n")
     
-    for pattern, reason in blocked_patterns:
-        if pattern.lower() in prompt_lower:
-            return False, reason
+    # Add context information (optional)
+    # Text returned as stdout will be added to the prompt as context
+    # Example: make_result(stdout=f"Current time: {datetime.now()}")
     
-    return True, None
+    # Success - prompt will be processed
+    return make_result()
 
 
 def main():
-    try:
-        # Parse command line arguments
-        parser = argparse.ArgumentParser()
-        parser.add_argument('--validate', action='store_true', 
-                          help='Enable prompt validation')
-        parser.add_argument('--log-only', action='store_true',
-                          help='Only log prompts, no validation or blocking')
-        args = parser.parse_args()
-        
-        # Read JSON input from stdin
-        input_data = json.loads(sys.stdin.read())
-        
-        # Extract session_id and prompt
-        session_id = input_data.get('session_id', 'unknown')
-        prompt = input_data.get('prompt', '')
-        
-        # Log the user prompt
-        log_user_prompt(session_id, input_data)
-        
-        # Validate prompt if requested and not in log-only mode
-        if args.validate and not args.log_only:
-            is_valid, reason = validate_prompt(prompt)
-            if not is_valid:
-                # Exit code 2 blocks the prompt with error message
-                print(f"Prompt blocked: {reason}", file=sys.stderr)
-                sys.exit(2)
-        
-        # Add context information (optional)
-        # You can print additional context that will be added to the prompt
-        # Example: print(f"Current time: {datetime.now()}")
-        
-        # Success - prompt will be processed
-        sys.exit(0)
-        
-    except json.JSONDecodeError:
-        # Handle JSON decode errors gracefully
-        sys.exit(0)
-    except Exception:
-        # Handle any other errors gracefully
-        sys.exit(0)
+    run_hook('user_prompt_submit', handle, build_parser())
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
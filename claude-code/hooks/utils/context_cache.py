@@ -0,0 +1,145 @@
+"""
+Per-project cache for the SessionStart development context.
+
+Probes such as `git status` and `gh issue list` are slow on large
+repositories but rarely change between a session's startup, resume and
+clear. Their results are kept in cache/context/<project>.json, each with an
+invalidation key (for git, the index mtime and HEAD) and a maximum age, so a
+repeat session start reuses them instead of running the probes again.
+
+Environment:
+- CCAOS_CONTEXT_CACHE=0         # Disable the cache
+- CCAOS_CONTEXT_CACHE_DIR=PATH  # Cache directory (default: <hooks>/cache/context)
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from utils.log_store import locked
+
+
+def is_enabled():
+    """Return False when the cache is disabled with CCAOS_CONTEXT_CACHE=0."""
+    return os.getenv('CCAOS_CONTEXT_CACHE', '1') != '0'
+
+
+def get_cache_dir():
+    """Return the cache directory."""
+    configured = os.getenv('CCAOS_CONTEXT_CACHE_DIR')
+    if configured:
+        return Path(configured).expanduser()
+    return HOOKS_DIR / 'cache' / 'context'
+
+
+def get_cache_path(project_dir=None):
+    """Return the cache file for a project directory (default: cwd)."""
+    project = str(Path(project_dir or os.getcwd()).resolve())
+    digest = hashlib.sha256(project.encode('utf-8')).hexdigest()[:16]
+    return get_cache_dir() / f'{digest}.json'
+
+
+def read_cache(cache_path):
+    """Load a project's cache, returning {} when missing or unreadable."""
+    try:
+        with open(cache_path, 'r') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def write_entry(cache_path, name, entry):
+    """
+    Store one entry, atomically replacing the project's cache file.
+
+    Probes finish concurrently, so the read-modify-write is done under a
+    lock file to keep one probe's entry from overwriting another's.
+    """
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(cache_path.with_name(cache_path.name + '.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        with locked(fd):
+            data = read_cache(cache_path)
+            data[name] = entry
+            tmp_path = cache_path.with_name(f'.{cache_path.name}.{os.getpid()}.{id(entry)}.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, cache_path)
+    finally:
+        os.close(fd)
+
+
+def cached(name, key, max_age, compute, project_dir=None):
+    """
+    Return compute() for a probe, reusing the cached value while it is valid.
+
+    Args:
+        name (str): Probe name within the project's cache
+        key: JSON-serialisable invalidation key; a different key recomputes
+        max_age (float): Seconds after which the value is recomputed anyway
+        compute (callable): Runs the probe; None results are not cached
+        project_dir (str|Path): Project the probe belongs to (default: cwd)
+    """
+    if not is_enabled():
+        return compute()
+    cache_path = get_cache_path(project_dir)
+    entry = read_cache(cache_path).get(name)
+    if (isinstance(entry, dict) and entry.get('key') == key
+            and time.time() - entry.get('time', 0) < max_age):
+        return entry.get('value')
+
+    value = compute()
+    if value is not None:
+        try:
+            write_entry(cache_path, name, {'key': key, 'time': time.time(), 'value': value})
+        except OSError:
+            pass  # The cache is best effort
+    return value
+
+
+def find_git_dir(start=None):
+    """Return the .git directory for start (default: cwd), or None outside a repo."""
+    path = Path(start or os.getcwd()).resolve()
+    for directory in (path, *path.parents):
+        dot_git = directory / '.git'
+        if dot_git.is_dir():
+            return dot_git
+        if dot_git.is_file():
+            # Worktrees and submodules point at their git dir with "gitdir: PATH"
+            try:
+                content = dot_git.read_text().strip()
+            except OSError:
+                return None
+            if content.startswith('gitdir:'):
+                git_dir = Path(content[len('gitdir:'):].strip())
+                return git_dir if git_dir.is_absolute() else (directory / git_dir).resolve()
+            return None
+    return None
+
+
+def git_state_key(start=None):
+    """
+    Return a key that changes whenever the index or HEAD does, or None outside a repo.
+
+    Staging, committing, checkout and `git status` refreshing stat info all
+    rewrite the index, so its mtime is a cheap stand-in for a status change.
+    """
+    git_dir = find_git_dir(start)
+    if git_dir is None:
+        return None
+    try:
+        head = (git_dir / 'HEAD').read_text().strip()
+    except OSError:
+        return None
+    try:
+        index_mtime = (git_dir / 'index').stat().st_mtime_ns
+    except OSError:
+        index_mtime = 0
+    return [str(git_dir), head, index_mtime]
@@ -0,0 +1,193 @@
+"""
+Lazy env file loading shared by the hooks.
+
+Hooks used to import python-dotenv and parse the env file at import time on
+every event, even when nothing they did needed an API key. getenv() here
+returns variables already in the environment directly and only reads the env
+file when a variable is missing. The parsed file is kept in a small marshal
+snapshot under run/ keyed by the file's path, mtime and size, so a later
+hook process loads it without parsing or importing python-dotenv. When the
+file has to be parsed, python-dotenv is used if installed and a built-in
+parser otherwise.
+
+As with load_dotenv(), variables already in the environment take precedence
+over the env file, and values loaded are exported to os.environ so child
+processes (TTS and LLM scripts) inherit them.
+
+Environment:
+- CCAOS_ENV_FILE=PATH   # Env file (default: nearest .env above the hooks directory)
+"""
+
+import hashlib
+import marshal
+import os
+import re
+import sys
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from hook_client import get_run_dir
+from utils.profiler import phase
+
+SNAPSHOT_FORMAT = 1
+
+LINE_RE = re.compile(
+    r'''^[ \t]*(?:export[ \t]+)?(?P<key>[A-Za-z_][A-Za-z0-9_.-]*)[ \t]*=[ \t]*'''
+    r'''(?:'(?P<single>[^']*)'[ \t]*(?:#[^\n]*)?'''
+    r'''|"(?P<double>(?:\\.|[^"\\])*)"[ \t]*(?:#[^\n]*)?'''
+    r'''|(?P<bare>[^\n]*))$''',
+    re.MULTILINE,
+)
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\', "'": "'"}
+VARIABLE_RE = re.compile(r'\$\{(?P<name>[A-Za-z_][A-Za-z0-9_]*)(?::-(?P<default>[^}]*))?\}')
+
+# Parsed values of the env file per (path, mtime_ns, size) for this process
+_values = {}
+
+
+def find_env_file():
+    """
+    Return the env file to load, or None if there is none.
+
+    CCAOS_ENV_FILE wins; otherwise the nearest .env at or above the hooks
+    directory, which is where load_dotenv() looked when called from a hook.
+    """
+    configured = os.environ.get('CCAOS_ENV_FILE')
+    if configured:
+        return Path(configured).expanduser()
+    for directory in (HOOKS_DIR, *HOOKS_DIR.parents):
+        candidate = directory / '.env'
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def expand(value, values):
+    """Expand ${VAR} and ${VAR:-default}, preferring the environment like python-dotenv."""
+    def replace(match):
+        name = match.group('name')
+        found = os.environ.get(name, values.get(name))
+        return found if found else (match.group('default') or '')
+    return VARIABLE_RE.sub(replace, value)
+
+
+def parse_env(text):
+    """
+    Parse env file text into a dict.
+
+    Handles comments, `export`, single-quoted (literal), double-quoted
+    (escapes, may span lines) and bare values, and ${VAR} expansion in
+    double-quoted and bare values.
+    """
+    values = {}
+    for match in LINE_RE.finditer(text):
+        key = match.group('key')
+        if match.group('single') is not None:
+            values[key] = match.group('single')
+            continue
+        if match.group('double') is not None:
+            value = re.sub(r'\\(.)', lambda m: ESCAPES.get(m.group(1), m.group(0)), match.group('double'))
+        else:
+            # An unquoted # starts a comment only after whitespace
+            value = re.split(r'\s#', match.group('bare'), maxsplit=1)[0].strip()
+        values[key] = expand(value, values)
+    return values
+
+
+def parse_env_file(path):
+    """Parse an env file with python-dotenv when installed, else the built-in parser."""
+    try:
+        from dotenv import dotenv_values
+    except ImportError:
+        with open(path, 'r', encoding='utf-8') as f:
+            return parse_env(f.read())
+    return {k: v for k, v in dotenv_values(path).items() if v is not None}
+
+
+def get_snapshot_path(env_path):
+    """Return the snapshot file for an env file."""
+    digest = hashlib.sha256(str(env_path).encode('utf-8')).hexdigest()[:16]
+    return get_run_dir() / f'env-{digest}.snapshot'
+
+
+def read_snapshot(snapshot_path, key):
+    """Return the values stored for key in a snapshot, or None when stale or unreadable."""
+    try:
+        with open(snapshot_path, 'rb') as f:
+            data = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(data, tuple) or len(data) != 3 or data[0] != SNAPSHOT_FORMAT or data[1] != key:
+        return None
+    return data[2] if isinstance(data[2], dict) else None
+
+
+def write_snapshot(snapshot_path, key, values):
+    """Store parsed values readable only by the current user; best effort."""
+    tmp_path = snapshot_path.with_name(f'.{snapshot_path.name}.{os.getpid()}.tmp')
+    try:
+        snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            marshal.dump((SNAPSHOT_FORMAT, key, values), f)
+        os.replace(tmp_path, snapshot_path)
+    except (OSError, ValueError):
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+
+
+def env_file_values(env_path=None):
+    """
+    Return the parsed env file, using the in-process and snapshot caches.
+
+    Returns {} when there is no env file or it cannot be read.
+    """
+    env_path = env_path or find_env_file()
+    if env_path is None:
+        return {}
+    try:
+        st = os.stat(env_path)
+    except OSError:
+        return {}
+    key = (str(env_path), st.st_mtime_ns, st.st_size)
+    values = _values.get(key)
+    if values is not None:
+        return values
+
+    snapshot_path = get_snapshot_path(env_path)
+    values = read_snapshot(snapshot_path, key)
+    if values is None:
+        try:
+            values = parse_env_file(env_path)
+        except (OSError, UnicodeDecodeError):
+            return {}
+        write_snapshot(snapshot_path, key, values)
+    _values.clear()
+    _values[key] = values
+    return values
+
+
+@phase('env_load')
+def load_env(env_path=None):
+    """Export the env file to os.environ without overriding variables already set."""
+    for name, value in env_file_values(env_path).items():
+        os.environ.setdefault(name, value)
+
+
+def getenv(name, default=None):
+    """
+    Return an environment variable, reading the env file only if it is not set.
+
+    Args:
+        name (str): Variable name, e.g. 'OPENAI_API_KEY'
+        default: Returned when neither the environment nor the env file sets it
+    """
+    value = os.environ.get(name)
+    if value is not None:
+        return value
+    load_env()
+    return os.environ.get(name, default)
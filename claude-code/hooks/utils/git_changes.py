@@ -0,0 +1,137 @@
+"""
+Bounded-time counting of uncommitted changes for SessionStart.
+
+`git status --porcelain` walks the whole worktree before printing anything,
+which takes seconds on very large repositories. The fast mode instead
+streams tracked changes from `git status --untracked-files=no` (using
+fsmonitor when the repository has it configured) and untracked entries
+from `git ls-files --others --directory`, and counts records as they
+arrive. Every step shares one time budget; when
+it runs out, the git process is killed and the count so far is reported as
+incomplete ("N+").
+
+Every git command runs with --no-optional-locks, so none of them writes
+the index (`git diff` would, even with that flag): killing one on timeout
+can never leave a stale index.lock or touch the index behind the user's
+back.
+
+Environment:
+- CCAOS_GIT_STATUS=fast|full        # full counts `git status --porcelain` lines (default: fast)
+- CCAOS_GIT_STATUS_BUDGET=SECONDS   # Time budget for counting (default: 1.0)
+"""
+
+import os
+import select
+import subprocess
+import sys
+import time
+
+DEFAULT_BUDGET = 1.0
+GIT = ['git', '--no-optional-locks']
+READ_SIZE = 1 << 16
+
+
+def get_budget():
+    """Return the counting time budget in seconds."""
+    try:
+        return max(0.0, float(os.getenv('CCAOS_GIT_STATUS_BUDGET', DEFAULT_BUDGET)))
+    except ValueError:
+        return DEFAULT_BUDGET
+
+
+def count_output(command, deadline, separator=b'\0', cwd=None):
+    """
+    Run a command and count separator-terminated records in its output.
+
+    The command is killed when the deadline passes.
+
+    Returns:
+        tuple: (count, complete), or None if the command failed
+    """
+    try:
+        proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                stdin=subprocess.DEVNULL, cwd=cwd)
+    except OSError:
+        return None
+
+    count = 0
+    try:
+        if sys.platform == 'win32':
+            # select() only works on sockets there, so wait for the whole output
+            try:
+                output, _ = proc.communicate(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                return 0, False
+            count = output.count(separator)
+        else:
+            fd = proc.stdout.fileno()
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return count, False
+                ready, _, _ = select.select([fd], [], [], remaining)
+                if not ready:
+                    continue
+                chunk = os.read(fd, READ_SIZE)
+                if not chunk:
+                    break
+                count += chunk.count(separator)
+        try:
+            returncode = proc.wait(timeout=max(0.0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            return count, False
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        if proc.stdout:
+            proc.stdout.close()
+
+    if returncode != 0:
+        return None
+    return count, True
+
+
+def count_changes_fast(deadline, cwd=None):
+    """Count tracked changes and untracked entries with status -uno and ls-files."""
+    # --no-renames keeps one NUL-terminated record per path
+    tracked = count_output(GIT + ['status', '--porcelain', '-z', '--untracked-files=no', '--no-renames'],
+                           deadline, cwd=cwd)
+    if tracked is None or not tracked[1]:
+        return tracked
+
+    # --directory reports an untracked directory once, as git status does
+    untracked = count_output(
+        GIT + ['ls-files', '--others', '--exclude-standard', '--directory', '--no-empty-directory', '-z'],
+        deadline, cwd=cwd)
+    if untracked is None:
+        return tracked
+    return tracked[0] + untracked[0], untracked[1]
+
+
+def count_changes_full(deadline, cwd=None):
+    """Count `git status --porcelain` lines, as the hook originally did."""
+    return count_output(GIT + ['status', '--porcelain'], deadline, separator=b'\n', cwd=cwd)
+
+
+def count_changes(budget=None, cwd=None):
+    """
+    Count uncommitted changes within a time budget.
+
+    Args:
+        budget (float): Seconds allowed (default: CCAOS_GIT_STATUS_BUDGET)
+        cwd (str|Path): Repository directory (default: cwd)
+
+    Returns:
+        tuple: (count, complete) where complete is False if the budget ran
+        out and count is a lower bound, or None outside a repository
+    """
+    deadline = time.monotonic() + (get_budget() if budget is None else budget)
+    if os.getenv('CCAOS_GIT_STATUS', 'fast') == 'full':
+        return count_changes_full(deadline, cwd)
+    return count_changes_fast(deadline, cwd)
+
+
+def format_changes(count, complete):
+    """Return a change count for display, e.g. "12" or "5000+"."""
+    return f"{count}" if complete else f"{count}+"
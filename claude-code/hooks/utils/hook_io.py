@@ -0,0 +1,129 @@
+"""
+Event input and output shared by the hook scripts.
+
+Every hook keeps its logic in an importable handle(event, args) that takes
+the decoded event and returns a result dict instead of printing and
+calling sys.exit():
+
+    {'exit_code': 0, 'stdout': '', 'stderr': ''}
+
+which is also the shape the hook server sends back to hook_client.py. A
+hook's main() hands its handle() and argument parser to run_hook(), which
+adds a --batch flag:
+
+- default: read one JSON event from stdin, write the result's stdout and
+  stderr and exit with its exit code, as Claude Code expects
+- --batch: read newline-delimited events from stdin and write one
+  newline-delimited JSON result per event to stdout, so logs can be
+  replayed or reprocessed in a single process. Blank lines are skipped;
+  every other line gets exactly one result, in order. A batch is a dry
+  run (CCAOS_DRY_RUN=1, see utils/log_store.py): replayed events are not
+  logged again, and nothing is spoken, refilled, exported or backed up,
+  so a batch can read the very log its hook writes.
+
+Hooks fail open: an event that cannot be decoded or that makes handle()
+raise gets an empty result with exit code 0. With CCAOS_PROFILE=1 each
+event is timed separately (see utils/profiler.py).
+
+Usage:
+- ./post_tool_use.py < event.json
+- ./post_tool_use.py --batch < logs/post_tool_use.jsonl > results.jsonl
+- ./pre_tool_use.py --batch < logs/pre_tool_use.jsonl | jq -c 'select(.exit_code == 2)'
+"""
+
+import json
+import os
+import sys
+
+from utils import profiler
+from utils.profiler import phase
+
+
+def make_result(exit_code=0, stdout='', stderr=''):
+    """Return a hook result."""
+    return {'exit_code': exit_code, 'stdout': stdout, 'stderr': stderr}
+
+
+def default_args(parser):
+    """Return the arguments a hook gets when run without any flags."""
+    return parser.parse_args([])
+
+
+def handle_text(hook, handle, text, args):
+    """
+    Decode one event and handle it.
+
+    Args:
+        hook (str): Hook name, e.g. 'pre_tool_use'
+        handle (callable): The hook's handle(event, args)
+        text (str): The event as JSON
+        args (argparse.Namespace): The hook's parsed arguments
+
+    Returns:
+        dict: The hook result; an empty result if the event is not valid
+              JSON or handle() raised
+    """
+    profiling = profiler.is_enabled()
+    if profiling:
+        profiler.begin(hook)
+    result = make_result()
+    try:
+        with phase('parse'):
+            event = json.loads(text)
+        if isinstance(event, dict):
+            profiler.set_session(event.get('session_id'))
+            result = handle(event, args)
+    except Exception:
+        pass  # Fail open
+    finally:
+        if profiling:
+            profiler.finish(result['exit_code'])
+    return result
+
+
+def handle_lines(hook, handle, lines, args):
+    """Yield one result per non-blank line of newline-delimited events."""
+    for line in lines:
+        if line.strip():
+            yield handle_text(hook, handle, line, args)
+
+
+def run(hook, handle, parser, argv=None, stdin=None, stdout=None, stderr=None):
+    """
+    Run a hook against its input and write its output.
+
+    Returns:
+        int: The process exit code
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    parser.add_argument('--batch', action='store_true',
+                        help='Handle newline-delimited events, writing one JSON result per line')
+    args = parser.parse_args(argv)
+
+    if args.batch:
+        previous = os.environ.get('CCAOS_DRY_RUN')
+        os.environ['CCAOS_DRY_RUN'] = '1'
+        try:
+            for result in handle_lines(hook, handle, stdin, args):
+                stdout.write(json.dumps(result) + '\n')
+        finally:
+            if previous is None:
+                os.environ.pop('CCAOS_DRY_RUN', None)
+            else:
+                os.environ['CCAOS_DRY_RUN'] = previous
+        stdout.flush()
+        return 0
+
+    result = handle_text(hook, handle, stdin.read(), args)
+    stdout.write(result['stdout'])
+    stderr.write(result['stderr'])
+    stdout.flush()
+    stderr.flush()
+    return result['exit_code']
+
+
+def run_hook(hook, handle, parser):
+    """Run a hook as a script and exit with its exit code."""
+    sys.exit(run(hook, handle, parser))
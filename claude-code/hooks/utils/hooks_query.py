@@ -0,0 +1,408 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Indexed queries over the hook event logs.
+
+Questions like "what tools ran in session X" or "which Bash commands were
+blocked" used to mean loading every log in full. This keeps a SQLite index
+(logs/hooks_index.sqlite) of each event's log name, session_id, tool_name,
+time and status, with the record itself, so filters run against indexed
+columns instead of scanning the logs.
+
+The index is brought up to date incrementally before each query. Every log
+file (current log, rolled segment or legacy array) is tracked by a
+fingerprint of its first record, so a log that rolls into the archive or
+gets gzipped is recognised and only the records appended since the last
+update are read. Rows of files removed by retention are dropped.
+
+Status is 'block' for calls stopped by a pre_tool_use rule, 'allow' for
+other pre_tool_use calls, 'ok' or 'error' for post_tool_use results, and
+empty for other events.
+
+Usage:
+- ./hooks_query.py [--log-dir DIR] query [--session ID] [--tool NAME] [--log NAME]
+                   [--status STATUS] [--since WHEN] [--until WHEN] [--limit N]
+                   [--format jsonl|csv]
+- ./hooks_query.py [--log-dir DIR] index    # Update the index now
+- ./hooks_query.py [--log-dir DIR] stats    # Event counts per log and status
+
+WHEN is an ISO 8601 time or an age such as 30m, 2h or 7d.
+"""
+
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from utils.log_store import (
+    LEGACY_SUFFIX, LOG_SUFFIX, NON_EVENT_LOGS, get_archive_dir, get_legacy_path, get_log_dir,
+    get_log_path, list_segments, load_legacy,
+)
+
+INDEX_FILE = 'hooks_index.sqlite'
+CSV_FIELDS = ['log', 'session_id', 'tool_name', 'logged_at', 'status']
+AGE_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    fingerprint TEXT PRIMARY KEY,
+    log TEXT NOT NULL,
+    path TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    sealed INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    log TEXT NOT NULL,
+    session_id TEXT,
+    tool_name TEXT,
+    timestamp REAL,
+    status TEXT,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_source ON events (source);
+CREATE INDEX IF NOT EXISTS events_session ON events (session_id, timestamp);
+CREATE INDEX IF NOT EXISTS events_tool ON events (tool_name, timestamp);
+CREATE INDEX IF NOT EXISTS events_status ON events (status, timestamp);
+CREATE INDEX IF NOT EXISTS events_log ON events (log, timestamp);
+CREATE INDEX IF NOT EXISTS events_timestamp ON events (timestamp);
+"""
+
+
+def get_index_path(log_dir=None):
+    """Return the SQLite index path."""
+    return get_log_dir(log_dir) / INDEX_FILE
+
+
+def connect(log_dir=None):
+    """Open the index, creating its schema if needed."""
+    index_path = get_index_path(log_dir)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(index_path), timeout=30, isolation_level=None)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def parse_time(value):
+    """Return an ISO 8601 time as epoch seconds, or None if it cannot be parsed."""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed.timestamp()
+
+
+def parse_when(value, now=None):
+    """
+    Parse a --since/--until argument into epoch seconds.
+
+    Raises:
+        ValueError: If value is neither an age like 2h nor an ISO 8601 time
+    """
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([smhd])', value.strip())
+    if match:
+        return (time.time() if now is None else now) - float(match.group(1)) * AGE_UNITS[match.group(2)]
+    parsed = parse_time(value)
+    if parsed is None:
+        raise ValueError(f"Invalid time: {value}")
+    return parsed
+
+
+def event_status(record):
+    """Return the outcome recorded for an event, or None when it has none."""
+    policy = record.get('policy')
+    if isinstance(policy, dict) and policy.get('decision'):
+        return policy['decision']
+    response = record.get('tool_response')
+    if isinstance(response, dict):
+        failed = response.get('is_error') or response.get('error') or response.get('interrupted')
+        return 'error' if failed else 'ok'
+    if 'tool_name' in record:
+        return 'allow'
+    return None
+
+
+def event_row(source, log, record):
+    """Return the events row for one record."""
+    session_id = record.get('session_id')
+    tool_name = record.get('tool_name')
+    return (
+        source,
+        log,
+        session_id if isinstance(session_id, str) else None,
+        tool_name if isinstance(tool_name, str) else None,
+        parse_time(record.get('logged_at')),
+        event_status(record),
+        json.dumps(record, separators=(',', ':'), default=str),
+    )
+
+
+def open_log(path):
+    """Open a JSONL log or gzipped segment for binary reading."""
+    return gzip.open(path, 'rb') if str(path).endswith('.gz') else open(path, 'rb')
+
+
+def fingerprint(log, path):
+    """
+    Identify a log's JSONL file by its first complete line.
+
+    The first record carries its session and logged_at time, so it stays
+    the same when the file is renamed into the archive or compressed.
+    Returns None while the file has no complete line yet.
+    """
+    with open_log(path) as f:
+        first = f.readline()
+    if not first.endswith(b'\n'):
+        return None
+    return hashlib.sha256(log.encode('utf-8') + b'\0' + first).hexdigest()
+
+
+def index_jsonl(conn, log, path, sealed):
+    """
+    Index the records of one JSONL file not indexed before.
+
+    Args:
+        sealed (bool): The file is a rolled segment and will not grow again
+
+    Returns:
+        tuple: (fingerprint or None, number of records added)
+    """
+    known = conn.execute('SELECT fingerprint, offset, sealed FROM sources WHERE path = ?',
+                         (str(path),)).fetchone()
+    if known and known[2]:
+        return known[0], 0
+
+    source = fingerprint(log, path)
+    if source is None:
+        return None, 0
+    row = conn.execute('SELECT offset, sealed FROM sources WHERE fingerprint = ?', (source,)).fetchone()
+    if row and row[1]:
+        conn.execute('UPDATE sources SET path = ? WHERE fingerprint = ?', (str(path), source))
+        return source, 0
+    offset = row[0] if row else 0
+
+    rows = []
+    with open_log(path) as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break  # A record still being written
+            offset += len(line)
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except (json.JSONDecodeError, ValueError):
+                continue
+            if isinstance(record, dict):
+                rows.append(event_row(source, log, record))
+
+    conn.executemany('INSERT INTO events (source, log, session_id, tool_name, timestamp, status, record) '
+                     'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.execute('INSERT OR REPLACE INTO sources (fingerprint, log, path, offset, sealed) VALUES (?, ?, ?, ?, ?)',
+                 (source, log, str(path), offset, int(sealed)))
+    return source, len(rows)
+
+
+def index_legacy(conn, log, path):
+    """Index a legacy JSON array log, reindexing it whenever it changes."""
+    st = path.stat()
+    source = f'legacy:{log}:{st.st_size}:{st.st_mtime_ns}'
+    if conn.execute('SELECT 1 FROM sources WHERE fingerprint = ?', (source,)).fetchone():
+        return source, 0
+    rows = [event_row(source, log, r) for r in load_legacy(path) if isinstance(r, dict)]
+    conn.executemany('INSERT INTO events (source, log, session_id, tool_name, timestamp, status, record) '
+                     'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+    conn.execute('INSERT INTO sources (fingerprint, log, path, offset, sealed) VALUES (?, ?, ?, 0, 1)',
+                 (source, log, str(path)))
+    return source, len(rows)
+
+
+def find_logs(log_dir=None):
+    """Return the names of all event logs: current, archived and legacy."""
+    logs = get_log_dir(log_dir)
+    if not logs.exists():
+        return []
+    names = {p.name[:-len(LOG_SUFFIX)] for p in logs.glob(f'*{LOG_SUFFIX}')}
+    names.update(p.stem for p in logs.glob(f'*{LEGACY_SUFFIX}'))
+    archive_dir = get_archive_dir(log_dir)
+    if archive_dir.exists():
+        for segment in archive_dir.glob(f'*{LOG_SUFFIX}*'):
+            match = re.fullmatch(r'(.+)\.\d{8}-\d{6}-\d{6}' + re.escape(LOG_SUFFIX) + r'(\.gz)?', segment.name)
+            if match:
+                names.add(match.group(1))
+    return sorted(n for n in names if n not in NON_EVENT_LOGS)
+
+
+def update_index(log_dir=None):
+    """
+    Bring the index up to date with the logs.
+
+    Returns:
+        int: Number of records added
+    """
+    conn = connect(log_dir)
+    try:
+        # Take the write lock up front so concurrent updaters index each file once
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            seen = set()
+            added = 0
+            for log in find_logs(log_dir):
+                legacy_path = get_legacy_path(log, log_dir)
+                files = [(p, True) for p in list_segments(log, log_dir)]
+                files.append((get_log_path(log, log_dir), False))
+                if legacy_path.exists():
+                    source, count = index_legacy(conn, log, legacy_path)
+                    seen.add(source)
+                    added += count
+                for path, sealed in files:
+                    try:
+                        source, count = index_jsonl(conn, log, path, sealed)
+                    except (OSError, EOFError):
+                        continue  # Missing, or removed by retention while reading
+                    if source:
+                        seen.add(source)
+                        added += count
+
+            # Forget files that were deleted or rewritten (e.g. by migration)
+            stale = [row[0] for row in conn.execute('SELECT fingerprint FROM sources') if row[0] not in seen]
+            for source in stale:
+                conn.execute('DELETE FROM events WHERE source = ?', (source,))
+                conn.execute('DELETE FROM sources WHERE fingerprint = ?', (source,))
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return added
+    finally:
+        conn.close()
+
+
+def query_events(log_dir=None, session=None, tool=None, log=None, status=None,
+                 since=None, until=None, limit=None, update=True):
+    """
+    Return matching records, oldest first.
+
+    Args:
+        session, tool, log, status (str): Exact-match filters
+        since, until (float): Epoch seconds bounding logged_at
+        limit (int): Return only the most recent N matches
+        update (bool): Update the index first
+    """
+    if update:
+        update_index(log_dir)
+    clauses, params = [], []
+    for column, value in (('session_id', session), ('tool_name', tool), ('log', log), ('status', status)):
+        if value is not None:
+            clauses.append(f'{column} = ?')
+            params.append(value)
+    if since is not None:
+        clauses.append('timestamp >= ?')
+        params.append(since)
+    if until is not None:
+        clauses.append('timestamp < ?')
+        params.append(until)
+    sql = 'SELECT log, status, record FROM events'
+    if clauses:
+        sql += ' WHERE ' + ' AND '.join(clauses)
+    sql += ' ORDER BY timestamp DESC, id DESC'
+    if limit:
+        sql += ' LIMIT ?'
+        params.append(limit)
+
+    conn = connect(log_dir)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    results = []
+    for log_name, event_status_value, record in reversed(rows):
+        results.append((log_name, event_status_value, json.loads(record)))
+    return results
+
+
+def write_results(results, output_format, out):
+    """Write query results as JSONL records or CSV rows."""
+    if output_format == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(CSV_FIELDS)
+        for log, status, record in results:
+            writer.writerow([log, record.get('session_id', ''), record.get('tool_name', ''),
+                             record.get('logged_at', ''), status or ''])
+        return
+    for log, status, record in results:
+        out.write(json.dumps(dict(record, log=log), default=str) + '\n')
+
+
+def main():
+    """Command line interface for indexing and querying hook events."""
+    parser = argparse.ArgumentParser(description='Query hook event logs')
+    parser.add_argument('--log-dir', help='Log directory (default: ./logs)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    query_parser = subparsers.add_parser('query', help='Print matching events')
+    query_parser.add_argument('--session', help='session_id')
+    query_parser.add_argument('--tool', help='tool_name, e.g. Bash')
+    query_parser.add_argument('--log', help='Log name, e.g. pre_tool_use')
+    query_parser.add_argument('--status', help='block, allow, ok or error')
+    query_parser.add_argument('--since', help='ISO 8601 time or age such as 2h')
+    query_parser.add_argument('--until', help='ISO 8601 time or age such as 2h')
+    query_parser.add_argument('--limit', type=int, help='Only the most recent N events')
+    query_parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl')
+    query_parser.add_argument('--no-update', action='store_true', help='Query the index as it is')
+
+    subparsers.add_parser('index', help='Update the index')
+    subparsers.add_parser('stats', help='Show event counts per log and status')
+
+    args = parser.parse_args()
+
+    if args.command == 'query':
+        try:
+            since = parse_when(args.since) if args.since else None
+            until = parse_when(args.until) if args.until else None
+        except ValueError as e:
+            print(f"❌ Error: {e}", file=sys.stderr)
+            return 1
+        results = query_events(args.log_dir, args.session, args.tool, args.log, args.status,
+                               since, until, args.limit, update=not args.no_update)
+        write_results(results, args.format, sys.stdout)
+        return 0
+
+    if args.command == 'index':
+        print(f"Indexed {update_index(args.log_dir)} new events")
+        return 0
+
+    if args.command == 'stats':
+        update_index(args.log_dir)
+        conn = connect(args.log_dir)
+        try:
+            rows = conn.execute('SELECT log, status, COUNT(*) FROM events GROUP BY log, status ORDER BY log, status')
+            for log, status, count in rows:
+                print(f"{log:<20} {status or '-':<6} {count}")
+        finally:
+            conn.close()
+        return 0
+
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
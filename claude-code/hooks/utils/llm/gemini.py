@@ -3,55 +3,33 @@
 # requires-python = ">=3.8"
 # dependencies = [
 #     "google-genai",
-#     "python-dotenv",
 # ]
 # ///
 
 import os
 import sys
-from dotenv import load_dotenv
 
+try:
+    from utils.llm import providers
+except ImportError:  # Run as a script from utils/llm
+    import providers
 
-def prompt_llm(prompt_text):
+
+def prompt_llm(prompt_text, max_tokens=100):
     """
     Base Gemini LLM prompting method using fastest model.
 
+    The SDK client is shared through the provider layer, so repeat calls in
+    one process reuse its connection.
+
     Args:
         prompt_text (str): The prompt to send to the model
+        max_tokens (int): Upper bound on the response length
 
     Returns:
         str: The model's response text, or None if error
     """
-    # Load dotenv from custom path if specified
-    env_file = os.getenv("CCAOS_ENV_FILE")
-    if env_file:
-        load_dotenv(dotenv_path=env_file)
-    else:
-        load_dotenv()
-
-    # Check for GOOGLE_API_KEY first, fallback to GEMINI_API_KEY
-    api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        return None
-
-    try:
-        from google import genai
-
-        client = genai.Client(api_key=api_key)
-
-        response = client.models.generate_content(
-            model="gemini-2.0-flash-001",  # Specified Gemini model
-            contents=prompt_text,
-            config={
-                "temperature": 0.7,
-                "max_output_tokens": 100,
-            }
-        )
-
-        return response.candidates[0].content.parts[0].text.strip()
-
-    except Exception:
-        return None
+    return providers.prompt_llm("gemini", prompt_text, max_tokens)
 
 
 def generate_completion_message():
@@ -98,8 +76,27 @@ Generate ONE completion message:"""
     return response
 
 
+def generate_completion_messages(count):
+    """
+    Generate several distinct completion messages with one Gemini request.
+
+    Args:
+        count (int): Number of messages to ask for
+
+    Returns:
+        list: Cleaned completion messages (may be fewer than count, empty on error)
+    """
+    return providers.completion_messages(prompt_llm, count)
+
+
+def load_env():
+    """Load the env file, honouring CCAOS_ENV_FILE."""
+    providers.load_env()
+
+
 def main():
     """Command line interface for testing."""
+    load_env()
     if len(sys.argv) > 1:
         if sys.argv[1] == "--completion":
             message = generate_completion_message()
@@ -107,6 +104,14 @@ def main():
                 print(message)
             else:
                 print("Error generating completion message")
+        elif sys.argv[1] == "--completion-batch":
+            count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+            messages = generate_completion_messages(count)
+            if messages:
+                print("\n".join(messages))
+            else:
+                print("Error generating completion messages", file=sys.stderr)
+                sys.exit(1)
         else:
             prompt_text = " ".join(sys.argv[1:])
             response = prompt_llm(prompt_text)
@@ -115,7 +120,7 @@ def main():
             else:
                 print("Error calling Gemini API")
     else:
-        print("Usage: ./gemini.py 'your prompt here' or ./gemini.py --completion")
+        print("Usage: ./gemini.py 'your prompt here' or ./gemini.py --completion or ./gemini.py --completion-batch N")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,246 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Completion Message Pool
+
+Keeps a local pool of LLM-generated completion messages per engineer name so
+the Stop hook can take one instantly instead of starting an LLM script and
+waiting on an API call. When the pool runs low, a detached refill process
+asks the LLM script for a batch of messages in a single request.
+
+Usage:
+- ./message_pool.py refill --llm-script PATH [--batch N]  # Top up the pool now
+- ./message_pool.py show                                  # Print pooled messages
+
+Environment:
+- ENGINEER_NAME                 # Pools are kept per engineer name
+- CCAOS_MESSAGE_POOL_DIR=PATH   # Pool directory (default: <hooks>/cache/messages)
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from utils.env import getenv
+from utils.llm.providers import call_script, load_script
+from utils.log_store import is_dry_run, locked
+from utils.profiler import phase
+
+# Refill when fewer messages than this remain
+LOW_WATER = 3
+# Messages requested per LLM call
+BATCH_SIZE = 10
+# Never keep more than this many messages
+MAX_POOL = 30
+
+REFILL_TIMEOUT_SECONDS = 30
+
+
+def get_pool_dir():
+    """Return the directory holding the message pools."""
+    configured = os.getenv('CCAOS_MESSAGE_POOL_DIR')
+    if configured:
+        return Path(configured).expanduser()
+    return HOOKS_DIR / 'cache' / 'messages'
+
+
+def pool_name(engineer_name=None):
+    """Return the pool file stem for an engineer name."""
+    if engineer_name is None:
+        engineer_name = getenv('ENGINEER_NAME', '')
+    slug = re.sub(r'[^a-z0-9]+', '_', engineer_name.strip().lower()).strip('_')
+    return slug or 'default'
+
+
+def get_pool_path(engineer_name=None):
+    """Return the pool file for an engineer name."""
+    return get_pool_dir() / f'{pool_name(engineer_name)}.json'
+
+
+def update_pool(update, engineer_name=None):
+    """
+    Apply update(messages) to the pool under its lock and save the result.
+
+    Returns:
+        The value returned by update
+    """
+    pool_path = get_pool_path(engineer_name)
+    pool_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(pool_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        with locked(fd):
+            with os.fdopen(os.dup(fd), 'r+') as f:
+                try:
+                    messages = json.load(f)
+                except (json.JSONDecodeError, ValueError):
+                    messages = []
+                if not isinstance(messages, list):
+                    messages = []
+                result = update(messages)
+                f.seek(0)
+                f.truncate()
+                json.dump(messages, f, indent=2)
+            return result
+    finally:
+        os.close(fd)
+
+
+def read_pool(engineer_name=None):
+    """Return the pooled messages without changing the pool."""
+    return update_pool(list, engineer_name)
+
+
+def add_messages(new_messages, engineer_name=None):
+    """Add messages to the pool, skipping duplicates; returns the pool size."""
+    def add(messages):
+        for message in new_messages:
+            if message not in messages and len(messages) < MAX_POOL:
+                messages.append(message)
+        return len(messages)
+    return update_pool(add, engineer_name)
+
+
+def refill_lock_path(engineer_name=None):
+    """Return the lock file held while a pool is being refilled."""
+    return get_pool_dir() / f'{pool_name(engineer_name)}.refill.lock'
+
+
+def acquire_refill_lock(engineer_name=None):
+    """Take the refill lock without waiting, returning the held file or None."""
+    lock_path = refill_lock_path(engineer_name)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    lock_file = open(lock_path, 'a')
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def request_batch(llm_script, batch=BATCH_SIZE):
+    """
+    Ask an LLM script for a batch of completion messages in one call.
+
+    The script runs in-process when its SDK is installed here, otherwise
+    through uv.
+    """
+    if load_script(llm_script) is not None:
+        return call_script(llm_script, 'generate_completion_messages', batch) or []
+    try:
+        result = subprocess.run(
+            ['uv', 'run', str(llm_script), '--completion-batch', str(batch)],
+            capture_output=True,
+            text=True,
+            timeout=REFILL_TIMEOUT_SECONDS,
+        )
+    except (subprocess.TimeoutExpired, subprocess.SubprocessError, OSError):
+        return []
+    if result.returncode != 0:
+        return []
+    return [line.strip() for line in result.stdout.splitlines() if line.strip()]
+
+
+def refill(llm_script, batch=BATCH_SIZE, engineer_name=None):
+    """
+    Top up the pool with one batch request unless a refill is already running.
+
+    Returns:
+        int: Number of messages now pooled, or None if another refill holds the lock
+    """
+    lock_file = acquire_refill_lock(engineer_name)
+    if lock_file is None:
+        return None
+    try:
+        return add_messages(request_batch(llm_script, batch), engineer_name)
+    finally:
+        lock_file.close()
+
+
+@phase('spawn')
+def spawn_refill(llm_script, batch=BATCH_SIZE):
+    """Start a detached refill for the current engineer's pool."""
+    try:
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), 'refill',
+             '--llm-script', str(llm_script), '--batch', str(batch)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        return True
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+
+def pop_message(llm_script=None, batch=BATCH_SIZE):
+    """
+    Take one pooled completion message for the current engineer.
+
+    When the pool falls below LOW_WATER and an LLM script is available, a
+    background refill is started; the caller never waits on the LLM.
+
+    Returns:
+        str: A completion message, or None if the pool is empty (always
+             None on a dry run, which leaves the pool untouched)
+    """
+    if is_dry_run():
+        return None
+
+    def pop(messages):
+        message = messages.pop(0) if messages else None
+        return message, len(messages)
+
+    message, remaining = update_pool(pop)
+    if llm_script and remaining < LOW_WATER:
+        spawn_refill(llm_script, batch)
+    return message
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Completion message pool')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    refill_parser = subparsers.add_parser('refill', help='Add one batch of LLM messages to the pool')
+    refill_parser.add_argument('--llm-script', required=True, help='LLM script supporting --completion-batch')
+    refill_parser.add_argument('--batch', type=int, default=BATCH_SIZE, help='Messages per request')
+    subparsers.add_parser('show', help='Print the pooled messages')
+
+    args = parser.parse_args()
+
+    if args.command == 'refill':
+        size = refill(args.llm_script, args.batch)
+        if size is None:
+            print("Refill already running")
+        else:
+            print(f"✓ {pool_name()}: {size} messages pooled")
+        return 0
+
+    if args.command == 'show':
+        for message in read_pool():
+            print(message)
+        return 0
+
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
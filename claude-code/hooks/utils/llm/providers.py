@@ -0,0 +1,539 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "anthropic",
+#     "openai",
+#     "google-genai",
+# ]
+# ///
+
+"""
+LLM Provider Layer
+
+Importable access to the Gemini, OpenAI and Anthropic APIs with one lazily
+created SDK client per provider. The client, and the HTTPS connection pool
+inside it, is kept for the life of the process, so repeat prompts from a
+long-lived process (the hook server, the background speaker, a pool refill)
+reuse a warm keep-alive connection instead of paying for a new client and a
+TLS handshake each time.
+
+Hooks can also run an LLM script's functions in-process with call_script()
+instead of starting `uv run` for it; callers fall back to the subprocess when
+the script's SDK is not installed in their interpreter.
+
+Every prompt's latency is recorded per provider. In race mode call_script()
+hedges: it starts the provider with the best observed p50, and if no answer
+has arrived after the hedge delay (by default that provider's p95) it starts
+the next one as well, taking whichever good answer comes first.
+
+Usage:
+- ./providers.py list                              # Providers usable with the current keys
+- ./providers.py prompt "Text" [--provider NAME]   # Prompt one provider
+- ./providers.py stats                             # Show observed latency per provider
+
+Environment:
+- CCAOS_ENV_FILE=PATH           # Env file loaded by the command line interface
+- CCAOS_LLM_RACE=1              # Hedge in-process calls across providers
+- CCAOS_LLM_HEDGE_DELAY=SECONDS # Fixed hedge delay (default: primary's p95)
+- CCAOS_LLM_LATENCY_FILE=PATH   # Latency stats (default: <hooks>/cache/llm-latency.json)
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+LLM_DIR = Path(__file__).resolve().parent
+HOOKS_DIR = LLM_DIR.parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from utils.env import getenv, load_env
+
+TEMPERATURE = 0.7
+REQUEST_TIMEOUT_SECONDS = 10
+# Idle connections stay open this long between prompts
+KEEPALIVE_SECONDS = 60
+
+# Latency samples kept per provider, and needed before they affect ordering
+LATENCY_SAMPLES = 50
+MIN_SAMPLES = 5
+# Hedge delay used until the primary provider has enough samples
+DEFAULT_HEDGE_DELAY = 1.5
+
+# Providers in the hooks' priority order: script, SDK module, API keys, model
+PROVIDERS = {
+    'gemini': {
+        'script': 'gemini.py',
+        'sdk': 'google.genai',
+        'keys': ('GOOGLE_API_KEY', 'GEMINI_API_KEY'),
+        'model': 'gemini-2.0-flash-001',
+    },
+    'openai': {
+        'script': 'oai.py',
+        'sdk': 'openai',
+        'keys': ('OPENAI_API_KEY',),
+        'model': 'gpt-4.1-nano',
+    },
+    'anthropic': {
+        'script': 'anth.py',
+        'sdk': 'anthropic',
+        'keys': ('ANTHROPIC_API_KEY',),
+        'model': 'claude-3-5-haiku-20241022',
+    },
+}
+
+_clients = {}
+_scripts = {}
+_lock = threading.Lock()
+
+
+def get_api_key(provider):
+    """Return the first API key set for a provider, or None."""
+    for key in PROVIDERS[provider]['keys']:
+        value = getenv(key)
+        if value:
+            return value
+    return None
+
+
+def available_providers():
+    """Return the providers with an API key set, in priority order."""
+    return [name for name in PROVIDERS if get_api_key(name)]
+
+
+def is_installed(provider):
+    """Return True if the provider's SDK can be imported by this interpreter."""
+    try:
+        return importlib.util.find_spec(PROVIDERS[provider]['sdk']) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def make_http_client():
+    """Return an HTTP client that keeps idle connections open between prompts."""
+    import httpx
+
+    return httpx.Client(
+        timeout=REQUEST_TIMEOUT_SECONDS,
+        limits=httpx.Limits(keepalive_expiry=KEEPALIVE_SECONDS),
+    )
+
+
+def create_client(provider, api_key):
+    """Build a new SDK client for a provider."""
+    if provider == 'gemini':
+        from google import genai
+
+        return genai.Client(api_key=api_key, http_options={'timeout': REQUEST_TIMEOUT_SECONDS * 1000})
+    if provider == 'openai':
+        from openai import OpenAI
+
+        return OpenAI(api_key=api_key, http_client=make_http_client())
+    if provider == 'anthropic':
+        import anthropic
+
+        return anthropic.Anthropic(api_key=api_key, http_client=make_http_client())
+    raise ValueError(f"Unknown provider: {provider}")
+
+
+def get_client(provider):
+    """
+    Return the shared SDK client for a provider, creating it on first use.
+
+    Clients are cached per API key, so changing the key builds a new one.
+
+    Returns:
+        The SDK client, or None if no API key is set
+    """
+    api_key = get_api_key(provider)
+    if not api_key:
+        return None
+    with _lock:
+        cached = _clients.get(provider)
+        if cached and cached[0] == api_key:
+            return cached[1]
+        client = create_client(provider, api_key)
+        _clients[provider] = (api_key, client)
+        return client
+
+
+def send_prompt(provider, client, prompt_text, max_tokens, temperature):
+    """Send one prompt with a provider's SDK and return the response text."""
+    model = PROVIDERS[provider]['model']
+    if provider == 'gemini':
+        response = client.models.generate_content(
+            model=model,
+            contents=prompt_text,
+            config={
+                "temperature": temperature,
+                "max_output_tokens": max_tokens,
+            }
+        )
+        return response.candidates[0].content.parts[0].text
+    if provider == 'openai':
+        response = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt_text}],
+            max_tokens=max_tokens,
+            temperature=temperature,
+        )
+        return response.choices[0].message.content
+    message = client.messages.create(
+        model=model,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        messages=[{"role": "user", "content": prompt_text}],
+    )
+    return message.content[0].text
+
+
+def get_latency_path():
+    """Return the file holding per-provider latency samples."""
+    configured = os.getenv('CCAOS_LLM_LATENCY_FILE')
+    if configured:
+        return Path(configured).expanduser()
+    return HOOKS_DIR / 'cache' / 'llm-latency.json'
+
+
+def read_latency():
+    """Return {provider: [seconds, ...]} of recent prompt latencies."""
+    try:
+        with open(get_latency_path(), 'r') as f:
+            samples = json.load(f)
+    except (OSError, json.JSONDecodeError, ValueError):
+        return {}
+    return samples if isinstance(samples, dict) else {}
+
+
+def record_latency(provider, seconds):
+    """Append one latency sample for a provider, keeping the newest LATENCY_SAMPLES."""
+    path = get_latency_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a+') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            try:
+                samples = json.load(f)
+            except (json.JSONDecodeError, ValueError):
+                samples = {}
+            if not isinstance(samples, dict):
+                samples = {}
+            history = samples.get(provider, [])[-(LATENCY_SAMPLES - 1):]
+            samples[provider] = history + [round(seconds, 3)]
+            f.seek(0)
+            f.truncate()
+            json.dump(samples, f)
+    except OSError:
+        pass  # Stats are best effort
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+def latency_summary(provider, samples=None):
+    """
+    Return (p50, p95) seconds for a provider.
+
+    Returns None until the provider has MIN_SAMPLES samples.
+    """
+    history = (read_latency() if samples is None else samples).get(provider, [])
+    if len(history) < MIN_SAMPLES:
+        return None
+    return percentile(history, 0.5), percentile(history, 0.95)
+
+
+def order_by_latency(candidates):
+    """
+    Order providers by observed p50 latency.
+
+    Providers without enough samples go first in their priority order so
+    they get measured; the sort is stable, so ties keep priority order.
+    """
+    samples = read_latency()
+
+    def p50(provider):
+        summary = latency_summary(provider, samples)
+        return summary[0] if summary else 0.0
+
+    return sorted(candidates, key=p50)
+
+
+def get_hedge_delay(primary):
+    """Return seconds to wait on the primary provider before hedging."""
+    configured = os.getenv('CCAOS_LLM_HEDGE_DELAY')
+    if configured:
+        try:
+            return max(0.0, float(configured))
+        except ValueError:
+            pass
+    summary = latency_summary(primary)
+    return summary[1] if summary else DEFAULT_HEDGE_DELAY
+
+
+def prompt_llm(provider, prompt_text, max_tokens=100, temperature=TEMPERATURE):
+    """
+    Prompt a provider's fastest model through its shared client.
+
+    Args:
+        provider (str): 'gemini', 'openai' or 'anthropic'
+        prompt_text (str): The prompt to send to the model
+        max_tokens (int): Upper bound on the response length
+        temperature (float): Sampling temperature
+
+    Returns:
+        str: The model's response text, or None if error
+    """
+    try:
+        client = get_client(provider)
+    except Exception:
+        return None
+    if client is None:
+        return None
+
+    started = time.monotonic()
+    try:
+        response = send_prompt(provider, client, prompt_text, max_tokens, temperature).strip()
+    except Exception:
+        response = None
+    # Failures count as a full timeout so an erroring provider sinks in the order
+    elapsed = time.monotonic() - started if response else float(REQUEST_TIMEOUT_SECONDS)
+    record_latency(provider, elapsed)
+    return response
+
+
+def completion_messages(prompt, count):
+    """
+    Generate several distinct completion messages with one request.
+
+    Shared by the provider scripts' generate_completion_messages(), which
+    pass their own prompt_llm.
+
+    Args:
+        prompt (callable): The script's prompt_llm(prompt_text, max_tokens)
+        count (int): Number of messages to ask for
+
+    Returns:
+        list: Cleaned completion messages (may be fewer than count, empty on error)
+    """
+    engineer_name = os.getenv("ENGINEER_NAME", "").strip()
+
+    if engineer_name:
+        name_instruction = f"Include the engineer's name '{engineer_name}' in a natural way in about 30% of the messages."
+    else:
+        name_instruction = ""
+
+    prompt_text = f"""Generate {count} different short, friendly completion messages for when an AI coding assistant finishes a task.
+
+Requirements:
+- Keep each one under 10 words
+- Make them positive and future focused
+- Use natural, conversational language
+- Focus on completion/readiness
+- Put each message on its own line
+- Do NOT number them or include quotes, formatting, or explanations
+{name_instruction}
+
+Examples of the style: "Work complete!", "All done!", "Task finished!", "Ready for your next move!"
+
+Generate {count} completion messages:"""
+
+    response = prompt(prompt_text, max_tokens=30 * count)
+    if not response:
+        return []
+
+    messages = []
+    for line in response.split("\n"):
+        # Drop list markers the model may add anyway, then quotes
+        line = line.strip().lstrip("-*0123456789.) ").strip().strip('"').strip("'").strip()
+        if line and line not in messages:
+            messages.append(line)
+    return messages[:count]
+
+
+def provider_for_script(llm_script):
+    """Return the provider an LLM script talks to, or None."""
+    name = Path(llm_script).name
+    for provider, config in PROVIDERS.items():
+        if config['script'] == name:
+            return provider
+    return None
+
+
+def load_script(llm_script):
+    """
+    Import an LLM script as a module so its functions run in-process.
+
+    Returns:
+        The module, or None if the script is unknown or its SDK is not
+        installed in this interpreter (callers then run it with uv)
+    """
+    llm_script = Path(llm_script)
+    provider = provider_for_script(llm_script)
+    if provider is None or not llm_script.exists() or not is_installed(provider):
+        return None
+    with _lock:
+        if llm_script in _scripts:
+            return _scripts[llm_script]
+        try:
+            spec = importlib.util.spec_from_file_location(f'ccaos_llm_{provider}', llm_script)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        except Exception:
+            module = None
+        _scripts[llm_script] = module
+        return module
+
+
+def is_race_enabled():
+    """Return True when CCAOS_LLM_RACE=1 turns on hedged calls."""
+    return os.getenv('CCAOS_LLM_RACE', '0') == '1'
+
+
+def race(call, candidates, hedge_delay=None, timeout=REQUEST_TIMEOUT_SECONDS):
+    """
+    Run call(provider) hedged across candidates and return the first good answer.
+
+    The first candidate starts at once. Each further candidate starts when
+    hedge_delay passes without an answer, or as soon as every running call
+    has failed. Once an answer arrives no more candidates are started;
+    calls still in flight run out in daemon threads and are ignored.
+
+    Returns:
+        tuple: (provider, result), or (None, None) if every call failed or
+        the timeout passed
+    """
+    if not candidates:
+        return None, None
+    if hedge_delay is None:
+        hedge_delay = get_hedge_delay(candidates[0])
+
+    results = queue.Queue()
+
+    def worker(provider):
+        try:
+            result = call(provider)
+        except Exception:
+            result = None
+        results.put((provider, result))
+
+    pending = list(candidates)
+    running = 0
+    deadline = time.monotonic() + timeout
+    next_start = time.monotonic()
+    while True:
+        now = time.monotonic()
+        if pending and (running == 0 or now >= next_start):
+            threading.Thread(target=worker, args=(pending.pop(0),), daemon=True).start()
+            running += 1
+            next_start = now + hedge_delay
+            continue
+        if running == 0 or now >= deadline:
+            return None, None
+
+        wait_until = min(deadline, next_start) if pending else deadline
+        try:
+            provider, result = results.get(timeout=max(0.0, wait_until - now))
+        except queue.Empty:
+            continue
+        running -= 1
+        if result:
+            return provider, result
+
+
+def call_script(llm_script, function_name, *args):
+    """
+    Call a function of an LLM script in-process.
+
+    In race mode the same function of every other provider with an API key
+    and an installed SDK is hedged behind it, ordered by observed latency.
+
+    Returns:
+        The function's result, or None if it failed or the script cannot be
+        imported here (check load_script() first to fall back to uv)
+    """
+    if not is_race_enabled():
+        module = load_script(llm_script)
+        if module is None:
+            return None
+        try:
+            return getattr(module, function_name)(*args)
+        except Exception:
+            return None
+
+    candidates = [provider_for_script(llm_script)] + available_providers()
+    candidates = [p for p in dict.fromkeys(candidates) if p and load_script(LLM_DIR / PROVIDERS[p]['script'])]
+
+    def call(provider):
+        module = load_script(LLM_DIR / PROVIDERS[provider]['script'])
+        return getattr(module, function_name)(*args)
+
+    return race(call, order_by_latency(candidates))[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LLM provider layer')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('list', help='List providers usable with the current API keys')
+    subparsers.add_parser('stats', help='Show observed latency per provider')
+    prompt_parser = subparsers.add_parser('prompt', help='Send a prompt to one provider')
+    prompt_parser.add_argument('text', nargs='+', help='Prompt text')
+    prompt_parser.add_argument('--provider', choices=list(PROVIDERS),
+                               help='Provider to use (default: first with an API key)')
+    prompt_parser.add_argument('--max-tokens', type=int, default=100, help='Response length limit')
+
+    args = parser.parse_args()
+    load_env()
+
+    if args.command == 'list':
+        for provider in available_providers():
+            status = 'installed' if is_installed(provider) else 'SDK not installed'
+            print(f"{provider}: {PROVIDERS[provider]['model']} ({status})")
+        return 0
+
+    if args.command == 'stats':
+        samples = read_latency()
+        for provider in PROVIDERS:
+            summary = latency_summary(provider, samples)
+            count = len(samples.get(provider, []))
+            if summary:
+                print(f"{provider}: p50 {summary[0]:.2f}s, p95 {summary[1]:.2f}s ({count} samples)")
+            else:
+                print(f"{provider}: {count} samples")
+        return 0
+
+    if args.command == 'prompt':
+        providers = [args.provider] if args.provider else available_providers()
+        if not providers:
+            print("❌ Error: no provider API key set", file=sys.stderr)
+            return 1
+        response = prompt_llm(providers[0], ' '.join(args.text), args.max_tokens)
+        if response is None:
+            print(f"❌ Error calling {providers[0]}", file=sys.stderr)
+            return 1
+        print(response)
+        return 0
+
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,7 +3,6 @@
 # requires-python = ">=3.8"
 # dependencies = [
 #     "pytest",
-#     "python-dotenv",
 #     "google-genai",
 # ]
 # ///
@@ -26,7 +25,7 @@ class TestGeminiLLM:
     def test_prompt_llm_missing_api_key(self):
         """Test prompt_llm returns None when API key is missing."""
         with patch.dict(os.environ, {}, clear=True):
-            with patch('gemini.load_dotenv'):  # Prevent loading from .env file
+            with patch('gemini.load_env'):  # Prevent loading from .env file
                 result = gemini.prompt_llm("test prompt")
                 # Without API key, should return None
                 assert result is None
@@ -46,7 +45,7 @@ class TestGeminiLLM:
         """Test prompt_llm falls back to GEMINI_API_KEY when GOOGLE_API_KEY not available."""
         # Test that function can access GEMINI_API_KEY as fallback
         with patch.dict(os.environ, {'GEMINI_API_KEY': 'invalid-test-key'}, clear=True):
-            with patch('gemini.load_dotenv'):  # Prevent loading from .env file
+            with patch('gemini.load_env'):  # Prevent loading from .env file
                 # Ensure GOOGLE_API_KEY is not set
                 assert 'GOOGLE_API_KEY' not in os.environ
                 # With an invalid key, the API call will fail and return None
@@ -161,7 +160,9 @@ class TestGeminiLLM:
         with patch('sys.argv', ['gemini.py']):
             with patch('builtins.print') as mock_print:
                 gemini.main()
-                mock_print.assert_called_once_with("Usage: ./gemini.py 'your prompt here' or ./gemini.py --completion")
+                mock_print.assert_called_once_with(
+                    "Usage: ./gemini.py 'your prompt here' or ./gemini.py --completion "
+                    "or ./gemini.py --completion-batch N")
 
 
 if __name__ == "__main__":
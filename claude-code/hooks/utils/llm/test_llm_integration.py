@@ -3,7 +3,6 @@
 # requires-python = ">=3.8"
 # dependencies = [
 #     "pytest",
-#     "python-dotenv",
 #     "google-genai",
 #     "anthropic",
 #     "openai",
@@ -38,9 +37,9 @@ class TestLLMIntegration:
         
         # Test that all return None when no API key provided
         with patch.dict(os.environ, {}, clear=True):
-            with patch('gemini.load_dotenv'):  # Prevent loading from .env file
-                with patch('anth.load_dotenv'):  # Prevent loading from .env file
-                    with patch('oai.load_dotenv'):  # Prevent loading from .env file
+            with patch('gemini.load_env'):  # Prevent loading from .env file
+                with patch('anth.load_env'):  # Prevent loading from .env file
+                    with patch('oai.load_env'):  # Prevent loading from .env file
                         assert gemini.prompt_llm("test") is None
                         assert anth.prompt_llm("test") is None
                         assert oai.prompt_llm("test") is None
@@ -54,9 +53,9 @@ class TestLLMIntegration:
         
         # Test that all handle missing API keys consistently
         with patch.dict(os.environ, {}, clear=True):
-            with patch('gemini.load_dotenv'):  # Prevent loading from .env file
-                with patch('anth.load_dotenv'):  # Prevent loading from .env file
-                    with patch('oai.load_dotenv'):  # Prevent loading from .env file
+            with patch('gemini.load_env'):  # Prevent loading from .env file
+                with patch('anth.load_env'):  # Prevent loading from .env file
+                    with patch('oai.load_env'):  # Prevent loading from .env file
                         assert gemini.generate_completion_message() is None
                         assert anth.generate_completion_message() is None
                         assert oai.generate_completion_message() is None
@@ -106,6 +105,19 @@ class TestLLMIntegration:
             with patch('oai.prompt_llm', return_value=raw_response):
                 assert oai.generate_completion_message() == expected_clean
 
+    def test_completion_batch_cleaning_consistency(self):
+        """Test that all LLM scripts split and clean batched completion messages."""
+        raw_response = '1. "Task complete!"\n- All done!\n\nAll done!\n* Ready for more!'
+        
+        for module in [gemini, anth, oai]:
+            with patch(f'{module.__name__}.prompt_llm', return_value=raw_response) as mock_prompt:
+                assert module.generate_completion_messages(5) == [
+                    "Task complete!", "All done!", "Ready for more!"]
+                assert mock_prompt.call_args[1]['max_tokens'] >= 100
+            
+            with patch(f'{module.__name__}.prompt_llm', return_value=None):
+                assert module.generate_completion_messages(5) == []
+
     def test_cli_interface_consistency(self):
         """Test that all LLM scripts have consistent CLI interfaces."""
         scripts = [
@@ -134,6 +146,14 @@ class TestLLMIntegration:
                         mock_print.assert_called_once_with("Response text")
                         mock_prompt.assert_called_once_with("test prompt")
 
+            # Test usage without arguments
+            with patch('sys.argv', [script_name]):
+                with patch('builtins.print') as mock_print:
+                    module.main()
+                    mock_print.assert_called_once_with(
+                        f"Usage: ./{script_name} 'your prompt here' or ./{script_name} --completion "
+                        f"or ./{script_name} --completion-batch N")
+
     def test_error_handling_consistency(self):
         """Test that all LLM scripts handle errors consistently."""
         scripts = [gemini, anth, oai]
@@ -141,7 +161,7 @@ class TestLLMIntegration:
         for module in scripts:
             # Test API key missing
             with patch.dict(os.environ, {}, clear=True):
-                with patch(f'{module.__name__}.load_dotenv'):  # Prevent loading from .env file
+                with patch(f'{module.__name__}.load_env'):  # Prevent loading from .env file
                     assert module.prompt_llm("test") is None
                     assert module.generate_completion_message() is None
             
@@ -176,7 +196,7 @@ class TestGeminiSpecificIntegration:
     def test_gemini_api_key_fallback(self):
         """Test that Gemini falls back to GEMINI_API_KEY when GOOGLE_API_KEY missing."""
         with patch.dict(os.environ, {'GEMINI_API_KEY': 'invalid-fallback-key'}, clear=True):
-            with patch('gemini.load_dotenv'):  # Prevent loading from .env file
+            with patch('gemini.load_env'):  # Prevent loading from .env file
                 # Ensure GOOGLE_API_KEY is not set
                 assert 'GOOGLE_API_KEY' not in os.environ
                 # With invalid key, function will return None
@@ -0,0 +1,231 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Compression and retention for the hook logs directory.
+
+Rollover itself happens inside log_store.append_event; when a log rolls,
+the hook starts `log_rotate.py maintain` detached, which:
+
+- gzips rolled segments in logs/archive/
+- deletes archived segments, chat exports, migrated legacy logs and
+  transcript backup snapshots older than the retention period
+- removes transcript backup chunks no remaining snapshot references
+
+Only one maintainer runs per log directory at a time.
+
+Usage:
+- ./log_rotate.py [--log-dir DIR] maintain    # Compress and apply retention now
+- ./log_rotate.py [--log-dir DIR] roll NAME   # Force a log to roll over
+- ./log_rotate.py [--log-dir DIR] status      # Show log and archive sizes
+
+Environment:
+- CCAOS_LOG_RETENTION_DAYS=N    # Delete rolled data older than this (default: 30)
+"""
+
+import argparse
+import gzip
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from utils.log_store import (
+    LOG_SUFFIX, MIGRATED_SUFFIX, env_number, get_archive_dir, get_log_dir, get_log_path,
+    locked, roll_log,
+)
+from utils import transcript_backup
+
+DEFAULT_RETENTION_DAYS = 30
+LOCK_FILE = '.maintain.lock'
+
+
+def get_retention_seconds():
+    """Return the retention period in seconds."""
+    return env_number('CCAOS_LOG_RETENTION_DAYS', DEFAULT_RETENTION_DAYS) * 86400
+
+
+def acquire_maintain_lock(log_dir=None):
+    """Take the maintainer lock without waiting, returning the held file or None."""
+    lock_path = get_archive_dir(log_dir) / LOCK_FILE
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    lock_file = open(lock_path, 'a')
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def compress_segment(segment):
+    """Gzip one rolled segment in place, keeping its mtime for retention."""
+    st = segment.stat()
+    gz_path = segment.with_name(segment.name + '.gz')
+    tmp_path = segment.with_name(f'.{segment.name}.gz.tmp')
+    with open(segment, 'rb') as src, gzip.open(tmp_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.utime(tmp_path, (st.st_atime, st.st_mtime))
+    os.replace(tmp_path, gz_path)
+    segment.unlink()
+    return gz_path
+
+
+def compress_segments(log_dir=None):
+    """Gzip every uncompressed rolled segment; returns how many were compressed."""
+    archive_dir = get_archive_dir(log_dir)
+    if not archive_dir.exists():
+        return 0
+    compressed = 0
+    for segment in sorted(archive_dir.glob(f'*{LOG_SUFFIX}')):
+        try:
+            compress_segment(segment)
+            compressed += 1
+        except OSError:
+            pass
+    return compressed
+
+
+def is_expired(path, cutoff):
+    """Return True if path was last modified before cutoff."""
+    try:
+        return path.stat().st_mtime < cutoff
+    except OSError:
+        return False
+
+
+def remove_expired(paths, cutoff):
+    """Delete the paths last modified before cutoff; returns how many were removed."""
+    removed = 0
+    for path in paths:
+        if is_expired(path, cutoff):
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def apply_retention(log_dir=None, now=None):
+    """
+    Delete rolled data older than the retention period.
+
+    The current logs are never deleted; they roll over first.
+
+    Returns:
+        int: Number of files removed
+    """
+    cutoff = (time.time() if now is None else now) - get_retention_seconds()
+    logs = get_log_dir(log_dir)
+    removed = 0
+
+    archive_dir = get_archive_dir(log_dir)
+    if archive_dir.exists():
+        removed += remove_expired(archive_dir.glob(f'*{LOG_SUFFIX}.gz'), cutoff)
+
+    removed += remove_expired(logs.glob(f'*{MIGRATED_SUFFIX}'), cutoff)
+
+    chat_dir = logs / 'chat'
+    if chat_dir.exists():
+        for export in list(chat_dir.glob('*.jsonl')):
+            if is_expired(export, cutoff):
+                removed += remove_expired([export, export.with_suffix('.state')], cutoff)
+
+    backup_dir = transcript_backup.get_backup_dir(log_dir)
+    if backup_dir.exists():
+        # Full copies written before backups were chunked
+        removed += remove_expired(backup_dir.glob('*.jsonl'), cutoff)
+        expired = [m for m in transcript_backup.list_snapshots(log_dir=log_dir) if is_expired(m, cutoff)]
+        removed += remove_expired(expired, cutoff)
+        if expired:
+            removed += transcript_backup.collect_garbage(log_dir)
+
+    return removed
+
+
+def maintain(log_dir=None):
+    """
+    Compress rolled segments and apply retention unless another maintainer is running.
+
+    Returns:
+        tuple: (segments compressed, files removed), or None if skipped
+    """
+    lock_file = acquire_maintain_lock(log_dir)
+    if lock_file is None:
+        return None
+    try:
+        return compress_segments(log_dir), apply_retention(log_dir)
+    finally:
+        lock_file.close()
+
+
+def force_roll(name, log_dir=None):
+    """Roll a log over now, regardless of its size or age."""
+    log_path = get_log_path(name, log_dir)
+    if not log_path.exists():
+        return None
+    fd = os.open(log_path, os.O_RDWR)
+    try:
+        with locked(fd):
+            return roll_log(name, log_path, log_dir)
+    finally:
+        os.close(fd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hook log rotation')
+    parser.add_argument('--log-dir', help='Log directory (default: ./logs)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('maintain', help='Compress rolled segments and apply retention')
+    roll_parser = subparsers.add_parser('roll', help='Force a log to roll over')
+    roll_parser.add_argument('name', help='Log name, e.g. pre_tool_use')
+    subparsers.add_parser('status', help='Show log and archive sizes')
+
+    args = parser.parse_args()
+
+    if args.command == 'maintain':
+        result = maintain(args.log_dir)
+        if result is None:
+            print("Maintenance already running")
+        else:
+            print(f"Compressed {result[0]} segments, removed {result[1]} expired files")
+        return 0
+
+    if args.command == 'roll':
+        segment = force_roll(args.name, args.log_dir)
+        if segment is None:
+            print(f"No log named {args.name}")
+            return 1
+        print(f"✓ Rolled {args.name} to {segment}")
+        maintain(args.log_dir)
+        return 0
+
+    if args.command == 'status':
+        logs = get_log_dir(args.log_dir)
+        for path in sorted(logs.glob(f'*{LOG_SUFFIX}')):
+            print(f"{path.name}: {path.stat().st_size / 1024:.0f} KB")
+        archive_dir = get_archive_dir(args.log_dir)
+        segments = list(archive_dir.glob(f'*{LOG_SUFFIX}*')) if archive_dir.exists() else []
+        total = sum(p.stat().st_size for p in segments)
+        print(f"archive: {len(segments)} segments, {total / 1024:.0f} KB")
+        return 0
+
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,394 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Append-only JSONL event log shared by all hook scripts.
+
+Each hook appends one record per event to logs/<name>.jsonl using a single
+O_APPEND write under an exclusive lock, so the cost of logging no longer grows
+with the size of the log. Older installations wrote logs/<name>.json as one
+JSON array rewritten on every event; the reader below merges those legacy
+arrays with the JSONL records so tooling can still get the full array view.
+
+Logs roll over in-process: after each append the hook checks the file size
+(from the descriptor it already holds) and the time since the last rollover
+(one stat of a stamp file). A log past either limit is renamed into
+logs/archive/ under the same lock, and a detached log_rotate.py process
+compresses rolled segments and applies the retention policy, so the hook
+never waits on gzip. Readers include the archived segments.
+
+Usage:
+- ./log_store.py migrate [NAME ...] [--log-dir DIR]  # Convert legacy JSON arrays
+- ./log_store.py export NAME [--log-dir DIR]         # Print a log as a JSON array
+
+Environment:
+- CCAOS_LOG_ROTATE=0                # Disable rollover
+- CCAOS_LOG_MAX_MB=N                # Roll a log past this size (default: 10)
+- CCAOS_LOG_MAX_AGE_HOURS=N         # Roll a log this long after the last rollover (default: 24)
+- CCAOS_DRY_RUN=1                   # Write no event logs (set by hook --batch runs)
+"""
+
+import argparse
+import gzip
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from utils.profiler import phase
+
+LOG_SUFFIX = '.jsonl'
+LEGACY_SUFFIX = '.json'
+MIGRATED_SUFFIX = '.json.migrated'
+
+# JSON files in logs/ that are snapshots rather than event logs
+NON_EVENT_LOGS = {'chat'}
+
+ARCHIVE_DIR = 'archive'
+DEFAULT_MAX_MB = 10
+DEFAULT_MAX_AGE_HOURS = 24
+
+
+def get_log_dir(log_dir=None):
+    """Return the log directory, defaulting to ./logs in the current project."""
+    return Path(log_dir) if log_dir else Path.cwd() / 'logs'
+
+
+def get_log_path(name, log_dir=None):
+    """Return the JSONL path for the named log."""
+    return get_log_dir(log_dir) / f'{name}{LOG_SUFFIX}'
+
+
+def get_legacy_path(name, log_dir=None):
+    """Return the legacy JSON array path for the named log."""
+    return get_log_dir(log_dir) / f'{name}{LEGACY_SUFFIX}'
+
+
+@contextmanager
+def locked(fd):
+    """Hold an exclusive advisory lock on an open file descriptor."""
+    if fcntl is None:
+        yield
+        return
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def encode_record(record):
+    """Serialize one record as a single JSONL line."""
+    return (json.dumps(record, separators=(',', ':'), default=str) + '\n').encode('utf-8')
+
+
+def is_dry_run():
+    """
+    Return True when hooks must not leave side effects behind.
+
+    Set for --batch replays (see utils/hook_io.py): events are handled and
+    their results returned, but nothing is logged, spoken or refilled.
+    """
+    return os.getenv('CCAOS_DRY_RUN', '0') == '1'
+
+
+def append_event(name, record, log_dir=None):
+    """
+    Append one record to logs/<name>.jsonl unless this is a dry run.
+
+    Returns:
+        Path: The log file that was written, or None on a dry run
+    """
+    if is_dry_run():
+        return None
+    return write_event(name, record, log_dir)
+
+
+@phase('log_write')
+def write_event(name, record, log_dir=None):
+    """
+    Append one record to logs/<name>.jsonl.
+
+    The record is stamped with `logged_at` (local ISO 8601 time, to the
+    microsecond so events from different logs sort in write order) unless
+    it already has one, so the event index can filter by time.
+
+    Args:
+        name (str): Log name, e.g. 'pre_tool_use'
+        record (dict): JSON-serializable event data
+        log_dir (str|Path): Optional log directory (defaults to ./logs)
+
+    Returns:
+        Path: The log file that was written
+    """
+    log_path = get_log_path(name, log_dir)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if 'logged_at' not in record:
+        record = dict(record, logged_at=datetime.now().astimezone().isoformat())
+    data = encode_record(record)
+    while True:
+        fd = os.open(log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            with locked(fd):
+                # The file may have been replaced (migrated) while we waited for the lock
+                if not is_current(fd, log_path):
+                    continue
+                # O_APPEND positions every write at end of file; loop on short writes
+                view = memoryview(data)
+                while view:
+                    written = os.write(fd, view)
+                    view = view[written:]
+                rolled = maybe_roll(name, log_path, os.fstat(fd).st_size, log_dir)
+        finally:
+            os.close(fd)
+        if rolled:
+            spawn_maintenance(log_dir)
+        return log_path
+
+
+def get_archive_dir(log_dir=None):
+    """Return the directory holding rolled log segments."""
+    return get_log_dir(log_dir) / ARCHIVE_DIR
+
+
+def get_stamp_path(name, log_dir=None):
+    """Return the file whose mtime records a log's last rollover."""
+    return get_archive_dir(log_dir) / f'.{name}.rolled'
+
+
+def env_number(variable, default):
+    """Return a numeric environment setting, falling back to default."""
+    try:
+        return float(os.getenv(variable, default))
+    except ValueError:
+        return default
+
+
+def maybe_roll(name, log_path, size, log_dir=None):
+    """
+    Roll a log into the archive if it is past the size or age limit.
+
+    Must be called with the log's lock held. Appenders waiting on the lock
+    notice the file was replaced and reopen a fresh one.
+
+    Returns:
+        Path: The rolled segment, or None if the log was not rolled
+    """
+    if os.getenv('CCAOS_LOG_ROTATE', '1') == '0':
+        return None
+    stamp_path = get_stamp_path(name, log_dir)
+    try:
+        last_rolled = stamp_path.stat().st_mtime
+    except FileNotFoundError:
+        # First append since rotation was enabled: start the age clock now
+        stamp_path.parent.mkdir(parents=True, exist_ok=True)
+        stamp_path.touch()
+        last_rolled = time.time()
+
+    too_big = size >= env_number('CCAOS_LOG_MAX_MB', DEFAULT_MAX_MB) * 1024 * 1024
+    too_old = time.time() - last_rolled >= env_number('CCAOS_LOG_MAX_AGE_HOURS', DEFAULT_MAX_AGE_HOURS) * 3600
+    if not (too_big or too_old):
+        return None
+
+    return roll_log(name, log_path, log_dir)
+
+
+def roll_log(name, log_path, log_dir=None):
+    """Move a log into the archive and restart its age clock; the lock must be held."""
+    segment = get_archive_dir(log_dir) / f"{name}.{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}{LOG_SUFFIX}"
+    segment.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(log_path, segment)
+    get_stamp_path(name, log_dir).touch()
+    return segment
+
+
+@phase('spawn')
+def spawn_maintenance(log_dir=None):
+    """Compress rolled segments and apply retention in a detached process."""
+    script = Path(__file__).resolve().parent / 'log_rotate.py'
+    try:
+        subprocess.Popen(
+            [sys.executable, str(script), '--log-dir', str(get_log_dir(log_dir).resolve()), 'maintain'],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        return True
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+
+def list_segments(name, log_dir=None):
+    """Return a log's archived segments, oldest first (plain or gzipped)."""
+    archive_dir = get_archive_dir(log_dir)
+    if not archive_dir.exists():
+        return []
+    segments = [
+        p for p in archive_dir.glob(f'{name}.*{LOG_SUFFIX}*')
+        if p.name.endswith((LOG_SUFFIX, LOG_SUFFIX + '.gz'))
+        and p.name[len(name) + 1:].split('.')[0][:1].isdigit()
+    ]
+    return sorted(segments, key=lambda p: p.name)
+
+
+def is_current(fd, path):
+    """Return True if the open descriptor still refers to the file at path."""
+    try:
+        return os.path.samestat(os.fstat(fd), os.stat(path))
+    except OSError:
+        return False
+
+
+def iter_jsonl(path):
+    """Yield records from a JSONL file (optionally gzipped), skipping blank or invalid lines."""
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except (json.JSONDecodeError, ValueError):
+                pass  # Skip partial or corrupt lines
+
+
+def load_legacy(path):
+    """Load a legacy JSON array log, returning [] when unreadable."""
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError, ValueError):
+        return []
+    return data if isinstance(data, list) else []
+
+
+def iter_events(name, log_dir=None):
+    """
+    Yield every record of the named log in write order.
+
+    Records from an unmigrated legacy JSON array come first, then rolled
+    segments still retained in the archive, then the current JSONL log.
+    """
+    legacy_path = get_legacy_path(name, log_dir)
+    if legacy_path.exists():
+        yield from load_legacy(legacy_path)
+
+    for segment in list_segments(name, log_dir):
+        try:
+            yield from iter_jsonl(segment)
+        except (OSError, EOFError):
+            pass  # Removed by retention or compressed while reading
+
+    log_path = get_log_path(name, log_dir)
+    if log_path.exists():
+        yield from iter_jsonl(log_path)
+
+
+def read_events(name, log_dir=None):
+    """Return the named log as a list, matching the old JSON array format."""
+    return list(iter_events(name, log_dir))
+
+
+def migrate_log(name, log_dir=None):
+    """
+    Convert a legacy logs/<name>.json array into logs/<name>.jsonl.
+
+    Legacy records are placed ahead of any JSONL records already written, and
+    the legacy file is renamed to <name>.json.migrated so it is never read twice.
+
+    Returns:
+        int: Number of legacy records migrated (0 if there was nothing to do)
+    """
+    legacy_path = get_legacy_path(name, log_dir)
+    if not legacy_path.exists():
+        return 0
+
+    log_path = get_log_path(name, log_dir)
+    tmp_path = log_path.with_name(log_path.name + '.tmp')
+
+    fd = os.open(log_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        with locked(fd):
+            # Another migrator may have finished while we waited for the lock
+            if not legacy_path.exists():
+                return 0
+            records = load_legacy(legacy_path)
+            with open(tmp_path, 'wb') as out:
+                for record in records:
+                    out.write(encode_record(record))
+                # Carry over records appended in JSONL form before migration
+                with open(log_path, 'rb') as existing:
+                    for line in existing:
+                        if line.strip():
+                            out.write(line if line.endswith(b'\n') else line + b'\n')
+            os.replace(tmp_path, log_path)
+            legacy_path.rename(legacy_path.with_name(f'{name}{MIGRATED_SUFFIX}'))
+    finally:
+        os.close(fd)
+
+    return len(records)
+
+
+def find_legacy_logs(log_dir=None):
+    """Return the names of all legacy JSON array logs in the log directory."""
+    directory = get_log_dir(log_dir)
+    if not directory.exists():
+        return []
+    return sorted(
+        p.stem for p in directory.glob(f'*{LEGACY_SUFFIX}')
+        if p.is_file() and p.stem not in NON_EVENT_LOGS
+    )
+
+
+def main():
+    """Command line interface for migrating and exporting hook logs."""
+    parser = argparse.ArgumentParser(description='Hook event log utilities')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    migrate_parser = subparsers.add_parser('migrate', help='Convert legacy JSON array logs to JSONL')
+    migrate_parser.add_argument('names', nargs='*', help='Log names (default: all legacy logs)')
+    migrate_parser.add_argument('--log-dir', help='Log directory (default: ./logs)')
+
+    export_parser = subparsers.add_parser('export', help='Print a log as a JSON array')
+    export_parser.add_argument('name', help='Log name, e.g. pre_tool_use')
+    export_parser.add_argument('--log-dir', help='Log directory (default: ./logs)')
+
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        names = args.names or find_legacy_logs(args.log_dir)
+        if not names:
+            print("No legacy JSON logs found")
+            return 0
+        for name in names:
+            count = migrate_log(name, args.log_dir)
+            print(f"✓ {name}: migrated {count} records")
+        return 0
+
+    if args.command == 'export':
+        json.dump(read_events(args.name, args.log_dir), sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return 0
+
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
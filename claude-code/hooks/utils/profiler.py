@@ -0,0 +1,199 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Opt-in latency profiling for the hooks.
+
+With CCAOS_PROFILE=1 each hook event (one per run, or each line of a
+--batch run) writes one compact timing record to
+logs/profile/hook_timings.jsonl: the event's total wall time and the time
+spent in each instrumented phase, in milliseconds:
+
+    env_load    - reading the env file (utils/env.py)
+    parse       - decoding the event JSON from stdin
+    policy      - rule checks in pre_tool_use and user_prompt_submit
+    log_write   - appending the event to its log (utils/log_store.py)
+    spawn       - starting detached helpers (speaker, log maintenance, message refill)
+    subprocess  - waiting on git and gh in session_start
+
+phase() works as a context manager or a decorator. A phase entered more
+than once (or from several threads) reports its total, and phases can nest
+(a log_write that rolls the log over includes its spawn). When profiling
+is off, phase() costs a flag check.
+
+Usage:
+- ./profiler.py report [--session ID] [--hook NAME] [--log-dir DIR]   # p50/p95/p99 per hook and phase
+
+Environment:
+- CCAOS_PROFILE=1               # Record hook timings
+- CCAOS_PROFILE_DIR=PATH        # Timing log directory (default: ./logs/profile)
+"""
+
+import argparse
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+# log_store is imported where used: it imports this module for phase()
+
+TIMINGS_LOG = 'hook_timings'
+
+_lock = threading.Lock()
+_active = False
+_state = {}
+
+
+def is_enabled():
+    """Return True when hook profiling is switched on."""
+    return os.getenv('CCAOS_PROFILE', '0') == '1'
+
+
+def get_profile_dir():
+    """Return the directory holding the timing log."""
+    configured = os.getenv('CCAOS_PROFILE_DIR')
+    if configured:
+        return Path(configured).expanduser()
+    return Path.cwd() / 'logs' / 'profile'
+
+
+def begin(hook):
+    """Start timing a hook run."""
+    global _active
+    with _lock:
+        _state.clear()
+        _state.update(hook=hook, session_id=None, started=time.perf_counter(), phases={})
+        _active = True
+
+
+def set_session(session_id):
+    """Attach the event's session to the current record."""
+    if _active:
+        _state['session_id'] = session_id
+
+
+@contextmanager
+def phase(name):
+    """Time a block as part of the named phase of the current hook run."""
+    if not _active:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        with _lock:
+            if _active:
+                _state['phases'][name] = _state['phases'].get(name, 0.0) + elapsed
+
+
+def finish(exit_code=0):
+    """
+    Stop timing and write the record.
+
+    Returns:
+        dict: The record written, or None if no hook run was being timed
+    """
+    global _active
+    with _lock:
+        if not _active:
+            return None
+        _active = False
+        record = {
+            'hook': _state['hook'],
+            'session_id': _state['session_id'],
+            'exit': exit_code,
+            'total_ms': round((time.perf_counter() - _state['started']) * 1000, 3),
+            'phases': {name: round(seconds * 1000, 3) for name, seconds in _state['phases'].items()},
+        }
+    from utils.log_store import write_event
+    try:
+        # Timings are kept on dry runs too: profiling a --batch replay is the point
+        write_event(TIMINGS_LOG, record, get_profile_dir())
+    except OSError:
+        pass  # Profiling must never break a hook
+    return record
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(records):
+    """
+    Group timing records into latency percentiles.
+
+    Returns:
+        dict: {hook: {'total': stats, 'phases': {phase: stats}}}, where stats
+              holds count, p50, p95 and p99 in milliseconds
+    """
+    totals = {}
+    phases = {}
+    for record in records:
+        hook = record.get('hook')
+        if not hook or not isinstance(record.get('total_ms'), (int, float)):
+            continue
+        totals.setdefault(hook, []).append(record['total_ms'])
+        for name, ms in (record.get('phases') or {}).items():
+            phases.setdefault(hook, {}).setdefault(name, []).append(ms)
+
+    def stats(values):
+        return {'count': len(values), 'p50': percentile(values, 50),
+                'p95': percentile(values, 95), 'p99': percentile(values, 99)}
+
+    return {
+        hook: {
+            'total': stats(values),
+            'phases': {name: stats(v) for name, v in sorted(phases.get(hook, {}).items())},
+        }
+        for hook, values in sorted(totals.items())
+    }
+
+
+def read_timings(log_dir=None, session=None, hook=None):
+    """Return timing records, optionally for one session or hook."""
+    from utils.log_store import iter_events
+    return [
+        r for r in iter_events(TIMINGS_LOG, log_dir or get_profile_dir())
+        if (session is None or r.get('session_id') == session) and (hook is None or r.get('hook') == hook)
+    ]
+
+
+def main():
+    """Command line interface for timing reports."""
+    parser = argparse.ArgumentParser(description='Hook latency report')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    report_parser = subparsers.add_parser('report', help='Show p50/p95/p99 per hook and phase')
+    report_parser.add_argument('--session', help='Only this session_id')
+    report_parser.add_argument('--hook', help='Only this hook, e.g. pre_tool_use')
+    report_parser.add_argument('--log-dir', help='Timing log directory (default: ./logs/profile)')
+    args = parser.parse_args()
+
+    if args.command == 'report':
+        summary = summarize(read_timings(args.log_dir, args.session, args.hook))
+        if not summary:
+            print("No timings recorded (run hooks with CCAOS_PROFILE=1)")
+            return 0
+        print(f"{'hook / phase':<32} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for hook, data in summary.items():
+            rows = [(hook, data['total'])] + [(f"  {name}", s) for name, s in data['phases'].items()]
+            for label, s in rows:
+                print(f"{label:<32} {s['count']:>6} {s['p50']:>9.3f} {s['p95']:>9.3f} {s['p99']:>9.3f}")
+        return 0
+
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
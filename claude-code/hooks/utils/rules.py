@@ -0,0 +1,430 @@
+"""
+Compiled pattern rules shared by hook policy checks.
+
+Rules are grouped by scope (the kind of text they inspect) and compiled once
+per scope into two combined regular expressions, one for allow rules and one
+for block rules. Checking a piece of text is then a single scan per
+expression instead of one re.search per pattern, and the match reports which
+rule fired. Allow rules take precedence over block rules in the same scope.
+
+Rule files are JSON:
+
+    {
+      "extend_defaults": true,
+      "rules": [
+        {
+          "name": "no-force-push",
+          "scope": "bash",
+          "action": "block",
+          "pattern": "\\bgit\\s+push\\s+.*--force",
+          "message": "Force pushes are not allowed",
+          "ignore_case": false
+        },
+        {
+          "name": "no-prod-credentials",
+          "scope": "prompt",
+          "pattern": "BEGIN RSA PRIVATE KEY",
+          "literal": true
+        }
+      ]
+    }
+
+With "extend_defaults": false the file replaces the built-in rules entirely.
+
+Rules with "literal": true match their pattern as plain text. All literal
+rules of a scope are merged into a trie-shaped alternation, so thousands of
+phrases cost about as much to scan for as a handful, and the matched text
+maps straight back to its rule.
+
+Building the combined patterns for a large rule file takes longer than
+matching, so the generated pattern sources are cached on disk under
+<hooks dir>/cache/rules/, keyed by a hash of the rules, and reused until the
+rule file changes.
+
+Environment:
+- CCAOS_RULE_CACHE=0         # Do not cache compiled rule sets on disk
+- CCAOS_RULE_CACHE_DIR=PATH  # Cache directory (default: <hooks>/cache/rules)
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+from pathlib import Path
+
+ACTIONS = ('allow', 'block')
+CACHE_FORMAT = 2
+# Numbered backreferences and group conditionals, outside of escaped backslashes.
+# Once a rule is wrapped in the combined pattern its group numbers shift.
+GROUP_REFERENCE_RE = re.compile(r'(?<!\\)(?:\\\\)*\\[1-9]|\(\?\(')
+
+Rule = namedtuple(
+    'Rule',
+    ['name', 'scope', 'action', 'pattern', 'message', 'ignore_case', 'literal'],
+    defaults=('block', '', '', False, False),
+)
+
+
+def make_rule(spec):
+    """
+    Build a Rule from a dict, validating its fields.
+
+    Raises:
+        ValueError: If the rule is missing fields or its pattern does not compile
+                    on its own or as part of the combined pattern
+    """
+    if isinstance(spec, Rule):
+        return spec
+    try:
+        rule = Rule(
+            name=str(spec['name']),
+            scope=str(spec['scope']),
+            action=spec.get('action', 'block'),
+            pattern=spec['pattern'],
+            message=spec.get('message', ''),
+            ignore_case=bool(spec.get('ignore_case', False)),
+            literal=bool(spec.get('literal', False)),
+        )
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"Invalid rule {spec!r}: {e}")
+    if rule.action not in ACTIONS:
+        raise ValueError(f"Invalid action for rule {rule.name}: {rule.action}")
+    if rule.literal:
+        if not isinstance(rule.pattern, str) or not rule.pattern:
+            raise ValueError(f"Invalid literal for rule {rule.name}: {rule.pattern!r}")
+        return rule
+    try:
+        compiled = re.compile(rule.pattern)
+    except re.error as e:
+        raise ValueError(f"Invalid pattern for rule {rule.name}: {e}")
+    try:
+        # Inside the combined pattern the rule is one alternative among others
+        re.compile(f'(?:{rule.pattern})|x')
+    except re.error:
+        raise ValueError(f"Invalid pattern for rule {rule.name}: global inline flags such as (?i) are not supported, use ignore_case or (?i:...)")
+    if compiled.groupindex or GROUP_REFERENCE_RE.search(rule.pattern):
+        # Rules share one combined pattern, where group names and numbers are not the rule's own
+        raise ValueError(f"Invalid pattern for rule {rule.name}: named groups and backreferences are not supported")
+    return rule
+
+
+def trie_pattern(words):
+    """
+    Return a regex source matching any of words, shaped as a trie.
+
+    Shared prefixes are written once, so the regex engine rejects a position
+    after a character or two instead of trying every word in turn.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = None
+    return trie_node_pattern(trie)
+
+
+def trie_node_pattern(node):
+    """Return the regex source for one trie node and everything below it."""
+    branches = []
+    for char in sorted(k for k in node if k):
+        # Collapse single-child chains so recursion only happens at branches
+        chars = [char]
+        child = node[char]
+        while len(child) == 1 and '' not in child:
+            (char, child), = child.items()
+            chars.append(char)
+        branches.append(re.escape(''.join(chars)) + trie_node_pattern(child))
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    return f'(?:{body})?' if '' in node else body
+
+
+def combine_sources(rules):
+    """
+    Build the source of one combined pattern for rules.
+
+    Regex rules each get a named group. Literal rules share two trie groups,
+    one case-sensitive and one case-insensitive, whose matched text is
+    looked up to find the rule.
+
+    Returns:
+        tuple: (pattern source or None, {group name: rule index or {text: rule index}})
+    """
+    groups = {}
+    parts = []
+    literals = {'lit': {}, 'ilit': {}}
+    words = {'lit': [], 'ilit': []}
+    for index, rule in enumerate(rules):
+        if rule.literal:
+            group = 'ilit' if rule.ignore_case else 'lit'
+            key = rule.pattern.casefold() if rule.ignore_case else rule.pattern
+            literals[group].setdefault(key, index)
+            words[group].append(rule.pattern)
+            continue
+        group = f'r{index}'
+        groups[group] = index
+        body = f'(?i:{rule.pattern})' if rule.ignore_case else f'(?:{rule.pattern})'
+        parts.append(f'(?P<{group}>{body})')
+    for group, table in literals.items():
+        if table:
+            body = trie_pattern(words[group])
+            if group == 'ilit':
+                body = f'(?i:{body})'
+            parts.append(f'(?P<{group}>{body})')
+            groups[group] = table
+    if not parts:
+        return None, {}
+    return '|'.join(parts), groups
+
+
+def compile_sources(source, group_indexes, rules):
+    """Compile a combined pattern source, resolving rule indexes to Rules."""
+    if source is None:
+        return None, {}
+    groups = {}
+    for group, target in group_indexes.items():
+        if isinstance(target, dict):
+            groups[group] = {text: rules[index] for text, index in target.items()}
+        else:
+            groups[group] = rules[target]
+    return re.compile(source), groups
+
+
+def combine_patterns(rules):
+    """
+    Compile rules into one alternation with a named group per rule.
+
+    Returns:
+        tuple: (compiled pattern or None, {group name: Rule or {text: Rule}})
+    """
+    rules = list(rules)
+    return compile_sources(*combine_sources(rules), rules)
+
+
+class RuleSet:
+    """Allow and block rules for one scope, compiled into combined patterns."""
+
+    def __init__(self, rules, sources=None):
+        self.rules = list(rules)
+        allow_rules = [r for r in self.rules if r.action == 'allow']
+        block_rules = [r for r in self.rules if r.action == 'block']
+        if sources is None:
+            sources = {'allow': combine_sources(allow_rules), 'block': combine_sources(block_rules)}
+        self.sources = sources
+        self._allow, self._allow_groups = compile_sources(*sources['allow'], allow_rules)
+        self._block, self._block_groups = compile_sources(*sources['block'], block_rules)
+
+    def match(self, text):
+        """Return the block rule that fires for text, or None if allowed."""
+        if self._allow is not None and self._allow.search(text):
+            return None
+        if self._block is None:
+            return None
+        match = self._block.search(text)
+        if match is None:
+            return None
+        return resolve(match, self._block_groups)
+
+    def allows(self, text):
+        """Return the allow rule matching text, or None."""
+        if self._allow is None:
+            return None
+        match = self._allow.search(text)
+        if match is None:
+            return None
+        return resolve(match, self._allow_groups)
+
+
+def resolve(match, groups):
+    """Return the Rule behind a combined pattern match."""
+    group = first_group(match, groups)
+    target = groups[group]
+    if isinstance(target, dict):
+        text = match.group(group)
+        rule = target.get(text.casefold() if group == 'ilit' else text)
+        return rule or rematch_literal(text, target.values())
+    return target
+
+
+def rematch_literal(text, rules):
+    """
+    Return the literal rule whose own pattern matches text.
+
+    The case-insensitive trie can match text whose casefold() differs from
+    the rule's (e.g. 'İGNORE' for 'ignore'), missing the lookup table. The
+    first rule is returned if none re-matches, so a match still blocks.
+    """
+    rules = list(rules)
+    for rule in rules:
+        flags = re.IGNORECASE if rule.ignore_case else 0
+        if re.fullmatch(re.escape(rule.pattern), text, flags):
+            return rule
+    return rules[0]
+
+
+def first_group(match, groups):
+    """Return the name of the rule group that participated in a match."""
+    for name, value in match.groupdict().items():
+        if value is not None and name in groups:
+            return name
+    return match.lastgroup
+
+
+class RuleBook:
+    """Rule sets keyed by scope."""
+
+    def __init__(self, rules, sources=None):
+        self.rules = [make_rule(r) for r in rules] if sources is None else list(rules)
+        by_scope = {}
+        for rule in self.rules:
+            by_scope.setdefault(rule.scope, []).append(rule)
+        sources = sources or {}
+        self.scopes = {
+            scope: RuleSet(scope_rules, sources.get(scope))
+            for scope, scope_rules in by_scope.items()
+        }
+
+    def match(self, scope, text):
+        """Return the block rule firing for text in scope, or None."""
+        ruleset = self.scopes.get(scope)
+        return ruleset.match(text) if ruleset else None
+
+    def export(self):
+        """Return the rules and pattern sources as JSON-serialisable data."""
+        return {
+            'format': CACHE_FORMAT,
+            'rules': [list(r) for r in self.rules],
+            'sources': {scope: ruleset.sources for scope, ruleset in self.scopes.items()},
+        }
+
+    @classmethod
+    def from_export(cls, data):
+        """Rebuild a RuleBook from export() output without re-validating rules."""
+        if data.get('format') != CACHE_FORMAT:
+            raise ValueError("Unsupported rule cache format")
+        rules = [Rule(*fields) for fields in data['rules']]
+        sources = {
+            scope: {action: tuple(pair) for action, pair in actions.items()}
+            for scope, actions in data['sources'].items()
+        }
+        return cls(rules, sources)
+
+
+def read_rule_file(path):
+    """
+    Read rules from a JSON rule file.
+
+    Returns:
+        tuple: (list of rule dicts, extend_defaults flag)
+    """
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return data, True
+    return data.get('rules', []), bool(data.get('extend_defaults', True))
+
+
+def get_cache_dir():
+    """Return the directory for compiled rule sets."""
+    configured = os.getenv('CCAOS_RULE_CACHE_DIR')
+    if configured:
+        return Path(configured).expanduser()
+    return Path(__file__).resolve().parent.parent / 'cache' / 'rules'
+
+
+def rules_digest(default_rules, content):
+    """Hash the default rules and the rule file content into a cache key."""
+    digest = hashlib.sha256(json.dumps([list(r) for r in default_rules]).encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(content)
+    return digest.hexdigest()
+
+
+def read_compiled(digest):
+    """Load a cached RuleBook, or None when missing or unusable."""
+    try:
+        with open(get_cache_dir() / f'{digest}.json', 'r') as f:
+            return RuleBook.from_export(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError, re.error):
+        return None
+
+
+def write_compiled(digest, book):
+    """Store a RuleBook's pattern sources for other processes; best effort."""
+    cache_path = get_cache_dir() / f'{digest}.json'
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(f'.{digest}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(book.export(), f)
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError):
+        pass
+
+
+def build_rules(default_rules, path):
+    """Compile the defaults plus a rule file, falling back to the defaults alone."""
+    try:
+        file_rules, extend = read_rule_file(path)
+        loaded = [make_rule(r) for r in file_rules]
+        # Compiling the combined patterns is the real validation: rules that
+        # compile alone can still clash once joined
+        return RuleBook((list(default_rules) if extend else []) + loaded)
+    except (OSError, ValueError, AttributeError, TypeError, re.error):
+        return RuleBook(default_rules)
+
+
+_cache = {}
+
+
+def load_rules(default_rules, path=None):
+    """
+    Return a compiled RuleBook for the defaults plus an optional rule file.
+
+    The compiled result is cached per rule file path, modification time and
+    size, so it is built once per process (or once per hook server lifetime).
+    Across processes, the combined pattern sources are reused from the disk
+    cache while the rule file content is unchanged. An unreadable or invalid
+    rule file falls back to the defaults.
+    """
+    key = (tuple(default_rules), None)
+    if path:
+        try:
+            st = os.stat(path)
+            key = (tuple(default_rules), (str(path), st.st_mtime_ns, st.st_size))
+        except OSError:
+            path = None
+
+    book = _cache.get(key)
+    if book is not None:
+        return book
+
+    if not path:
+        book = RuleBook(default_rules)
+    elif os.getenv('CCAOS_RULE_CACHE', '1') == '0':
+        book = build_rules(default_rules, path)
+    else:
+        try:
+            with open(path, 'rb') as f:
+                digest = rules_digest(default_rules, f.read())
+        except OSError:
+            digest = None
+        book = read_compiled(digest) if digest else None
+        if book is None:
+            book = build_rules(default_rules, path)
+            if digest:
+                write_compiled(digest, book)
+
+    _cache[key] = book
+    return book
+
+
+def get_rule_file(env_var, default_name):
+    """Resolve a rule file from an env var or <hooks dir>/rules/<default_name>."""
+    configured = os.getenv(env_var)
+    if configured:
+        return Path(configured).expanduser()
+    return Path(__file__).resolve().parent.parent / 'rules' / default_name
@@ -0,0 +1,419 @@
+"""
+Shell command parsing for hook policy checks.
+
+Splits a Bash command line into its simple commands once, so policies can
+inspect each command's argv instead of re-scanning the raw text with every
+pattern. Quoted arguments stay inside their word (`echo "rm -rf /"` is an
+echo, not an rm), while code that really runs as a command is parsed too:
+
+- compound commands: `;`, `&&`, `||`, `|`, `&`, newlines and `( ... )`
+- command substitution: `$( ... )` and backticks, quoted or not
+- `bash -c`, `sh -c`, `eval`, `find -exec` and heredocs fed to a shell
+- `su -c`, `runuser -c`, `flock -c` and the remote command of `ssh`
+- wrappers such as sudo, env, xargs and timeout, and VAR=value prefixes
+
+Results are memoized per command string, so every check made on the same
+command in one process shares a single parse.
+"""
+
+import os
+import re
+import shlex
+from collections import namedtuple
+from functools import lru_cache
+
+# program: basename of the command run, e.g. 'rm' for '/bin/rm'
+# argv:    the command and its arguments, without wrappers or redirections
+# words:   every word of the simple command as written, redirections included
+SimpleCommand = namedtuple('SimpleCommand', ['program', 'argv', 'words'])
+
+CONTROL_CHARS = ';&|()\n'
+PUNCTUATION_CHARS = CONTROL_CHARS + '<>'
+PUNCTUATION_RE = re.compile(r'&>>?|>&|<&|<<<|<<|<>|>>|>\||[<>]|[;&|()\n]+')
+HEREDOC_RE = re.compile(r"(?<!<)<<(?!<)(-?)\s*(['\"]?)([^\s'\"<>;&|()]+)\2")
+ASSIGNMENT_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*=')
+
+SHELLS = frozenset({'bash', 'sh', 'zsh', 'dash', 'ksh'})
+SHELL_VALUE_OPTIONS = frozenset({'-o', '+o', '-O', '+O'})
+FIND_EXEC_FLAGS = frozenset({'-exec', '-execdir', '-ok', '-okdir'})
+KEYWORDS = frozenset({'!', '{', '}', 'if', 'then', 'else', 'elif', 'fi',
+                      'do', 'done', 'while', 'until'})
+
+# Commands that run their arguments as another command, mapped to the
+# options that take a separate value
+WRAPPERS = {
+    'sudo': {'-u', '-g', '-C', '-D', '-p', '-r', '-t', '-U'},
+    'doas': {'-u', '-C'},
+    'env': {'-u', '-C'},
+    'command': set(),
+    'builtin': set(),
+    'exec': {'-a'},
+    'nice': {'-n'},
+    'nohup': set(),
+    'time': {'-f', '-o'},
+    'timeout': {'-s', '-k', '--signal', '--kill-after'},
+    'stdbuf': {'-i', '-o', '-e'},
+    'xargs': {'-a', '-d', '-E', '-I', '-L', '-n', '-P', '-s'},
+    'setsid': set(),
+    'ionice': {'-c', '-n', '-p', '-P', '-u'},
+    'chroot': {'--userspec', '--groups'},
+    'taskset': set(),
+    'unbuffer': set(),
+    'watch': {'-n', '--interval'},
+}
+# Positional arguments a wrapper takes before the wrapped command
+WRAPPER_POSITIONALS = {'timeout': 1, 'chroot': 1, 'taskset': 1}
+# Commands that run the string given to -c as a shell script
+COMMAND_OPTION_PROGRAMS = frozenset({'su', 'runuser', 'sg', 'flock'})
+COMMAND_OPTIONS = frozenset({'-c', '--command'})
+# ssh runs everything after the host as a remote shell command
+SSH_VALUE_OPTIONS = frozenset({'-b', '-c', '-D', '-E', '-e', '-F', '-I', '-i', '-J', '-L', '-l',
+                               '-m', '-O', '-o', '-p', '-Q', '-R', '-S', '-W', '-w', '-B'})
+
+MAX_DEPTH = 8
+
+
+def find_closing(text, start):
+    """
+    Return the index of the ')' closing the '(' at start, skipping quotes.
+
+    Raises:
+        ValueError: If the parenthesis is never closed
+    """
+    depth = 0
+    quote = None
+    i = start
+    while i < len(text):
+        char = text[i]
+        if quote:
+            if char == quote:
+                quote = None
+            elif char == '\\' and quote == '"':
+                i += 1
+        elif char == '\\':
+            i += 1
+        elif char in '\'"':
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    raise ValueError("Unterminated command substitution")
+
+
+def find_substitution(text, start):
+    """Return the end index (exclusive) of the substitution starting at start."""
+    if text[start] == '`':
+        end = start + 1
+        while end < len(text) and text[end] != '`':
+            end += 2 if text[end] == '\\' else 1
+        if end >= len(text):
+            raise ValueError("Unterminated backtick substitution")
+        return end + 1
+    return find_closing(text, start + 1) + 1
+
+
+def quote_substitutions(text):
+    """
+    Wrap unquoted $( ... ) and backticks in double quotes.
+
+    This keeps each substitution inside the word it belongs to instead of
+    letting the tokenizer split it on its parentheses, spaces and nested
+    quotes; the substitution itself is parsed later from the word.
+    """
+    if '$(' not in text and '`' not in text:
+        return text
+    out = []
+    quote = None
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if quote == "'":
+            out.append(char)
+            if char == quote:
+                quote = None
+        elif quote == '"' and (char == '`' or text.startswith('$(', i)):
+            # Already inside double quotes: only escape the substitution's own quotes
+            end = find_substitution(text, i)
+            out.append(text[i:end].replace('\\', '\\\\').replace('"', '\\"'))
+            i = end - 1
+        elif quote:
+            out.append(char)
+            if char == quote:
+                quote = None
+            elif char == '\\' and i + 1 < len(text):
+                out.append(text[i + 1])
+                i += 1
+        elif char == '\\' and i + 1 < len(text):
+            out.append(text[i:i + 2])
+            i += 1
+        elif char in '\'"':
+            quote = char
+            out.append(char)
+        elif char == '`' or text.startswith('$(', i):
+            end = find_substitution(text, i)
+            inner = text[i:end].replace('\\', '\\\\').replace('"', '\\"')
+            out.append(f'"{inner}"')
+            i = end - 1
+        else:
+            out.append(char)
+        i += 1
+    return ''.join(out)
+
+
+def substitutions(word):
+    """Return the command text of every $( ... ) and backtick in a word."""
+    found = []
+    i = 0
+    while i < len(word):
+        if word.startswith('$(', i) or word[i] == '`':
+            try:
+                end = find_substitution(word, i)
+            except ValueError:
+                break  # e.g. a literal '$(' inside single quotes
+            found.append(word[i + 2:end - 1] if word[i] == '$' else word[i + 1:end - 1])
+            i = end
+        else:
+            i += 1
+    return found
+
+
+def split_heredocs(text):
+    """
+    Remove heredoc bodies from a command.
+
+    Returns:
+        tuple: (command without heredoc bodies, list of bodies in order)
+    """
+    if '<<' not in text:
+        return text, []
+    lines = text.split('\n')
+    kept, bodies = [], []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        kept.append(line)
+        i += 1
+        for match in HEREDOC_RE.finditer(line):
+            strip_tabs = match.group(1) == '-'
+            delimiter = match.group(3)
+            body = []
+            while i < len(lines):
+                current = lines[i].lstrip('\t') if strip_tabs else lines[i]
+                i += 1
+                if current == delimiter:
+                    break
+                body.append(current)
+            bodies.append('\n'.join(body))
+    return '\n'.join(kept), bodies
+
+
+def tokenize(text):
+    """
+    Split shell text into ('word' | 'redirect' | 'control', value) tokens.
+
+    Raises:
+        ValueError: On unbalanced quotes
+    """
+    lexer = shlex.shlex(text, posix=True, punctuation_chars=PUNCTUATION_CHARS)
+    lexer.commenters = ''
+    lexer.whitespace = ' \t\r'
+    lexer.whitespace_split = True
+    tokens = []
+    for token in lexer:
+        if token and all(c in PUNCTUATION_CHARS for c in token):
+            for part in PUNCTUATION_RE.findall(token):
+                kind = 'redirect' if any(c in '<>' for c in part) else 'control'
+                tokens.append((kind, part))
+        else:
+            tokens.append(('word', token))
+    return tokens
+
+
+def strip_wrappers(args):
+    """Drop reserved words, VAR=value prefixes and wrapper commands."""
+    args = list(args)
+    while args:
+        while args and (args[0] in KEYWORDS or ASSIGNMENT_RE.match(args[0])):
+            args.pop(0)
+        if not args:
+            break
+        name = os.path.basename(args[0])
+        if name not in WRAPPERS:
+            break
+        value_options = WRAPPERS[name]
+        i = 1
+        while i < len(args):
+            arg = args[i]
+            if arg == '--':
+                i += 1
+                break
+            if arg.startswith('-') and len(arg) > 1:
+                i += 2 if arg in value_options else 1
+            elif name == 'env' and ASSIGNMENT_RE.match(arg):
+                i += 1
+            else:
+                break
+        args = args[i + WRAPPER_POSITIONALS.get(name, 0):]
+    return args
+
+
+def shell_script(argv):
+    """Return the script passed to a shell with -c, or None."""
+    i = 1
+    while i < len(argv):
+        arg = argv[i]
+        if arg in SHELL_VALUE_OPTIONS:
+            i += 2
+            continue
+        if arg == '--' or arg[:1] not in ('-', '+'):
+            return None
+        if arg.startswith('-') and not arg.startswith('--') and 'c' in arg[1:]:
+            return argv[i + 1] if i + 1 < len(argv) else None
+        i += 1
+    return None
+
+
+def command_option_script(argv):
+    """Return the script passed to su, runuser, sg or flock with -c, or None."""
+    for i, arg in enumerate(argv[1:-1], 1):
+        if arg in COMMAND_OPTIONS:
+            return argv[i + 1]
+    return None
+
+
+def ssh_command(argv):
+    """Return the remote command of an ssh invocation, or None."""
+    i = 1
+    while i < len(argv) and argv[i].startswith('-'):
+        i += 2 if argv[i] in SSH_VALUE_OPTIONS else 1
+    remote = argv[i + 1:]
+    return ' '.join(remote) if remote else None
+
+
+def in_find_exec(args):
+    """Return True while a find -exec command is still collecting arguments."""
+    for arg in reversed(args):
+        if arg in (';', '+'):
+            return False
+        if arg in FIND_EXEC_FLAGS:
+            return True
+    return False
+
+
+def find_exec_commands(argv):
+    """Return the argv of every command run by find -exec and friends."""
+    found = []
+    current = None
+    for arg in argv[1:]:
+        if current is None:
+            if arg in FIND_EXEC_FLAGS:
+                current = []
+        elif arg in (';', '+'):
+            found.append(current)
+            current = None
+        else:
+            current.append(arg)
+    if current:
+        found.append(current)
+    return found
+
+
+def build_command(args, words, heredocs, depth):
+    """Create the SimpleCommand for one command plus any commands it runs."""
+    argv = strip_wrappers(args)
+    program = os.path.basename(argv[0]) if argv else ''
+    commands = [SimpleCommand(program, tuple(argv), tuple(words))]
+
+    nested = []
+    if program in SHELLS:
+        script = shell_script(argv)
+        nested.extend([script] if script is not None else heredocs)
+    elif program == 'eval':
+        nested.append(' '.join(argv[1:]))
+    elif program in COMMAND_OPTION_PROGRAMS:
+        script = command_option_script(argv)
+        nested.extend([script] if script is not None else [])
+    elif program == 'ssh':
+        script = ssh_command(argv)
+        nested.extend([script] if script is not None else [])
+    elif program == 'find':
+        for exec_args in find_exec_commands(argv):
+            commands.extend(build_command(exec_args, exec_args, [], depth + 1))
+    for word in words:
+        nested.extend(substitutions(word))
+
+    for script in nested:
+        commands.extend(parse_script(script, depth + 1))
+    return commands
+
+
+def parse_tokens(tokens, bodies, depth):
+    """Group tokens into simple commands."""
+    commands = []
+    args, words, heredocs = [], [], []
+
+    def flush():
+        if words:
+            commands.extend(build_command(args, words, heredocs, depth))
+        args.clear()
+        words.clear()
+        heredocs.clear()
+
+    i = 0
+    while i < len(tokens):
+        kind, value = tokens[i]
+        i += 1
+        if kind == 'word':
+            args.append(value)
+            words.append(value)
+        elif kind == 'redirect':
+            if args and args[-1].isdigit() and words[-1] == args[-1]:
+                args.pop()  # File descriptor number, as in 2>&1
+            words.append(value)
+            if i < len(tokens) and tokens[i][0] == 'word':
+                words.append(tokens[i][1])
+                i += 1
+            if value == '<<':
+                heredocs.append(next(bodies, ''))
+        elif value == ';' and in_find_exec(args):
+            # find's escaped \; terminator, not a command separator
+            args.append(value)
+            words.append(value)
+        else:
+            flush()
+    flush()
+    return commands
+
+
+def parse_script(text, depth=0):
+    """
+    Parse shell text into a flat list of SimpleCommands.
+
+    Raises:
+        ValueError: If the text cannot be tokenized or nests too deeply
+    """
+    if depth > MAX_DEPTH:
+        raise ValueError("Command nesting too deep")
+    text, bodies = split_heredocs(text.replace('\\\n', ' '))
+    tokens = tokenize(quote_substitutions(text))
+    return parse_tokens(tokens, iter(bodies), depth)
+
+
+@lru_cache(maxsize=256)
+def parse_command(command):
+    """
+    Parse a Bash command into the simple commands it runs.
+
+    Returns:
+        tuple: SimpleCommands, or None if the command cannot be parsed
+               (e.g. unbalanced quotes), in which case callers should fall
+               back to checking the raw text
+    """
+    try:
+        return tuple(parse_script(command))
+    except ValueError:
+        return None
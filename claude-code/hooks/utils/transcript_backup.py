@@ -0,0 +1,268 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Deduplicating transcript backups for the PreCompact --backup switch.
+
+A transcript only grows between compactions, so full copies at each
+compaction are nearly identical. Backups are instead split into fixed-size
+chunks stored once under their SHA-256 and gzip-compressed:
+
+    logs/transcript_backups/chunks/ab/ab12....gz
+    logs/transcript_backups/snapshots/<session>/<timestamp>_<trigger>.json
+
+Each snapshot manifest lists its chunks in order. Chunks are aligned to
+fixed offsets, so the unchanged prefix of a transcript maps to chunks that
+already exist and a backup only writes the new tail (plus the previously
+partial last chunk). Any snapshot can be restored byte for byte.
+
+Usage:
+- ./transcript_backup.py list [SESSION] [--log-dir DIR]
+- ./transcript_backup.py restore SNAPSHOT OUTPUT [--log-dir DIR]
+- ./transcript_backup.py gc [--log-dir DIR]    # Delete chunks no snapshot uses
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from utils.log_store import get_log_dir, locked
+
+BACKUP_DIR = 'transcript_backups'
+CHUNK_SIZE = 1 << 20
+COMPRESS_LEVEL = 6
+LOCK_FILE = '.lock'
+
+
+def get_backup_dir(log_dir=None):
+    """Return the transcript backup directory."""
+    return get_log_dir(log_dir) / BACKUP_DIR
+
+
+def get_chunk_path(digest, log_dir=None):
+    """Return the stored path of a chunk."""
+    return get_backup_dir(log_dir) / 'chunks' / digest[:2] / f'{digest}.gz'
+
+
+def get_snapshot_dir(session_name, log_dir=None):
+    """Return the directory holding a session's snapshot manifests."""
+    safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', session_name)
+    return get_backup_dir(log_dir) / 'snapshots' / safe_name
+
+
+@contextmanager
+def backup_lock(log_dir=None):
+    """
+    Hold the backup directory lock.
+
+    A backup reuses existing chunks before its manifest names them, so
+    garbage collection must not run in between.
+    """
+    backup_dir = get_backup_dir(log_dir)
+    backup_dir.mkdir(parents=True, exist_ok=True)
+    fd = os.open(backup_dir / LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        with locked(fd):
+            yield
+    finally:
+        os.close(fd)
+
+
+def store_chunk(data, log_dir=None):
+    """
+    Store one chunk unless an identical one already exists.
+
+    Returns:
+        tuple: (digest, whether the chunk was newly written)
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    chunk_path = get_chunk_path(digest, log_dir)
+    if chunk_path.exists():
+        return digest, False
+    chunk_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = chunk_path.with_name(f'.{digest}.{os.getpid()}.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(gzip.compress(data, COMPRESS_LEVEL))
+    os.replace(tmp_path, chunk_path)
+    return digest, True
+
+
+def backup_transcript(transcript_path, trigger='unknown', log_dir=None):
+    """
+    Snapshot a transcript, storing only chunks not already backed up.
+
+    Args:
+        transcript_path (str|Path): Transcript JSONL to back up
+        trigger (str): Compaction trigger recorded in the manifest
+        log_dir (str|Path): Optional log directory (defaults to ./logs)
+
+    Returns:
+        Path: The snapshot manifest
+    """
+    transcript_path = Path(transcript_path)
+    with backup_lock(log_dir):
+        return write_snapshot(transcript_path, trigger, log_dir)
+
+
+def write_snapshot(transcript_path, trigger, log_dir):
+    """Store a transcript's chunks and its manifest; the caller holds backup_lock."""
+    chunks = []
+    written = 0
+    whole = hashlib.sha256()
+    size = 0
+    with open(transcript_path, 'rb') as f:
+        while True:
+            data = f.read(CHUNK_SIZE)
+            if not data:
+                break
+            whole.update(data)
+            size += len(data)
+            digest, is_new = store_chunk(data, log_dir)
+            chunks.append(digest)
+            written += len(data) if is_new else 0
+
+    now = datetime.now()
+    snapshot_dir = get_snapshot_dir(transcript_path.stem, log_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = snapshot_dir / f"{now.strftime('%Y%m%d_%H%M%S_%f')}_{re.sub(r'[^A-Za-z0-9]', '_', trigger)}.json"
+    manifest = {
+        'transcript': str(transcript_path),
+        'trigger': trigger,
+        'created': now.isoformat(),
+        'size': size,
+        'sha256': whole.hexdigest(),
+        'chunk_size': CHUNK_SIZE,
+        'chunks': chunks,
+        'bytes_written': written,
+    }
+    tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return manifest_path
+
+
+def read_manifest(manifest_path):
+    """Load a snapshot manifest."""
+    with open(manifest_path, 'r') as f:
+        return json.load(f)
+
+
+def list_snapshots(session_name=None, log_dir=None):
+    """Return snapshot manifest paths, oldest first, for one session or all."""
+    snapshots_root = get_backup_dir(log_dir) / 'snapshots'
+    if session_name:
+        directories = [get_snapshot_dir(session_name, log_dir)]
+    elif snapshots_root.exists():
+        directories = sorted(p for p in snapshots_root.iterdir() if p.is_dir())
+    else:
+        directories = []
+    manifests = []
+    for directory in directories:
+        if directory.exists():
+            manifests.extend(sorted(directory.glob('*.json')))
+    return manifests
+
+
+def restore_snapshot(manifest_path, output_path, log_dir=None):
+    """
+    Rebuild a transcript from a snapshot and verify its checksum.
+
+    Raises:
+        ValueError: If the restored content does not match the manifest
+    """
+    manifest = read_manifest(manifest_path)
+    whole = hashlib.sha256()
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(output_path.name + '.tmp')
+    with open(tmp_path, 'wb') as out:
+        for digest in manifest['chunks']:
+            with gzip.open(get_chunk_path(digest, log_dir), 'rb') as chunk:
+                data = chunk.read()
+            whole.update(data)
+            out.write(data)
+    if whole.hexdigest() != manifest['sha256']:
+        tmp_path.unlink()
+        raise ValueError(f"Checksum mismatch restoring {manifest_path}")
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+def collect_garbage(log_dir=None):
+    """Delete chunks not referenced by any snapshot; returns the number removed."""
+    if not get_backup_dir(log_dir).exists():
+        return 0
+    with backup_lock(log_dir):
+        return remove_unreferenced(log_dir)
+
+
+def remove_unreferenced(log_dir):
+    """Delete unreferenced chunks; the caller holds backup_lock."""
+    referenced = set()
+    for manifest_path in list_snapshots(log_dir=log_dir):
+        try:
+            referenced.update(read_manifest(manifest_path)['chunks'])
+        except (OSError, json.JSONDecodeError, KeyError, ValueError):
+            return 0  # Never delete chunks while a manifest is unreadable
+    removed = 0
+    for chunk_path in (get_backup_dir(log_dir) / 'chunks').glob('*/*.gz'):
+        if chunk_path.stem not in referenced:
+            chunk_path.unlink()
+            removed += 1
+    return removed
+
+
+def main():
+    """Command line interface for listing, restoring and pruning backups."""
+    parser = argparse.ArgumentParser(description='Transcript backup utilities')
+    parser.add_argument('--log-dir', help='Log directory (default: ./logs)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = subparsers.add_parser('list', help='List snapshots')
+    list_parser.add_argument('session', nargs='?', help='Session (transcript file stem)')
+
+    restore_parser = subparsers.add_parser('restore', help='Rebuild a transcript from a snapshot')
+    restore_parser.add_argument('snapshot', help='Snapshot manifest path')
+    restore_parser.add_argument('output', help='Where to write the transcript')
+
+    subparsers.add_parser('gc', help='Delete chunks no snapshot references')
+
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for manifest_path in list_snapshots(args.session, args.log_dir):
+            manifest = read_manifest(manifest_path)
+            print(f"{manifest_path}  {manifest['size']} bytes, "
+                  f"{manifest['bytes_written']} new, trigger {manifest['trigger']}")
+        return 0
+
+    if args.command == 'restore':
+        try:
+            output = restore_snapshot(args.snapshot, args.output, args.log_dir)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Error: {e}", file=sys.stderr)
+            return 1
+        print(f"✓ Restored {output}")
+        return 0
+
+    if args.command == 'gc':
+        print(f"Removed {collect_garbage(args.log_dir)} unreferenced chunks")
+        return 0
+
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,203 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Incremental transcript export for the Stop and SubagentStop --chat switch.
+
+The transcript Claude Code keeps for a session is append-only JSONL, so each
+export only needs the lines written since the last one. The byte offset
+already exported is remembered per session, and new complete lines are
+streamed into logs/chat/<session_id>.jsonl without loading the transcript
+into memory. If the transcript shrinks or is replaced, or a rebuild is
+requested, the export starts over from the beginning.
+
+Usage:
+- ./transcript_export.py rebuild SESSION_ID [--transcript PATH] [--log-dir DIR]
+- ./transcript_export.py export SESSION_ID [--log-dir DIR]  # Print as a JSON array
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from utils.log_store import get_log_dir, iter_jsonl, locked
+
+CHAT_DIR = 'chat'
+CHAT_SUFFIX = '.jsonl'
+STATE_SUFFIX = '.state'
+
+# Read the transcript in blocks so memory stays flat for large sessions
+READ_BLOCK_SIZE = 1 << 20
+
+
+def get_chat_dir(log_dir=None):
+    """Return the directory holding exported transcripts."""
+    return get_log_dir(log_dir) / CHAT_DIR
+
+
+def safe_session_id(session_id):
+    """Return a session id usable as a file name."""
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', str(session_id or 'unknown'))
+
+
+def get_chat_path(session_id, log_dir=None):
+    """Return the exported transcript path for a session."""
+    return get_chat_dir(log_dir) / f'{safe_session_id(session_id)}{CHAT_SUFFIX}'
+
+
+def get_state_path(session_id, log_dir=None):
+    """Return the export state path for a session."""
+    return get_chat_dir(log_dir) / f'{safe_session_id(session_id)}{STATE_SUFFIX}'
+
+
+def read_state(state_path):
+    """Load the export state, returning {} when missing or unreadable."""
+    try:
+        with open(state_path, 'r') as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def write_state(state_path, state):
+    """Atomically replace the export state."""
+    tmp_path = state_path.with_name(state_path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+
+def is_valid_line(line):
+    """Return True if a transcript line holds a JSON value."""
+    try:
+        json.loads(line)
+        return True
+    except (json.JSONDecodeError, ValueError):
+        return False
+
+
+def copy_new_lines(source, out):
+    """
+    Copy complete, valid JSON lines from source to out.
+
+    A trailing line without a newline may still be being written, so it is
+    left for the next export.
+
+    Returns:
+        tuple: (bytes consumed from source, records written)
+    """
+    consumed = 0
+    written = 0
+    pending = b''
+    while True:
+        block = source.read(READ_BLOCK_SIZE)
+        if not block:
+            break
+        lines = (pending + block).split(b'\n')
+        pending = lines.pop()
+        for line in lines:
+            consumed += len(line) + 1
+            line = line.strip()
+            if line and is_valid_line(line):
+                out.write(line + b'\n')
+                written += 1
+    return consumed, written
+
+
+def export_transcript(transcript_path, session_id, log_dir=None, full=False):
+    """
+    Append transcript lines not yet exported to logs/chat/<session_id>.jsonl.
+
+    Args:
+        transcript_path (str|Path): Claude Code transcript JSONL
+        session_id (str): Session the transcript belongs to
+        log_dir (str|Path): Optional log directory (defaults to ./logs)
+        full (bool): Discard the previous export and start from the beginning
+
+    Returns:
+        int: Number of records written by this call
+    """
+    transcript_path = Path(transcript_path)
+    chat_path = get_chat_path(session_id, log_dir)
+    state_path = get_state_path(session_id, log_dir)
+    chat_path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd = os.open(chat_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        with locked(fd), open(transcript_path, 'rb') as source:
+            st = os.fstat(source.fileno())
+            state = read_state(state_path)
+            offset = state.get('offset', 0)
+            restart = (
+                full
+                or state.get('transcript') != str(transcript_path)
+                or state.get('inode') != st.st_ino
+                or not isinstance(offset, int)
+                or offset > st.st_size
+                or os.fstat(fd).st_size != state.get('exported_size', 0)
+            )
+            if restart:
+                offset = 0
+                os.ftruncate(fd, 0)
+
+            source.seek(offset)
+            with os.fdopen(os.dup(fd), 'ab') as out:
+                consumed, written = copy_new_lines(source, out)
+
+            write_state(state_path, {
+                'transcript': str(transcript_path),
+                'inode': st.st_ino,
+                'offset': offset + consumed,
+                'exported_size': os.fstat(fd).st_size,
+            })
+            return written
+    finally:
+        os.close(fd)
+
+
+def main():
+    """Command line interface for rebuilding and reading exported transcripts."""
+    parser = argparse.ArgumentParser(description='Transcript export utilities')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    rebuild_parser = subparsers.add_parser('rebuild', help='Re-export a transcript from the beginning')
+    rebuild_parser.add_argument('session_id', help='Session ID')
+    rebuild_parser.add_argument('--transcript', help='Transcript path (default: path from the last export)')
+    rebuild_parser.add_argument('--log-dir', help='Log directory (default: ./logs)')
+
+    export_parser = subparsers.add_parser('export', help='Print an exported transcript as a JSON array')
+    export_parser.add_argument('session_id', help='Session ID')
+    export_parser.add_argument('--log-dir', help='Log directory (default: ./logs)')
+
+    args = parser.parse_args()
+
+    if args.command == 'rebuild':
+        transcript = args.transcript or read_state(get_state_path(args.session_id, args.log_dir)).get('transcript')
+        if not transcript or not os.path.exists(transcript):
+            print(f"❌ Error: no transcript found for session {args.session_id}", file=sys.stderr)
+            return 1
+        count = export_transcript(transcript, args.session_id, args.log_dir, full=True)
+        print(f"✓ {args.session_id}: exported {count} records")
+        return 0
+
+    if args.command == 'export':
+        chat_path = get_chat_path(args.session_id, args.log_dir)
+        records = list(iter_jsonl(chat_path)) if chat_path.exists() else []
+        json.dump(records, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return 0
+
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,270 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Synthesized Speech Cache
+
+Content-addressed on-disk cache of rendered announcements shared by the TTS
+scripts. Audio is keyed by provider, voice, model and text (plus any style
+prompt), so repeat announcements such as "Subagent Complete" play from disk
+without a network round trip or engine init. The cache is trimmed to a size
+limit by evicting the least recently played entries.
+
+Usage:
+- ./audio_cache.py prewarm [--provider NAME]  # Render the fixed hook phrases
+- ./audio_cache.py stats                      # Show entry count and size
+- ./audio_cache.py clear                      # Remove every cached entry
+
+Environment:
+- CCAOS_TTS_CACHE=0             # Disable the cache
+- CCAOS_TTS_CACHE_DIR=PATH      # Cache directory (default: <hooks>/cache/tts)
+- CCAOS_TTS_CACHE_MAX_MB=N      # Size limit in MB (default: 50)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+TTS_DIR = Path(__file__).resolve().parent
+HOOKS_DIR = TTS_DIR.parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from utils.env import getenv
+
+DEFAULT_MAX_MB = 50
+
+# Providers in the hooks' priority order, with the script and API keys each needs
+PROVIDERS = {
+    'gemini': ('gemini_tts.py', ('GOOGLE_API_KEY', 'GEMINI_API_KEY')),
+    'openai': ('openai_tts.py', ('OPENAI_API_KEY',)),
+    'elevenlabs': ('elevenlabs_tts.py', ('ELEVENLABS_API_KEY',)),
+    'pyttsx3': ('pyttsx3_tts.py', ()),
+}
+
+# Fixed phrases announced by the hooks
+STATIC_PHRASES = (
+    "Subagent Complete",
+    "Your agent needs your input",
+    "Work complete!",
+    "All done!",
+    "Task finished!",
+    "Job complete!",
+    "Ready for next task!",
+    "Claude Code session started",
+    "Resuming previous session",
+    "Starting fresh session",
+    "Session started",
+)
+
+PREWARM_TIMEOUT_SECONDS = 60
+
+
+def is_enabled():
+    """Return False when the cache is disabled with CCAOS_TTS_CACHE=0."""
+    return os.getenv('CCAOS_TTS_CACHE', '1') != '0'
+
+
+def get_cache_dir():
+    """Return the cache directory."""
+    configured = os.getenv('CCAOS_TTS_CACHE_DIR')
+    if configured:
+        return Path(configured).expanduser()
+    return HOOKS_DIR / 'cache' / 'tts'
+
+
+def get_max_bytes():
+    """Return the cache size limit in bytes."""
+    try:
+        return int(float(os.getenv('CCAOS_TTS_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+    except ValueError:
+        return DEFAULT_MAX_MB * 1024 * 1024
+
+
+def cache_key(provider, voice, model, text, style=''):
+    """Return the content address for rendered speech."""
+    identity = json.dumps([provider, voice, model, style, text], separators=(',', ':'))
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+
+def get_cached(key, ext):
+    """
+    Return the cached audio path for key, or None on a miss.
+
+    A hit refreshes the entry's modification time, which eviction uses as
+    its least-recently-used order.
+    """
+    if not is_enabled():
+        return None
+    path = get_cache_dir() / f'{key}.{ext}'
+    try:
+        os.utime(path)
+    except OSError:
+        return None
+    return path
+
+
+def put_cached(key, ext, data):
+    """Store rendered audio, evicting old entries past the size limit."""
+    if not is_enabled() or not data:
+        return None
+    cache_dir = get_cache_dir()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / f'{key}.{ext}'
+    tmp_path = cache_dir / f'.{key}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    evict(get_max_bytes())
+    return path
+
+
+def cache_entries():
+    """Return (path, stat) for every cached entry, least recently used first."""
+    cache_dir = get_cache_dir()
+    if not cache_dir.exists():
+        return []
+    entries = []
+    for path in cache_dir.iterdir():
+        if path.name.startswith('.'):
+            continue
+        try:
+            entries.append((path, path.stat()))
+        except OSError:
+            pass
+    entries.sort(key=lambda item: item[1].st_mtime)
+    return entries
+
+
+def evict(max_bytes):
+    """Delete least recently used entries until the cache fits in max_bytes."""
+    entries = cache_entries()
+    total = sum(st.st_size for _, st in entries)
+    for path, st in entries:
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+            total -= st.st_size
+        except OSError:
+            pass
+    return total
+
+
+def play_file(path):
+    """Play an audio file with the platform's command line player."""
+    path = str(path)
+    if sys.platform == 'darwin':
+        command = ['afplay', path]
+    elif sys.platform == 'win32':
+        os.system(f'start "" "{path}"')
+        return True
+    elif path.endswith('.wav') and shutil.which('aplay'):
+        command = ['aplay', path]
+    elif shutil.which('ffplay'):
+        command = ['ffplay', '-nodisp', '-autoexit', '-loglevel', 'quiet', path]
+    elif shutil.which('mpg123'):
+        command = ['mpg123', '-q', path]
+    elif shutil.which('paplay'):
+        command = ['paplay', path]
+    else:
+        return False
+    try:
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        return True
+    except OSError:
+        return False
+
+
+def parse_tts_args(argv):
+    """
+    Split a TTS script's arguments into (text, cache_only).
+
+    --cache-only renders into the cache without playing, for prewarming.
+    """
+    cache_only = '--cache-only' in argv
+    words = [arg for arg in argv if arg != '--cache-only']
+    return ' '.join(words), cache_only
+
+
+def available_providers():
+    """Return the providers usable with the current environment."""
+    return [
+        name for name, (script, keys) in PROVIDERS.items()
+        if (TTS_DIR / script).exists() and (not keys or any(getenv(k) for k in keys))
+    ]
+
+
+def static_phrases():
+    """Return the fixed hook phrases, including the engineer-name variant."""
+    phrases = list(STATIC_PHRASES)
+    engineer_name = getenv('ENGINEER_NAME', '').strip()
+    if engineer_name:
+        phrases.append(f"{engineer_name}, your agent needs your input")
+    return phrases
+
+
+def prewarm(providers):
+    """Render every static phrase for each provider into the cache."""
+    rendered = 0
+    for provider in providers:
+        script = TTS_DIR / PROVIDERS[provider][0]
+        for phrase in static_phrases():
+            try:
+                result = subprocess.run(
+                    ['uv', 'run', str(script), '--cache-only', phrase],
+                    capture_output=True,
+                    timeout=PREWARM_TIMEOUT_SECONDS,
+                )
+            except (subprocess.TimeoutExpired, subprocess.SubprocessError, OSError) as e:
+                print(f"⚠️  {provider}: {phrase!r} failed: {e}")
+                continue
+            if result.returncode == 0:
+                rendered += 1
+                print(f"✓ {provider}: {phrase}")
+            else:
+                print(f"⚠️  {provider}: {phrase!r} failed (exit {result.returncode})")
+    return rendered
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthesized speech cache')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    prewarm_parser = subparsers.add_parser('prewarm', help='Render the fixed hook phrases ahead of time')
+    prewarm_parser.add_argument('--provider', choices=sorted(PROVIDERS), action='append',
+                                help='Provider to render (default: every provider with an API key)')
+    subparsers.add_parser('stats', help='Show cache entry count and size')
+    subparsers.add_parser('clear', help='Remove every cached entry')
+
+    args = parser.parse_args()
+
+    if args.command == 'prewarm':
+        providers = args.provider or available_providers()
+        rendered = prewarm(providers)
+        print(f"Rendered {rendered} phrases into {get_cache_dir()}")
+        return 0
+
+    if args.command == 'stats':
+        entries = cache_entries()
+        total = sum(st.st_size for _, st in entries)
+        print(f"{len(entries)} entries, {total / (1024 * 1024):.1f} MB of "
+              f"{get_max_bytes() / (1024 * 1024):.0f} MB in {get_cache_dir()}")
+        return 0
+
+    if args.command == 'clear':
+        evict(0)
+        print(f"Cleared {get_cache_dir()}")
+        return 0
+
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
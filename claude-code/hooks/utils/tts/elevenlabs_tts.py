@@ -12,6 +12,12 @@ import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
+from audio_cache import cache_key, get_cached, parse_tts_args, play_file, put_cached
+
+MODEL = "eleven_turbo_v2_5"
+VOICE = "WejK3H1m7MI9CHnIjW9K"
+OUTPUT_FORMAT = "mp3_44100_128"
+
 def main():
     """
     ElevenLabs Turbo v2.5 TTS Script
@@ -22,14 +28,31 @@ def main():
     Usage:
     - ./eleven_turbo_tts.py                    # Uses default text
     - ./eleven_turbo_tts.py "Your custom text" # Uses provided text
+    - ./eleven_turbo_tts.py --cache-only "Text" # Render into the audio cache only
     
     Features:
     - Fast generation (optimized for real-time use)
     - High-quality voice synthesis
     - Stable production model
     - Cost-effective for high-volume usage
+    - Cached playback for repeated phrases (see audio_cache.py)
     """
     
+    # Get text from command line argument or use default
+    text, cache_only = parse_tts_args(sys.argv[1:])
+    if not text:
+        text = "The first move is what sets everything in motion."
+    
+    # Repeated phrases play from the cache without an API call
+    key = cache_key("elevenlabs", VOICE, MODEL, text, OUTPUT_FORMAT)
+    cached = get_cached(key, "mp3")
+    if cached:
+        if not cache_only:
+            print(f"🎯 Text: {text}")
+            print("🔊 Playing cached audio...")
+            play_file(cached)
+        return
+    
     # Load dotenv from custom path if specified
     env_file = os.getenv("CCAOS_ENV_FILE")
     if env_file:
@@ -55,23 +78,21 @@ def main():
         print("🎙️  ElevenLabs Turbo v2.5 TTS")
         print("=" * 40)
         
-        # Get text from command line argument or use default
-        if len(sys.argv) > 1:
-            text = " ".join(sys.argv[1:])  # Join all arguments as text
-        else:
-            text = "The first move is what sets everything in motion."
-        
         print(f"🎯 Text: {text}")
         print("🔊 Generating and playing...")
         
         try:
-            # Generate and play audio directly
-            audio = elevenlabs.text_to_speech.convert(
+            # Generate audio and keep the full MP3 for the cache
+            audio = b"".join(elevenlabs.text_to_speech.convert(
                 text=text,
-                voice_id="WejK3H1m7MI9CHnIjW9K",  # Specified voice
-                model_id="eleven_turbo_v2_5",
-                output_format="mp3_44100_128",
-            )
+                voice_id=VOICE,  # Specified voice
+                model_id=MODEL,
+                output_format=OUTPUT_FORMAT,
+            ))
+            put_cached(key, "mp3", audio)
+            if cache_only:
+                print("✅ Cached!")
+                return
             
             play(audio)
             print("✅ Playback complete!")
@@ -15,6 +15,12 @@ import subprocess
 from pathlib import Path
 from dotenv import load_dotenv
 
+from audio_cache import cache_key, get_cached, parse_tts_args, play_file, put_cached
+
+MODEL = "gemini-2.5-flash-preview-tts"
+VOICE = "Kore"
+STYLE = "Say cheerfully:"
+
 
 def play_audio_data(audio_data):
     """Play audio data using system audio player via temporary file"""
@@ -91,14 +97,31 @@ def main():
     Usage:
     - ./gemini_tts.py                    # Uses default text
     - ./gemini_tts.py "Your custom text" # Uses provided text
+    - ./gemini_tts.py --cache-only "Text" # Render into the audio cache only
 
     Features:
     - Gemini 2.5 Flash TTS model (latest)
     - Kore voice (natural and clear)
     - Direct audio playback without file saving
+    - Cached playback for repeated phrases (see audio_cache.py)
     - Environment variable configuration
     """
 
+    # Get text from command line argument or use default
+    text, cache_only = parse_tts_args(sys.argv[1:])
+    if not text:
+        text = "Today is a wonderful day to build something people love!"
+
+    # Repeated phrases play from the cache without an API call
+    key = cache_key("gemini", VOICE, MODEL, text, STYLE)
+    cached = get_cached(key, "wav")
+    if cached:
+        if not cache_only:
+            print(f"🎯 Text: {text}")
+            print("🔊 Playing cached audio...")
+            play_file(cached)
+        return
+
     # Load dotenv from custom path if specified
     env_file = os.getenv("CCAOS_ENV_FILE")
     if env_file:
@@ -124,26 +147,20 @@ def main():
         print("🎙️  Gemini TTS")
         print("=" * 15)
 
-        # Get text from command line argument or use default
-        if len(sys.argv) > 1:
-            text = " ".join(sys.argv[1:])  # Join all arguments as text
-        else:
-            text = "Today is a wonderful day to build something people love!"
-
         print(f"🎯 Text: {text}")
         print("🔊 Generating and playing...")
 
         try:
             # Generate audio using Gemini TTS
             response = client.models.generate_content(
-                model="gemini-2.5-flash-preview-tts",
-                contents=f"Say cheerfully: {text}",
+                model=MODEL,
+                contents=f"{STYLE} {text}",
                 config=types.GenerateContentConfig(
                     response_modalities=["AUDIO"],
                     speech_config=types.SpeechConfig(
                         voice_config=types.VoiceConfig(
                             prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                                voice_name='Kore',
+                                voice_name=VOICE,
                             )
                         )
                     ),
@@ -155,6 +172,10 @@ def main():
 
             # Convert to WAV format for better compatibility
             wav_data = create_wave_data(audio_data)
+            put_cached(key, "wav", wav_data)
+            if cache_only:
+                print("✅ Cached!")
+                return
 
             # Play audio directly
             if play_audio_data(wav_data):
@@ -14,6 +14,12 @@ import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
 
+from audio_cache import cache_key, get_cached, is_enabled, parse_tts_args, play_file, put_cached
+
+MODEL = "gpt-4o-mini-tts"
+VOICE = "nova"
+INSTRUCTIONS = "Speak in a cheerful, positive yet professional tone."
+
 
 async def main():
     """
@@ -25,14 +31,31 @@ async def main():
     Usage:
     - ./openai_tts.py                    # Uses default text
     - ./openai_tts.py "Your custom text" # Uses provided text
+    - ./openai_tts.py --cache-only "Text" # Render into the audio cache only
 
     Features:
     - OpenAI gpt-4o-mini-tts model (latest)
     - Nova voice (engaging and warm)
     - Streaming audio with instructions support
     - Live audio playback via LocalAudioPlayer
+    - Cached playback for repeated phrases (see audio_cache.py)
     """
 
+    # Get text from command line argument or use default
+    text, cache_only = parse_tts_args(sys.argv[1:])
+    if not text:
+        text = "Today is a wonderful day to build something people love!"
+
+    # Repeated phrases play from the cache without an API call
+    key = cache_key("openai", VOICE, MODEL, text, INSTRUCTIONS)
+    cached = get_cached(key, "wav")
+    if cached:
+        if not cache_only:
+            print(f"🎯 Text: {text}")
+            print("🔊 Playing cached audio...")
+            play_file(cached)
+        return
+
     # Load dotenv from custom path if specified
     env_file = os.getenv("CCAOS_ENV_FILE")
     if env_file:
@@ -58,25 +81,39 @@ async def main():
         print("🎙️  OpenAI TTS")
         print("=" * 20)
 
-        # Get text from command line argument or use default
-        if len(sys.argv) > 1:
-            text = " ".join(sys.argv[1:])  # Join all arguments as text
-        else:
-            text = "Today is a wonderful day to build something people love!"
-
         print(f"🎯 Text: {text}")
-        print("🔊 Generating and streaming...")
 
         try:
-            # Generate and stream audio using OpenAI TTS
-            async with openai.audio.speech.with_streaming_response.create(
-                model="gpt-4o-mini-tts",
-                voice="nova",
-                input=text,
-                instructions="Speak in a cheerful, positive yet professional tone.",
-                response_format="mp3",
-            ) as response:
-                await LocalAudioPlayer().play(response)
+            if is_enabled():
+                print("🔊 Generating and playing...")
+
+                # Render the full WAV so it can be cached, then play it from disk
+                async with openai.audio.speech.with_streaming_response.create(
+                    model=MODEL,
+                    voice=VOICE,
+                    input=text,
+                    instructions=INSTRUCTIONS,
+                    response_format="wav",
+                ) as response:
+                    audio_data = await response.read()
+
+                path = put_cached(key, "wav", audio_data)
+                if cache_only:
+                    print("✅ Cached!")
+                    return
+                play_file(path)
+            else:
+                print("🔊 Generating and streaming...")
+
+                # Generate and stream audio using OpenAI TTS
+                async with openai.audio.speech.with_streaming_response.create(
+                    model=MODEL,
+                    voice=VOICE,
+                    input=text,
+                    instructions=INSTRUCTIONS,
+                    response_format="mp3",
+                ) as response:
+                    await LocalAudioPlayer().play(response)
 
             print("✅ Playback complete!")
 
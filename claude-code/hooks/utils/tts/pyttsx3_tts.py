@@ -6,8 +6,31 @@
 # ]
 # ///
 
+import os
 import sys
 import random
+import tempfile
+
+from audio_cache import cache_key, get_cached, is_enabled, parse_tts_args, play_file, put_cached
+
+RATE = 180    # Speech rate (words per minute)
+VOLUME = 0.8  # Volume (0.0 to 1.0)
+# Engines render to AIFF on macOS and WAV elsewhere
+AUDIO_EXT = "aiff" if sys.platform == "darwin" else "wav"
+
+
+def render_to_cache(engine, text, key):
+    """Render text to a file and store it in the cache, returning its path."""
+    fd, tmp_path = tempfile.mkstemp(suffix=f".{AUDIO_EXT}")
+    os.close(fd)
+    try:
+        engine.save_to_file(text, tmp_path)
+        engine.runAndWait()
+        with open(tmp_path, "rb") as f:
+            return put_cached(key, AUDIO_EXT, f.read())
+    finally:
+        os.unlink(tmp_path)
+
 
 def main():
     """
@@ -19,14 +42,39 @@ def main():
     Usage:
     - ./pyttsx3_tts.py                    # Uses default text
     - ./pyttsx3_tts.py "Your custom text" # Uses provided text
+    - ./pyttsx3_tts.py --cache-only "Text" # Render into the audio cache only
     
     Features:
     - Offline TTS (no API key required)
     - Cross-platform compatibility
     - Configurable voice settings
     - Immediate audio playback
+    - Cached playback for repeated phrases (see audio_cache.py)
     """
     
+    # Get text from command line argument or use default
+    text, cache_only = parse_tts_args(sys.argv[1:])
+    if not text:
+        # Default completion messages
+        completion_messages = [
+            "Work complete!",
+            "All done!",
+            "Task finished!",
+            "Job complete!",
+            "Ready for next task!"
+        ]
+        text = random.choice(completion_messages)
+    
+    # Repeated phrases play from the cache without initializing the engine
+    key = cache_key("pyttsx3", "default", f"rate={RATE},volume={VOLUME}", text)
+    cached = get_cached(key, AUDIO_EXT)
+    if cached:
+        if not cache_only:
+            print(f"🎯 Text: {text}")
+            print("🔊 Playing cached audio...")
+            play_file(cached)
+        return
+    
     try:
         import pyttsx3
         
@@ -34,35 +82,27 @@ def main():
         engine = pyttsx3.init()
         
         # Configure engine settings
-        engine.setProperty('rate', 180)    # Speech rate (words per minute)
-        engine.setProperty('volume', 0.8)  # Volume (0.0 to 1.0)
+        engine.setProperty('rate', RATE)
+        engine.setProperty('volume', VOLUME)
         
         print("🎙️  pyttsx3 TTS")
         print("=" * 15)
         
-        # Get text from command line argument or use default
-        if len(sys.argv) > 1:
-            text = " ".join(sys.argv[1:])  # Join all arguments as text
-        else:
-            # Default completion messages
-            completion_messages = [
-                "Work complete!",
-                "All done!",
-                "Task finished!",
-                "Job complete!",
-                "Ready for next task!"
-            ]
-            text = random.choice(completion_messages)
-        
         print(f"🎯 Text: {text}")
         print("🔊 Speaking...")
         
-        # Speak the text
-        engine.say(text)
-        engine.runAndWait()
+        # Render into the cache when possible so the next run skips the engine
+        path = render_to_cache(engine, text, key) if is_enabled() else None
+        if cache_only:
+            print("✅ Cached!" if path else "⚠️  Nothing cached")
+            return
+        if not (path and play_file(path)):
+            # Speak the text
+            engine.say(text)
+            engine.runAndWait()
         
         print("✅ Playback complete!")
-        
+    
     except ImportError:
         print("❌ Error: pyttsx3 package not installed")
         print("This script uses UV to auto-install dependencies.")
@@ -72,4 +112,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# ///
+
+"""
+Background Speaker
+
+Hooks hand announcements to a single detached speaker process through a
+queue file instead of waiting for LLM message generation and TTS playback
+themselves, so Stop, SubagentStop and Notification return in milliseconds.
+
+The speaker waits briefly after each announcement to coalesce bursts:
+queued announcements sharing a key (e.g. five SubagentStop events within a
+second) are spoken once. Announcements older than their max age are dropped
+instead of being read out long after the fact. The speaker exits on its own
+once the queue has been idle for a while and is respawned on demand.
+
+Usage:
+- ./speaker.py serve                 # Run the speaker (spawned by announce())
+- ./speaker.py say "Text" [--key K]  # Queue an announcement
+
+Environment:
+- CCAOS_TTS=0                        # Queue nothing and never start a speaker
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from hook_client import get_run_dir
+from utils.llm.providers import call_script, load_script
+from utils.log_store import encode_record, is_dry_run, locked
+from utils.profiler import phase
+
+QUEUE_FILE = 'speaker-queue.jsonl'
+LOCK_FILE = 'speaker.lock'
+
+# Seconds to wait after an announcement for more with the same key
+COALESCE_SECONDS = 1.0
+# Announcements older than this are dropped unspoken
+DEFAULT_MAX_AGE = 30.0
+# The speaker exits after this many seconds with an empty queue
+IDLE_SECONDS = 60.0
+POLL_SECONDS = 0.1
+
+LLM_TIMEOUT_SECONDS = 10
+TTS_TIMEOUT_SECONDS = 60
+
+
+def get_queue_path():
+    """Return the speaker queue file path."""
+    return get_run_dir() / QUEUE_FILE
+
+
+def get_lock_path():
+    """Return the single-instance lock file path."""
+    return get_run_dir() / LOCK_FILE
+
+
+def is_enabled():
+    """Return True unless CCAOS_TTS=0 switches announcements off."""
+    return os.getenv('CCAOS_TTS', '1') != '0'
+
+
+def enqueue(entry):
+    """Append one announcement to the queue."""
+    queue_path = get_queue_path()
+    queue_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    fd = os.open(queue_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        with locked(fd):
+            os.write(fd, encode_record(entry))
+    finally:
+        os.close(fd)
+
+
+def take_queue():
+    """Remove and return every queued announcement."""
+    queue_path = get_queue_path()
+    try:
+        fd = os.open(queue_path, os.O_RDWR)
+    except FileNotFoundError:
+        return []
+    try:
+        with locked(fd):
+            with os.fdopen(os.dup(fd), 'rb') as f:
+                data = f.read()
+            os.ftruncate(fd, 0)
+    finally:
+        os.close(fd)
+
+    entries = []
+    for line in data.splitlines():
+        try:
+            entries.append(json.loads(line))
+        except (json.JSONDecodeError, ValueError):
+            pass  # Skip partial or corrupt lines
+    return entries
+
+
+def is_speaker_running():
+    """Return True if a speaker process holds the single-instance lock."""
+    if fcntl is None:
+        return False
+    try:
+        with open(get_lock_path(), 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return True
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+    except OSError:
+        pass
+    return False
+
+
+@phase('spawn')
+def spawn_speaker():
+    """Start the speaker detached from the calling hook."""
+    try:
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), 'serve'],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        return True
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+
+def announce(tts_script, text=None, key=None, llm_script=None, fallback=None, max_age=DEFAULT_MAX_AGE):
+    """
+    Queue an announcement for the background speaker and return immediately.
+
+    Args:
+        tts_script (str): TTS script used to speak the text
+        text (str): Text to speak; if None it is generated with llm_script
+        key (str): Coalescing key; queued announcements with the same key
+                   are spoken once
+        llm_script (str): LLM script run with --completion to generate the text
+        fallback (str): Text to speak if generation fails
+        max_age (float): Seconds after which the announcement is dropped
+    """
+    if is_dry_run() or not is_enabled():
+        return
+    now = time.time()
+    enqueue({
+        'tts_script': str(tts_script),
+        'text': text,
+        'key': key,
+        'llm_script': str(llm_script) if llm_script else None,
+        'fallback': fallback,
+        'created': now,
+        'expires': now + max_age,
+    })
+    if not is_speaker_running():
+        spawn_speaker()
+
+
+def select_entries(entries, now):
+    """
+    Drop stale announcements and coalesce those sharing a key.
+
+    For each key only the newest announcement is kept, in the position of the
+    first one queued, so a burst is spoken once at the point it began.
+    """
+    fresh = [e for e in entries if e.get('expires', now) >= now]
+    latest = {}
+    for entry in fresh:
+        if entry.get('key'):
+            latest[entry['key']] = entry
+
+    selected = []
+    seen = set()
+    for entry in fresh:
+        key = entry.get('key')
+        if not key:
+            selected.append(entry)
+        elif key not in seen:
+            seen.add(key)
+            selected.append(latest[key])
+    return selected
+
+
+def generate_text(entry):
+    """Return the text for an announcement, generating it if needed."""
+    if entry.get('text'):
+        return entry['text']
+    llm_script = entry.get('llm_script')
+    if llm_script and load_script(llm_script) is not None:
+        # Runs in-process, reusing the provider's client across announcements
+        text = call_script(llm_script, 'generate_completion_message')
+        if text:
+            return text
+    elif llm_script:
+        try:
+            result = subprocess.run(
+                ['uv', 'run', llm_script, '--completion'],
+                capture_output=True,
+                text=True,
+                timeout=LLM_TIMEOUT_SECONDS,
+            )
+            if result.returncode == 0 and result.stdout.strip():
+                return result.stdout.strip()
+        except (subprocess.TimeoutExpired, subprocess.SubprocessError, OSError):
+            pass
+    return entry.get('fallback')
+
+
+def speak(entry):
+    """Speak one announcement with its TTS script."""
+    text = generate_text(entry)
+    if not text or not entry.get('tts_script'):
+        return
+    try:
+        subprocess.run(
+            ['uv', 'run', entry['tts_script'], text],
+            capture_output=True,
+            timeout=TTS_TIMEOUT_SECONDS,
+        )
+    except (subprocess.TimeoutExpired, subprocess.SubprocessError, OSError):
+        pass
+
+
+def collect(entries):
+    """Keep taking the queue until no new announcement arrives for COALESCE_SECONDS."""
+    while True:
+        newest = max(e.get('created', 0) for e in entries)
+        wait = newest + COALESCE_SECONDS - time.time()
+        if wait > 0:
+            time.sleep(wait)
+        more = take_queue()
+        if not more:
+            return entries
+        entries.extend(more)
+
+
+def serve(idle_seconds=IDLE_SECONDS):
+    """Speak queued announcements until the queue stays empty for idle_seconds."""
+    idle_since = time.monotonic()
+    while True:
+        entries = take_queue()
+        if not entries:
+            if time.monotonic() - idle_since >= idle_seconds:
+                return
+            time.sleep(POLL_SECONDS)
+            continue
+
+        entries = collect(entries)
+        for entry in select_entries(entries, time.time()):
+            # Re-check staleness: earlier announcements may have taken a while
+            if entry.get('expires', 0) >= time.time():
+                speak(entry)
+        idle_since = time.monotonic()
+
+
+def acquire_speaker_lock():
+    """Take the single-instance lock, returning the held file or None."""
+    lock_path = get_lock_path()
+    lock_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    lock_file = open(lock_path, 'a')
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def queue_is_empty():
+    """Return True if nothing is waiting in the queue."""
+    try:
+        return get_queue_path().stat().st_size == 0
+    except OSError:
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Background TTS speaker')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='Speak queued announcements until idle')
+    serve_parser.add_argument('--idle-timeout', type=float,
+                              default=float(os.getenv('CCAOS_SPEAKER_IDLE', IDLE_SECONDS)),
+                              help='Exit after this many seconds with an empty queue')
+
+    say_parser = subparsers.add_parser('say', help='Queue an announcement')
+    say_parser.add_argument('text', help='Text to speak')
+    say_parser.add_argument('--tts-script', default=str(Path(__file__).resolve().parent / 'pyttsx3_tts.py'),
+                            help='TTS script (default: pyttsx3_tts.py)')
+    say_parser.add_argument('--key', help='Coalescing key')
+
+    args = parser.parse_args()
+
+    if args.command == 'say':
+        announce(args.tts_script, text=args.text, key=args.key)
+        return 0
+
+    while True:
+        lock_file = acquire_speaker_lock()
+        if lock_file is None:
+            return 0  # Another speaker is already running
+        try:
+            serve(args.idle_timeout)
+        finally:
+            lock_file.close()
+        # An announcement queued while we were shutting down saw the lock held
+        # and did not spawn a new speaker, so pick it up ourselves
+        if queue_is_empty():
+            return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
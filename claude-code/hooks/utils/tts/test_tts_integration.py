@@ -235,19 +235,24 @@ class TestCLIInterfaceConsistency:
     
     def test_all_scripts_accept_command_line_args(self):
         """Test that all TTS scripts accept command line arguments consistently"""
-        # All scripts should handle sys.argv for text input
+        # All scripts should parse sys.argv (text and --cache-only) the same way
         tts_scripts = [
             "claude-code/hooks/utils/tts/gemini_tts.py",
             "claude-code/hooks/utils/tts/openai_tts.py", 
-            "claude-code/hooks/utils/tts/pyttsx3_tts.py"
+            "claude-code/hooks/utils/tts/pyttsx3_tts.py",
+            "claude-code/hooks/utils/tts/elevenlabs_tts.py"
         ]
         
         for script_path in tts_scripts:
             path = Path(script_path)
             if path.exists():
                 content = path.read_text()
-                assert "sys.argv" in content
-                assert "if len(sys.argv) > 1:" in content
+                assert "parse_tts_args(sys.argv[1:])" in content
+
+        from utils.tts.audio_cache import parse_tts_args
+        assert parse_tts_args([]) == ('', False)
+        assert parse_tts_args(['Hello', 'there']) == ('Hello there', False)
+        assert parse_tts_args(['--cache-only', 'Hello']) == ('Hello', True)
     
     def test_all_scripts_have_consistent_output_format(self):
         """Test that all TTS scripts have consistent output format"""
@@ -272,7 +272,8 @@ def main():
     hook_files = [
         'notification.py', 'post_tool_use.py', 'pre_compact.py', 
         'pre_tool_use.py', 'session_start.py', 'stop.py', 
-        'subagent_stop.py', 'user_prompt_submit.py'
+        'subagent_stop.py', 'user_prompt_submit.py',
+        'hook_client.py', 'hook_server.py'
     ]
     
     hooks_copied = 0
@@ -301,8 +302,17 @@ def main():
             else:
                 print(f"    ✓ instructions/ directory")
     
+    # Copy shared hook utilities
+    util_files = ['context_cache.py', 'env.py', 'git_changes.py', 'hook_io.py', 'hooks_query.py', 'log_rotate.py', 'log_store.py', 'profiler.py', 'rules.py', 'shell_parse.py', 'transcript_backup.py', 'transcript_export.py']
+    util_src = hooks_source_path / 'utils'
+    if util_src.exists():
+        for util_file in util_files:
+            source_file = util_src / util_file
+            dest_file = hooks_install_path / 'utils' / util_file
+            copy_file_with_overwrite_check(source_file, dest_file, args.overwrite, f"utils/{util_file}")
+    
     # Copy LLM utilities
-    llm_files = ['anth.py', 'gemini.py', 'oai.py']
+    llm_files = ['anth.py', 'gemini.py', 'oai.py', 'message_pool.py', 'providers.py']
     llm_src = hooks_source_path / 'utils' / 'llm'
     if llm_src.exists():
         for llm_file in llm_files:
@@ -311,7 +321,7 @@ def main():
             copy_file_with_overwrite_check(source_file, dest_file, args.overwrite, f"utils/llm/{llm_file}")
     
     # Copy TTS utilities
-    tts_files = ['elevenlabs_tts.py', 'gemini_tts.py', 'openai_tts.py', 'pyttsx3_tts.py']
+    tts_files = ['elevenlabs_tts.py', 'gemini_tts.py', 'openai_tts.py', 'pyttsx3_tts.py', 'speaker.py', 'audio_cache.py']
     tts_src = hooks_source_path / 'utils' / 'tts'
     if tts_src.exists():
         for tts_file in tts_files:
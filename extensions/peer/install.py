@@ -68,10 +68,10 @@ def main():
         scripts_dst = install_dir / 'scripts'
         if scripts_dst.exists():
             shutil.rmtree(scripts_dst)
-        shutil.copytree(scripts_src, scripts_dst)
+        shutil.copytree(scripts_src, scripts_dst, ignore=shutil.ignore_patterns('tests', '__pycache__', 'run'))
         
         # Make scripts executable
-        for script in scripts_dst.glob('*.sh'):
+        for script in [*scripts_dst.glob('*.sh'), *scripts_dst.glob('*.py')]:
             script.chmod(0o755)
         print(f"  ✓ Installed PEER scripts")
     
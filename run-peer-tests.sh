@@ -0,0 +1,78 @@
+#!/bin/bash
+
+# Test Runner Script for the PEER state scripts
+# This script runs all test files in scripts/peer/tests using UV
+
+echo "🧪 Running All PEER State Script Tests"
+echo "======================================"
+echo ""
+
+# Track test results
+TOTAL_TESTS=0
+PASSED_TESTS=0
+FAILED_TESTS=0
+FAILED_FILES=()
+
+# Function to run a test file
+run_test() {
+    local test_file="$1"
+    local test_name=$(basename "$test_file")
+
+    echo "📝 Testing: $test_name"
+    echo "   Path: $test_file"
+
+    # Run the test and capture the output
+    if output=$(uv run "$test_file" 2>&1); then
+        passed=$(echo "$output" | grep -oE "[0-9]+ passed" | grep -oE "[0-9]+" | head -1)
+        echo "   ✅ Result: ${passed:-0} tests passed"
+        PASSED_TESTS=$((PASSED_TESTS + ${passed:-0}))
+        TOTAL_TESTS=$((TOTAL_TESTS + ${passed:-0}))
+    else
+        echo "$output" | tail -20
+        echo "   ❌ Result: Test failed"
+        FAILED_TESTS=$((FAILED_TESTS + 1))
+        FAILED_FILES+=("$test_file")
+        echo ""
+        return
+    fi
+
+    # pytest.main() does not set the exit code, so check the summary too
+    failed=$(echo "$output" | grep -oE "[0-9]+ (failed|error)" | grep -oE "[0-9]+" | head -1)
+    if [ -n "$failed" ] && [ "$failed" != "0" ]; then
+        echo "$output" | tail -20
+        echo "   ⚠️  Warning: $failed test(s) failed"
+        FAILED_TESTS=$((FAILED_TESTS + failed))
+        FAILED_FILES+=("$test_file")
+    fi
+
+    echo ""
+}
+
+for test_file in scripts/peer/tests/test*.py; do
+    if [ -f "$test_file" ]; then
+        run_test "$test_file"
+    fi
+done
+
+# Summary
+echo "======================================"
+echo "📊 Test Summary"
+echo "======================================"
+echo ""
+echo "Total Tests Run: $TOTAL_TESTS"
+echo "✅ Passed: $PASSED_TESTS"
+echo "❌ Failed: $FAILED_TESTS"
+echo ""
+
+if [ ${#FAILED_FILES[@]} -gt 0 ]; then
+    echo "Failed test files:"
+    for file in "${FAILED_FILES[@]}"; do
+        echo "  - $file"
+    done
+    echo ""
+    echo "❌ Some tests failed. Please review the output above."
+    exit 1
+else
+    echo "✅ All tests passed successfully!"
+    exit 0
+fi
@@ -3,6 +3,14 @@
 # Usage: ./create-state.sh <STATE_KEY> <INITIAL_JSON>
 # Creates a new key only if it doesn't already exist
 
+# Hand over to the native client when uv is available: one process and one
+# NATS round trip per create instead of a nats/jq pipeline.
+# Set AGENT_OS_PEER_NATIVE=0 to use the shell implementation below.
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+if [ "${AGENT_OS_PEER_NATIVE:-1}" != "0" ] && [ -f "$SCRIPT_DIR/peer_state.py" ] && command -v uv >/dev/null 2>&1; then
+  exec uv run --quiet --script "$SCRIPT_DIR/peer_state.py" create "$@"
+fi
+
 STATE_KEY="$1"
 INITIAL_JSON="$2"
 
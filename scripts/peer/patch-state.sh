@@ -0,0 +1,18 @@
+#!/bin/bash
+# patch-state.sh - Wrapper for delta writes to NATS KV state
+# Usage: ./patch-state.sh <STATE_KEY> <PATCH_JSON>
+#    or: ./patch-state.sh <STATE_KEY> --patch-file <FILE_PATH>
+# PATCH_JSON is a JSON Patch array (RFC 6902), e.g.
+#   '[{"op": "replace", "path": "/phases/plan/status", "value": "completed"}]'
+# or a merge patch object (RFC 7396), e.g. '{"phases": {"plan": {"status": "completed"}}}'
+
+# Patches are applied by the native client, with the same revision check and
+# conflict retries as update-state.sh.
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+if [ -f "$SCRIPT_DIR/peer_state.py" ] && command -v uv >/dev/null 2>&1; then
+  exec uv run --quiet --script "$SCRIPT_DIR/peer_state.py" patch "$@"
+fi
+
+echo "ERROR: patch-state.sh requires uv (https://docs.astral.sh/uv/)" >&2
+echo "Use update-state.sh with a JQ filter instead" >&2
+exit 1
@@ -0,0 +1,977 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "nats-py",
+#     "jq",
+# ]
+# ///
+
+"""
+PEER State Client
+
+Native replacement for read-state.sh, create-state.sh and update-state.sh,
+and the implementation of patch-state.sh.
+The shell wrappers spawn around eight processes per state write (two
+`nats kv get` calls to fetch the value and scrape its revision, several jq
+validations, wc, and `nats kv update`). This client holds one NATS
+connection, fetches value and revision in a single round trip, applies the
+jq filter in-process and writes with the revision check. When another
+writer changed the state first, the update is retried automatically: the
+state is re-read, the same filter re-applied and the write re-attempted
+with jittered exponential backoff, so concurrent PEER agents converge
+instead of failing the step. Every update's attempts, conflicts and
+backoff are logged for `stats`.
+
+`patch` writes a delta instead of a jq filter: a JSON Patch (RFC 6902)
+array or a merge patch (RFC 7396) object, applied here with the same
+revision check and retries (see state_patch.py). Phase outputs larger than
+AGENT_OS_PEER_OUTPUT_LIMIT spill over into the agent-os-peer-outputs
+Object Store bucket (or their own keys in the state bucket when it does
+not exist), content-addressed, and the state keeps only a reference, so a
+status change rewrites a small document instead of every output.
+References are resolved lazily: `get` reads back the outputs under the
+requested --path (all of them without one, none with --refs), patches the
+outputs their paths touch, and jq filters the outputs if they mention
+`output`.
+
+The command line keeps the wrappers' contract: `get` prints the state JSON,
+`create` and `update` print OK, and every failure exits 1 with the same
+ERROR lines on stderr. The wrappers hand over to this client when uv is
+available (set AGENT_OS_PEER_NATIVE=0 to keep the shell implementation).
+`get` is answered by the local state cache sidecar when it holds the key
+(see state_cache.py), and writes report their new revision to it.
+
+Python callers that write state many times per cycle can keep one
+connection open:
+
+    async with PeerStateStore() as store:
+        state = await store.get(key)
+        await store.update(key, '.phases.plan.status = "completed"')
+
+Usage:
+- ./peer_state.py get <STATE_KEY> [--path <JSON_POINTER>] [--refs]
+- ./peer_state.py create <STATE_KEY> <INITIAL_JSON>
+- ./peer_state.py update <STATE_KEY> <JQ_FILTER> [--json-file <VAR_NAME>=<FILE_PATH> ...]
+- ./peer_state.py update --state-key <KEY> --filter <FILTER> [--json-file <VAR_NAME>=<FILE_PATH> ...]
+- ./peer_state.py patch <STATE_KEY> <PATCH_JSON>
+- ./peer_state.py patch <STATE_KEY> --patch-file <FILE_PATH>
+- ./peer_state.py stats [STATE_KEY]    # Revision conflicts and retries per key
+
+Environment:
+- NATS_URL=URL                  # NATS server (default: nats_url in .agent-os/peer/config.json, else nats://localhost:4222)
+- NATS_CREDS=PATH               # Credentials file for the connection
+- AGENT_OS_PEER_RETRIES=N       # Retries after a revision conflict (default: 6)
+- AGENT_OS_PEER_BACKOFF_MS=N    # Backoff window of the first retry (default: 50, doubling up to 2000)
+- AGENT_OS_PEER_METRICS=PATH    # Contention log (default: .agent-os/peer/metrics/state_updates.jsonl, 0 disables)
+- AGENT_OS_PEER_OUTPUT_LIMIT=N  # Phase outputs above N bytes get their own key (default: 4096, 0 keeps them inline)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from state_patch import PatchError, apply_patch, parse_pointer, resolve
+
+BUCKET = 'agent-os-peer-state'
+OBJECT_BUCKET = 'agent-os-peer-outputs'
+DEFAULT_NATS_URL = 'nats://localhost:4222'
+CONNECT_TIMEOUT = 5  # seconds
+FULL_JSON_LIMIT = 5000  # bytes; larger states are logged as a preview
+DEFAULT_RETRIES = 6
+DEFAULT_BACKOFF_MS = 50  # first retry waits up to this long
+MAX_BACKOFF_MS = 2000
+DEFAULT_OUTPUT_LIMIT = 4096  # bytes; larger phase outputs are stored outside the state
+VAR_SPEC_RE = re.compile(r'^([a-zA-Z_][a-zA-Z0-9_]*)=(.+)$')
+KEY_RE = re.compile(r'^[-/_=.a-zA-Z0-9]+$')
+# A field below one phase, e.g. .phases.plan.status or .phases["plan"].status
+PHASE_FIELD_RE = re.compile(r'\.phases(?:\.\w+|\."[^"]*"|\["[^"]*"\])(?:\.\w+|\."[^"]*"|\["[^"]*"\])')
+# Anything that can take a phase as a whole: `.`, `..`, `.[...]` or `phases`
+WHOLE_VALUE_RE = re.compile(r'\.\.|\.(?![\w"\[])|\.\[(?!")|\bphases\b')
+
+UPDATE_USAGE = (
+    "Usage: ./update-state.sh <STATE_KEY> <JQ_FILTER> [--json-file <VAR_NAME>=<FILE_PATH> ...]",
+    "  or: ./update-state.sh --state-key <KEY> --filter <FILTER> [--json-file <VAR_NAME>=<FILE_PATH> ...]",
+)
+GET_USAGE = (
+    "Usage: ./read-state.sh <STATE_KEY> [--path <JSON_POINTER>] [--refs]",
+)
+PATCH_USAGE = (
+    "Usage: ./patch-state.sh <STATE_KEY> <PATCH_JSON>",
+    "  or: ./patch-state.sh <STATE_KEY> --patch-file <FILE_PATH>",
+)
+
+
+class PeerStateError(Exception):
+    """A failed state operation, carrying the lines to report on stderr."""
+
+    def __init__(self, *lines):
+        super().__init__('\n'.join(lines))
+        self.lines = lines
+
+
+def get_servers():
+    """Return the NATS server URL from NATS_URL or the project's PEER config."""
+    if os.getenv('NATS_URL'):
+        return os.environ['NATS_URL']
+    config_path = Path.cwd() / '.agent-os' / 'peer' / 'config.json'
+    try:
+        with open(config_path, 'r') as f:
+            return json.load(f).get('nats_url') or DEFAULT_NATS_URL
+    except (OSError, ValueError, AttributeError):
+        return DEFAULT_NATS_URL
+
+
+def describe(err):
+    """Return an error's message, falling back to its type."""
+    return str(err) or type(err).__name__
+
+
+def load_json_values(text):
+    """
+    Parse every JSON value in text, as `jq` reads its input.
+
+    Raises:
+        ValueError: If the text is not a sequence of valid JSON values
+    """
+    decoder = json.JSONDecoder()
+    values = []
+    index = 0
+    while True:
+        while index < len(text) and text[index].isspace():
+            index += 1
+        if index == len(text):
+            return values
+        value, index = decoder.raw_decode(text, index)
+        values.append(value)
+
+
+def format_state(value):
+    """Serialize a state the way `jq .` prints it."""
+    return json.dumps(value, indent=2, ensure_ascii=False)
+
+
+def byte_size(text):
+    """Return the size `echo "$TEXT" | wc -c` reports."""
+    return len(text.encode('utf-8')) + 1
+
+
+def log_json(text):
+    """Log the JSON being written to stderr, in full when small."""
+    print(f"INFO: JSON size: {byte_size(text)} bytes", file=sys.stderr)
+    if byte_size(text) < FULL_JSON_LIMIT:
+        print("INFO: Full JSON:", file=sys.stderr)
+        try:
+            print('\n'.join(format_state(v) for v in load_json_values(text)), file=sys.stderr)
+        except ValueError:
+            print(text, file=sys.stderr)
+    else:
+        print("INFO: JSON preview (first 1000 chars):", file=sys.stderr)
+        print(text[:1000], file=sys.stderr)
+
+
+def parse_update_args(argv):
+    """
+    Parse update arguments exactly as update-state.sh does.
+
+    Positional `KEY FILTER` (legacy) and `--state-key/--filter` flags are
+    both accepted, each with any number of `--json-file VAR=FILE`.
+
+    Returns:
+        tuple: (state key, jq filter, list of VAR=FILE specs); key or
+               filter is '' when missing
+    """
+    argv = list(argv)
+    key, jq_filter, json_files = '', '', []
+    if argv and not argv[0].startswith('--'):
+        key, jq_filter = argv[0], argv[1] if len(argv) > 1 else ''
+        argv = argv[2:]
+    else:
+        while argv:
+            flag = argv.pop(0)
+            if flag in ('--state-key', '--filter', '--json-file'):
+                value = argv.pop(0) if argv else ''
+                if flag == '--state-key':
+                    key = value
+                elif flag == '--filter':
+                    jq_filter = value
+                else:
+                    json_files.append(value)
+            elif not key:
+                key = flag
+            elif not jq_filter:
+                jq_filter = flag
+    while argv:
+        if argv.pop(0) == '--json-file':
+            json_files.append(argv.pop(0) if argv else '')
+    return key, jq_filter, json_files
+
+
+def load_json_files(specs):
+    """
+    Load --json-file arguments as jq `--slurpfile` variables.
+
+    Returns:
+        dict: {VAR_NAME: [every JSON value in FILE_PATH]}
+    """
+    variables = {}
+    for spec in specs:
+        match = VAR_SPEC_RE.match(spec)
+        if not match:
+            raise PeerStateError(
+                f"ERROR: Invalid --json-file format: {spec}",
+                "Expected: VAR_NAME=FILE_PATH where VAR_NAME follows jq variable naming rules",
+            )
+        name, file_path = match.groups()
+        if not os.path.isfile(file_path):
+            raise PeerStateError(f"ERROR: JSON file not found: {file_path}")
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                variables[name] = load_json_values(f.read())
+        except (OSError, ValueError):
+            raise PeerStateError(f"ERROR: Invalid JSON in file: {file_path}")
+    return variables
+
+
+def run_jq(state, jq_filter, variables):
+    """
+    Apply a jq filter to a state.
+
+    Uses the jq Python bindings in-process; without them, runs the jq
+    binary once.
+
+    Returns:
+        tuple: (jq exit code, list of outputs, error text)
+    """
+    try:
+        import jq
+    except ImportError:
+        jq = None
+
+    if jq is not None:
+        try:
+            program = jq.compile(jq_filter, args=variables)
+        except ValueError as err:
+            return 3, [], describe(err)
+        try:
+            return 0, program.input_value(state).all(), ''
+        except ValueError as err:
+            return 5, [], describe(err)
+
+    cmd = ['jq']
+    for name, values in variables.items():
+        cmd += ['--argjson', name, json.dumps(values)]
+    try:
+        result = subprocess.run(cmd + [jq_filter], input=json.dumps(state), capture_output=True, text=True)
+    except OSError as err:
+        return 127, [], describe(err)
+    if result.returncode != 0:
+        return result.returncode, [], result.stderr.strip()
+    try:
+        return 0, load_json_values(result.stdout), ''
+    except ValueError as err:
+        return 0, [], describe(err)
+
+
+def filter_state(state, jq_filter, json_files=(), variables=None):
+    """
+    Return the state a jq filter produces.
+
+    Raises:
+        PeerStateError: If the filter fails or does not produce exactly one value
+    """
+    variables = load_json_files(json_files) if variables is None else variables
+    exit_code, outputs, error = run_jq(state, jq_filter, variables)
+    if exit_code != 0:
+        lines = [
+            f"ERROR: Failed to modify JSON with jq (exit code: {exit_code})",
+            f"JQ Error: {error}",
+            f"JQ Filter was: {jq_filter}",
+        ]
+        if json_files:
+            lines.append(f"JSON Files provided: {' '.join(json_files)}")
+        raise PeerStateError(*lines)
+    if len(outputs) != 1:
+        # Zero or several values would not be one JSON document in the store
+        preview = '\n'.join(format_state(v) for v in outputs)
+        raise PeerStateError(
+            "ERROR: Modified state resulted in invalid JSON",
+            f"Modified JSON (first 500 chars): {preview[:500]}",
+        )
+    return outputs[0]
+
+
+def apply_filter(state, jq_filter, json_files=(), variables=None):
+    """Return the state a jq filter produces, as the JSON text to store."""
+    return format_state(filter_state(state, jq_filter, json_files, variables))
+
+
+def get_output_limit():
+    """Return the size above which a phase output gets its own key, or None when disabled."""
+    configured = os.getenv('AGENT_OS_PEER_OUTPUT_LIMIT')
+    if configured == '0':
+        return None
+    try:
+        return max(1, int(configured)) if configured else DEFAULT_OUTPUT_LIMIT
+    except ValueError:
+        return DEFAULT_OUTPUT_LIMIT
+
+
+def is_output_ref(value):
+    """Return True if a phase output is a reference to where it is stored."""
+    return (isinstance(value, dict) and isinstance(value.get('$ref'), str)
+            and value['$ref'].startswith(('kv:', 'obj:')))
+
+
+def overlaps(path, other):
+    """Return True if one JSON Pointer path (as tokens) contains the other."""
+    return path[:len(other)] == other[:len(path)]
+
+
+def output_refs(state, paths=None):
+    """
+    Return {phase: reference} for the phase outputs stored outside a state.
+
+    With paths (JSON Pointers as token lists), only the outputs on or under
+    one of them are returned, i.e. the ones a read or write of those paths
+    needs in place.
+    """
+    phases = state.get('phases') if isinstance(state, dict) else None
+    if not isinstance(phases, dict):
+        return {}
+    return {
+        phase: data['output']['$ref']
+        for phase, data in phases.items()
+        if isinstance(data, dict) and is_output_ref(data.get('output'))
+        and (paths is None or any(overlaps(path, ['phases', phase, 'output']) for path in paths))
+    }
+
+
+def with_outputs(state, outputs):
+    """Return a copy of state with {phase: output} in place of their references."""
+    phases = dict(state['phases'])
+    for phase, output in outputs.items():
+        phases[phase] = dict(phases[phase], output=output)
+    return dict(state, phases=phases)
+
+
+def detach_outputs(key, state, limit, target='obj'):
+    """
+    Move phase outputs larger than limit bytes out of a state.
+
+    Outputs are content-addressed, so an unchanged output is never written
+    again, and the state itself keeps only a small reference. With target
+    'obj' they go to the Object Store, named by their SHA-256; with 'kv'
+    they get a key of their own in the state bucket:
+
+        {"$ref": "obj:<SHA256>", "sha256": ..., "bytes": ...}
+        {"$ref": "kv:<STATE_KEY>.output.<PHASE>.<HASH>", "sha256": ..., "bytes": ...}
+
+    Returns:
+        tuple: (state to store, {reference: output JSON text})
+    """
+    phases = state.get('phases') if isinstance(state, dict) else None
+    if limit is None or not isinstance(phases, dict):
+        return state, {}
+    detached = {}
+    stored_phases = dict(phases)
+    for phase, data in phases.items():
+        output = data.get('output') if isinstance(data, dict) else None
+        if output is None or is_output_ref(output):
+            continue
+        text = format_state(output)
+        size = len(text.encode('utf-8'))
+        if size <= limit:
+            continue
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        if target == 'obj':
+            ref = f"obj:{digest}"
+        else:
+            ref = f"kv:{key}.output.{phase}.{digest[:16]}"
+            if not KEY_RE.match(ref[len('kv:'):]):
+                continue  # Phase names that are not valid key tokens stay inline
+        detached[ref] = text
+        stored_phases[phase] = dict(data, output={'$ref': ref, 'sha256': digest, 'bytes': size})
+    if not detached:
+        return state, detached
+    return dict(state, phases=stored_phases), detached
+
+
+def patch_paths(patch):
+    """Return the paths (as token lists) a JSON Patch or merge patch reads or writes."""
+    if isinstance(patch, dict):
+        return merge_patch_paths(patch)
+    paths = []
+    for operation in patch if isinstance(patch, list) else []:
+        for field in ('path', 'from'):
+            try:
+                paths.append(parse_pointer(operation[field]))
+            except (TypeError, KeyError, PatchError):
+                continue
+    return paths
+
+
+def merge_patch_paths(patch, prefix=()):
+    """Return the paths a merge patch replaces or removes."""
+    if not isinstance(patch, dict) or not patch:
+        return [list(prefix)]
+    return [path for name, value in patch.items() for path in merge_patch_paths(value, prefix + (name,))]
+
+
+def filter_paths(jq_filter):
+    """
+    Return the paths a jq filter needs in place: none when it only touches
+    fields below a phase other than `output`, otherwise every output.
+
+    This is a textual check, not a jq parser, so it errs towards loading:
+    any mention of `output`, and anything that may read a phase whole
+    (`.phases`, `.phases.plan`, `.`, `..`, `.[]`, `.phases[$p]`), loads all
+    outputs. That way a filter such as `.archive = .phases` copies outputs,
+    not references, to places get() does not resolve. Filters that build
+    the path some other way (e.g. getpath(["phases"])) are not recognised.
+    """
+    if 'output' in jq_filter:
+        return None
+    return None if WHOLE_VALUE_RE.search(PHASE_FIELD_RE.sub('', jq_filter)) else []
+
+
+def select(state, path, key):
+    """Return the value at a JSON Pointer path of a state."""
+    try:
+        return resolve(state, path)
+    except PatchError as err:
+        raise PeerStateError(f"ERROR: Path not found in state at key: {key}", f"Path: {path} ({describe(err)})")
+
+
+def parse_get_args(argv):
+    """
+    Parse get arguments: `KEY [--path POINTER] [--refs]`.
+
+    Returns:
+        tuple: (state key, JSON Pointer or None, whether to resolve outputs)
+    """
+    argv = list(argv)
+    key, path, resolve_outputs = (argv.pop(0) if argv else ''), None, True
+    while argv:
+        flag = argv.pop(0)
+        if flag == '--path':
+            path = argv.pop(0) if argv else ''
+            if path and not path.startswith('/'):
+                raise PeerStateError(f"ERROR: --path must be a JSON Pointer such as /phases/plan/output: {path}")
+        elif flag == '--refs':
+            resolve_outputs = False
+        else:
+            raise PeerStateError(f"ERROR: Unknown argument: {flag}", *GET_USAGE)
+    if not key:
+        raise PeerStateError("ERROR: STATE_KEY is required as first argument")
+    return key, path, resolve_outputs
+
+
+def load_patch(argv):
+    """
+    Parse patch arguments: `KEY PATCH_JSON` or `KEY --patch-file FILE`.
+
+    Returns:
+        tuple: (state key, patch value)
+    """
+    if len(argv) < 2 or not argv[0] or not argv[1]:
+        raise PeerStateError("ERROR: STATE_KEY and PATCH are required", *PATCH_USAGE)
+    key = argv[0]
+    if argv[1] == '--patch-file':
+        file_path = argv[2] if len(argv) > 2 else ''
+        if not os.path.isfile(file_path):
+            raise PeerStateError(f"ERROR: Patch file not found: {file_path}")
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except OSError as err:
+            raise PeerStateError(f"ERROR: Failed to read patch file: {file_path}", describe(err))
+    else:
+        text = argv[1]
+    try:
+        values = load_json_values(text)
+    except ValueError:
+        values = []
+    if len(values) != 1 or not isinstance(values[0], (list, dict)):
+        raise PeerStateError(
+            "ERROR: Invalid JSON patch",
+            "Expected a JSON Patch array (RFC 6902) or a merge patch object (RFC 7396)",
+            f"Patch (first 500 chars): {text[:500]}",
+        )
+    return key, values[0]
+
+
+def get_retries():
+    """Return how many times a conflicting update is retried."""
+    try:
+        return max(0, int(os.getenv('AGENT_OS_PEER_RETRIES', DEFAULT_RETRIES)))
+    except ValueError:
+        return DEFAULT_RETRIES
+
+
+def backoff_delay(attempt):
+    """
+    Return the seconds to wait before retry number attempt + 1.
+
+    Full jitter over an exponential window (base * 2^attempt, capped), so
+    writers that collided spread out instead of colliding again.
+    """
+    try:
+        base = float(os.getenv('AGENT_OS_PEER_BACKOFF_MS', DEFAULT_BACKOFF_MS)) / 1000
+    except ValueError:
+        base = DEFAULT_BACKOFF_MS / 1000
+    return random.uniform(0, min(MAX_BACKOFF_MS / 1000, base * 2 ** attempt))
+
+
+def is_revision_conflict(err):
+    """Return True if a write failed because the key moved past the expected revision."""
+    try:
+        from nats.js.errors import KeyWrongLastSequenceError
+    except ImportError:
+        return False
+    return isinstance(err, KeyWrongLastSequenceError)
+
+
+def get_metrics_path():
+    """Return the contention metrics log, or None when disabled."""
+    configured = os.getenv('AGENT_OS_PEER_METRICS')
+    if configured == '0':
+        return None
+    if configured:
+        return Path(configured).expanduser()
+    return Path.cwd() / '.agent-os' / 'peer' / 'metrics' / 'state_updates.jsonl'
+
+
+def record_update(metrics):
+    """Append one update's contention metrics; best effort."""
+    path = get_metrics_path()
+    if path is None:
+        return
+    record = dict(metrics, at=datetime.now().astimezone().isoformat())
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8'))
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+def read_updates(path=None, key=None):
+    """Return recorded update metrics, optionally for one key."""
+    path = path or get_metrics_path()
+    records = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and (key is None or record.get('key') == key):
+                    records.append(record)
+    except (OSError, TypeError):
+        pass
+    return records
+
+
+def summarize_updates(records):
+    """
+    Summarize contention per state key.
+
+    Returns:
+        dict: {key: {'updates', 'conflicts', 'retried', 'failed', 'max_attempts', 'backoff_ms'}}
+    """
+    summary = {}
+    for record in records:
+        entry = summary.setdefault(record.get('key'), {
+            'updates': 0, 'conflicts': 0, 'retried': 0, 'failed': 0, 'max_attempts': 0, 'backoff_ms': 0.0,
+        })
+        entry['updates'] += 1
+        entry['conflicts'] += record.get('conflicts', 0)
+        entry['retried'] += 1 if record.get('attempts', 1) > 1 else 0
+        entry['failed'] += 1 if record.get('outcome') != 'ok' else 0
+        entry['max_attempts'] = max(entry['max_attempts'], record.get('attempts', 1))
+        entry['backoff_ms'] += record.get('backoff_ms', 0.0)
+    return summary
+
+
+class PeerStateStore:
+    """PEER state in the NATS KV bucket over one persistent connection."""
+
+    def __init__(self, servers=None, bucket=BUCKET):
+        self.servers = servers or get_servers()
+        self.bucket = bucket
+        self._nc = None
+        self._kv = None
+        self._objects = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def kv(self):
+        """Return the bucket, connecting on first use."""
+        if self._kv is None:
+            import nats
+            options = {'servers': self.servers, 'connect_timeout': CONNECT_TIMEOUT,
+                       'allow_reconnect': False}
+            if os.getenv('NATS_CREDS'):
+                options['user_credentials'] = os.environ['NATS_CREDS']
+            self._nc = await nats.connect(**options)
+            self._kv = await self._nc.jetstream().key_value(self.bucket)
+        return self._kv
+
+    async def objects(self):
+        """Return the phase output Object Store, or None if the bucket does not exist."""
+        if self._objects is None:
+            from nats.js.errors import BucketNotFoundError
+            await self.kv()
+            try:
+                self._objects = await self._nc.jetstream().object_store(OBJECT_BUCKET)
+            except BucketNotFoundError:
+                self._objects = False
+        return self._objects or None
+
+    async def close(self):
+        """Close the connection if one was opened."""
+        if self._nc is not None:
+            await self._nc.close()
+        self._nc = self._kv = self._objects = None
+
+    async def read(self, key):
+        """
+        Fetch a state's raw value and revision in one round trip.
+
+        Returns:
+            tuple: (value text, revision)
+        """
+        kv = await self.kv()
+        entry = await kv.get(key)
+        # The shell wrappers read values through $(...), which drops trailing newlines
+        return (entry.value or b'').decode('utf-8', errors='replace').rstrip('\n'), entry.revision
+
+    async def get(self, key, path=None, resolve_outputs=True):
+        """
+        Return a state's JSON text, checking it parses (read-state.sh).
+
+        Phase outputs stored outside the state are read back in place, but
+        only the ones the caller asks for: with path (a JSON Pointer) the
+        value at that path is returned and only outputs on or under it are
+        read; with resolve_outputs=False none are.
+        """
+        try:
+            text, _ = await self.read(key)
+        except Exception as err:
+            raise PeerStateError(
+                f"ERROR: Failed to read state from NATS KV at key: {key}",
+                f"NATS Error: {describe(err)}",
+            )
+        try:
+            values = load_json_values(text)
+        except ValueError:
+            raise PeerStateError(
+                f"ERROR: Invalid JSON in NATS KV state at key: {key}",
+                f"Raw data received (first 500 chars): {text[:500]}",
+            )
+        if path is None and (len(values) != 1 or not (resolve_outputs and output_refs(values[0]))):
+            return text
+        if len(values) != 1:
+            raise PeerStateError(
+                f"ERROR: Expected one JSON value in NATS KV state at key: {key}",
+                f"Found {len(values)} values",
+            )
+        state = values[0]
+        if resolve_outputs:
+            state = await self.load_outputs(key, state, None if path is None else [parse_pointer(path)])
+        return format_state(state if path is None else select(state, path, key))
+
+    async def read_ref(self, ref):
+        """Return the JSON text a phase output reference points to."""
+        kind, _, name = ref.partition(':')
+        if kind == 'obj':
+            objects = await self.objects()
+            if objects is None:
+                raise LookupError(f"Object Store bucket {OBJECT_BUCKET} does not exist")
+            result = await objects.get(name)
+            return (result.data or b'').decode('utf-8')
+        text, _ = await self.read(name)
+        return text
+
+    async def load_outputs(self, key, state, paths=None):
+        """Return a state with the outputs on or under paths (default: all) read back in place."""
+        outputs = {}
+        for phase, ref in output_refs(state, paths).items():
+            try:
+                outputs[phase] = load_json_values(await self.read_ref(ref))[0]
+            except Exception as err:
+                raise PeerStateError(
+                    f"ERROR: Failed to read {phase} output of state at key: {key}",
+                    f"Output reference: {ref}",
+                    f"NATS Error: {describe(err)}",
+                )
+        return with_outputs(state, outputs) if outputs else state
+
+    async def store_outputs(self, key, detached, stored):
+        """Write detached phase outputs that are not stored yet."""
+        existing = set(output_refs(stored).values())
+        for ref, text in detached.items():
+            if ref in existing:
+                continue
+            kind, _, name = ref.partition(':')
+            try:
+                if kind == 'obj':
+                    await self.put_object(name, text)
+                else:
+                    kv = await self.kv()
+                    await kv.put(name, text.encode('utf-8'))
+            except Exception as err:
+                raise PeerStateError(
+                    f"ERROR: Failed to store phase output of state at key: {key}",
+                    f"Output reference: {ref}",
+                    f"NATS Error: {describe(err)}",
+                )
+
+    async def put_object(self, name, text):
+        """Upload an output to the Object Store unless an identical one is there already."""
+        from nats.js.errors import NotFoundError
+        objects = await self.objects()
+        try:
+            await objects.get_info(name)
+            return  # Content-addressed: same name, same output
+        except NotFoundError:
+            pass
+        # The Object Store splits it into chunks and records its digest
+        await objects.put(name, text.encode('utf-8'))
+
+    async def create(self, key, initial_json):
+        """Create a state that must not exist yet (create-state.sh)."""
+        try:
+            load_json_values(initial_json)
+        except ValueError:
+            raise PeerStateError(
+                "ERROR: Invalid JSON provided for new state",
+                f"JSON (first 500 chars): {initial_json[:500]}",
+            )
+
+        print(f"INFO: Creating new state at key: {key}", file=sys.stderr)
+        log_json(initial_json)
+
+        try:
+            kv = await self.kv()
+            revision = await kv.create(key, initial_json.encode('utf-8'))
+        except Exception as err:
+            from nats.js.errors import KeyWrongLastSequenceError
+            if isinstance(err, KeyWrongLastSequenceError):
+                raise PeerStateError(
+                    f"ERROR: Key already exists: {key}",
+                    "Use update-state.sh to modify existing keys",
+                )
+            raise PeerStateError("ERROR: Failed to create new state", f"NATS Error: {describe(err)}")
+
+        print(f"SUCCESS: Created new state at key {key}", file=sys.stderr)
+        return revision
+
+    async def read_state(self, key):
+        """Return a state's parsed value and revision for an update."""
+        try:
+            text, revision = await self.read(key)
+        except Exception as err:
+            raise PeerStateError("ERROR: Failed to read state from NATS KV", f"NATS Error: {describe(err)}")
+        if not revision:
+            raise PeerStateError(f"ERROR: Failed to get revision number for key: {key}")
+        try:
+            values = load_json_values(text)
+        except ValueError:
+            values = None
+        if not values:
+            raise PeerStateError(f"ERROR: Current state has invalid JSON at key: {key}")
+        return values[0], revision
+
+    async def update(self, key, jq_filter, json_files=(), retries=None):
+        """
+        Apply a jq filter to a state and write it back if nobody else has (update-state.sh).
+
+        Returns:
+            int: The new revision of the state
+        """
+        # Check the filter's input files before touching the store
+        variables = load_json_files(json_files)
+        return await self.modify(key, lambda state: filter_state(state, jq_filter, json_files, variables),
+                                 retries, paths=filter_paths(jq_filter))
+
+    async def patch(self, key, patch, retries=None):
+        """
+        Apply a JSON Patch or merge patch to a state (patch-state.sh).
+
+        Returns:
+            int: The new revision of the state
+        """
+        def transform(state):
+            try:
+                return apply_patch(state, patch)
+            except PatchError as err:
+                raise PeerStateError(
+                    f"ERROR: Failed to apply patch to state at key: {key}",
+                    f"Patch Error: {describe(err)}",
+                )
+        return await self.modify(key, transform, retries, paths=patch_paths(patch))
+
+    async def modify(self, key, transform, retries=None, paths=None):
+        """
+        Write the state transform(state) returns if nobody else wrote first.
+
+        transform receives the state with the phase outputs on or under
+        paths (default: all) in place; the others stay references. Large
+        outputs are split off again before the write (see detach_outputs).
+        When another writer got there first, the state is re-read and
+        transform re-applied, up to `retries` more times with jittered
+        exponential backoff (default: AGENT_OS_PEER_RETRIES). Each write is
+        recorded in the contention metrics.
+
+        Returns:
+            int: The new revision of the state
+        """
+        retries = get_retries() if retries is None else retries
+        metrics = {'key': key, 'attempts': 0, 'conflicts': 0, 'backoff_ms': 0.0, 'outcome': 'error'}
+        started = time.monotonic()
+        try:
+            for attempt in range(retries + 1):
+                metrics['attempts'] += 1
+                stored, revision = await self.read_state(key)
+                state = await self.load_outputs(key, stored, paths)
+                modified, limit = transform(state), get_output_limit()
+                to_store, detached = detach_outputs(key, modified, limit)
+                if detached and await self.objects() is None:
+                    # Without the Object Store bucket, large outputs get keys of their own
+                    to_store, detached = detach_outputs(key, modified, limit, target='kv')
+                modified = format_state(to_store)
+                await self.store_outputs(key, detached, stored)
+
+                print(f"INFO: Writing JSON to {key} at revision {revision}", file=sys.stderr)
+                if attempt == 0:
+                    log_json(modified)
+
+                try:
+                    kv = await self.kv()
+                    written = await kv.update(key, modified.encode('utf-8'), last=revision)
+                except Exception as err:
+                    conflict = is_revision_conflict(err)
+                    if conflict:
+                        metrics['conflicts'] += 1
+                    if conflict and attempt < retries:
+                        delay = backoff_delay(attempt)
+                        metrics['backoff_ms'] += delay * 1000
+                        print(f"INFO: Revision {revision} of {key} changed concurrently; "
+                              f"retrying in {delay * 1000:.0f} ms ({attempt + 1}/{retries})", file=sys.stderr)
+                        await asyncio.sleep(delay)
+                        continue
+                    if conflict:
+                        metrics['outcome'] = 'conflict'
+                    lines = [
+                        "ERROR: Failed to update state (likely revision mismatch)",
+                        f"Expected revision was: {revision}",
+                        f"NATS Error: {describe(err)}",
+                        "Another process may have updated the state concurrently",
+                    ]
+                    if conflict and retries:
+                        lines.append(f"Gave up after {attempt + 1} attempts")
+                    raise PeerStateError(*lines)
+
+                metrics['outcome'] = 'ok'
+                print(f"SUCCESS: Updated state at key {key} at revision {revision}", file=sys.stderr)
+                return written
+        finally:
+            metrics['elapsed_ms'] = round((time.monotonic() - started) * 1000, 3)
+            metrics['backoff_ms'] = round(metrics['backoff_ms'], 3)
+            record_update(metrics)
+
+
+def notify_written(key, revision):
+    """Let the local state cache know about a write, so this host reads it back."""
+    from state_cache import notify_written as notify
+    notify(key, revision)
+
+
+async def run_command(command, argv):
+    """Run one CLI command, returning what to print on stdout."""
+    if command == 'get':
+        key, path, resolve_outputs = parse_get_args(argv)
+        from state_cache import cached_state
+        text = cached_state(key, path, resolve_outputs)
+        if text is not None:
+            return text
+        async with PeerStateStore() as store:
+            return await store.get(key, path, resolve_outputs)
+
+    if command == 'create':
+        if len(argv) < 2 or not argv[0] or not argv[1]:
+            raise PeerStateError(
+                "ERROR: STATE_KEY and INITIAL_JSON are required",
+                "Usage: ./create-state.sh <STATE_KEY> <INITIAL_JSON>",
+            )
+        async with PeerStateStore() as store:
+            revision = await store.create(argv[0], argv[1])
+        notify_written(argv[0], revision)
+        return 'OK'
+
+    if command == 'patch':
+        key, patch = load_patch(argv)
+        async with PeerStateStore() as store:
+            revision = await store.patch(key, patch)
+        notify_written(key, revision)
+        return 'OK'
+
+    key, jq_filter, json_files = parse_update_args(argv)
+    if not key or not jq_filter:
+        raise PeerStateError("ERROR: STATE_KEY and JQ_FILTER are required", *UPDATE_USAGE)
+    async with PeerStateStore() as store:
+        revision = await store.update(key, jq_filter, json_files)
+    notify_written(key, revision)
+    return 'OK'
+
+
+def print_stats(key=None):
+    """Print contention per state key from the metrics log."""
+    summary = summarize_updates(read_updates(key=key))
+    if not summary:
+        print("No updates recorded")
+        return
+    print(f"{'key':<40} {'updates':>8} {'conflicts':>9} {'retried':>8} {'failed':>7} {'max tries':>9} {'backoff ms':>10}")
+    for name, s in sorted(summary.items(), key=lambda item: str(item[0])):
+        print(f"{str(name):<40} {s['updates']:>8} {s['conflicts']:>9} {s['retried']:>8} {s['failed']:>7} "
+              f"{s['max_attempts']:>9} {s['backoff_ms']:>10.0f}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] == 'stats':
+        print_stats(argv[1] if len(argv) > 1 else None)
+        return 0
+    if not argv or argv[0] not in ('get', 'create', 'update', 'patch'):
+        print("Usage: peer_state.py get|create|update|patch|stats ...", file=sys.stderr)
+        return 1
+    try:
+        output = asyncio.run(run_command(argv[0], argv[1:]))
+    except PeerStateError as err:
+        for line in err.lines:
+            print(line, file=sys.stderr)
+        return 1
+    print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
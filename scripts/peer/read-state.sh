@@ -1,6 +1,22 @@
 #!/bin/bash
 # read-state.sh - Wrapper for reading NATS KV state
-# Usage: ./read-state.sh <STATE_KEY>
+# Usage: ./read-state.sh <STATE_KEY> [--path <JSON_POINTER>] [--refs]
+# --path prints only the value at that path, e.g. /phases/plan/output, reading
+# only the phase outputs under it; --refs leaves phase output references as is.
+
+# Hand over to the native client when uv is available: one process and one
+# NATS round trip per read instead of a nats/jq pipeline.
+# Set AGENT_OS_PEER_NATIVE=0 to use the shell implementation below.
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+if [ "${AGENT_OS_PEER_NATIVE:-1}" != "0" ] && [ -f "$SCRIPT_DIR/peer_state.py" ] && command -v uv >/dev/null 2>&1; then
+  # Hot states are served from memory by the local state cache sidecar;
+  # misses fall through to a direct read (AGENT_OS_PEER_CACHE=0 skips it).
+  if [ "${AGENT_OS_PEER_CACHE:-1}" != "0" ] && STATE=$(python3 "$SCRIPT_DIR/state_cache.py" get "$@" 2>/dev/null); then
+    echo "$STATE"
+    exit 0
+  fi
+  AGENT_OS_PEER_CACHE=0 exec uv run --quiet --script "$SCRIPT_DIR/peer_state.py" get "$@"
+fi
 
 STATE_KEY="$1"
 
@@ -9,6 +25,11 @@ if [ -z "$STATE_KEY" ]; then
   exit 1
 fi
 
+if [ $# -gt 1 ]; then
+  echo "ERROR: --path and --refs require the native client (install uv)" >&2
+  exit 1
+fi
+
 # Read current state
 STATE=$(nats kv get agent-os-peer-state "$STATE_KEY" --raw 2>&1)
 READ_EXIT=$?
@@ -27,5 +48,13 @@ if [ $? -ne 0 ]; then
   exit 1
 fi
 
+# Phase outputs stored out of line are references only the native client
+# resolves; fail instead of handing them to the agent as if they were output
+if echo "$STATE" | jq -e '[.. | objects | select((."$ref" | type) == "string" and (."$ref" | test("^(kv|obj):")))] | any' >/dev/null 2>&1; then
+  echo "ERROR: State at key $STATE_KEY has phase outputs stored out of line" >&2
+  echo "Reading it requires the native client (install uv and leave AGENT_OS_PEER_NATIVE unset)" >&2
+  exit 1
+fi
+
 # Output the valid JSON to stdout (for agent to capture)
 echo "$STATE"
\ No newline at end of file
@@ -1,6 +1,7 @@
 #!/bin/bash
 # Script: setup-kv-bucket.sh
-# Purpose: Ensure agent-os-peer-state KV bucket exists with correct configuration
+# Purpose: Ensure agent-os-peer-state KV bucket exists with correct configuration,
+#          and the agent-os-peer-outputs Object Store bucket for large phase outputs
 # Parameters: None
 # Output: Exit 0 on success, exit 1 on failure
 # Cache: None (always verify bucket exists)
@@ -14,7 +15,23 @@ cleanup() {
 # Set trap for cleanup on any exit
 trap cleanup EXIT
 
+# Phase outputs above the spill-over size are stored in an Object Store
+# bucket; without it they are kept in the KV bucket, so failing here is not fatal
+ensure_object_bucket() {
+    if nats object info "$OBJECT_BUCKET_NAME" > /dev/null 2>&1; then
+        echo "✅ Bucket $OBJECT_BUCKET_NAME exists"
+    elif nats object add "$OBJECT_BUCKET_NAME" \
+        --replicas=$REQUIRED_REPLICAS \
+        --description="PEER phase outputs for Agent OS" > /dev/null; then
+        echo "✅ Successfully created $OBJECT_BUCKET_NAME bucket"
+    else
+        echo "⚠️  Warning: Failed to create Object Store bucket $OBJECT_BUCKET_NAME"
+        echo "   Large phase outputs will be stored in the KV bucket instead"
+    fi
+}
+
 BUCKET_NAME="agent-os-peer-state"
+OBJECT_BUCKET_NAME="agent-os-peer-outputs"
 REQUIRED_REPLICAS=3
 REQUIRED_HISTORY=50
 
@@ -44,6 +61,7 @@ if nats kv info "$BUCKET_NAME" > /tmp/bucket_info.txt 2>&1; then
         echo "✅ Bucket configuration verified: replicas=$REQUIRED_REPLICAS, history=$REQUIRED_HISTORY"
     fi
     
+    ensure_object_bucket
     exit 0
 else
     echo "📦 Creating $BUCKET_NAME bucket..."
@@ -54,6 +72,7 @@ else
         --history=$REQUIRED_HISTORY \
         --description="PEER pattern state storage for Agent OS"; then
         echo "✅ Successfully created $BUCKET_NAME bucket"
+        ensure_object_bucket
         exit 0
     else
         echo "❌ Failed to create KV bucket"
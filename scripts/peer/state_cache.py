@@ -0,0 +1,536 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "nats-py",
+#     "jq",
+# ]
+# ///
+
+"""
+PEER State Cache
+
+Long-lived sidecar that keeps the hot PEER states in memory and serves
+reads over a Unix domain socket. PEER agents re-read the same few state
+keys many times per cycle; through the sidecar a read costs one local
+round trip instead of a NATS connection.
+
+The sidecar holds one NATS connection and watches the agent-os-peer-state
+bucket (metadata only, values are not streamed). Every cached value is
+tagged with the revision it was read at, and any newer revision of that
+key seen on the watch drops it; the next read fetches the value directly
+and caches it again. Reads are served from memory only while the watch is
+caught up: until its initial sync completes, after it fails, or while the
+stream has stayed ahead of it for longer than the lag tolerance, every
+read goes straight to the bucket. Writers made through peer_state.py
+report their new revision, so a process always reads its own writes.
+Phase outputs spilled into the Object Store are content-addressed and
+never change, so they are cached without invalidation.
+
+Reads that miss (unknown key, invalid JSON, sidecar not running) fall
+through to the direct path in the caller, which reports errors exactly as
+before. The first read spawns the sidecar; it exits after an idle
+timeout. The client side of this module only needs the standard library,
+so read-state.sh can query it with plain python3.
+
+Usage:
+- ./state_cache.py get <STATE_KEY> [--path <JSON_POINTER>] [--refs]   # Print a cached state, exit 1 on a miss
+- ./state_cache.py stats                                              # Hits, misses and watch state of the sidecar
+- ./state_cache.py serve                                              # Run the sidecar (spawned by `get`)
+
+Environment:
+- AGENT_OS_PEER_CACHE=0             # Bypass the sidecar
+- AGENT_OS_PEER_CACHE_IDLE=N        # Sidecar idle shutdown in seconds (default: 900)
+- AGENT_OS_PEER_CACHE_SIZE=N        # States held in memory (default: 256)
+- AGENT_OS_PEER_CACHE_LAG_MS=N      # Watch lag tolerated before reading directly (default: 250)
+- AGENT_OS_PEER_RUN_DIR=PATH        # Socket and lock directory (default: run/ next to this script)
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+PEER_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(PEER_DIR))
+
+from peer_state import (
+    PeerStateStore, describe, format_state, get_servers, load_json_values, output_refs, with_outputs,
+)
+from state_patch import PatchError, parse_pointer, resolve
+
+DEFAULT_IDLE_TIMEOUT = 900  # seconds
+DEFAULT_CACHE_SIZE = 256  # states
+DEFAULT_LAG_MS = 250
+LAG_CHECK_SECONDS = 1.0  # how often the stream's last revision is compared with the watch
+# A read must never wait on the sidecar for long; the direct path is always there
+REQUEST_TIMEOUT_SECONDS = 2.0
+
+
+def get_setting(name, default):
+    """Return a numeric setting from the environment."""
+    try:
+        return max(0, int(os.getenv(name, default)))
+    except ValueError:
+        return default
+
+
+def is_enabled():
+    """Return True unless AGENT_OS_PEER_CACHE=0."""
+    return os.getenv('AGENT_OS_PEER_CACHE', '1') != '0'
+
+
+def get_run_dir():
+    """Return the directory holding the sidecar sockets and lock files."""
+    return Path(os.getenv('AGENT_OS_PEER_RUN_DIR', PEER_DIR / 'run'))
+
+
+def get_socket_path(servers=None):
+    """Return the sidecar socket for a NATS server; each server gets its own sidecar."""
+    digest = hashlib.sha1((servers or get_servers()).encode('utf-8')).hexdigest()[:12]
+    return get_run_dir() / f'state-cache-{digest}.sock'
+
+
+def send_message(sock, message):
+    """Send one newline-terminated JSON message."""
+    sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def recv_message(sock):
+    """Receive one newline-terminated JSON message, or None if the peer closed."""
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b'\n'):
+            break
+    data = b''.join(chunks).strip()
+    return json.loads(data) if data else None
+
+
+def request(message, socket_path=None):
+    """Send a request to a running sidecar, returning None if none answered."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(REQUEST_TIMEOUT_SECONDS)
+        sock.connect(str(socket_path or get_socket_path()))
+        send_message(sock, message)
+        return recv_message(sock)
+    except (OSError, ValueError):
+        return None
+    finally:
+        sock.close()
+
+
+def spawn_sidecar():
+    """Start the sidecar detached from this process."""
+    if shutil.which('uv') is None:
+        return False
+    try:
+        subprocess.Popen(
+            ['uv', 'run', '--quiet', '--script', str(PEER_DIR / 'state_cache.py'), 'serve'],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        return True
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+
+def cached_get(key, spawn=True):
+    """
+    Read a state through the sidecar.
+
+    Starts the sidecar when none is running, including when a socket is
+    left behind by one that was killed (nothing holds its lock); that read
+    still misses, the following ones are served by it.
+
+    Returns:
+        str: The state JSON text, or None if the caller must read directly
+    """
+    if not key or not is_enabled():
+        return None
+    socket_path = get_socket_path()
+    response = request({'op': 'get', 'key': key}, socket_path)
+    if response is None:
+        if spawn and not is_sidecar_running(socket_path):
+            spawn_sidecar()
+        return None
+    if not response.get('ok') or not isinstance(response.get('value'), str):
+        return None
+    return response['value']
+
+
+def cached_state(key, path=None, resolve_outputs=True, spawn=True):
+    """
+    Read a state through the sidecar, as PeerStateStore.get() returns it.
+
+    Returns:
+        str: The state (or the value at path) as JSON text, or None if the
+             caller must read directly
+    """
+    text = cached_get(key, spawn)
+    if text is None or (path is None and not (resolve_outputs and '"$ref"' in text)):
+        return text
+    try:
+        values = load_json_values(text)
+        paths = None if path is None else [parse_pointer(path)]
+    except ValueError:
+        return None
+    if len(values) != 1:
+        return None if path is not None else text
+    state = values[0]
+    outputs = {}
+    if resolve_outputs:
+        for phase, ref in output_refs(state, paths).items():
+            # Outputs in the state bucket are cached by key, Object Store outputs by reference
+            output = cached_get(ref[len('kv:'):] if ref.startswith('kv:') else ref, spawn=False)
+            if output is None:
+                return None
+            outputs[phase] = load_json_values(output)[0]
+    state = with_outputs(state, outputs) if outputs else state
+    if path is None:
+        return format_state(state)
+    try:
+        return format_state(resolve(state, path))
+    except PatchError:
+        return None  # The direct read reports the missing path
+
+
+def notify_written(key, revision):
+    """Tell a running sidecar a state was written, so the writer reads it back."""
+    if not is_enabled() or not revision:
+        return
+    request({'op': 'written', 'key': key, 'revision': revision})
+
+
+class StateCache:
+    """
+    Revision-tagged states and the watch position that keeps them valid.
+
+    Holds no connection itself; the sidecar feeds it reads, watch entries
+    and stream positions.
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE, lag_tolerance=DEFAULT_LAG_MS / 1000):
+        self.max_entries = max_entries
+        self.lag_tolerance = lag_tolerance
+        self.entries = OrderedDict()  # key -> (text, revision), least recently read first
+        self.latest = {}  # key -> newest revision seen on the watch or written here
+        self.watching = False
+        self.synced = False
+        self.synced_seq = 0
+        self.stream_seq = 0
+        self.behind_since = None
+        self.stats = {'hits': 0, 'misses': 0, 'direct': 0, 'invalidations': 0}
+
+    def is_lagging(self, now=None):
+        """Return True if the watch cannot vouch for cached values."""
+        if not (self.watching and self.synced):
+            return True
+        if self.behind_since is None:
+            return False
+        now = time.monotonic() if now is None else now
+        return now - self.behind_since > self.lag_tolerance
+
+    def lookup(self, key, now=None):
+        """Return a cached state's text, or None if it must be read directly."""
+        if self.is_lagging(now):
+            self.stats['direct'] += 1
+            return None
+        cached = self.entries.get(key)
+        if cached is None or cached[1] < self.latest.get(key, 0):
+            self.stats['misses'] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.stats['hits'] += 1
+        return cached[0]
+
+    def store(self, key, text, revision):
+        """Cache a state read at revision unless a newer one is already known."""
+        if revision < self.latest.get(key, 0):
+            return  # The watch saw a change while this read was in flight
+        self.entries[key] = (text, revision)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def changed(self, key, revision):
+        """Record that key changed at revision, dropping an older cached value."""
+        self.latest[key] = max(revision, self.latest.get(key, 0))
+        cached = self.entries.get(key)
+        if cached is not None and cached[1] < revision:
+            del self.entries[key]
+            self.stats['invalidations'] += 1
+
+    def apply_watch(self, key, revision):
+        """Apply one watch entry; a put, delete or purge all invalidate the key."""
+        self.changed(key, revision)
+        self.synced_seq = max(self.synced_seq, revision)
+        if self.synced_seq >= self.stream_seq:
+            self.behind_since = None
+
+    def observe_stream(self, last_seq, now=None):
+        """Compare the bucket stream's last revision with the watch position."""
+        now = time.monotonic() if now is None else now
+        self.stream_seq = max(self.stream_seq, last_seq)
+        if self.stream_seq <= self.synced_seq:
+            self.behind_since = None
+        elif self.behind_since is None:
+            self.behind_since = now
+
+    def reset_watch(self):
+        """Forget the watch position and every cached value; the watch is restarting."""
+        self.watching = False
+        self.synced = False
+        self.behind_since = None
+        self.entries.clear()
+        self.latest.clear()
+
+    def describe(self, now=None):
+        """Return the sidecar's counters and watch state."""
+        return dict(
+            self.stats,
+            entries=len(self.entries),
+            watching=self.watching,
+            synced=self.synced,
+            lagging=self.is_lagging(now),
+            synced_seq=self.synced_seq,
+            stream_seq=self.stream_seq,
+        )
+
+
+class StateCacheServer:
+    """Serve state reads from a StateCache kept valid by a watch on the bucket."""
+
+    def __init__(self, store, cache, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.store = store
+        self.cache = cache
+        self.idle_timeout = idle_timeout
+        self.last_request = time.monotonic()
+        self.stopped = None
+
+    async def read(self, key):
+        """Answer a read from memory, or from the bucket when the cache cannot."""
+        text = self.cache.lookup(key)
+        if text is not None:
+            return {'ok': True, 'value': text, 'source': 'cache'}
+        try:
+            if key.startswith('obj:'):
+                # Object Store outputs are content-addressed and never change
+                text, revision = await self.store.read_ref(key), 0
+            else:
+                text, revision = await self.store.read(key)
+        except Exception as err:
+            return {'ok': False, 'error': describe(err)}
+        try:
+            load_json_values(text)
+        except ValueError:
+            return {'ok': False, 'error': 'invalid JSON'}
+        self.cache.store(key, text, revision)
+        return {'ok': True, 'value': text, 'source': 'kv'}
+
+    async def handle_request(self, message):
+        """Answer one request message."""
+        if not isinstance(message, dict):
+            return {'ok': False, 'error': 'invalid request'}
+        op, key = message.get('op'), message.get('key')
+        if op == 'get' and isinstance(key, str) and key:
+            return await self.read(key)
+        if op == 'written' and isinstance(key, str) and isinstance(message.get('revision'), int):
+            self.cache.changed(key, message['revision'])
+            return {'ok': True}
+        if op == 'stats':
+            return dict(self.cache.describe(), ok=True)
+        return {'ok': False, 'error': 'invalid request'}
+
+    async def handle_connection(self, reader, writer):
+        """Read one request line and write its response."""
+        self.last_request = time.monotonic()
+        try:
+            line = await reader.readline()
+            try:
+                message = json.loads(line)
+            except ValueError:
+                message = None
+            response = await self.handle_request(message)
+            writer.write(json.dumps(response).encode('utf-8') + b'\n')
+            await writer.drain()
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def watch(self):
+        """Apply the bucket's changes to the cache, restarting the watch if it fails."""
+        while True:
+            try:
+                kv = await self.store.kv()
+                watcher = await kv.watchall(meta_only=True)
+                self.cache.watching = True
+                async for entry in watcher:
+                    if entry is None:
+                        self.cache.synced = True  # Initial values delivered
+                        continue
+                    self.cache.apply_watch(entry.key, entry.revision)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            self.cache.reset_watch()
+            await asyncio.sleep(LAG_CHECK_SECONDS)
+
+    async def check_lag(self):
+        """Track how far the watch trails the bucket, and stop when idle or disconnected."""
+        while True:
+            await asyncio.sleep(LAG_CHECK_SECONDS)
+            if time.monotonic() - self.last_request > self.idle_timeout:
+                break
+            try:
+                kv = await self.store.kv()
+                status = await kv.status()
+            except Exception:
+                break  # Connection lost; the next read starts a fresh sidecar
+            self.cache.observe_stream(status.stream_info.state.last_seq)
+        self.stopped.set()
+
+    async def serve(self, socket_path):
+        """Serve until idle or the NATS connection is lost."""
+        self.stopped = asyncio.Event()
+        await self.store.kv()
+        if socket_path.exists():
+            socket_path.unlink()  # Stale socket from a sidecar that did not shut down cleanly
+        old_umask = os.umask(0o077)
+        try:
+            server = await asyncio.start_unix_server(self.handle_connection, path=str(socket_path))
+        finally:
+            os.umask(old_umask)
+
+        tasks = [asyncio.ensure_future(self.watch()), asyncio.ensure_future(self.check_lag())]
+        try:
+            await self.stopped.wait()
+        finally:
+            # Stop new clients from connecting before the connection goes away
+            try:
+                socket_path.unlink()
+            except OSError:
+                pass
+            server.close()
+            await server.wait_closed()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.store.close()
+
+
+def acquire_lock(socket_path):
+    """Take the sidecar's single-instance lock, returning the held file or None."""
+    lock_file = open(socket_path.with_suffix('.lock'), 'w')
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def is_sidecar_running(socket_path):
+    """Return True if a sidecar holds the lock for socket_path, even while still starting."""
+    try:
+        lock_file = acquire_lock(socket_path)
+    except OSError:
+        return False  # No run directory yet
+    if lock_file is None:
+        return True
+    lock_file.close()
+    return False
+
+
+def serve(idle_timeout):
+    """Run the sidecar for the configured NATS server."""
+    if not hasattr(socket, 'AF_UNIX'):
+        print("ERROR: The state cache requires Unix domain sockets", file=sys.stderr)
+        return 1
+
+    run_dir = get_run_dir()
+    run_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    servers = get_servers()
+    socket_path = get_socket_path(servers)
+
+    lock_file = acquire_lock(socket_path)
+    if lock_file is None:
+        return 0  # Another sidecar is already serving this NATS server
+
+    cache = StateCache(
+        max_entries=max(1, get_setting('AGENT_OS_PEER_CACHE_SIZE', DEFAULT_CACHE_SIZE)),
+        lag_tolerance=get_setting('AGENT_OS_PEER_CACHE_LAG_MS', DEFAULT_LAG_MS) / 1000,
+    )
+    server = StateCacheServer(PeerStateStore(servers), cache, idle_timeout=idle_timeout)
+    try:
+        asyncio.run(server.serve(socket_path))
+    except Exception as err:
+        print(f"ERROR: State cache stopped: {describe(err)}", file=sys.stderr)
+        return 1
+    finally:
+        lock_file.close()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local read cache for PEER state')
+    subparsers = parser.add_subparsers(dest='command')
+    get_parser = subparsers.add_parser('get', help='Print a cached state, exit 1 on a miss')
+    get_parser.add_argument('key')
+    get_parser.add_argument('--path', help='Print only the value at this JSON Pointer')
+    get_parser.add_argument('--refs', action='store_true', help='Leave phase output references unresolved')
+    subparsers.add_parser('stats', help='Show the running sidecar\'s counters')
+    serve_parser = subparsers.add_parser('serve', help='Run the sidecar')
+    serve_parser.add_argument('--idle-timeout', type=float,
+                              default=get_setting('AGENT_OS_PEER_CACHE_IDLE', DEFAULT_IDLE_TIMEOUT),
+                              help='Exit after this many seconds without requests')
+    args = parser.parse_args(argv)
+
+    if args.command == 'get':
+        text = cached_state(args.key, args.path, not args.refs)
+        if text is None:
+            return 1
+        print(text)
+        return 0
+
+    if args.command == 'stats':
+        response = request({'op': 'stats'})
+        if response is None:
+            print("State cache is not running", file=sys.stderr)
+            return 1
+        response.pop('ok', None)
+        print(json.dumps(response, indent=2))
+        return 0
+
+    if args.command == 'serve':
+        return serve(args.idle_timeout)
+
+    parser.print_usage(sys.stderr)
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
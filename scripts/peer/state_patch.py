@@ -0,0 +1,188 @@
+"""
+JSON Patch (RFC 6902) and JSON Merge Patch (RFC 7396) for PEER state.
+
+A patch names only the fields it changes, so a phase agent can flip a
+status without sending the rest of the cycle document:
+
+    [{"op": "replace", "path": "/phases/plan/status", "value": "completed"}]
+    {"phases": {"plan": {"status": "completed"}}}
+
+The first form is a JSON Patch: an array of operations, applied in order,
+all or nothing. The second is a merge patch: an object merged into the
+state, where null removes a field. apply_patch() tells them apart by that
+shape.
+"""
+
+import copy
+
+
+class PatchError(ValueError):
+    """A patch that is malformed or does not apply to the state."""
+
+
+def json_equal(a, b):
+    """Compare JSON values the way RFC 6902 `test` does (true is not 1)."""
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a == b
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(json_equal(a[k], b[k]) for k in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(json_equal(x, y) for x, y in zip(a, b))
+    return type(a) is type(b) and a == b
+
+
+def parse_pointer(pointer):
+    """Split a JSON Pointer (RFC 6901) into its reference tokens."""
+    if not isinstance(pointer, str):
+        raise PatchError(f"Invalid JSON Pointer: {pointer!r}")
+    if pointer == '':
+        return []
+    if not pointer.startswith('/'):
+        raise PatchError(f"JSON Pointer must start with '/': {pointer}")
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+
+def list_index(array, token, pointer, allow_end=False):
+    """Return the array index a token refers to."""
+    if allow_end and token == '-':
+        return len(array)
+    if not token.isdigit() or (token != '0' and token.startswith('0')):
+        raise PatchError(f"Invalid array index '{token}' in {pointer}")
+    index = int(token)
+    if index > len(array) or (index == len(array) and not allow_end):
+        raise PatchError(f"Array index {index} out of range in {pointer}")
+    return index
+
+
+def resolve(doc, pointer):
+    """Return the value a pointer refers to."""
+    value = doc
+    for token in parse_pointer(pointer):
+        if isinstance(value, dict):
+            if token not in value:
+                raise PatchError(f"Path not found: {pointer}")
+            value = value[token]
+        elif isinstance(value, list):
+            value = value[list_index(value, token, pointer)]
+        else:
+            raise PatchError(f"Path not found: {pointer}")
+    return value
+
+
+def parent_of(doc, pointer):
+    """Return the container holding a pointer's target and the last token."""
+    tokens = parse_pointer(pointer)
+    parent = doc
+    for token in tokens[:-1]:
+        if isinstance(parent, dict) and token in parent:
+            parent = parent[token]
+        elif isinstance(parent, list):
+            parent = parent[list_index(parent, token, pointer)]
+        else:
+            raise PatchError(f"Path not found: {pointer}")
+    if not isinstance(parent, (dict, list)):
+        raise PatchError(f"Path not found: {pointer}")
+    return parent, tokens[-1]
+
+
+def add(doc, pointer, value):
+    """Apply an `add`, returning the new document."""
+    if pointer == '':
+        return value
+    parent, token = parent_of(doc, pointer)
+    if isinstance(parent, dict):
+        parent[token] = value
+    else:
+        parent.insert(list_index(parent, token, pointer, allow_end=True), value)
+    return doc
+
+
+def remove(doc, pointer):
+    """Apply a `remove`, returning the new document and the removed value."""
+    if pointer == '':
+        raise PatchError("Cannot remove the whole state")
+    parent, token = parent_of(doc, pointer)
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise PatchError(f"Path not found: {pointer}")
+        return doc, parent.pop(token)
+    return doc, parent.pop(list_index(parent, token, pointer))
+
+
+def apply_json_patch(doc, patch):
+    """
+    Apply a JSON Patch to a copy of doc.
+
+    Raises:
+        PatchError: If an operation is malformed, a path is missing or a
+                    `test` fails; doc is left unchanged
+    """
+    doc = copy.deepcopy(doc)
+    for number, operation in enumerate(patch, 1):
+        if not isinstance(operation, dict) or 'path' not in operation:
+            raise PatchError(f"Operation {number} needs 'op' and 'path'")
+        op, path = operation.get('op'), operation['path']
+        if op in ('add', 'replace', 'test') and 'value' not in operation:
+            raise PatchError(f"Operation {number} ({op}) needs 'value'")
+        if op in ('move', 'copy') and 'from' not in operation:
+            raise PatchError(f"Operation {number} ({op}) needs 'from'")
+        # Check pointers are well-formed before any of them is used
+        parse_pointer(path)
+        if op in ('move', 'copy'):
+            parse_pointer(operation['from'])
+
+        if op == 'add':
+            doc = add(doc, path, copy.deepcopy(operation['value']))
+        elif op == 'remove':
+            doc, _ = remove(doc, path)
+        elif op == 'replace':
+            resolve(doc, path)
+            if path == '':
+                doc = copy.deepcopy(operation['value'])
+            else:
+                doc, _ = remove(doc, path)
+                doc = add(doc, path, copy.deepcopy(operation['value']))
+        elif op == 'move':
+            source = operation['from']
+            if path.startswith(source + '/'):
+                raise PatchError(f"Cannot move {source} into itself")
+            if path != source:
+                doc, value = remove(doc, source)
+                doc = add(doc, path, value)
+        elif op == 'copy':
+            doc = add(doc, path, copy.deepcopy(resolve(doc, operation['from'])))
+        elif op == 'test':
+            if not json_equal(resolve(doc, path), operation['value']):
+                raise PatchError(f"Test failed at {path}")
+        else:
+            raise PatchError(f"Operation {number} has unknown op: {op!r}")
+    return doc
+
+
+def apply_merge_patch(doc, patch):
+    """Apply a JSON Merge Patch, returning a new document."""
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = copy.deepcopy(doc) if isinstance(doc, dict) else {}
+    for name, value in patch.items():
+        if value is None:
+            result.pop(name, None)
+        else:
+            result[name] = apply_merge_patch(result.get(name), value)
+    return result
+
+
+def apply_patch(doc, patch):
+    """
+    Apply a JSON Patch (array) or merge patch (object) to a copy of doc.
+
+    Raises:
+        PatchError: If the patch is neither or does not apply
+    """
+    if isinstance(patch, list):
+        return apply_json_patch(doc, patch)
+    if isinstance(patch, dict):
+        return apply_merge_patch(doc, patch)
+    raise PatchError("Patch must be a JSON Patch array or a merge patch object")
@@ -0,0 +1,500 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import asyncio
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import types
+import pytest
+from pathlib import Path
+
+# Add the peer scripts directory to path to import the client (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import peer_state
+
+PEER_DIR = Path(__file__).parent.parent
+
+needs_jq = pytest.mark.skipif(
+    shutil.which('jq') is None and importlib.util.find_spec('jq') is None,
+    reason="jq is not installed",
+)
+
+
+@pytest.fixture
+def nats_errors(monkeypatch):
+    """
+    Return nats.js.errors, installing stand-in exception classes under that
+    name when nats-py is not installed, so the retry and spill-over logic is
+    tested either way.
+    """
+    try:
+        from nats.js import errors
+        return errors
+    except ImportError:
+        pass
+
+    class APIError(Exception):
+        def __init__(self, code=None, description=None, **kwargs):
+            super().__init__(description)
+            self.code, self.description = code, description
+
+    errors = types.ModuleType('nats.js.errors')
+    errors.APIError = APIError
+    errors.NotFoundError = type('NotFoundError', (APIError,), {})
+    errors.BucketNotFoundError = type('BucketNotFoundError', (errors.NotFoundError,), {})
+    errors.ObjectNotFoundError = type('ObjectNotFoundError', (errors.NotFoundError,), {})
+    errors.KeyWrongLastSequenceError = type('KeyWrongLastSequenceError', (APIError,), {})
+    nats = types.ModuleType('nats')
+    nats.js = types.ModuleType('nats.js')
+    nats.js.errors = errors
+    monkeypatch.setitem(sys.modules, 'nats', nats)
+    monkeypatch.setitem(sys.modules, 'nats.js', nats.js)
+    monkeypatch.setitem(sys.modules, 'nats.js.errors', errors)
+    return errors
+
+
+class TestArguments:
+    """Test suite for matching the wrappers' argument handling."""
+
+    def test_legacy_positional(self):
+        """Test `KEY FILTER --json-file ...` as update-state.sh accepts it."""
+        assert peer_state.parse_update_args(['k', '.a = 1', '--json-file', 'x=f.json']) == \
+            ('k', '.a = 1', ['x=f.json'])
+
+    def test_flags(self):
+        """Test the --state-key/--filter form."""
+        argv = ['--json-file', 'x=f.json', '--state-key', 'k', '--filter', '.a', '--json-file', 'y=g.json']
+        assert peer_state.parse_update_args(argv) == ('k', '.a', ['x=f.json', 'y=g.json'])
+
+    def test_missing_filter(self, capsys):
+        """Test a missing filter exits 1 with the wrapper's usage lines and no stdout."""
+        assert peer_state.main(['update', 'k']) == 1
+        out, err = capsys.readouterr()
+        assert out == ''
+        assert err.splitlines()[0] == "ERROR: STATE_KEY and JQ_FILTER are required"
+        assert err.splitlines()[1].startswith("Usage: ./update-state.sh")
+
+    def test_missing_key(self, capsys):
+        """Test get and create require their arguments like the wrappers."""
+        assert peer_state.main(['get']) == 1
+        assert peer_state.main(['create', 'k']) == 1
+        err = capsys.readouterr().err
+        assert "ERROR: STATE_KEY is required as first argument" in err
+        assert "ERROR: STATE_KEY and INITIAL_JSON are required" in err
+
+    def test_unknown_command(self):
+        """Test an unknown command fails like a wrapper error."""
+        assert peer_state.main(['delete', 'k']) == 1
+
+
+class TestJsonFiles:
+    """Test suite for --json-file loading."""
+
+    def test_slurps_every_value(self, tmp_path):
+        """Test a file is bound as an array of its JSON values, like --slurpfile."""
+        path = tmp_path / 'task.json'
+        path.write_text('{"id": 1}\n{"id": 2}\n')
+        assert peer_state.load_json_files([f'task={path}']) == {'task': [{'id': 1}, {'id': 2}]}
+
+    @pytest.mark.parametrize('spec, message', [
+        ('1bad=x.json', 'ERROR: Invalid --json-file format: 1bad=x.json'),
+        ('task=/does/not/exist.json', 'ERROR: JSON file not found: /does/not/exist.json'),
+    ])
+    def test_rejects_bad_specs(self, spec, message):
+        """Test bad specs and missing files report the wrapper's errors."""
+        with pytest.raises(peer_state.PeerStateError) as exc:
+            peer_state.load_json_files([spec])
+        assert exc.value.lines[0] == message
+
+    def test_rejects_invalid_json(self, tmp_path):
+        """Test a file that is not JSON is rejected before any write."""
+        path = tmp_path / 'task.json'
+        path.write_text('{not json')
+        with pytest.raises(peer_state.PeerStateError) as exc:
+            peer_state.load_json_files([f'task={path}'])
+        assert exc.value.lines == (f"ERROR: Invalid JSON in file: {path}",)
+
+
+@needs_jq
+class TestFilter:
+    """Test suite for applying jq filters."""
+
+    def test_applies_filter_with_variables(self):
+        """Test the filter sees slurped files as $VAR arrays."""
+        text = peer_state.apply_filter({'phases': {}}, '.phases.plan = $task[0]', variables={'task': [{'id': 7}]})
+        assert json.loads(text) == {'phases': {'plan': {'id': 7}}}
+        assert text == peer_state.format_state({'phases': {'plan': {'id': 7}}})
+
+    def test_reports_jq_errors(self):
+        """Test a broken filter reports the jq error and the filter."""
+        with pytest.raises(peer_state.PeerStateError) as exc:
+            peer_state.apply_filter({}, '.a |||', variables={})
+        assert exc.value.lines[0].startswith("ERROR: Failed to modify JSON with jq (exit code: ")
+        assert exc.value.lines[2] == "JQ Filter was: .a |||"
+
+    def test_rejects_multiple_outputs(self):
+        """Test a filter yielding several values is not written as one state."""
+        with pytest.raises(peer_state.PeerStateError) as exc:
+            peer_state.apply_filter({'a': 1}, '.a, .a', variables={})
+        assert exc.value.lines[0] == "ERROR: Modified state resulted in invalid JSON"
+
+
+class TestRetry:
+    """Test suite for retrying updates that lose the revision race."""
+
+    @pytest.fixture
+    def metrics(self, tmp_path, monkeypatch):
+        """Write contention metrics under tmp_path with no real backoff."""
+        path = tmp_path / 'state_updates.jsonl'
+        monkeypatch.setenv('AGENT_OS_PEER_METRICS', str(path))
+        monkeypatch.setenv('AGENT_OS_PEER_BACKOFF_MS', '0')
+        return path
+
+    def test_backoff_is_bounded(self, monkeypatch):
+        """Test the backoff window doubles per attempt and is capped."""
+        monkeypatch.setenv('AGENT_OS_PEER_BACKOFF_MS', '50')
+        for attempt in range(12):
+            delay = peer_state.backoff_delay(attempt)
+            assert 0 <= delay <= min(peer_state.MAX_BACKOFF_MS, 50 * 2 ** attempt) / 1000
+
+    def test_retry_count_from_environment(self, monkeypatch):
+        """Test AGENT_OS_PEER_RETRIES sets the retry budget."""
+        monkeypatch.setenv('AGENT_OS_PEER_RETRIES', '2')
+        assert peer_state.get_retries() == 2
+        monkeypatch.setenv('AGENT_OS_PEER_RETRIES', 'many')
+        assert peer_state.get_retries() == peer_state.DEFAULT_RETRIES
+
+    def test_summarizes_contention(self, metrics, capsys):
+        """Test recorded updates are summarized per key."""
+        peer_state.record_update({'key': 'a', 'attempts': 1, 'conflicts': 0, 'backoff_ms': 0, 'outcome': 'ok'})
+        peer_state.record_update({'key': 'a', 'attempts': 3, 'conflicts': 2, 'backoff_ms': 80, 'outcome': 'ok'})
+        peer_state.record_update({'key': 'b', 'attempts': 7, 'conflicts': 7, 'backoff_ms': 900, 'outcome': 'conflict'})
+
+        summary = peer_state.summarize_updates(peer_state.read_updates())
+        assert summary['a'] == {'updates': 2, 'conflicts': 2, 'retried': 1, 'failed': 0,
+                                'max_attempts': 3, 'backoff_ms': 80}
+        assert summary['b']['failed'] == 1
+
+        assert peer_state.main(['stats', 'b']) == 0
+        out = capsys.readouterr().out
+        assert 'b ' in out and '\na ' not in out
+
+    @needs_jq
+    def test_conflicting_writes_converge(self, metrics, nats_errors):
+        """Test an update re-reads and re-applies its filter after losing the race."""
+        errors = nats_errors
+
+        class RacingKV:
+            """A bucket where another writer bumps the counter before our first two writes."""
+
+            def __init__(self):
+                self.value, self.revision, self.races = b'{"count": 0}', 1, 2
+
+            async def get(self, key):
+                return type('Entry', (), {'value': self.value, 'revision': self.revision})
+
+            async def update(self, key, value, last):
+                if self.races:
+                    self.races -= 1
+                    self.value = json.dumps({'count': json.loads(self.value)['count'] + 1}).encode()
+                    self.revision += 1
+                    raise errors.KeyWrongLastSequenceError(description='wrong last sequence')
+                assert last == self.revision
+                self.value, self.revision = value, self.revision + 1
+                return self.revision
+
+        store = peer_state.PeerStateStore(servers='nats://unused')
+        store._kv = RacingKV()
+        revision = asyncio.run(store.update('cycle', '.count += 10'))
+
+        assert revision == 4
+        assert json.loads(store._kv.value) == {'count': 12}
+        record = peer_state.read_updates(metrics)[0]
+        assert (record['attempts'], record['conflicts'], record['outcome']) == (3, 2, 'ok')
+
+
+class MemoryKV:
+    """A bucket held in a dict of key -> (value bytes, revision)."""
+
+    def __init__(self, **states):
+        self.seq = 0
+        self.entries = {}
+        self.puts = []
+        self.reads = []
+        for key, value in states.items():
+            self.entries[key] = (json.dumps(value).encode(), self.next_seq())
+
+    def next_seq(self):
+        self.seq += 1
+        return self.seq
+
+    async def get(self, key):
+        self.reads.append(key)
+        value, revision = self.entries[key]
+        return type('Entry', (), {'value': value, 'revision': revision})
+
+    async def put(self, key, value):
+        self.puts.append(key)
+        self.entries[key] = (value, self.next_seq())
+        return self.seq
+
+    async def update(self, key, value, last):
+        assert self.entries[key][1] == last
+        self.entries[key] = (value, self.next_seq())
+        return self.seq
+
+
+class TestPatch:
+    """Test suite for delta writes and phase outputs stored under their own keys."""
+
+    @pytest.fixture
+    def store(self, tmp_path, monkeypatch):
+        """A store over an in-memory bucket holding one cycle."""
+        monkeypatch.setenv('AGENT_OS_PEER_METRICS', '0')
+        monkeypatch.setenv('AGENT_OS_PEER_OUTPUT_LIMIT', '100')
+        store = peer_state.PeerStateStore(servers='nats://unused')
+        store._kv = MemoryKV(cycle={'phases': {'plan': {'status': 'pending'}}})
+        store._objects = False  # No Object Store bucket: outputs get keys of their own
+        return store
+
+    def test_patch_and_merge_patch(self, store):
+        """Test both patch forms are applied with the revision check."""
+        asyncio.run(store.patch('cycle', [{'op': 'replace', 'path': '/phases/plan/status', 'value': 'done'}]))
+        revision = asyncio.run(store.patch('cycle', {'phases': {'execute': {'status': 'pending'}}}))
+
+        assert revision == 3
+        assert json.loads(asyncio.run(store.get('cycle'))) == \
+            {'phases': {'plan': {'status': 'done'}, 'execute': {'status': 'pending'}}}
+
+    def test_patch_errors(self, store):
+        """Test a patch that does not apply is reported and nothing is written."""
+        with pytest.raises(peer_state.PeerStateError) as exc:
+            asyncio.run(store.patch('cycle', [{'op': 'remove', 'path': '/phases/review'}]))
+        assert exc.value.lines[0] == "ERROR: Failed to apply patch to state at key: cycle"
+        assert store._kv.entries['cycle'][1] == 1
+
+    def test_large_output_gets_its_own_key(self, store):
+        """Test a large output is referenced from the state and read back in place."""
+        output = {'summary': 'x' * 200}
+        asyncio.run(store.patch('cycle', {'phases': {'plan': {'output': output}}}))
+
+        stored = json.loads(store._kv.entries['cycle'][0])
+        ref = stored['phases']['plan']['output']
+        assert ref['$ref'].startswith('kv:cycle.output.plan.')
+        assert b'x' * 200 not in store._kv.entries['cycle'][0]
+        assert json.loads(asyncio.run(store.get('cycle')))['phases']['plan']['output'] == output
+
+        # A status change keeps the reference and does not store the output again
+        asyncio.run(store.patch('cycle', [{'op': 'replace', 'path': '/phases/plan/status', 'value': 'done'}]))
+        assert len(store._kv.puts) == 1
+        assert json.loads(store._kv.entries['cycle'][0])['phases']['plan']['output'] == ref
+
+    def test_small_outputs_stay_inline(self, store, monkeypatch):
+        """Test outputs under the limit, or with the limit disabled, are stored in the state."""
+        asyncio.run(store.patch('cycle', {'phases': {'plan': {'output': {'a': 1}}}}))
+        monkeypatch.setenv('AGENT_OS_PEER_OUTPUT_LIMIT', '0')
+        asyncio.run(store.patch('cycle', {'phases': {'execute': {'output': {'b': 'y' * 200}}}}))
+        stored = json.loads(store._kv.entries['cycle'][0])
+        assert stored['phases']['plan']['output'] == {'a': 1}
+        assert stored['phases']['execute']['output'] == {'b': 'y' * 200}
+        assert store._kv.puts == []
+
+    def test_load_patch_arguments(self, tmp_path):
+        """Test patches are taken from argv or a file and must be an array or object."""
+        path = tmp_path / 'patch.json'
+        path.write_text('[{"op": "remove", "path": "/a"}]')
+        assert peer_state.load_patch(['k', '--patch-file', str(path)]) == ('k', [{'op': 'remove', 'path': '/a'}])
+        assert peer_state.load_patch(['k', '{"a": null}']) == ('k', {'a': None})
+        with pytest.raises(peer_state.PeerStateError) as exc:
+            peer_state.load_patch(['k', '"a"'])
+        assert exc.value.lines[0] == "ERROR: Invalid JSON patch"
+        with pytest.raises(peer_state.PeerStateError) as exc:
+            peer_state.load_patch(['k'])
+        assert exc.value.lines[1].startswith("Usage: ./patch-state.sh")
+
+
+class MemoryObjects:
+    """An Object Store held in a dict of name -> bytes."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        self.objects = {}
+        self.reads = []
+
+    async def get_info(self, name):
+        if name not in self.objects:
+            raise self.errors.ObjectNotFoundError()
+        return name
+
+    async def get(self, name):
+        self.reads.append(name)
+        return type('ObjectResult', (), {'data': self.objects[name]})
+
+    async def put(self, name, data):
+        self.objects[name] = data
+
+
+class TestOutputSpillOver:
+    """Test suite for large outputs spilling into the Object Store and lazy resolution."""
+
+    @pytest.fixture
+    def store(self, monkeypatch):
+        """A store whose cycle has large plan and execute outputs stored under their own keys."""
+        monkeypatch.setenv('AGENT_OS_PEER_METRICS', '0')
+        monkeypatch.setenv('AGENT_OS_PEER_OUTPUT_LIMIT', '100')
+        store = peer_state.PeerStateStore(servers='nats://unused')
+        store._kv = MemoryKV(cycle={'phases': {'plan': {'status': 'done'}, 'execute': {'status': 'done'}}})
+        store._objects = False
+        asyncio.run(store.patch('cycle', {'phases': {
+            'plan': {'output': {'summary': 'p' * 200}},
+            'execute': {'output': {'summary': 'e' * 200}},
+        }}))
+        store._kv.reads.clear()
+        return store
+
+    def output_reads(self, store):
+        return [key for key in store._kv.reads if key != 'cycle']
+
+    def test_path_resolves_only_that_output(self, store):
+        """Test reading one path reads only the output under it."""
+        text = asyncio.run(store.get('cycle', path='/phases/plan/output/summary'))
+        assert json.loads(text) == 'p' * 200
+        assert len(self.output_reads(store)) == 1
+        assert '.output.plan.' in self.output_reads(store)[0]
+
+    def test_refs_and_unrelated_paths_read_no_outputs(self, store):
+        """Test --refs and paths outside the outputs leave references unresolved."""
+        state = json.loads(asyncio.run(store.get('cycle', resolve_outputs=False)))
+        assert peer_state.is_output_ref(state['phases']['plan']['output'])
+        assert json.loads(asyncio.run(store.get('cycle', path='/phases/plan/status'))) == 'done'
+        assert self.output_reads(store) == []
+
+    def test_missing_path(self, store):
+        """Test a path that is not in the state is reported."""
+        with pytest.raises(peer_state.PeerStateError) as exc:
+            asyncio.run(store.get('cycle', path='/phases/review'))
+        assert exc.value.lines[0] == "ERROR: Path not found in state at key: cycle"
+
+    @pytest.mark.parametrize('value', [b'', b' \n', b'{} {}'])
+    def test_path_needs_one_value(self, store, value):
+        """Test a path into an empty or multi-value state is reported instead of crashing."""
+        store._kv.entries['blank'] = (value, store._kv.next_seq())
+        with pytest.raises(peer_state.PeerStateError) as exc:
+            asyncio.run(store.get('blank', path='/phases'))
+        assert exc.value.lines[0] == "ERROR: Expected one JSON value in NATS KV state at key: blank"
+
+    def test_writes_read_only_touched_outputs(self, store):
+        """Test patches and filters that leave outputs alone do not read them."""
+        asyncio.run(store.patch('cycle', [{'op': 'replace', 'path': '/phases/plan/status', 'value': 'x'}]))
+        assert self.output_reads(store) == []
+        asyncio.run(store.patch('cycle', [{'op': 'add', 'path': '/phases/plan/output/extra', 'value': 1}]))
+        assert len(self.output_reads(store)) == 1
+
+        stored = json.loads(store._kv.entries['cycle'][0])
+        assert peer_state.is_output_ref(stored['phases']['execute']['output'])
+        assert json.loads(asyncio.run(store.get('cycle')))['phases']['plan']['output'] == \
+            {'summary': 'p' * 200, 'extra': 1}
+
+    def test_paths_of_writes(self):
+        """Test which paths patches and filters are taken to touch."""
+        assert peer_state.patch_paths([{'op': 'move', 'from': '/a/b', 'path': '/c'}]) == [['c'], ['a', 'b']]
+        assert peer_state.patch_paths({'phases': {'plan': {'status': 'x', 'error': None}}}) == \
+            [['phases', 'plan', 'status'], ['phases', 'plan', 'error']]
+        assert peer_state.filter_paths('.phases.plan.status = "x"') == []
+        assert peer_state.filter_paths('.phases.plan.output.x = 1') is None
+
+    @pytest.mark.parametrize('jq_filter', [
+        '.phases.plan.status = "completed" | .phases["plan"].ended_at = "2025-01-01T00:00:00Z"',
+        '.current_phase = "execute" | .cycle += 1',
+    ])
+    def test_filters_leaving_references(self, jq_filter):
+        """Test filters that only touch fields below a phase keep outputs as references."""
+        assert peer_state.filter_paths(jq_filter) == []
+
+    @pytest.mark.parametrize('jq_filter', [
+        '.archive = .phases',
+        '.history += [.phases.plan]',
+        '.snapshot = .',
+        '.phases[$name].status = "x"',
+        '[..] | length as $n | .count = $n',
+        '.copy = .phases | del(.phases)',
+    ])
+    def test_filters_reading_phases_whole(self, jq_filter):
+        """Test filters that may copy a whole phase load every output first."""
+        assert peer_state.filter_paths(jq_filter) is None
+
+    def test_get_arguments(self):
+        """Test --path and --refs parsing."""
+        assert peer_state.parse_get_args(['k', '--path', '/phases', '--refs']) == ('k', '/phases', False)
+        with pytest.raises(peer_state.PeerStateError):
+            peer_state.parse_get_args(['k', '--path', 'phases'])
+        with pytest.raises(peer_state.PeerStateError):
+            peer_state.parse_get_args(['k', '--bogus'])
+
+    def test_object_store_spill_over(self, monkeypatch, nats_errors):
+        """Test large outputs go to the Object Store by content and are uploaded once."""
+        errors = nats_errors
+        monkeypatch.setenv('AGENT_OS_PEER_METRICS', '0')
+        monkeypatch.setenv('AGENT_OS_PEER_OUTPUT_LIMIT', '100')
+        store = peer_state.PeerStateStore(servers='nats://unused')
+        store._kv = MemoryKV(a={'phases': {}}, b={'phases': {}})
+        store._objects = MemoryObjects(errors)
+
+        output = {'summary': 'o' * 200}
+        asyncio.run(store.patch('a', {'phases': {'plan': {'output': output}}}))
+        asyncio.run(store.patch('b', {'phases': {'plan': {'output': output}}}))
+
+        ref = json.loads(store._kv.entries['a'][0])['phases']['plan']['output']
+        assert ref['$ref'] == f"obj:{ref['sha256']}"
+        assert list(store._objects.objects) == [ref['sha256']]
+        assert store._kv.puts == []
+        assert json.loads(asyncio.run(store.get('b')))['phases']['plan']['output'] == output
+
+
+
+@pytest.mark.skipif(shutil.which('jq') is None or shutil.which('bash') is None,
+                    reason="the shell fallbacks need bash and the jq binary")
+class TestShellFallback:
+    """Test suite for the wrappers' shell implementation (AGENT_OS_PEER_NATIVE=0)."""
+
+    def run_wrapper(self, tmp_path, script, state, *args):
+        """Run a wrapper against a stub nats CLI holding state at revision 7."""
+        (tmp_path / 'state.json').write_text(json.dumps(state))
+        nats = tmp_path / 'nats'
+        nats.write_text(
+            '#!/bin/bash\n'
+            f'case "$*" in *--raw*) cat {tmp_path}/state.json ;; "kv get"*) echo "revision: 7" ;; *) echo updated ;; esac\n')
+        nats.chmod(0o755)
+        env = dict(os.environ, AGENT_OS_PEER_NATIVE='0', PATH=f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+        return subprocess.run(['bash', str(PEER_DIR / script), 'cycle', *args],
+                              capture_output=True, text=True, env=env, timeout=30)
+
+    def test_inline_state(self, tmp_path):
+        """Test states without references read and update as before."""
+        state = {'phases': {'plan': {'status': 'completed', 'output': {'text': 'x'}}}}
+        read = self.run_wrapper(tmp_path, 'read-state.sh', state)
+        assert read.returncode == 0 and json.loads(read.stdout) == state
+        assert self.run_wrapper(tmp_path, 'update-state.sh', state, '.a = 1').returncode == 0
+
+    @pytest.mark.parametrize('script,args', [('read-state.sh', ()), ('update-state.sh', ('.a = 1',))])
+    def test_references_fail_loudly(self, tmp_path, script, args):
+        """Test a state with spilled outputs is refused instead of returned unresolved."""
+        state = {'phases': {'plan': {'output': {'$ref': 'obj:abc', 'sha256': 'abc', 'bytes': 9000}}}}
+        result = self.run_wrapper(tmp_path, script, state, *args)
+        assert result.returncode == 1
+        assert result.stdout.strip() == ''
+        assert 'native client' in result.stderr
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
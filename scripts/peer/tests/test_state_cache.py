@@ -0,0 +1,224 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import asyncio
+import json
+import socket
+import sys
+import pytest
+from pathlib import Path
+
+# Add the peer scripts directory to path to import the cache (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import state_cache
+from state_cache import StateCache, StateCacheServer
+
+
+def synced_cache(**kwargs):
+    """Return a cache whose watch is running and caught up."""
+    cache = StateCache(**kwargs)
+    cache.watching = cache.synced = True
+    return cache
+
+
+class TestStateCache:
+    """Test suite for cache validity against the watch."""
+
+    def test_lagging_until_synced(self):
+        """Test nothing is served from memory before the watch delivered the initial values."""
+        cache = StateCache()
+        cache.store('k', '{}', 1)
+        assert cache.lookup('k') is None
+        cache.watching = cache.synced = True
+        assert cache.lookup('k') == '{}'
+
+    def test_newer_revision_invalidates(self):
+        """Test a change seen on the watch drops the older cached value."""
+        cache = synced_cache()
+        cache.store('k', '{"a": 1}', 5)
+        cache.apply_watch('k', 5)
+        assert cache.lookup('k') == '{"a": 1}'
+
+        cache.apply_watch('k', 7)
+        assert cache.lookup('k') is None
+        assert cache.stats['invalidations'] == 1
+
+    def test_stale_read_not_cached(self):
+        """Test a direct read that raced with a newer write is not cached."""
+        cache = synced_cache()
+        cache.apply_watch('k', 9)
+        cache.store('k', '{"old": true}', 8)
+        assert cache.lookup('k') is None
+
+    def test_written_revision(self):
+        """Test a local write invalidates the cached value before the watch sees it."""
+        cache = synced_cache()
+        cache.store('k', '{}', 3)
+        cache.changed('k', 4)
+        assert cache.lookup('k') is None
+
+    def test_lag_tolerance(self):
+        """Test reads go direct once the stream stays ahead of the watch too long."""
+        cache = synced_cache(lag_tolerance=0.25)
+        cache.store('k', '{}', 1)
+        cache.apply_watch('k', 1)
+
+        cache.observe_stream(2, now=100.0)
+        assert cache.lookup('k', now=100.1) == '{}'
+        assert cache.lookup('k', now=100.5) is None
+        assert cache.stats['direct'] == 1
+
+        cache.apply_watch('other', 2)
+        assert cache.lookup('k', now=100.6) == '{}'
+
+    def test_lru_eviction(self):
+        """Test the least recently read state is evicted first."""
+        cache = synced_cache(max_entries=2)
+        cache.store('a', '1', 1)
+        cache.store('b', '2', 2)
+        cache.lookup('a')
+        cache.store('c', '3', 3)
+        assert list(cache.entries) == ['a', 'c']
+
+    def test_reset_watch(self):
+        """Test a restarted watch discards everything it can no longer vouch for."""
+        cache = synced_cache()
+        cache.store('k', '{}', 1)
+        cache.reset_watch()
+        assert cache.is_lagging()
+        assert not cache.entries
+
+
+class FakeStore:
+    """A store answering reads from a dict of key -> (text, revision)."""
+
+    def __init__(self, states):
+        self.states = states
+        self.reads = 0
+
+    async def read(self, key):
+        self.reads += 1
+        if key not in self.states:
+            raise KeyError('key not found')
+        return self.states[key]
+
+
+class TestServer:
+    """Test suite for the sidecar's request handling."""
+
+    def test_read_through(self):
+        """Test a miss is read directly and the next read served from memory."""
+        store = FakeStore({'k': ('{"a": 1}', 2)})
+        server = StateCacheServer(store, synced_cache())
+
+        first = asyncio.run(server.handle_request({'op': 'get', 'key': 'k'}))
+        second = asyncio.run(server.handle_request({'op': 'get', 'key': 'k'}))
+        assert (first['source'], second['source']) == ('kv', 'cache')
+        assert second['value'] == '{"a": 1}'
+        assert store.reads == 1
+
+    def test_written_forces_direct_read(self):
+        """Test a reported write makes the next read fetch the new value."""
+        store = FakeStore({'k': ('{"a": 1}', 2)})
+        server = StateCacheServer(store, synced_cache())
+        asyncio.run(server.handle_request({'op': 'get', 'key': 'k'}))
+
+        store.states['k'] = ('{"a": 2}', 3)
+        assert asyncio.run(server.handle_request({'op': 'written', 'key': 'k', 'revision': 3}))['ok']
+        response = asyncio.run(server.handle_request({'op': 'get', 'key': 'k'}))
+        assert (response['value'], response['source']) == ('{"a": 2}', 'kv')
+
+    def test_errors_are_misses(self):
+        """Test missing keys, invalid JSON and bad requests are reported as misses."""
+        store = FakeStore({'bad': ('{not json', 1)})
+        server = StateCacheServer(store, synced_cache())
+        assert not asyncio.run(server.handle_request({'op': 'get', 'key': 'missing'}))['ok']
+        assert not asyncio.run(server.handle_request({'op': 'get', 'key': 'bad'}))['ok']
+        assert not asyncio.run(server.handle_request({'op': 'get'}))['ok']
+        assert not asyncio.run(server.handle_request(None))['ok']
+        assert 'bad' not in server.cache.entries
+
+
+class TestClient:
+    """Test suite for the client falling back when no sidecar answers."""
+
+    def test_no_sidecar(self, tmp_path, monkeypatch):
+        """Test a read without a running sidecar misses instead of failing."""
+        monkeypatch.setenv('AGENT_OS_PEER_RUN_DIR', str(tmp_path))
+        assert state_cache.cached_get('k', spawn=False) is None
+
+    def test_stale_socket_respawns(self, tmp_path, monkeypatch):
+        """Test a socket left by a killed sidecar does not disable the cache for good."""
+        monkeypatch.setenv('AGENT_OS_PEER_RUN_DIR', str(tmp_path))
+        socket_path = state_cache.get_socket_path()
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(str(socket_path))
+        stale.close()
+        spawned = []
+        monkeypatch.setattr(state_cache, 'spawn_sidecar', lambda: spawned.append(True))
+
+        assert state_cache.cached_get('k') is None
+        assert spawned == [True]
+
+        lock_file = state_cache.acquire_lock(socket_path)
+        try:
+            assert state_cache.cached_get('k') is None
+        finally:
+            lock_file.close()
+        assert spawned == [True]  # A sidecar still starting up is not spawned twice
+
+    def test_disabled(self, tmp_path, monkeypatch):
+        """Test AGENT_OS_PEER_CACHE=0 bypasses the sidecar."""
+        monkeypatch.setenv('AGENT_OS_PEER_RUN_DIR', str(tmp_path))
+        monkeypatch.setenv('AGENT_OS_PEER_CACHE', '0')
+        assert state_cache.cached_get('k') is None
+
+    def test_socket_round_trip(self, tmp_path, monkeypatch):
+        """Test the client reads through a sidecar listening on the socket."""
+        monkeypatch.setenv('AGENT_OS_PEER_RUN_DIR', str(tmp_path))
+        server = StateCacheServer(FakeStore({'k': ('{"a": 1}', 2)}), synced_cache())
+        socket_path = state_cache.get_socket_path()
+
+        async def round_trip():
+            listener = await asyncio.start_unix_server(server.handle_connection, path=str(socket_path))
+            try:
+                loop = asyncio.get_event_loop()
+                text = await loop.run_in_executor(None, state_cache.cached_get, 'k', False)
+                stats = await loop.run_in_executor(None, state_cache.request, {'op': 'stats'})
+            finally:
+                listener.close()
+                await listener.wait_closed()
+            return text, stats
+
+        text, stats = asyncio.run(round_trip())
+        assert json.loads(text) == {'a': 1}
+        assert stats['misses'] == 1 and stats['entries'] == 1
+
+
+    def test_outputs_resolved_through_sidecar(self, tmp_path, monkeypatch):
+        """Test a state referencing an output key is returned with the output in place."""
+        monkeypatch.setenv('AGENT_OS_PEER_RUN_DIR', str(tmp_path))
+        cycle = {'phases': {'plan': {'output': {'$ref': 'kv:cycle.output.plan.abc'}}}}
+        store = FakeStore({'cycle': (json.dumps(cycle), 2), 'cycle.output.plan.abc': ('{"big": true}', 1)})
+        server = StateCacheServer(store, synced_cache())
+        socket_path = state_cache.get_socket_path()
+
+        async def read():
+            listener = await asyncio.start_unix_server(server.handle_connection, path=str(socket_path))
+            try:
+                loop = asyncio.get_event_loop()
+                return await loop.run_in_executor(None, lambda: state_cache.cached_state('cycle', spawn=False))
+            finally:
+                listener.close()
+                await listener.wait_closed()
+
+        assert json.loads(asyncio.run(read())) == {'phases': {'plan': {'output': {'big': True}}}}
+
+if __name__ == "__main__":
+    pytest.main([__file__])
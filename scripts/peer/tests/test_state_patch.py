@@ -0,0 +1,99 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.8"
+# dependencies = [
+#     "pytest",
+# ]
+# ///
+
+import sys
+import pytest
+from pathlib import Path
+
+# Add the peer scripts directory to path to import the patch module (need to go up 1 level)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from state_patch import PatchError, apply_json_patch, apply_merge_patch, apply_patch
+
+
+class TestJsonPatch:
+    """Test suite for RFC 6902 operations."""
+
+    def test_add_replace_remove(self):
+        """Test the basic operations on objects and arrays."""
+        doc = {'phases': {'plan': {'status': 'pending'}}, 'log': ['a', 'c']}
+        patched = apply_json_patch(doc, [
+            {'op': 'replace', 'path': '/phases/plan/status', 'value': 'completed'},
+            {'op': 'add', 'path': '/log/1', 'value': 'b'},
+            {'op': 'add', 'path': '/log/-', 'value': 'd'},
+            {'op': 'remove', 'path': '/log/0'},
+        ])
+        assert patched == {'phases': {'plan': {'status': 'completed'}}, 'log': ['b', 'c', 'd']}
+        assert doc['log'] == ['a', 'c'], "the input must not be modified"
+
+    def test_move_copy_escaped_pointer(self):
+        """Test move and copy, with ~0 and ~1 escapes in pointers."""
+        doc = {'a/b': {'x': 1}, 'm~n': 2}
+        patched = apply_json_patch(doc, [
+            {'op': 'copy', 'from': '/a~1b', 'path': '/c'},
+            {'op': 'move', 'from': '/m~0n', 'path': '/c/y'},
+        ])
+        assert patched == {'a/b': {'x': 1}, 'c': {'x': 1, 'y': 2}}
+
+    def test_failure_is_atomic(self):
+        """Test a failing test op rejects the whole patch."""
+        doc = {'count': 1}
+        with pytest.raises(PatchError, match='Test failed'):
+            apply_json_patch(doc, [
+                {'op': 'replace', 'path': '/count', 'value': 2},
+                {'op': 'test', 'path': '/count', 'value': 1},
+            ])
+        assert doc == {'count': 1}
+
+    def test_test_is_type_strict(self):
+        """Test `test` does not treat true as 1."""
+        with pytest.raises(PatchError):
+            apply_json_patch({'a': True}, [{'op': 'test', 'path': '/a', 'value': 1}])
+        assert apply_json_patch({'a': 1}, [{'op': 'test', 'path': '/a', 'value': 1.0}]) == {'a': 1}
+
+    @pytest.mark.parametrize('operation', [
+        {'op': 'remove', 'path': '/missing'},
+        {'op': 'replace', 'path': '/missing', 'value': 1},
+        {'op': 'add', 'path': '/missing/child', 'value': 1},
+        {'op': 'add', 'path': '/list/5', 'value': 1},
+        {'op': 'add', 'path': '/list/01', 'value': 1},
+        {'op': 'move', 'from': '/list', 'path': '/list/0'},
+        {'op': 'add', 'path': 'list', 'value': 1},
+        {'op': 'add', 'path': '/x'},
+        {'op': 'frobnicate', 'path': '/x'},
+        {'op': 'move', 'from': '/list', 'path': 5},
+        {'op': 'move', 'from': 5, 'path': '/x'},
+        {'op': 'copy', 'from': None, 'path': '/x'},
+        {'op': 'remove', 'path': ['list']},
+        {'op': 'test', 'path': 0, 'value': 1},
+    ])
+    def test_invalid_operations(self, operation):
+        """Test operations that do not apply are rejected."""
+        with pytest.raises(PatchError):
+            apply_json_patch({'list': [1]}, [operation])
+
+
+class TestMergePatch:
+    """Test suite for RFC 7396 merge patches."""
+
+    def test_merge(self):
+        """Test nested merge, null removal and array replacement."""
+        doc = {'phases': {'plan': {'status': 'pending', 'error': 'x'}}, 'tags': [1, 2]}
+        patch = {'phases': {'plan': {'status': 'completed', 'error': None}}, 'tags': [3]}
+        assert apply_merge_patch(doc, patch) == {'phases': {'plan': {'status': 'completed'}}, 'tags': [3]}
+
+    def test_dispatch(self):
+        """Test arrays are JSON Patches, objects merge patches, anything else an error."""
+        assert apply_patch({'a': 1}, [{'op': 'add', 'path': '/b', 'value': 2}]) == {'a': 1, 'b': 2}
+        assert apply_patch({'a': 1}, {'b': 2}) == {'a': 1, 'b': 2}
+        with pytest.raises(PatchError):
+            apply_patch({'a': 1}, 'b')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
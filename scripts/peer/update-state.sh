@@ -4,6 +4,14 @@
 # The JQ filter receives the current state and should output the modified state
 # Optional --json-file flags load JSON from files for use in JQ filter as $VAR_NAME[0]
 
+# Hand over to the native client when uv is available: one process and one
+# NATS connection per write instead of a nats/jq pipeline.
+# Set AGENT_OS_PEER_NATIVE=0 to use the shell implementation below.
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+if [ "${AGENT_OS_PEER_NATIVE:-1}" != "0" ] && [ -f "$SCRIPT_DIR/peer_state.py" ] && command -v uv >/dev/null 2>&1; then
+  exec uv run --quiet --script "$SCRIPT_DIR/peer_state.py" update "$@"
+fi
+
 # Initialize variables
 STATE_KEY=""
 JQ_FILTER=""
@@ -88,6 +96,14 @@ if [ $? -ne 0 ]; then
   exit 1
 fi
 
+# Phase outputs stored out of line are references only the native client
+# resolves; fail instead of running the filter against them
+if echo "$STATE" | jq -e '[.. | objects | select((."$ref" | type) == "string" and (."$ref" | test("^(kv|obj):")))] | any' >/dev/null 2>&1; then
+  echo "ERROR: State at key $STATE_KEY has phase outputs stored out of line" >&2
+  echo "Updating it requires the native client (install uv and leave AGENT_OS_PEER_NATIVE unset)" >&2
+  exit 1
+fi
+
 # Step 3.5: Validate and prepare --json-file arguments
 JQ_SLURPFILE_ARGS=()
 for json_file_spec in "${JSON_FILES[@]}"; do